@@ -3,10 +3,11 @@ from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import uuid
+import time
 import asyncio
 import json
 import logging
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.config import settings
 from app.api.auth.auth import get_current_user
 from app.models.user import User
@@ -18,8 +19,10 @@ from app.services.parsers.progress_events import progress_stream, ProgressPhase,
 from app.middleware.rate_limit import limiter
 from app.middleware.file_security import file_security_validator
 from app.utils.security_logger import security_logger
-from app.core.tier_enforcement import require_premium, check_parsing_limit
+from app.core.tier_enforcement import require_premium, check_parsing_limit, TierEnforcement
 from app.services.usage_tracking_service import UsageTrackingService
+from app.services.parse_job_service import ParseJobService, JOB_TYPES, FINISHED_STATUSES, JOB_SUCCEEDED
+from app.models.parse_job import ParseJob
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -31,19 +34,25 @@ class URLParseRequest(BaseModel):
 class InstagramParseRequest(BaseModel):
     url: str
     collection_id: Optional[str] = None
+    refresh: Optional[bool] = False  # Re-download the post instead of using the cached copy
 
 class BatchInstagramRequest(BaseModel):
     urls: List[str]
     max_results: Optional[int] = 20
     collection_id: Optional[str] = None
+    refresh: Optional[bool] = False
 
 class ProfileParseRequest(BaseModel):
     username: str
     max_posts: Optional[int] = 10
+    cursor: Optional[str] = None  # Shortcode returned by a previous crawl; continues after it
+    refresh: Optional[bool] = False
 
 class HashtagSearchRequest(BaseModel):
     hashtag: str
     max_posts: Optional[int] = 20
+    cursor: Optional[str] = None
+    refresh: Optional[bool] = False
 
 class ValidationApprovalRequest(BaseModel):
     validation_id: str
@@ -54,8 +63,17 @@ class ValidationRejectionRequest(BaseModel):
     reason: str
 
 class URLParseStreamRequest(BaseModel):
-    url: str
+    url: Optional[str] = None
     collection_id: Optional[str] = None
+    job_id: Optional[str] = None  # Follow a queued parse job instead of parsing inline
+
+class ParseJobRequest(BaseModel):
+    job_type: str = "url"  # 'url', 'instagram' or 'instagram_batch'
+    url: Optional[str] = None
+    urls: Optional[List[str]] = None
+    max_results: Optional[int] = 20
+    collection_id: Optional[str] = None
+    refresh: Optional[bool] = False  # Instagram jobs: ignore cached posts
 
 @router.post("/url")
 @limiter.limit(settings.PARSING_RATE_LIMIT)
@@ -92,14 +110,38 @@ async def parse_recipe_from_url(
 
 @router.post("/url/stream")
 @limiter.limit(settings.PARSING_RATE_LIMIT)
-@check_parsing_limit
 async def parse_recipe_from_url_stream(
     stream_request: URLParseStreamRequest,
     request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Stream real-time progress updates while parsing recipe from URL"""
+    """Stream real-time progress updates while parsing recipe from URL, or for a queued parse job"""
+    if stream_request.job_id:
+        job = ParseJobService.get_job(stream_request.job_id, current_user.id, db)
+        if not job:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Parse job not found"
+            )
+        return _parse_job_event_response(job.id)
+
+    if not stream_request.url:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Either url or job_id is required"
+        )
+
+    # Checked here rather than with @check_parsing_limit: following a job was already counted at submit
+    if not UsageTrackingService.check_parsing_limit(current_user, db):
+        limits = TierEnforcement.get_user_limits(current_user)
+        current_usage = UsageTrackingService.get_usage_count(current_user, 'recipe_parse', db)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Monthly parsing limit reached ({current_usage}/{limits['monthly_parsing_limit']}). Upgrade to premium for unlimited parsing."
+        )
+    UsageTrackingService.increment_usage(current_user, 'recipe_parse', db)
+
     session_id = str(uuid.uuid4())
     
     async def event_stream():
@@ -207,6 +249,178 @@ async def parse_recipe_with_progress(
             detail=f"Failed to parse recipe from URL: {str(e)}"
         )
 
+def _read_job_progress(job_id: str, after_id: int):
+    """Job outcome and the progress events stored after after_id (outcome first: events precede it)"""
+    db = SessionLocal()
+    try:
+        job = db.get(ParseJob, job_id)
+        if job is None:
+            return None, []
+        outcome = {"status": job.status, "result": job.result, "error": job.error}
+        events = [(event.id, event.payload) for event in ParseJobService.events_since(job_id, after_id, db)]
+        return outcome, events
+    finally:
+        db.close()
+
+def _parse_job_event_response(job_id: str) -> StreamingResponse:
+    """SSE stream of a parse job's stored progress events, ending with its result or error"""
+
+    async def event_stream():
+        last_event_id = 0
+        try:
+            while True:
+                outcome, events = await asyncio.to_thread(_read_job_progress, job_id, last_event_id)
+                for event_id, payload in events:
+                    last_event_id = event_id
+                    yield f"data: {json.dumps(payload)}\n\n"
+
+                if outcome is None:
+                    break
+
+                if outcome["status"] in FINISHED_STATUSES:
+                    if outcome["status"] == JOB_SUCCEEDED:
+                        final_event = {"event": "result", "data": outcome["result"]}
+                    else:
+                        final_event = {"event": "error", "data": outcome["error"]}
+                    yield f"data: {json.dumps(final_event)}\n\n"
+                    break
+
+                await asyncio.sleep(settings.PARSE_JOB_EVENT_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            # Client disconnected; the job keeps running
+            pass
+        except Exception as e:
+            error_event = {
+                "event": "error",
+                "data": {
+                    "error_type": "stream_error",
+                    "message": str(e)
+                }
+            }
+            yield f"data: {json.dumps(error_event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Session-ID": job_id
+        }
+    )
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit(settings.PARSING_RATE_LIMIT)
+@check_parsing_limit
+async def submit_parse_job(
+    job_request: ParseJobRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Queue a parse for the background workers; follow it with /url/stream (job_id) or poll /jobs/{job_id}"""
+    if not settings.PARSE_JOBS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Background parsing is disabled"
+        )
+
+    if job_request.job_type not in JOB_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"job_type must be one of: {', '.join(JOB_TYPES)}"
+        )
+
+    if job_request.job_type == "instagram_batch":
+        if not job_request.urls:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="urls is required for instagram_batch jobs"
+            )
+        params = {
+            "urls": job_request.urls,
+            "max_results": job_request.max_results,
+            "collection_id": job_request.collection_id,
+            "refresh": job_request.refresh
+        }
+    else:
+        if not job_request.url:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"url is required for {job_request.job_type} jobs"
+            )
+        params = {"url": job_request.url, "collection_id": job_request.collection_id, "refresh": job_request.refresh}
+
+    job = ParseJobService.submit(current_user, job_request.job_type, params, db)
+    return ParseJobService.to_dict(job, db)
+
+@router.get("/jobs/{job_id}")
+async def get_parse_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the status of a queued parse job"""
+    job = ParseJobService.get_job(job_id, current_user.id, db)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parse job not found"
+        )
+    return ParseJobService.to_dict(job, db)
+
+@router.get("/jobs/{job_id}/result")
+async def get_parse_job_result(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the parsed recipe of a finished job (same shape as the inline endpoints)"""
+    job = ParseJobService.get_job(job_id, current_user.id, db)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parse job not found"
+        )
+
+    if job.status not in FINISHED_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Parse job is still {job.status}"
+        )
+
+    if job.status == JOB_SUCCEEDED:
+        return job.result
+
+    error = job.error or {}
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN if error.get("error_type") == "website_protection" else status.HTTP_400_BAD_REQUEST,
+        detail=error
+    )
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_parse_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Cancel a queued or running parse job"""
+    job = ParseJobService.get_job(job_id, current_user.id, db)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Parse job not found"
+        )
+
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Parse job already {job.status}"
+        )
+
+    job = ParseJobService.request_cancel(job, db)
+    return ParseJobService.to_dict(job, db)
+
 @router.post("/instagram")
 @limiter.limit(settings.PARSING_RATE_LIMIT)
 @check_parsing_limit
@@ -218,7 +432,9 @@ async def parse_recipe_from_instagram(
 ):
     parsing_service = ParsingService(db)
     try:
-        recipe_data = await parsing_service.parse_from_instagram(instagram_request.url, current_user.id, instagram_request.collection_id)
+        recipe_data = await parsing_service.parse_from_instagram(
+            instagram_request.url, current_user.id, instagram_request.collection_id, refresh=bool(instagram_request.refresh)
+        )
         return recipe_data
     except Exception as e:
         raise HTTPException(
@@ -234,26 +450,83 @@ async def parse_batch_instagram_urls(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Parse multiple Instagram URLs in batch"""
+    """Parse multiple Instagram URLs in batch (INSTAGRAM_BATCH_CONCURRENCY posts at a time)"""
     parsing_service = ParsingService(db)
-    results = []
-    errors = []
-    
-    for url in batch_request.urls[:batch_request.max_results]:
-        try:
-            recipe_data = await parsing_service.parse_from_instagram(url, current_user.id, batch_request.collection_id)
-            results.append({"url": url, "status": "success", "data": recipe_data})
-        except Exception as e:
-            errors.append({"url": url, "status": "error", "error": str(e)})
-    
+    return await parsing_service.parse_batch_from_instagram(
+        batch_request.urls[:batch_request.max_results],
+        current_user.id,
+        batch_request.collection_id,
+        refresh=bool(batch_request.refresh)
+    )
+
+@router.post("/instagram/batch/stream")
+@limiter.limit(settings.INSTAGRAM_BATCH_RATE_LIMIT)
+async def stream_batch_instagram_urls(
+    batch_request: BatchInstagramRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Parse multiple Instagram URLs in batch, streaming each post as NDJSON as soon as it finishes"""
+    parsing_service = ParsingService(db)
+    urls = batch_request.urls[:batch_request.max_results]
+
+    async def item_stream():
+        started = time.perf_counter()
+        successful = 0
+        async for item in parsing_service.iter_instagram_batch(
+            urls, current_user.id, batch_request.collection_id, refresh=bool(batch_request.refresh)
+        ):
+            successful += item["status"] == "success"
+            yield json.dumps({"event": "item", **item}) + "\n"
+
+        summary = {
+            "event": "summary",
+            "total_processed": len(urls),
+            "successful": successful,
+            "failed": len(urls) - successful,
+            "duration_ms": int((time.perf_counter() - started) * 1000)
+        }
+        yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(
+        item_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+async def _collect_harvest(events) -> Dict[str, Any]:
+    """Gather a profile/hashtag crawl into a single response"""
+    recipes = []
+    summary = {}
+    async for event in events:
+        if event["event"] == "recipe":
+            recipes.append(event["data"])
+        else:
+            summary = event
     return {
-        "total_processed": len(batch_request.urls[:batch_request.max_results]),
-        "successful": len(results),
-        "failed": len(errors),
-        "results": results,
-        "errors": errors
+        "recipes_found": len(recipes),
+        "recipes": recipes,
+        "cursor": summary.get("cursor"),
+        "exhausted": summary.get("exhausted", False)
     }
 
+def _harvest_stream_response(events) -> StreamingResponse:
+    """NDJSON stream of a profile/hashtag crawl: one line per recipe, then an end line with the cursor"""
+
+    async def event_stream():
+        try:
+            async for event in events:
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "message": str(e)}) + "\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache"}
+    )
+
 @router.post("/instagram/profile")
 @limiter.limit(settings.INSTAGRAM_BATCH_RATE_LIMIT)
 async def parse_instagram_profile(
@@ -265,28 +538,40 @@ async def parse_instagram_profile(
     """Parse recipes from an Instagram profile"""
     parsing_service = ParsingService(db)
     try:
-        recipes = parsing_service.instagram_parser.parse_instagram_profile(
-            profile_request.username, 
-            profile_request.max_posts
-        )
-        
-        # Convert to legacy format
-        recipe_data = []
-        for recipe in recipes:
-            data = parsing_service._convert_to_legacy_format(recipe)
-            recipe_data.append(data)
-        
-        return {
-            "username": profile_request.username,
-            "recipes_found": len(recipe_data),
-            "recipes": recipe_data
-        }
+        result = await _collect_harvest(parsing_service.iter_instagram_harvest(
+            "profile",
+            profile_request.username,
+            profile_request.max_posts,
+            cursor=profile_request.cursor,
+            user_id=current_user.id,
+            refresh=bool(profile_request.refresh)
+        ))
+        return {"username": profile_request.username, **result}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to parse Instagram profile: {str(e)}"
         )
 
+@router.post("/instagram/profile/stream")
+@limiter.limit(settings.INSTAGRAM_BATCH_RATE_LIMIT)
+async def stream_instagram_profile(
+    profile_request: ProfileParseRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream recipes from an Instagram profile as NDJSON as soon as each is parsed"""
+    parsing_service = ParsingService(db)
+    return _harvest_stream_response(parsing_service.iter_instagram_harvest(
+        "profile",
+        profile_request.username,
+        profile_request.max_posts,
+        cursor=profile_request.cursor,
+        user_id=current_user.id,
+        refresh=bool(profile_request.refresh)
+    ))
+
 @router.post("/instagram/hashtag")
 @limiter.limit(settings.INSTAGRAM_BATCH_RATE_LIMIT)
 async def search_recipes_by_hashtag(
@@ -298,28 +583,40 @@ async def search_recipes_by_hashtag(
     """Search for recipes using Instagram hashtags"""
     parsing_service = ParsingService(db)
     try:
-        recipes = parsing_service.instagram_parser.search_recipe_hashtags(
-            hashtag_request.hashtag, 
-            hashtag_request.max_posts
-        )
-        
-        # Convert to legacy format
-        recipe_data = []
-        for recipe in recipes:
-            data = parsing_service._convert_to_legacy_format(recipe)
-            recipe_data.append(data)
-        
-        return {
-            "hashtag": hashtag_request.hashtag,
-            "recipes_found": len(recipe_data),
-            "recipes": recipe_data
-        }
+        result = await _collect_harvest(parsing_service.iter_instagram_harvest(
+            "hashtag",
+            hashtag_request.hashtag,
+            hashtag_request.max_posts,
+            cursor=hashtag_request.cursor,
+            user_id=current_user.id,
+            refresh=bool(hashtag_request.refresh)
+        ))
+        return {"hashtag": hashtag_request.hashtag, **result}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Failed to search hashtag: {str(e)}"
         )
 
+@router.post("/instagram/hashtag/stream")
+@limiter.limit(settings.INSTAGRAM_BATCH_RATE_LIMIT)
+async def stream_recipes_by_hashtag(
+    hashtag_request: HashtagSearchRequest,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Stream recipes for an Instagram hashtag as NDJSON as soon as each is parsed"""
+    parsing_service = ParsingService(db)
+    return _harvest_stream_response(parsing_service.iter_instagram_harvest(
+        "hashtag",
+        hashtag_request.hashtag,
+        hashtag_request.max_posts,
+        cursor=hashtag_request.cursor,
+        user_id=current_user.id,
+        refresh=bool(hashtag_request.refresh)
+    ))
+
 @router.post("/image")
 @limiter.limit(settings.FILE_UPLOAD_RATE_LIMIT)
 @require_premium
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Union
+from typing import Dict, List, Union
 
 class Settings(BaseSettings):
     # Application Secret Key - must be set via environment variable
@@ -65,7 +65,115 @@ class Settings(BaseSettings):
     SECURITY_LOG_LEVEL: str = "INFO"
     LOG_SECURITY_EVENTS: bool = True
     LOG_FILE_UPLOADS: bool = True
-    
+
+    # Outbound HTTP client pool (shared keep-alive connections)
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 6
+    HTTP_MAX_TRACKED_HOSTS: int = 1024  # Unused per-host caps beyond this are forgotten
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    HTTP_TIMEOUT: float = 30.0  # seconds
+    HTTP_CONNECT_TIMEOUT: float = 10.0  # seconds
+    HTTP2_ENABLED: bool = True  # Only used when the h2 package is installed
+
+    # Parse result cache (keyed on canonicalized recipe URL)
+    PARSE_CACHE_ENABLED: bool = True
+    PARSE_CACHE_BACKEND: str = "memory"  # "memory" (per process) or "database" (shared by all workers)
+    PARSE_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    PARSE_CACHE_NEGATIVE_TTL_SECONDS: int = 5 * 60  # Blocked pages and 404s
+    PARSE_CACHE_MAX_ENTRIES: int = 1000  # In-process LRU size
+
+    # HTML tree builder for the manual parser: "auto" (lxml when installed), "lxml" or "html.parser"
+    HTML_PARSER_BACKEND: str = "auto"
+
+    # Blocked-page detection scans title, h1 and this much visible body text
+    BLOCK_DETECTION_SAMPLE_KB: int = 16
+
+    # Politeness delays, cookies and proxy health shared by every parser
+    SHARED_STATE_BACKEND: str = "memory"  # "memory" (per process) or "database" (shared by all workers)
+    SHARED_STATE_DATABASE_URL: str = ""  # Empty uses DATABASE_URL; e.g. sqlite:///./data/parser_state.db
+
+    # Per-domain strategy learning (which parsing methods work on which sites)
+    STRATEGY_LEARNING_ENABLED: bool = True
+    STRATEGY_PERSIST: bool = True  # Keep the learned table in Postgres across restarts
+    STRATEGY_MIN_SAMPLES: int = 5  # Attempts before a method's success rate is trusted
+    STRATEGY_MIN_SUCCESS_RATE: float = 0.2  # Below this a method is skipped for the domain
+    STRATEGY_EXPLORATION_RATE: float = 0.1  # Share of requests that still run the full cascade
+    STRATEGY_FLUSH_INTERVAL: float = 30.0  # seconds between database writes
+    STRATEGY_DECAY_HALF_LIFE_HOURS: float = 24.0  # Older outcomes count half as much after this long
+
+    # Playwright browser pool for the browser-automation fallback
+    BROWSER_POOL_ENABLED: bool = True  # Only used when Playwright is installed
+    BROWSER_POOL_SIZE: int = 1  # Warm Chromium processes per worker
+    BROWSER_POOL_MAX_CONCURRENT_PAGES: int = 4
+    BROWSER_POOL_RECYCLE_AFTER_PAGES: int = 50
+    BROWSER_POOL_MAX_JS_HEAP_MB: float = 512.0  # Recycle a browser once a page grows past this
+    BROWSER_POOL_ACQUIRE_TIMEOUT: float = 20.0  # seconds to wait for a free page slot
+    BROWSER_BLOCK_RESOURCES: bool = True  # Abort images, media, fonts and third-party ads/analytics
+    BROWSER_RESOURCE_ALLOWLIST: Dict[str, List[str]] = {}  # e.g. {"example.com": ["image", "cdn.example.net"]}
+
+    # Conditional re-fetches (ETag / Last-Modified) of pages parsed before
+    REVALIDATION_ENABLED: bool = True
+    REVALIDATION_STORE_PATH: str = "./data/revalidation.db"  # SQLite file with validators, bodies and recipes
+    REVALIDATION_MAX_ENTRIES: int = 5000
+    REVALIDATION_TTL_SECONDS: int = 30 * 24 * 60 * 60
+
+    # Overall time budget for one URL parse, shared by fetch retries and browser fallbacks
+    PARSE_DEADLINE_SECONDS: float = 60.0
+
+    # Outbound fetch scheduler (per-domain slots and token buckets, fair across users)
+    FETCH_SCHEDULER_ENABLED: bool = True
+    FETCH_MAX_OUTBOUND: int = 32  # Concurrent outbound requests per worker, all domains
+    FETCH_DOMAIN_CONCURRENCY: int = 2  # Concurrent requests per domain
+    FETCH_DOMAIN_RATE: float = 1.0  # Requests per second per domain (0 = unlimited)
+    FETCH_DOMAIN_BURST: int = 4
+    FETCH_MAX_TRACKED_DOMAINS: int = 1024  # Idle per-domain states beyond this are forgotten
+    FETCH_DOMAIN_LIMITS: Dict[str, Dict[str, float]] = {
+        "instagram.com": {"concurrency": 1, "rate": 0.2, "burst": 2},
+    }  # Per-domain overrides, also applied to subdomains
+
+    # Background parse jobs (parse_jobs table, consumed by `python -m app.workers.parse_worker`)
+    PARSE_JOBS_ENABLED: bool = True
+    PARSE_WORKER_CONCURRENCY: int = 4  # Parse jobs run concurrently per worker process
+    PARSE_JOB_POLL_INTERVAL: float = 1.0  # seconds an idle worker waits before polling again
+    PARSE_JOB_HEARTBEAT_INTERVAL: float = 5.0  # seconds between heartbeats / cancellation checks
+    PARSE_JOB_STALE_SECONDS: float = 120.0  # Running jobs without a heartbeat this long are requeued
+    PARSE_JOB_MAX_ATTEMPTS: int = 2  # Runs before a job abandoned by crashed workers is failed
+    PARSE_JOB_PREMIUM_PRIORITY: int = 10  # Premium jobs are claimed ahead of free ones
+    PARSE_JOB_RETENTION_DAYS: int = 7  # Finished jobs and their events are deleted after this
+    PARSE_JOB_EVENT_POLL_INTERVAL: float = 0.5  # seconds between event reads when streaming a job
+
+    # Instagram batches
+    INSTAGRAM_BATCH_CONCURRENCY: int = 4  # Posts of one batch parsed at once (fetches still obey FETCH_DOMAIN_LIMITS)
+    INSTAGRAM_THREAD_POOL_SIZE: int = 4  # Threads for blocking instaloader calls, per worker
+
+    # Instagram post cache (keyed on shortcode; skips instaloader and media processing on repeat imports)
+    INSTAGRAM_CACHE_ENABLED: bool = True
+    INSTAGRAM_CACHE_BACKEND: str = "database"  # "database" (shared, survives restarts) or "memory"
+    INSTAGRAM_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    INSTAGRAM_CACHE_MAX_ENTRIES: int = 1000  # In-process LRU size
+    INSTAGRAM_HARVEST_CURSOR_TTL_SECONDS: int = 7 * 24 * 60 * 60  # Profile/hashtag crawl cursors stay resumable this long
+    INSTAGRAM_HARVEST_MAX_SKIP: int = 200  # Posts re-scanned looking for a cursor that cannot be resumed directly
+
+    # spaCy pipeline for NLP ingredient/instruction parsing (optional dependency)
+    SPACY_ENABLED: bool = True
+    SPACY_MODEL: str = "en_core_web_sm"
+    SPACY_EXCLUDE: str = "ner,parser"  # Comma-separated components never loaded (only tags and lemmas are read)
+    SPACY_BATCH_SIZE: int = 64  # Lines per nlp.pipe batch
+    SPACY_N_PROCESS: int = 1  # Processes for batches larger than SPACY_BATCH_SIZE
+    NLP_INGREDIENT_CACHE_SIZE: int = 4096  # Parsed ingredient lines kept per process
+
+    # Process pool for CPU-bound parsing (HTML trees, section heuristics, caption/NLP extraction)
+    CPU_POOL_ENABLED: bool = True
+    CPU_POOL_WORKERS: int = 2  # Worker processes per API/worker process
+    CPU_POOL_INLINE_BYTES: int = 20_000  # Smaller inputs are parsed in the calling thread
+    CPU_POOL_START_METHOD: str = "spawn"  # "spawn" or "forkserver"; forking a threaded event loop is unsafe
+
+    # Content-addressed media store (images deduplicated by pixel hash, reference counted per recipe)
+    MEDIA_GC_GRACE_SECONDS: int = 24 * 60 * 60  # Unreferenced images (e.g. imports never saved) are kept this long
+    MEDIA_GC_BATCH_SIZE: int = 500  # Images removed per garbage collection run
+    MEDIA_GC_INTERVAL_SECONDS: int = 60 * 60  # Background collection period in API and worker processes (0 disables)
+
     @field_validator('ALLOWED_ORIGINS', mode='before')
     @classmethod
     def parse_cors_origins(cls, v):
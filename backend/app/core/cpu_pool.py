@@ -0,0 +1,168 @@
+"""
+Process pool for CPU-bound parsing stages.
+HTML tree building, the section heuristics and caption/NLP extraction hold the
+GIL for the whole parse, so running them on the event loop stalls every other
+request of the API worker. Stages are submitted here instead and run in warm
+worker processes (modules, regexes and models loaded by the initializer);
+inputs below CPU_POOL_INLINE_BYTES are cheaper to run in the calling thread
+than to ship to another process. Queue and CPU time are recorded per stage.
+"""
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CPUStageError(RuntimeError):
+    """A stage's worker process died; the input is not retried, since it may be what killed the worker"""
+
+
+def _warm_parsers() -> None:
+    """Worker initializer; imported here because the parsers themselves import this module"""
+    from app.services.parsers.cpu_stages import warm_worker
+    warm_worker()
+
+
+def _run_stage(func: Callable[[Any], Any], payload: Any, submitted_at: float) -> Tuple[Any, float, float]:
+    """Runs in a worker process: the stage result with its queue and CPU time in milliseconds"""
+    queue_ms = max(0.0, (time.time() - submitted_at) * 1000)
+    cpu_start = time.process_time()
+    result = func(payload)
+    return result, queue_ms, (time.process_time() - cpu_start) * 1000
+
+
+class CPUPool:
+    """Shared ProcessPoolExecutor for parsing stages, with per-stage timings"""
+
+    def __init__(self, max_workers: int = 2, inline_bytes: int = 20_000, enabled: bool = True,
+                 start_method: str = "spawn", initializer: Optional[Callable[[], None]] = None):
+        self.max_workers = max(1, max_workers)
+        self.inline_bytes = inline_bytes
+        self.enabled = enabled
+        self.start_method = start_method
+        self.initializer = initializer
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "CPUPool":
+        """Build the pool from application settings"""
+        return cls(
+            max_workers=settings.CPU_POOL_WORKERS,
+            inline_bytes=settings.CPU_POOL_INLINE_BYTES,
+            enabled=settings.CPU_POOL_ENABLED,
+            start_method=settings.CPU_POOL_START_METHOD,
+            initializer=_warm_parsers,
+        )
+
+    async def startup(self) -> None:
+        """Start the worker processes and wait until each has loaded the parsers"""
+        if not self.enabled or self._executor is not None:
+            return
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=self.initializer,
+        )
+        # Processes start on first submit; one no-op per worker spawns and warms them all now
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._executor, time.sleep, 0.05) for _ in range(self.max_workers)
+        ))
+        logger.info(f"CPU pool started {self.max_workers} {self.start_method} workers "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    async def shutdown(self) -> None:
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def run(self, stage: str, func: Callable[[Any], Any], payload: Any, size: int,
+                  inline_in_thread: bool = False) -> Any:
+        """Run func(payload) in a worker process, or in this process when the input is small or no pool is up.
+        func must be a module-level function and payload picklable. inline_in_thread moves the in-process
+        runs to a thread, for stages whose C code releases the GIL (Pillow decoding and resampling)."""
+        if self._executor is None or size < self.inline_bytes:
+            return await self._run_inline(stage, func, payload, inline_in_thread)
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        start = time.perf_counter()
+        try:
+            result, queue_ms, cpu_ms = await loop.run_in_executor(
+                executor, _run_stage, func, payload, time.time()
+            )
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory). Every task in flight on the pool fails at once;
+            # only the first to get here replaces it, the rest find a new executor already in place
+            if self._executor is executor:
+                logger.error(f"CPU pool broken while running {stage}, restarting it")
+                self._executor = None
+                await asyncio.to_thread(executor.shutdown, wait=False, cancel_futures=True)
+                await self.startup()
+            raise CPUStageError(f"{stage} worker process died") from e
+
+        self._record(stage, inline=False, queue_ms=queue_ms, cpu_ms=cpu_ms,
+                     wall_ms=(time.perf_counter() - start) * 1000)
+        return result
+
+    async def _run_inline(self, stage: str, func: Callable[[Any], Any], payload: Any, in_thread: bool) -> Any:
+        start = time.perf_counter()
+        timing = {"cpu_ms": 0.0}
+
+        def call() -> Any:
+            cpu_start = time.thread_time()
+            try:
+                return func(payload)
+            finally:
+                timing["cpu_ms"] = (time.thread_time() - cpu_start) * 1000
+
+        try:
+            return await asyncio.to_thread(call) if in_thread else call()
+        finally:
+            self._record(stage, inline=True, queue_ms=0.0, cpu_ms=timing["cpu_ms"],
+                         wall_ms=(time.perf_counter() - start) * 1000)
+
+    def _record(self, stage: str, inline: bool, queue_ms: float, cpu_ms: float, wall_ms: float) -> None:
+        stats = self.stats.setdefault(stage, {
+            "calls": 0, "inline": 0, "offloaded": 0,
+            "queue_ms_total": 0.0, "queue_ms_max": 0.0,
+            "cpu_ms_total": 0.0, "wall_ms_total": 0.0,
+        })
+        stats["calls"] += 1
+        stats["inline" if inline else "offloaded"] += 1
+        stats["queue_ms_total"] += queue_ms
+        stats["queue_ms_max"] = max(stats["queue_ms_max"], queue_ms)
+        stats["cpu_ms_total"] += cpu_ms
+        stats["wall_ms_total"] += wall_ms
+
+    def get_stats(self) -> Dict[str, Any]:
+        stages = {}
+        for stage, stats in self.stats.items():
+            calls = stats["calls"] or 1
+            stages[stage] = {
+                **{key: round(value, 2) if isinstance(value, float) else value for key, value in stats.items()},
+                "queue_ms_avg": round(stats["queue_ms_total"] / calls, 2),
+                "cpu_ms_avg": round(stats["cpu_ms_total"] / calls, 2),
+            }
+        return {
+            "enabled": self.enabled,
+            "running": self._executor is not None,
+            "workers": self.max_workers,
+            "inline_bytes": self.inline_bytes,
+            "stages": stages,
+        }
+
+
+# Global pool shared by every parser in this process (each API/worker process owns its own)
+cpu_pool = CPUPool.from_settings()
@@ -0,0 +1,451 @@
+"""
+Outbound fetch scheduler shared by the parsers and media downloads.
+Every outbound request waits for a global outbound slot, a per-domain
+concurrency slot and a per-domain token (token bucket: steady rate plus a
+small burst). Waiters are queued per user and served round-robin, so one user
+importing fifty links from the same site cannot starve everyone else, and a
+queued caller gets a wait estimate for the progress stream. After failures a
+domain is backed off by slowing its bucket, so the wait estimate still holds.
+"""
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Deque, AsyncIterator, Iterator, TYPE_CHECKING
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.parsers.progress_events import ProgressEventEmitter
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS_USER = "anonymous"
+
+# User the current request is fetching for (set by ParsingService, inherited by child tasks)
+_current_user: ContextVar[Optional[str]] = ContextVar("fetch_scheduler_user", default=None)
+
+
+@contextmanager
+def fetch_user(user_id: Optional[Any]) -> Iterator[None]:
+    """Attribute outbound fetches made inside this block to a user for fair queuing"""
+    token = _current_user.set(str(user_id) if user_id is not None else None)
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+@dataclass
+class DomainLimits:
+    """Concurrency and request-rate limits for one domain"""
+    concurrency: int = 2
+    rate: float = 1.0  # Requests per second (0 = no rate limit)
+    burst: int = 4
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens/second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        else:
+            self.tokens = float(self.capacity)
+        self.updated = now
+
+    def try_take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def reconfigure(self, rate: float, burst: int, now: float) -> None:
+        """Change rate and capacity, keeping the tokens already earned (up to the new capacity)"""
+        self._refill(now)
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = min(self.tokens, float(self.capacity))
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+    def seconds_until(self, tokens_needed: float, now: float) -> float:
+        """How long until tokens_needed tokens will have been available"""
+        self._refill(now)
+        missing = tokens_needed - self.tokens
+        if missing <= 0 or self.rate <= 0:
+            return 0.0
+        return missing / self.rate
+
+
+class _Waiter:
+    __slots__ = ("user", "future", "enqueued_at")
+
+    def __init__(self, user: str, future: asyncio.Future):
+        self.user = user
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class _DomainState:
+    """Slots, token bucket and per-user wait queues for one domain"""
+
+    def __init__(self, domain: str, limits: DomainLimits):
+        self.domain = domain
+        self.limits = limits
+        self.bucket = TokenBucket(limits.rate, limits.burst)
+        self.active = 0
+        self.waiting = 0
+        self.queues: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        # Smoothed time a request holds its slot, used for wait estimates
+        self.avg_hold_seconds = 1.0
+        # Seconds between requests while the domain is backed off after failures (0 = normal limits)
+        self.backoff = 0.0
+
+    def set_backoff(self, delay: float) -> None:
+        if delay == self.backoff:
+            return
+        self.backoff = delay
+
+        now = time.monotonic()
+        if delay > 0:
+            # One request per delay, and no burst: the bucket alone now paces the domain
+            rate = 1.0 / delay
+            if self.limits.rate > 0:
+                rate = min(rate, self.limits.rate)
+            self.bucket.reconfigure(rate, 1, now)
+        else:
+            self.bucket.reconfigure(self.limits.rate, self.limits.burst, now)
+
+    def is_idle(self, now: float) -> bool:
+        """Nothing running or queued, no tokens owed and no backoff: safe to forget"""
+        return (
+            self.active == 0 and self.waiting <= 0 and not self.queues
+            and self.backoff == 0 and self.bucket.is_full(now)
+        )
+
+    def peek_user(self) -> Optional[str]:
+        """Next user in round-robin order with a live waiter (drops cancelled waiters)"""
+        for user in list(self.queues):
+            queue = self.queues[user]
+            while queue and queue[0].future.done():
+                queue.popleft()
+            if queue:
+                return user
+            del self.queues[user]
+        return None
+
+    def pop_waiter(self, user: str) -> _Waiter:
+        queue = self.queues[user]
+        waiter = queue.popleft()
+        # Rotate the user to the back so every user gets a turn
+        if queue:
+            self.queues.move_to_end(user)
+        else:
+            del self.queues[user]
+        return waiter
+
+    def position_of(self, waiter: _Waiter) -> int:
+        """Requests served before this waiter under round-robin"""
+        own_queue = self.queues.get(waiter.user, ())
+        index = next((i for i, queued in enumerate(own_queue) if queued is waiter), 0)
+        ahead = index
+        for user, queue in self.queues.items():
+            if user != waiter.user:
+                ahead += min(len(queue), index + 1)
+        return ahead
+
+
+class FetchScheduler:
+    """Fair, per-domain and global admission control for outbound requests"""
+
+    def __init__(
+        self,
+        max_outbound: int = 32,
+        default_limits: Optional[DomainLimits] = None,
+        domain_limits: Optional[Dict[str, DomainLimits]] = None,
+        enabled: bool = True,
+        max_tracked_domains: int = 1024,
+    ):
+        self.max_outbound = max(1, max_outbound)
+        self.max_tracked_domains = max(1, max_tracked_domains)
+        self.default_limits = default_limits or DomainLimits()
+        self.domain_limits = {normalize_domain(domain): limits for domain, limits in (domain_limits or {}).items()}
+        self.enabled = enabled
+
+        self._domains: "OrderedDict[str, _DomainState]" = OrderedDict()
+        self._active = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_deadline = 0.0
+
+        self.stats = {
+            "granted": 0,
+            "queued": 0,
+            "cancelled": 0,
+            "global_cap_waits": 0,
+            "total_wait_ms": 0,
+            "max_wait_ms": 0,
+            "evicted_domains": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "FetchScheduler":
+        """Build the scheduler from application settings"""
+        defaults = DomainLimits(
+            concurrency=settings.FETCH_DOMAIN_CONCURRENCY,
+            rate=settings.FETCH_DOMAIN_RATE,
+            burst=settings.FETCH_DOMAIN_BURST,
+        )
+        # Overrides may set only some limits; the rest come from the defaults
+        domain_limits = {
+            domain: DomainLimits(
+                concurrency=int(overrides.get("concurrency", defaults.concurrency)),
+                rate=float(overrides.get("rate", defaults.rate)),
+                burst=int(overrides.get("burst", defaults.burst)),
+            )
+            for domain, overrides in settings.FETCH_DOMAIN_LIMITS.items()
+        }
+        return cls(
+            max_outbound=settings.FETCH_MAX_OUTBOUND,
+            default_limits=defaults,
+            domain_limits=domain_limits,
+            enabled=settings.FETCH_SCHEDULER_ENABLED,
+            max_tracked_domains=settings.FETCH_MAX_TRACKED_DOMAINS,
+        )
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        url: str,
+        progress_emitter: Optional["ProgressEventEmitter"] = None,
+        method: str = "http",
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[None]:
+        """Hold an outbound slot for url's domain for the duration of the block"""
+        if not self.enabled:
+            yield
+            return
+
+        state = self._domain_state(url)
+        user = user_id or _current_user.get() or ANONYMOUS_USER
+        waiter = _Waiter(user, asyncio.get_running_loop().create_future())
+        state.queues.setdefault(user, deque()).append(waiter)
+        state.waiting += 1
+        self._dispatch()
+
+        if not waiter.future.done():
+            self._report_queued(state, waiter, progress_emitter, method)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                # Still queued: peek_user drops the cancelled waiter
+                state.waiting -= 1
+                self.stats["cancelled"] += 1
+            else:
+                # Granted just as the caller was cancelled
+                self._release(state, 0.0)
+            raise
+
+        wait_ms = int((time.monotonic() - waiter.enqueued_at) * 1000)
+        self.stats["granted"] += 1
+        self.stats["total_wait_ms"] += wait_ms
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(state, time.monotonic() - started)
+
+    def set_backoff(self, url: str, delay: float) -> None:
+        """Pace url's domain at one request per delay seconds after failures (0 restores its limits)"""
+        if self.enabled:
+            self._domain_state(url).set_backoff(max(0.0, delay))
+
+    def estimate_wait_ms(self, url: str) -> int:
+        """Rough wait a new request for url would see right now"""
+        state = self._domain_state(url)
+        return int(self._estimate_seconds(state, state.waiting) * 1000)
+
+    def _domain_state(self, url: str) -> _DomainState:
+        host = normalize_domain(urlparse(url).netloc or url)
+        key, limits = self._limits_for(host)
+        state = self._domains.get(key)
+        if state is None:
+            self._evict_idle()
+            state = _DomainState(key, limits)
+            self._domains[key] = state
+        return state
+
+    def _evict_idle(self) -> None:
+        """Forget idle domains, least recently granted first, once the table is at its cap"""
+        excess = len(self._domains) + 1 - self.max_tracked_domains
+        if excess <= 0:
+            return
+
+        now = time.monotonic()
+        for key, state in list(self._domains.items()):
+            if state.is_idle(now):
+                del self._domains[key]
+                self.stats["evicted_domains"] += 1
+                excess -= 1
+                if excess <= 0:
+                    return
+
+    def _limits_for(self, host: str):
+        """Limits for a host, matching configured domains and their subdomains"""
+        parts = host.split('.')
+        for i in range(len(parts) - 1):
+            candidate = '.'.join(parts[i:])
+            if candidate in self.domain_limits:
+                # Share one bucket across all subdomains of a configured domain (e.g. *.cdninstagram.com)
+                return candidate, self.domain_limits[candidate]
+        return host, self.default_limits
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters, round-robin over domains and users"""
+        now = time.monotonic()
+        next_wakeup = None
+
+        granted = True
+        while granted:
+            granted = False
+            for state in list(self._domains.values()):
+                if state.waiting <= 0 or state.active >= state.limits.concurrency:
+                    continue
+                if self._active >= self.max_outbound:
+                    self.stats["global_cap_waits"] += 1
+                    return
+
+                user = state.peek_user()
+                if user is None:
+                    state.waiting = 0
+                    continue
+
+                if not state.bucket.try_take(now):
+                    wait = state.bucket.seconds_until(1, now)
+                    next_wakeup = wait if next_wakeup is None else min(next_wakeup, wait)
+                    continue
+
+                waiter = state.pop_waiter(user)
+                state.waiting -= 1
+                state.active += 1
+                self._active += 1
+                waiter.future.set_result(None)
+
+                # Let other domains go first on the next pass
+                self._domains.move_to_end(state.domain)
+                granted = True
+
+        if next_wakeup is not None:
+            self._schedule_dispatch(next_wakeup)
+
+    def _schedule_dispatch(self, delay: float) -> None:
+        deadline = time.monotonic() + delay
+        if self._timer is not None and not self._timer.cancelled() and self._timer_deadline <= deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+
+        self._timer_deadline = deadline
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def _release(self, state: _DomainState, held_seconds: float) -> None:
+        state.active -= 1
+        self._active -= 1
+        if held_seconds > 0:
+            state.avg_hold_seconds = 0.8 * state.avg_hold_seconds + 0.2 * held_seconds
+        self._dispatch()
+
+    def _estimate_seconds(self, state: _DomainState, ahead: int) -> float:
+        """Wait for 'ahead' earlier requests: bounded by both the token rate and the slot turnover"""
+        now = time.monotonic()
+        token_wait = state.bucket.seconds_until(ahead + 1, now)
+
+        free_slots = max(0, state.limits.concurrency - state.active)
+        rounds = max(0, ahead + 1 - free_slots) / state.limits.concurrency
+        slot_wait = rounds * state.avg_hold_seconds
+
+        return max(token_wait, slot_wait)
+
+    def _report_queued(
+        self,
+        state: _DomainState,
+        waiter: _Waiter,
+        progress_emitter: Optional["ProgressEventEmitter"],
+        method: str,
+    ) -> None:
+        self.stats["queued"] += 1
+        position = state.position_of(waiter)
+        eta_ms = int(self._estimate_seconds(state, position) * 1000)
+        logger.debug(f"Queued outbound request to {state.domain} (position {position}, ~{eta_ms}ms)")
+
+        if progress_emitter:
+            # Imported here: media_utils uses the scheduler and is itself imported by the parsers package
+            from app.services.parsers.progress_events import ProgressPhase, ProgressStatus
+
+            progress_emitter.emit_event(
+                ProgressPhase.RATE_LIMITING,
+                ProgressStatus.IN_PROGRESS,
+                f"Waiting for a free connection to {state.domain} (about {max(1, round(eta_ms / 1000))}s)",
+                method=method,
+                metadata={
+                    "domain": state.domain,
+                    "queue_position": position,
+                    "active_requests": state.active,
+                    "eta_ms": eta_ms,
+                },
+                estimated_remaining_ms=eta_ms,
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        granted = self.stats["granted"]
+        return {
+            "enabled": self.enabled,
+            "max_outbound": self.max_outbound,
+            "active": self._active,
+            "tracked_domains": len(self._domains),
+            "domains": {
+                state.domain: {
+                    "active": state.active,
+                    "waiting": state.waiting,
+                    "users_waiting": len(state.queues),
+                    "concurrency": state.limits.concurrency,
+                    "rate": state.limits.rate,
+                    "tokens": round(state.bucket.tokens, 2),
+                    "avg_hold_ms": int(state.avg_hold_seconds * 1000),
+                    "backoff_seconds": round(state.backoff, 2),
+                }
+                for state in self._domains.values() if state.active or state.waiting
+            },
+            **self.stats,
+            "avg_wait_ms": self.stats["total_wait_ms"] / granted if granted else 0.0,
+        }
+
+
+def normalize_domain(domain: str) -> str:
+    domain = domain.lower().split(':')[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+# Global scheduler shared by every outbound fetch in this process
+fetch_scheduler = FetchScheduler.from_settings()
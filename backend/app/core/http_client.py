@@ -0,0 +1,233 @@
+"""
+Application-scoped HTTP client registry.
+Keeps one pooled httpx.AsyncClient per proxy so outbound requests reuse
+keep-alive connections instead of paying a TCP+TLS handshake on every call.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 support in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Registry key for the client that does not go through a proxy
+DIRECT_CLIENT_KEY = "direct"
+
+
+class _HostLimit:
+    """Per-host connection cap and the number of requests holding or waiting for it"""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class HTTPClientRegistry:
+    """Owns the shared outbound httpx clients and tracks connection reuse"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        max_connections_per_host: int = 6,
+        max_tracked_hosts: int = 1024,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_connections_per_host = max_connections_per_host
+        self.max_tracked_hosts = max(1, max_tracked_hosts)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.transport = transport  # Injected transport (used by benchmarks)
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._host_limits: "OrderedDict[str, _HostLimit]" = OrderedDict()
+        self._started = False
+
+        self.stats = {
+            "requests": 0,
+            "new_connections": 0,
+            "tls_handshakes": 0,
+            "http2_responses": 0,
+            "host_limit_waits": 0,
+            "evicted_hosts": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "HTTPClientRegistry":
+        """Build a registry from application settings"""
+        return cls(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            max_connections_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_tracked_hosts=settings.HTTP_MAX_TRACKED_HOSTS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            timeout=settings.HTTP_TIMEOUT,
+            connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+            http2=settings.HTTP2_ENABLED,
+        )
+
+    async def startup(self) -> None:
+        """Create the direct client eagerly so the first request does not pay for it"""
+        self.get_client()
+        self._started = True
+        logger.info(
+            f"HTTP client registry started (http2={self.http2}, "
+            f"max_connections={self.limits.max_connections}, per_host={self.max_connections_per_host})"
+        )
+
+    async def shutdown(self) -> None:
+        """Close every pooled client"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._host_limits.clear()
+        self._started = False
+
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client: {e}")
+
+    def get_client(self, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        """Get (or lazily create) the pooled client for a proxy"""
+        key = proxy or DIRECT_CLIENT_KEY
+        client = self._clients.get(key)
+
+        if client is None or client.is_closed:
+            client_kwargs: Dict[str, Any] = {
+                "limits": self.limits,
+                "timeout": self.timeout,
+                "http2": self.http2,
+            }
+            if proxy:
+                client_kwargs["proxies"] = proxy
+            if self.transport is not None:
+                client_kwargs["transport"] = self.transport
+
+            client = httpx.AsyncClient(**client_kwargs)
+            self._clients[key] = client
+
+        return client
+
+    def _get_host_limit(self, host: str) -> _HostLimit:
+        """Per-host connection cap (httpx only limits the pool as a whole)"""
+        host_limit = self._host_limits.get(host)
+        if host_limit is None:
+            self._evict_idle_hosts()
+            host_limit = _HostLimit(self.max_connections_per_host)
+            self._host_limits[host] = host_limit
+        else:
+            self._host_limits.move_to_end(host)
+        return host_limit
+
+    def _evict_idle_hosts(self) -> None:
+        """Forget unused host caps, least recently used first, once the table is at its cap"""
+        excess = len(self._host_limits) + 1 - self.max_tracked_hosts
+        if excess <= 0:
+            return
+
+        for host, host_limit in list(self._host_limits.items()):
+            if host_limit.users == 0:
+                del self._host_limits[host]
+                self.stats["evicted_hosts"] += 1
+                excess -= 1
+                if excess <= 0:
+                    return
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """httpcore trace hook used to count real handshakes"""
+        if event_name == "connection.connect_tcp.complete":
+            self.stats["new_connections"] += 1
+        elif event_name == "connection.start_tls.complete":
+            self.stats["tls_handshakes"] += 1
+
+    async def request(self, method: str, url: str, proxy: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Send a request through the pooled client for the given proxy"""
+        client = self.get_client(proxy)
+        host_limit = self._get_host_limit(urlparse(url).netloc)
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+
+        if host_limit.semaphore.locked():
+            self.stats["host_limit_waits"] += 1
+
+        # Counted while waiting too, so a cap with queued requests is never evicted
+        host_limit.users += 1
+        try:
+            async with host_limit.semaphore:
+                self.stats["requests"] += 1
+                response = await client.request(method, url, extensions=extensions, **kwargs)
+        finally:
+            host_limit.users -= 1
+
+        if response.http_version == "HTTP/2":
+            self.stats["http2_responses"] += 1
+
+        return response
+
+    async def get(self, url: str, proxy: Optional[str] = None, **kwargs) -> httpx.Response:
+        """Convenience wrapper for GET requests"""
+        return await self.request("GET", url, proxy=proxy, **kwargs)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Report pooled connection state and how often connections were reused"""
+        pools = {}
+        for key, client in self._clients.items():
+            connections = []
+            try:
+                # httpx keeps its httpcore pool on the default transport
+                connections = list(client._transport._pool.connections)
+            except AttributeError:
+                pass
+
+            idle = sum(1 for conn in connections if conn.is_idle())
+            pools[key] = {
+                "connections": len(connections),
+                "idle": idle,
+                "active": len(connections) - idle,
+                "closed": client.is_closed,
+            }
+
+        requests = self.stats["requests"]
+        new_connections = self.stats["new_connections"]
+        reuse_ratio = max(0.0, 1 - new_connections / requests) if requests else 0.0
+
+        return {
+            "started": self._started,
+            "http2_enabled": self.http2,
+            "limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "max_connections_per_host": self.max_connections_per_host,
+                "max_tracked_hosts": self.max_tracked_hosts,
+                "keepalive_expiry": self.limits.keepalive_expiry,
+            },
+            "pools": pools,
+            **self.stats,
+            "reuse_ratio": reuse_ratio,
+        }
+
+
+# Global registry instance (started/stopped by the FastAPI lifecycle hooks)
+http_client_registry = HTTPClientRegistry.from_settings()
@@ -6,7 +6,7 @@ from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, ec
 import json
 from app.core.config import settings
-import httpx
+from app.core.http_client import http_client_registry
 import logging
 import time
 import base64
@@ -140,17 +140,16 @@ async def get_clerk_public_keys() -> Dict[str, Any]:
                 detail=f"Failed to decode Clerk publishable key: {str(e)}"
             )
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(jwks_url)
-            response.raise_for_status()
-            
-            jwks_data = response.json()
-            
-            # Cache the keys for 1 hour
-            _clerk_jwks_cache["keys"] = jwks_data
-            _clerk_jwks_cache["expires_at"] = current_time + timedelta(hours=1)
-            
-            return jwks_data
+        response = await http_client_registry.get(jwks_url, timeout=10.0)
+        response.raise_for_status()
+        
+        jwks_data = response.json()
+        
+        # Cache the keys for 1 hour
+        _clerk_jwks_cache["keys"] = jwks_data
+        _clerk_jwks_cache["expires_at"] = current_time + timedelta(hours=1)
+        
+        return jwks_data
     
     except Exception as e:
         logger.error(f"Failed to fetch Clerk JWKS: {str(e)}")
@@ -0,0 +1,11 @@
+"""
+Lazy access to the application's database sessions.
+Caches, stores and the strategy table accept an injected session factory and
+fall back to this one, so importing them never builds the database engine.
+"""
+
+
+def app_session_factory():
+    """The application's SessionLocal, imported on first use so parsers and media storage work without a configured database"""
+    from app.core.database import SessionLocal
+    return SessionLocal
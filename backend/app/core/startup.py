@@ -2,10 +2,18 @@
 Startup validation and checks for the HomeChef Companion backend
 """
 
+import asyncio
 import logging
 import sys
 from typing import List, Tuple
 from app.core.config import settings
+from app.core.http_client import http_client_registry
+from app.services.parsers.browser_pool import browser_pool
+from app.services.parsers.strategy_table import strategy_table
+from app.services.parsers.instagram_parser import instaloader_executor
+from app.services.parsers.spacy_pipeline import spacy_pipeline
+from app.core.cpu_pool import cpu_pool
+from app.utils.storage_utils import storage_utils
 
 logger = logging.getLogger(__name__)
 
@@ -200,6 +208,68 @@ async def startup_event():
         # For now, we'll just log and continue
     except Exception as e:
         logger.error(f"Unexpected error during startup validation: {str(e)}")
+    
+    try:
+        await http_client_registry.startup()
+    except Exception as e:
+        logger.error(f"Failed to start HTTP client registry: {str(e)}")
+    
+    try:
+        await browser_pool.startup()
+    except Exception as e:
+        logger.error(f"Failed to start browser pool: {str(e)}")
+    
+    try:
+        # Load the spaCy model before the first request needs it
+        await asyncio.to_thread(spacy_pipeline.warm)
+    except Exception as e:
+        logger.error(f"Failed to load spaCy model: {str(e)}")
+    
+    try:
+        await cpu_pool.startup()
+    except Exception as e:
+        logger.error(f"Failed to start CPU pool, parsing runs in-process: {str(e)}")
+    
+    try:
+        storage_utils.start_gc()
+    except Exception as e:
+        logger.error(f"Failed to schedule media garbage collection: {str(e)}")
+    
+    if any(storage_utils.metadata_dir.glob("*.json")):
+        logger.warning("Media metadata JSON files found; stored images are missing from the catalog until "
+                       "`python -m app.utils.migrate_media_catalog` is run")
+
+async def shutdown_event():
+    """FastAPI shutdown event handler"""
+    try:
+        await http_client_registry.shutdown()
+    except Exception as e:
+        logger.error(f"Failed to close HTTP client registry: {str(e)}")
+    
+    try:
+        await browser_pool.shutdown()
+    except Exception as e:
+        logger.error(f"Failed to close browser pool: {str(e)}")
+    
+    try:
+        await strategy_table.shutdown()
+    except Exception as e:
+        logger.error(f"Failed to save parsing strategy table: {str(e)}")
+    
+    try:
+        instaloader_executor.shutdown(wait=False, cancel_futures=True)
+    except Exception as e:
+        logger.error(f"Failed to stop instaloader threads: {str(e)}")
+    
+    try:
+        await cpu_pool.shutdown()
+    except Exception as e:
+        logger.error(f"Failed to stop CPU pool: {str(e)}")
+    
+    try:
+        await storage_utils.stop_gc()
+    except Exception as e:
+        logger.error(f"Failed to stop media garbage collection: {str(e)}")
 
 if __name__ == "__main__":
     # Command line validation
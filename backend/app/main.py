@@ -4,7 +4,7 @@ from fastapi.staticfiles import StaticFiles
 from slowapi.errors import RateLimitExceeded
 from app.core.config import settings
 from app.core.database import engine
-from app.core.startup import startup_event
+from app.core.startup import startup_event, shutdown_event
 from app.models import Base
 from app.api.auth import auth_router
 from app.api.recipes import recipes_router
@@ -30,8 +30,9 @@ if settings.RATE_LIMIT_ENABLED:
     app.state.limiter = limiter
     app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
-# Add startup event handler
+# Add startup and shutdown event handlers
 app.add_event_handler("startup", startup_event)
+app.add_event_handler("shutdown", shutdown_event)
 
 # Add security headers middleware (should be added before CORS)
 app.add_middleware(SecurityHeadersMiddleware)
@@ -3,5 +3,11 @@ from .user import User
 from .recipe import Recipe, Tag
 from .meal_plan import MealPlan, MealPlanEntry
 from .collection import Collection
+from .cache_entry import CacheEntry
+from .domain_strategy_stat import DomainStrategyStat
+from .shared_state import SharedState
+from .parse_job import ParseJob, ParseJobEvent
+from .media_blob import MediaBlob, MediaAlias, MediaReference
+from .media_item import MediaItem
 
-__all__ = ["Base", "User", "Recipe", "Tag", "MealPlan", "MealPlanEntry", "Collection"]
\ No newline at end of file
+__all__ = ["Base", "User", "Recipe", "Tag", "MealPlan", "MealPlanEntry", "Collection", "CacheEntry", "DomainStrategyStat", "SharedState", "ParseJob", "ParseJobEvent", "MediaBlob", "MediaAlias", "MediaReference", "MediaItem"]
\ No newline at end of file
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class CacheEntry(Base):
+    """Shared key/value cache rows so every uvicorn worker sees the same entries"""
+    __tablename__ = "cache_entries"
+
+    namespace = Column(String, primary_key=True)  # 'parse_result', etc.
+    key = Column(String, primary_key=True)
+    payload = Column(JSONB, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_cache_entries_namespace_expires_at", "namespace", "expires_at"),
+    )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, Float, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class DomainStrategyStat(Base):
+    """Learned success/latency counters for one parsing method on one domain"""
+    __tablename__ = "domain_strategy_stats"
+
+    domain = Column(String, primary_key=True)
+    method = Column(String, primary_key=True)  # 'scrapers', 'json-ld', 'microdata', 'section', 'html', 'browser'
+    attempts = Column(Integer, nullable=False, default=0)
+    successes = Column(Integer, nullable=False, default=0)
+    total_latency_ms = Column(Float, nullable=False, default=0.0)
+    last_success_at = Column(DateTime(timezone=True))
+    last_failure_at = Column(DateTime(timezone=True))
+    # Exponentially decayed counters as of recent_at; plans are built from these
+    recent_attempts = Column(Float, nullable=False, default=0.0)
+    recent_successes = Column(Float, nullable=False, default=0.0)
+    recent_latency_ms = Column(Float, nullable=False, default=0.0)
+    recent_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
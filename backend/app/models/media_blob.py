@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MediaBlob(Base):
+    """Stored image (optimized original + thumbnails) addressed by the SHA-256 of its normalized pixels"""
+    __tablename__ = "media_blobs"
+
+    content_hash = Column(String(64), primary_key=True)  # media_items.media_id
+    ref_count = Column(Integer, nullable=False, default=0)  # Rows in media_references
+    byte_size = Column(Integer, nullable=False, default=0)  # Original and thumbnails on disk
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    released_at = Column(DateTime(timezone=True))  # Last time ref_count was (or dropped to) zero; GC grace starts here
+
+    __table_args__ = (
+        # Garbage collection scans unreferenced blobs by age
+        Index("ix_media_blobs_gc", "ref_count", "released_at"),
+    )
+
+class MediaAlias(Base):
+    """Source URL whose image is already stored, so re-imports skip the download"""
+    __tablename__ = "media_aliases"
+
+    url_key = Column(String, primary_key=True)  # Canonical URL without tracking, CDN signature and resize params
+    content_hash = Column(String(64), ForeignKey("media_blobs.content_hash", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class MediaReference(Base):
+    """Recipe using a stored image; each row holds one count of media_blobs.ref_count"""
+    __tablename__ = "media_references"
+
+    content_hash = Column(String(64), ForeignKey("media_blobs.content_hash", ondelete="CASCADE"), primary_key=True)
+    recipe_id = Column(String, primary_key=True, index=True)  # No FK: recipes release their media explicitly
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
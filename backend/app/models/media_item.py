@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MediaItem(Base):
+    """Catalog entry of a stored image: its files, URLs and sizes (formerly media/metadata/<media_id>.json)"""
+    __tablename__ = "media_items"
+
+    media_id = Column(String, primary_key=True)  # Content hash; images migrated from the URL-keyed layout keep their old id
+    content_hash = Column(String(64), index=True)  # NULL for migrated images stored before deduplication
+    source_url = Column(String)  # URL the image was first fetched from
+    byte_size = Column(Integer, nullable=False, default=0)  # Sum of the columns below
+    original_bytes = Column(Integer, nullable=False, default=0)
+    small_bytes = Column(Integer, nullable=False, default=0)
+    medium_bytes = Column(Integer, nullable=False, default=0)
+    large_bytes = Column(Integer, nullable=False, default=0)
+    details = Column(JSON, nullable=False)  # original/thumbnails filenames, paths, URLs and image metadata
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_media_items_created_at", "created_at"),
+    )
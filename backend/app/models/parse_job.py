@@ -0,0 +1,45 @@
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.utils.id_utils import generate_id
+
+class ParseJob(Base):
+    """Recipe parse queued for the background workers"""
+    __tablename__ = "parse_jobs"
+
+    id = Column(String, primary_key=True, default=generate_id)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    job_type = Column(String, nullable=False)  # 'url', 'instagram', 'instagram_batch'
+    params = Column(JSON, nullable=False)  # url / urls, collection_id, max_results
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first (premium users)
+    attempts = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    result = Column(JSON)
+    error = Column(JSON)  # error_type, message, suggestions
+    worker_id = Column(String)
+    heartbeat_at = Column(DateTime(timezone=True))  # Running jobs with a stale heartbeat are requeued
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    user = relationship("User", backref="parse_jobs")
+    events = relationship("ParseJobEvent", back_populates="job", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Workers claim the highest-priority, oldest queued job
+        Index("ix_parse_jobs_claim", "status", priority.desc(), "created_at"),
+    )
+
+class ParseJobEvent(Base):
+    """Progress event emitted by a worker, read back by the SSE endpoint"""
+    __tablename__ = "parse_job_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String, ForeignKey("parse_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    payload = Column(JSON, nullable=False)  # ProgressEvent.to_dict()
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    job = relationship("ParseJob", back_populates="events")
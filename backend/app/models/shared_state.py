@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class SharedState(Base):
+    """Parser state shared by every worker (politeness delays, cookies, proxy health)"""
+    __tablename__ = "shared_state"
+
+    namespace = Column(String, primary_key=True)  # 'rate_limit', 'session', 'proxy_health'
+    key = Column(String, primary_key=True)
+    payload = Column(JSON, nullable=False)  # Plain JSON so the table also works in SQLite
+    expires_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,238 @@
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+import logging
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.parse_job import ParseJob, ParseJobEvent
+from app.services.subscription_service import SubscriptionService
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+JOB_TYPES = ("url", "instagram", "instagram_batch")
+
+CANCELLED_ERROR = {"error_type": "cancelled", "message": "The parse was cancelled."}
+
+WEBSITE_PROTECTION_SUGGESTIONS = [
+    "Try copying and pasting the recipe text manually",
+    "Take a screenshot and use image parsing instead",
+    "Look for the same recipe on a different website",
+    "Some websites block automated access to protect their content"
+]
+
+class ParseJobService:
+    """Durable queue of recipe parses run by the background workers"""
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc)
+
+    @staticmethod
+    def submit(user: User, job_type: str, params: Dict[str, Any], db: Session) -> ParseJob:
+        """Queue a parse for the user; premium users are claimed first"""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown parse job type: {job_type}")
+
+        priority = settings.PARSE_JOB_PREMIUM_PRIORITY if SubscriptionService.is_premium_user(user) else 0
+        job = ParseJob(user_id=user.id, job_type=job_type, params=params, priority=priority)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info(f"Queued {job_type} parse job {job.id} for user {user.id} (priority {priority})")
+        return job
+
+    @staticmethod
+    def get_job(job_id: str, user_id: str, db: Session) -> Optional[ParseJob]:
+        """Get a job owned by the user"""
+        return db.query(ParseJob).filter(ParseJob.id == job_id, ParseJob.user_id == user_id).first()
+
+    @staticmethod
+    def queue_position(job: ParseJob, db: Session) -> Optional[int]:
+        """Number of queued jobs that will be claimed before this one"""
+        if job.status != JOB_QUEUED:
+            return None
+        return db.query(ParseJob).filter(
+            ParseJob.status == JOB_QUEUED,
+            or_(
+                ParseJob.priority > job.priority,
+                and_(ParseJob.priority == job.priority, ParseJob.created_at < job.created_at)
+            )
+        ).count()
+
+    @staticmethod
+    def request_cancel(job: ParseJob, db: Session) -> ParseJob:
+        """Cancel a queued job now; a running job is cancelled by its worker at the next heartbeat"""
+        if job.status == JOB_QUEUED:
+            job.status = JOB_CANCELLED
+            job.error = CANCELLED_ERROR
+            job.finished_at = ParseJobService._now()
+        elif job.status == JOB_RUNNING:
+            job.cancel_requested = True
+        db.commit()
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def claim_next(worker_id: str, db: Session) -> Optional[ParseJob]:
+        """Claim the highest-priority queued job; SKIP LOCKED lets concurrent workers claim different rows"""
+        try:
+            # The conditional UPDATE keeps claims exclusive on databases without SKIP LOCKED (SQLite)
+            for _ in range(3):
+                candidate = db.query(ParseJob.id).filter(
+                    ParseJob.status == JOB_QUEUED
+                ).order_by(
+                    ParseJob.priority.desc(),
+                    ParseJob.created_at
+                ).with_for_update(skip_locked=True).first()
+
+                if candidate is None:
+                    db.rollback()
+                    return None
+
+                now = ParseJobService._now()
+                claimed = db.query(ParseJob).filter(
+                    ParseJob.id == candidate.id,
+                    ParseJob.status == JOB_QUEUED
+                ).update({
+                    ParseJob.status: JOB_RUNNING,
+                    ParseJob.worker_id: worker_id,
+                    ParseJob.attempts: ParseJob.attempts + 1,
+                    ParseJob.started_at: now,
+                    ParseJob.heartbeat_at: now,
+                }, synchronize_session=False)
+                db.commit()
+
+                if claimed:
+                    return db.get(ParseJob, candidate.id)
+            return None
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def heartbeat(job_id: str, worker_id: str, db: Session) -> bool:
+        """Refresh the job's heartbeat; returns False when the job should stop (cancelled or taken over)"""
+        updated = db.query(ParseJob).filter(
+            ParseJob.id == job_id,
+            ParseJob.worker_id == worker_id,
+            ParseJob.status == JOB_RUNNING,
+            ParseJob.cancel_requested.is_(False)
+        ).update({ParseJob.heartbeat_at: ParseJobService._now()}, synchronize_session=False)
+        db.commit()
+        return updated == 1
+
+    @staticmethod
+    def finish(job_id: str, worker_id: str, status: str, db: Session,
+               result: Optional[Dict[str, Any]] = None, error: Optional[Dict[str, Any]] = None) -> bool:
+        """Record a job's outcome, unless it was requeued and handed to another worker meanwhile"""
+        updated = db.query(ParseJob).filter(
+            ParseJob.id == job_id,
+            ParseJob.worker_id == worker_id,
+            ParseJob.status == JOB_RUNNING
+        ).update({
+            ParseJob.status: status,
+            ParseJob.result: result,
+            ParseJob.error: error,
+            ParseJob.finished_at: ParseJobService._now(),
+        }, synchronize_session=False)
+        db.commit()
+        if not updated:
+            logger.warning(f"Parse job {job_id} is no longer held by {worker_id}, dropping its {status} outcome")
+        return updated == 1
+
+    @staticmethod
+    def append_events(job_id: str, payloads: List[Dict[str, Any]], db: Session) -> None:
+        """Persist progress events so any API worker can stream them"""
+        db.add_all([ParseJobEvent(job_id=job_id, payload=payload) for payload in payloads])
+        db.commit()
+
+    @staticmethod
+    def events_since(job_id: str, after_id: int, db: Session) -> List[ParseJobEvent]:
+        """Progress events of a job with ids greater than after_id, oldest first"""
+        return db.query(ParseJobEvent).filter(
+            ParseJobEvent.job_id == job_id,
+            ParseJobEvent.id > after_id
+        ).order_by(ParseJobEvent.id).all()
+
+    @staticmethod
+    def requeue_stale(db: Session) -> int:
+        """Requeue running jobs whose worker stopped heartbeating; fail them after PARSE_JOB_MAX_ATTEMPTS"""
+        cutoff = ParseJobService._now() - timedelta(seconds=settings.PARSE_JOB_STALE_SECONDS)
+        try:
+            stale_jobs = db.query(ParseJob).filter(
+                ParseJob.status == JOB_RUNNING,
+                ParseJob.heartbeat_at < cutoff
+            ).with_for_update(skip_locked=True).all()
+
+            for job in stale_jobs:
+                job.worker_id = None
+                if job.cancel_requested:
+                    job.status = JOB_CANCELLED
+                    job.error = CANCELLED_ERROR
+                    job.finished_at = ParseJobService._now()
+                elif job.attempts >= settings.PARSE_JOB_MAX_ATTEMPTS:
+                    job.status = JOB_FAILED
+                    job.finished_at = ParseJobService._now()
+                    job.error = {
+                        "error_type": "worker_lost",
+                        "message": "The parse was interrupted too many times. Please try again."
+                    }
+                else:
+                    job.status = JOB_QUEUED
+            db.commit()
+
+            if stale_jobs:
+                logger.warning(f"Recovered {len(stale_jobs)} parse jobs abandoned by their workers")
+            return len(stale_jobs)
+        except Exception as e:
+            logger.error(f"Failed to requeue stale parse jobs: {str(e)}")
+            db.rollback()
+            return 0
+
+    @staticmethod
+    def purge_finished(db: Session) -> int:
+        """Delete finished jobs (and their events) older than PARSE_JOB_RETENTION_DAYS"""
+        cutoff = ParseJobService._now() - timedelta(days=settings.PARSE_JOB_RETENTION_DAYS)
+        try:
+            old_jobs = db.query(ParseJob.id).filter(
+                ParseJob.status.in_(FINISHED_STATUSES),
+                ParseJob.finished_at < cutoff
+            )
+            db.query(ParseJobEvent).filter(ParseJobEvent.job_id.in_(old_jobs.scalar_subquery())).delete(synchronize_session=False)
+            removed = db.query(ParseJob).filter(
+                ParseJob.status.in_(FINISHED_STATUSES),
+                ParseJob.finished_at < cutoff
+            ).delete(synchronize_session=False)
+            db.commit()
+            return removed
+        except Exception as e:
+            logger.error(f"Failed to purge finished parse jobs: {str(e)}")
+            db.rollback()
+            return 0
+
+    @staticmethod
+    def to_dict(job: ParseJob, db: Session) -> Dict[str, Any]:
+        """Status summary returned by the job endpoints"""
+        return {
+            "job_id": job.id,
+            "job_type": job.job_type,
+            "status": job.status,
+            "priority": job.priority,
+            "queue_position": ParseJobService.queue_position(job, db),
+            "attempts": job.attempts,
+            "cancel_requested": job.cancel_requested,
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
@@ -0,0 +1,184 @@
+"""
+Blocked-page detection for the URL parser and browser fallback.
+Matches every known block/challenge phrase in one pass with a compiled regex
+alternation, over a bounded sample of the visible text (<title>, <h1> and the
+start of the body, skipping navigation chrome), and reports which phrases hit.
+Account and paywall words ("sign in", "subscribe") are only matched in the
+title and h1 headings: in body text they are mostly newsletter boxes and
+save-recipe prompts on pages that are not blocked at all.
+"""
+import re
+import logging
+from typing import List, Iterable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from bs4 import NavigableString, Tag
+    from bs4.element import PreformattedString
+except ImportError:
+    NavigableString = Tag = PreformattedString = None
+
+# Phrases that show up on block and challenge pages, anywhere in the visible text
+CHALLENGE_INDICATORS = (
+    'access denied', 'forbidden', 'blocked', 'unauthorized access',
+    'please enable javascript', 'verify you are human',
+    'captcha', 'are you a robot', 'cloudflare', 'ddos protection',
+    'rate limit', 'too many requests', 'temporarily unavailable',
+    'security check', 'suspicious activity', 'bot detected',
+    'please try again later', 'service unavailable',
+    'checking your browser', 'moment please', 'ray id',
+    'error 1020', 'error 1015', 'error 1012',  # Cloudflare errors
+)
+
+# Login walls and paywalls; only a block when the page is titled or headed by them
+HEADING_INDICATORS = ('sign in', 'login', 'subscribe', 'membership required')
+
+# Elements whose text is never shown, or is site chrome rather than page content
+NON_VISIBLE_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'head'}
+CHROME_TAGS = {'nav', 'header', 'footer', 'aside'}
+
+TITLE_PATTERN = re.compile(r'<title\b[^>]*>(.*?)</title\s*>', re.IGNORECASE | re.DOTALL)
+H1_PATTERN = re.compile(r'<h1\b[^>]*>(.*?)</h1\s*>', re.IGNORECASE | re.DOTALL)
+BODY_OPEN_PATTERN = re.compile(r'<body\b[^>]*>', re.IGNORECASE)
+HIDDEN_BLOCK_PATTERN = re.compile(
+    r'<(script|style|noscript|template|svg|iframe|nav|header|footer|aside)\b.*?</\1\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+class BlockedPageDetector:
+    """Finds block-page phrases in a page's visible text with a single compiled pattern"""
+
+    def __init__(self, indicators: Iterable[str] = CHALLENGE_INDICATORS,
+                 heading_indicators: Iterable[str] = HEADING_INDICATORS, sample_chars: int = 16 * 1024):
+        self.indicators = tuple(indicators)
+        self.heading_indicators = tuple(heading_indicators)
+        self.sample_chars = sample_chars
+
+        # Phrases share prefixes, so the alternation is factored as a trie: at each
+        # position the regex engine follows one branch instead of trying every phrase
+        self.pattern = re.compile(rf'\b{_trie_pattern(self.indicators)}\b')
+        self.heading_pattern = re.compile(rf'\b{_trie_pattern(self.heading_indicators)}\b')
+
+    @classmethod
+    def from_settings(cls) -> "BlockedPageDetector":
+        return cls(sample_chars=settings.BLOCK_DETECTION_SAMPLE_KB * 1024)
+
+    def find_indicators(self, text: str, headings: str = "") -> List[str]:
+        """Return each indicator found, in order of first appearance: challenge phrases
+        anywhere in headings or text, account/paywall phrases only in headings"""
+        headings = ' '.join(headings.lower().split())
+        found = (self.heading_pattern.findall(headings)
+                 + self.pattern.findall(headings) + self.pattern.findall(' '.join(text.lower().split())))
+        hits = []
+        for indicator in found:
+            if indicator not in hits:
+                hits.append(indicator)
+        return hits
+
+    def detect_in_soup(self, soup) -> List[str]:
+        """Check the title, h1 headings and the start of the visible body of a parsed page"""
+        return self.find_indicators(self.visible_text_from_soup(soup), self.headings_from_soup(soup))
+
+    def detect_in_html(self, html: str) -> List[str]:
+        """Check raw HTML (e.g. a 403/429 body) without building a tree"""
+        return self.find_indicators(self.visible_text_from_html(html), self.headings_from_html(html))
+
+    @staticmethod
+    def headings_from_soup(soup) -> str:
+        """Title and the first h1 headings of a parsed page"""
+        parts = [soup.title.string] if soup.title and soup.title.string else []
+        parts.extend(h1.get_text(' ') for h1 in soup.find_all('h1', limit=3))
+        return ' '.join(parts)
+
+    @staticmethod
+    def headings_from_html(html: str) -> str:
+        """Regex-based equivalent of headings_from_soup for raw HTML"""
+        title = TITLE_PATTERN.search(html)
+        parts = [title.group(1)] if title else []
+        parts.extend(H1_PATTERN.findall(html)[:3])
+        return TAG_PATTERN.sub(' ', ' '.join(parts))
+
+    def visible_text_from_soup(self, soup) -> str:
+        """Title + h1 text + up to sample_chars of visible body text"""
+        parts = []
+        if soup.title and soup.title.string:
+            parts.append(soup.title.string)
+
+        body = soup.body or soup
+        remaining = self.sample_chars
+        for text in self._iter_visible_strings(body):
+            parts.append(text[:remaining])
+            remaining -= len(text)
+            if remaining <= 0:
+                break
+
+        return ' '.join(parts)
+
+    def visible_text_from_html(self, html: str) -> str:
+        """Regex-based equivalent of visible_text_from_soup for raw HTML"""
+        parts = []
+
+        title = TITLE_PATTERN.search(html)
+        if title:
+            parts.append(TAG_PATTERN.sub(' ', title.group(1)))
+        parts.extend(TAG_PATTERN.sub(' ', h1) for h1 in H1_PATTERN.findall(html)[:3])
+
+        body_open = BODY_OPEN_PATTERN.search(html)
+        body = html[body_open.end():] if body_open else html
+        # Markup is several times larger than its text, so strip a generous window
+        body = HIDDEN_BLOCK_PATTERN.sub(' ', body[:self.sample_chars * 8])
+        parts.append(TAG_PATTERN.sub(' ', body)[:self.sample_chars])
+
+        return ' '.join(parts)
+
+    def _iter_visible_strings(self, root) -> Iterable[str]:
+        """Yield non-empty visible strings in document order, skipping hidden and chrome subtrees"""
+        stack = [iter(root.children)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                continue
+
+            if isinstance(child, Tag):
+                if child.name in NON_VISIBLE_TAGS or child.has_attr('hidden'):
+                    continue
+                if child.name in CHROME_TAGS or child.get('role') == 'navigation':
+                    # Skip menus and footers, but keep a page heading placed in the header
+                    heading = child.find('h1')
+                    if heading:
+                        yield heading.get_text(' ')
+                    continue
+                stack.append(iter(child.children))
+            elif isinstance(child, NavigableString) and not isinstance(child, PreformattedString):
+                text = child.strip()
+                if text:
+                    yield text
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Build a regex alternation factored on shared prefixes (longest match wins)"""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase.lower():
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+# Global detector shared by the URL parser and the browser fallback
+blocked_page_detector = BlockedPageDetector.from_settings()
@@ -3,118 +3,141 @@ Browser automation fallback using Playwright for heavily protected websites.
 Used when traditional HTTP requests fail due to JavaScript requirements or anti-bot protection.
 """
 import asyncio
+import html
 import logging
-from typing import Optional, Dict, Any, TYPE_CHECKING
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 from urllib.parse import urlparse
 
+from app.core.config import settings
+from .browser_pool import browser_pool, PLAYWRIGHT_AVAILABLE
+from .blocking_detection import blocked_page_detector, CHROME_TAGS
+from .html_backend import make_soup
+
 if TYPE_CHECKING:
-    from playwright.async_api import Browser, BrowserContext, Page
+    from playwright.async_api import BrowserContext, Page
 
 logger = logging.getLogger(__name__)
 
-try:
-    from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError as e:
-    logger.warning(f"Playwright not available: {e}")
-    PLAYWRIGHT_AVAILABLE = False
-    async_playwright = None
-    Browser = None
-    BrowserContext = None
-    Page = None
+# Resource types the recipe extraction never needs
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+
+# Third-party ad, tracking and analytics hosts (subdomains are matched too)
+BLOCKED_THIRD_PARTY_HOSTS = (
+    'doubleclick.net', 'googlesyndication.com', 'googletagservices.com', 'googletagmanager.com',
+    'google-analytics.com', 'adservice.google.com', 'amazon-adsystem.com', 'adnxs.com',
+    'criteo.com', 'criteo.net', 'pubmatic.com', 'rubiconproject.com', 'openx.net',
+    'casalemedia.com', 'moatads.com', 'scorecardresearch.com', 'quantserve.com',
+    'taboola.com', 'outbrain.com', 'mediavine.com', 'adthrive.com', 'hotjar.com',
+    'facebook.net', 'segment.io', 'newrelic.com', 'nr-data.net', 'chartbeat.com',
+)
+
+# Selectors for the recipe card returned alongside the JSON-LD
+RECIPE_SECTION_SELECTORS = [
+    '.wprm-recipe-container',
+    '.wprm-recipe',
+    '.tasty-recipes',
+    '.mv-create-card',
+    '[itemtype*="schema.org/Recipe"]',
+    '.recipe-card',
+    '#recipe',
+    '.recipe',
+]
+
+# Site chrome left out of the block-page check (a "Login" link in the nav is not a login wall)
+CHROME_SELECTOR = ', '.join(sorted(CHROME_TAGS) + ['[role=navigation]'])
+
+# Runs in the page: the title with the h1 headings, and the start of the rendered body
+# text, skipping the same hidden and chrome subtrees as BlockedPageDetector
+VISIBLE_TEXT_SCRIPT = """
+([limit, chromeSelector]) => {
+    const headings = Array.from(document.querySelectorAll('h1')).slice(0, 3).map(h1 => h1.innerText);
+    const skipped = chromeSelector + ', script, style, noscript, template, svg, iframe, [hidden]';
+    const parts = [];
+    let remaining = limit;
+    if (document.body) {
+        // Rejecting an element skips its whole subtree; CSS-hidden elements are rejected like innerText would
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+            acceptNode: node => {
+                if (node.nodeType === Node.TEXT_NODE) {
+                    return NodeFilter.FILTER_ACCEPT;
+                }
+                if (node.matches(skipped) || (node.checkVisibility && !node.checkVisibility())) {
+                    return NodeFilter.FILTER_REJECT;
+                }
+                return NodeFilter.FILTER_SKIP;
+            }
+        });
+        while (remaining > 0 && walker.nextNode()) {
+            const text = walker.currentNode.textContent.trim();
+            if (text) {
+                parts.push(text.slice(0, remaining));
+                remaining -= text.length;
+            }
+        }
+    }
+    return {headings: [document.title, ...headings].join(' '), text: parts.join(' ')};
+}
+"""
+
+# Runs in the page: returns Recipe JSON-LD blocks and the recipe card HTML once present
+EXTRACT_RECIPE_SCRIPT = """
+(selectors) => {
+    const recipeType = /"@type"\\s*:\\s*(\\[[^\\]]*)?"Recipe"/;
+    const jsonLd = Array.from(document.querySelectorAll('script[type="application/ld+json"]'))
+        .map(script => script.textContent || '')
+        .filter(text => recipeType.test(text));
+    if (!jsonLd.length) {
+        return null;
+    }
+    let sectionHtml = null;
+    for (const selector of selectors) {
+        const section = document.querySelector(selector);
+        if (section) {
+            sectionHtml = section.outerHTML;
+            break;
+        }
+    }
+    return { jsonLd: jsonLd, sectionHtml: sectionHtml, title: document.title };
+}
+"""
 
 
 class BrowserAutomation:
     """Handles browser automation for sites that block traditional scraping"""
     
     def __init__(self):
-        self.browser: Optional['Browser'] = None
         self.context: Optional['BrowserContext'] = None
-        self._playwright = None
+        self._lease = None
+        self.block_resources = settings.BROWSER_BLOCK_RESOURCES
+        self.resource_allowlist: Dict[str, List[str]] = settings.BROWSER_RESOURCE_ALLOWLIST
+        self.stats = {
+            "blocked_requests": 0,
+            "early_exit": False,
+        }
         
     async def __aenter__(self):
-        """Async context manager entry"""
+        """Borrow a fresh context from the shared browser pool"""
         if not PLAYWRIGHT_AVAILABLE:
             raise ImportError("Playwright is required for browser automation. Install with: pip install playwright")
         
-        self._playwright = await async_playwright().start()
-        
-        # Launch browser with realistic settings
-        self.browser = await self._playwright.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--disable-gpu',
-                '--no-first-run',
-                '--no-default-browser-check',
-                '--disable-extensions',
-                '--disable-default-apps',
-                '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-            ]
-        )
-        
-        # Create context with realistic settings
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-            locale='en-US',
-            timezone_id='America/New_York',
-            extra_http_headers={
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-            }
-        )
-        
-        # Add realistic browser behavior
-        await self.context.add_init_script("""
-            // Remove webdriver property
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined,
-            });
-            
-            // Mock permissions
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => (
-                parameters.name === 'notifications' ?
-                    Promise.resolve({ state: Intl.DateTimeFormat().resolvedOptions().timeZone === 'Asia/Kolkata' ? 'denied' : 'granted' }) :
-                    originalQuery(parameters)
-            );
-            
-            // Mock plugins
-            Object.defineProperty(navigator, 'plugins', {
-                get: () => [1, 2, 3, 4, 5],
-            });
-            
-            // Mock languages
-            Object.defineProperty(navigator, 'languages', {
-                get: () => ['en-US', 'en'],
-            });
-        """)
-        
+        self._lease = browser_pool.lease()
+        self.context = await self._lease.__aenter__()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.context:
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
-        if self._playwright:
-            await self._playwright.stop()
+        """Return the context to the pool (the browser itself stays warm)"""
+        lease, self._lease = self._lease, None
+        self.context = None
+        if lease:
+            await lease.__aexit__(exc_type, exc_val, exc_tb)
     
-    async def fetch_page_content(self, url: str, wait_for_content: bool = True) -> tuple[str, str]:
+    async def fetch_page_content(self, url: str, wait_for_content: bool = True, extract_recipe_early: bool = False) -> tuple[str, str]:
         """
         Fetch page content using browser automation
         
+        With extract_recipe_early, returns right after DOMContentLoaded when the page already
+        has a Recipe JSON-LD block, with the HTML reduced to that JSON-LD plus the recipe card.
+        
         Returns:
             tuple: (page_html, page_title)
         """
@@ -126,25 +149,44 @@ class BrowserAutomation:
         try:
             logger.info(f"Loading page with Playwright: {url}")
             
+            # Skip images, fonts, media and third-party ads/analytics
+            if self.block_resources:
+                page_domain = urlparse(url).netloc.lower()
+                await page.route("**/*", lambda route: self._route_request(route, page_domain))
+            
             # Navigate to page with realistic timing
             await page.goto(url, wait_until='domcontentloaded', timeout=30000)
             
+            # Most recipe sites ship the JSON-LD in the initial HTML, so check for it once before any waiting
+            if extract_recipe_early:
+                extracted = await self._extract_recipe_early(page)
+                if extracted:
+                    return extracted
+            
             # Wait a bit for any dynamic content
             await asyncio.sleep(2)
             
             # Check if we hit a blocking page
-            page_text = await page.text_content('body') or ""
-            if self._is_blocked_page(page_text.lower()):
-                logger.warning(f"Detected blocking page for {url}")
+            hits = await self._find_block_indicators(page)
+            if hits:
+                logger.warning(f"Detected blocking page for {url} (matched: {', '.join(hits)})")
                 
                 # Try some basic evasion techniques
                 await self._try_bypass_techniques(page)
                 
                 # Wait and check again
                 await asyncio.sleep(3)
-                page_text = await page.text_content('body') or ""
-                if self._is_blocked_page(page_text.lower()):
-                    raise Exception("Page appears to be blocking automated access even with browser automation")
+                hits = await self._find_block_indicators(page)
+                if hits:
+                    raise Exception(
+                        f"Page appears to be blocking automated access even with browser automation (matched: {', '.join(hits)})"
+                    )
+                
+                # The real page may carry the JSON-LD now that the challenge has passed
+                if extract_recipe_early:
+                    extracted = await self._extract_recipe_early(page)
+                    if extracted:
+                        return extracted
             
             # Wait for recipe-specific content if requested
             if wait_for_content:
@@ -162,8 +204,57 @@ class BrowserAutomation:
             logger.error(f"Browser automation failed for {url}: {e}")
             raise
         finally:
+            await browser_pool.record_page_memory(self.context, page)
             await page.close()
     
+    async def _route_request(self, route, page_domain: str) -> None:
+        """Abort requests for resources the parser does not need"""
+        request = route.request
+        if self._should_block_request(request.resource_type, urlparse(request.url).netloc.lower(), page_domain):
+            self.stats["blocked_requests"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+    
+    def _should_block_request(self, resource_type: str, host: str, page_domain: str) -> bool:
+        """Decide whether a sub-resource can be skipped, honoring the per-domain allowlist"""
+        site = page_domain[4:] if page_domain.startswith('www.') else page_domain
+        allowed = self.resource_allowlist.get(site, [])
+        
+        if resource_type in BLOCKED_RESOURCE_TYPES:
+            return resource_type not in allowed
+        
+        if any(host == blocked or host.endswith('.' + blocked) for blocked in BLOCKED_THIRD_PARTY_HOSTS):
+            return not any(host == entry or host.endswith('.' + entry) for entry in allowed)
+        
+        return False
+    
+    async def _extract_recipe_early(self, page: 'Page') -> Optional[tuple[str, str]]:
+        """Recipe JSON-LD already in the DOM, with the recipe card, as a small HTML document.
+        Never waits: pages without it go on to the regular content wait."""
+        try:
+            extracted = await page.evaluate(EXTRACT_RECIPE_SCRIPT, RECIPE_SECTION_SELECTORS)
+        except Exception as e:
+            logger.debug(f"No Recipe JSON-LD found early: {e}")
+            return None
+        
+        if not extracted:
+            return None
+        
+        self.stats["early_exit"] = True
+        page_title = extracted.get('title') or ""
+        scripts = ''.join(
+            f'<script type="application/ld+json">{json_ld}</script>'
+            for json_ld in extracted.get('jsonLd', [])
+        )
+        html_content = (
+            f"<html><head><title>{html.escape(page_title)}</title>{scripts}</head>"
+            f"<body>{extracted.get('sectionHtml') or ''}</body></html>"
+        )
+        
+        logger.debug(f"Extracted Recipe JSON-LD early: {page_title[:50]}...")
+        return html_content, page_title
+    
     async def _wait_for_recipe_content(self, page: 'Page') -> None:
         """Wait for recipe content to load"""
         try:
@@ -230,20 +321,15 @@ class BrowserAutomation:
         except Exception as e:
             logger.debug(f"Bypass techniques failed: {e}")
     
-    def _is_blocked_page(self, page_text: str) -> bool:
-        """Check if page content indicates blocking"""
-        blocking_indicators = [
-            'access denied', 'forbidden', 'blocked',
-            'verify you are human', 'captcha', 'are you a robot',
-            'cloudflare', 'ddos protection', 'rate limit',
-            'security check', 'suspicious activity', 'bot detected',
-            'checking your browser', 'moment please',
-            'error 1020', 'error 1015', 'error 1012',
-            'please enable javascript',
-            'service unavailable', 'temporarily unavailable'
-        ]
-        
-        return any(indicator in page_text for indicator in blocking_indicators)
+    async def _find_block_indicators(self, page: 'Page') -> List[str]:
+        """Return the block-page phrases found in the rendered page's visible text"""
+        try:
+            visible = await page.evaluate(VISIBLE_TEXT_SCRIPT, [blocked_page_detector.sample_chars, CHROME_SELECTOR])
+        except Exception as e:
+            logger.debug(f"Could not read visible page text: {e}")
+            return blocked_page_detector.detect_in_soup(make_soup(await page.content() or ""))
+        visible = visible or {}
+        return blocked_page_detector.find_indicators(visible.get("text") or "", visible.get("headings") or "")
     
     async def test_browser_availability(self) -> bool:
         """Test if browser automation is working"""
@@ -0,0 +1,330 @@
+"""
+Long-lived Playwright browser pool for the browser-automation fallback.
+Keeps N warm Chromium processes and hands out a fresh browser context per
+request, so a fallback parse no longer pays for starting Playwright and
+launching a browser. Browsers are recycled after a number of pages or when
+their JS heap grows too large.
+"""
+import asyncio
+import time
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, AsyncIterator, TYPE_CHECKING
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext
+
+logger = logging.getLogger(__name__)
+
+try:
+    from playwright.async_api import async_playwright
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"Playwright not available: {e}")
+    PLAYWRIGHT_AVAILABLE = False
+    async_playwright = None
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+
+# Launch browser with realistic settings
+LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-extensions',
+    '--disable-default-apps',
+    f'--user-agent={USER_AGENT}'
+]
+
+# Create contexts with realistic settings
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': USER_AGENT,
+    'locale': 'en-US',
+    'timezone_id': 'America/New_York',
+    'extra_http_headers': {
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'DNT': '1',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+    }
+}
+
+# Add realistic browser behavior
+STEALTH_INIT_SCRIPT = """
+    // Remove webdriver property
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+
+    // Mock permissions
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+            Promise.resolve({ state: Intl.DateTimeFormat().resolvedOptions().timeZone === 'Asia/Kolkata' ? 'denied' : 'granted' }) :
+            originalQuery(parameters)
+    );
+
+    // Mock plugins
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5],
+    });
+
+    // Mock languages
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['en-US', 'en'],
+    });
+"""
+
+
+class BrowserPoolTimeoutError(Exception):
+    """Raised when no browser page slot frees up within the acquire timeout"""
+    pass
+
+
+class PooledBrowser:
+    """A warm browser process and its usage counters"""
+
+    def __init__(self, browser: 'Browser', browser_id: int):
+        self.browser = browser
+        self.browser_id = browser_id
+        self.created_at = time.time()
+        self.active_pages = 0
+        self.pages_served = 0
+        self.peak_js_heap_mb = 0.0
+        self.retiring = False
+
+    def is_usable(self) -> bool:
+        return not self.retiring and self.browser.is_connected()
+
+
+class BrowserPool:
+    """Shares a few warm Chromium browsers between browser-automation requests"""
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_concurrent_pages: int = 4,
+        recycle_after_pages: int = 50,
+        max_js_heap_mb: float = 512.0,
+        acquire_timeout: float = 20.0,
+        enabled: bool = True,
+    ):
+        self.size = max(1, size)
+        self.max_concurrent_pages = max(1, max_concurrent_pages)
+        self.recycle_after_pages = recycle_after_pages
+        self.max_js_heap_mb = max_js_heap_mb
+        self.acquire_timeout = acquire_timeout
+        self.enabled = enabled and PLAYWRIGHT_AVAILABLE
+
+        self._playwright = None
+        self._browsers: List[PooledBrowser] = []
+        self._context_owners: Dict[int, PooledBrowser] = {}
+        self._page_slots = asyncio.Semaphore(self.max_concurrent_pages)
+        self._lock = asyncio.Lock()
+        self._next_browser_id = 0
+        self._started = False
+
+        self.stats = {
+            "leases": 0,
+            "waiting": 0,
+            "acquire_timeouts": 0,
+            "total_wait_ms": 0,
+            "browsers_launched": 0,
+            "browsers_recycled": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "BrowserPool":
+        """Build the pool from application settings"""
+        return cls(
+            size=settings.BROWSER_POOL_SIZE,
+            max_concurrent_pages=settings.BROWSER_POOL_MAX_CONCURRENT_PAGES,
+            recycle_after_pages=settings.BROWSER_POOL_RECYCLE_AFTER_PAGES,
+            max_js_heap_mb=settings.BROWSER_POOL_MAX_JS_HEAP_MB,
+            acquire_timeout=settings.BROWSER_POOL_ACQUIRE_TIMEOUT,
+            enabled=settings.BROWSER_POOL_ENABLED,
+        )
+
+    async def startup(self) -> None:
+        """Start Playwright and launch the warm browsers"""
+        if not self.enabled:
+            return
+
+        async with self._lock:
+            if self._started:
+                return
+
+            self._playwright = await async_playwright().start()
+            for _ in range(self.size):
+                self._browsers.append(await self._launch())
+            self._started = True
+
+        logger.info(
+            f"Browser pool started ({self.size} browsers, "
+            f"max {self.max_concurrent_pages} concurrent pages)"
+        )
+
+    async def shutdown(self) -> None:
+        """Close every browser and stop Playwright"""
+        async with self._lock:
+            browsers = list(self._browsers)
+            self._browsers.clear()
+            self._started = False
+
+            for pooled in browsers:
+                await self._close(pooled)
+
+            if self._playwright:
+                try:
+                    await self._playwright.stop()
+                except Exception as e:
+                    logger.warning(f"Failed to stop Playwright: {e}")
+                self._playwright = None
+
+    async def _launch(self) -> PooledBrowser:
+        browser = await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        self._next_browser_id += 1
+        self.stats["browsers_launched"] += 1
+        return PooledBrowser(browser, self._next_browser_id)
+
+    async def _close(self, pooled: PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.debug(f"Failed to close pooled browser {pooled.browser_id}: {e}")
+
+    async def _checkout_browser(self) -> PooledBrowser:
+        """Pick the least busy usable browser, replacing dead or retired ones"""
+        async with self._lock:
+            for pooled in list(self._browsers):
+                if not pooled.browser.is_connected():
+                    logger.warning(f"Pooled browser {pooled.browser_id} disconnected, replacing it")
+                    self._browsers.remove(pooled)
+
+            usable = [pooled for pooled in self._browsers if pooled.is_usable()]
+            while len(usable) < self.size:
+                pooled = await self._launch()
+                self._browsers.append(pooled)
+                usable.append(pooled)
+
+            pooled = min(usable, key=lambda candidate: candidate.active_pages)
+            pooled.active_pages += 1
+            return pooled
+
+    async def _checkin_browser(self, pooled: PooledBrowser) -> None:
+        """Return a browser and recycle it once it has served enough pages"""
+        async with self._lock:
+            pooled.active_pages -= 1
+            pooled.pages_served += 1
+
+            if not pooled.retiring and (
+                pooled.pages_served >= self.recycle_after_pages
+                or pooled.peak_js_heap_mb >= self.max_js_heap_mb
+            ):
+                logger.info(
+                    f"Recycling pooled browser {pooled.browser_id} after {pooled.pages_served} pages "
+                    f"(peak JS heap {pooled.peak_js_heap_mb:.0f} MB)"
+                )
+                pooled.retiring = True
+                self.stats["browsers_recycled"] += 1
+
+            # Retired browsers are closed once their last page is done
+            if pooled.retiring and pooled.active_pages == 0 and pooled in self._browsers:
+                self._browsers.remove(pooled)
+                await self._close(pooled)
+
+    async def record_page_memory(self, context: 'BrowserContext', page) -> None:
+        """Sample a page's JS heap before it closes (Chromium exposes performance.memory)"""
+        pooled = self._context_owners.get(id(context))
+        if pooled is None:
+            return
+
+        try:
+            heap_bytes = await page.evaluate(
+                "() => (performance.memory && performance.memory.usedJSHeapSize) || 0"
+            )
+            pooled.peak_js_heap_mb = max(pooled.peak_js_heap_mb, heap_bytes / (1024 * 1024))
+        except Exception as e:
+            logger.debug(f"Could not sample page memory: {e}")
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator['BrowserContext']:
+        """Borrow a fresh browser context, waiting for a free page slot if the pool is saturated"""
+        if not self.enabled:
+            raise ImportError("Playwright is required for browser automation. Install with: pip install playwright")
+
+        if not self._started:
+            await self.startup()
+
+        wait_start = time.time()
+        self.stats["waiting"] += 1
+        try:
+            await asyncio.wait_for(self._page_slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.stats["acquire_timeouts"] += 1
+            raise BrowserPoolTimeoutError(
+                f"All {self.max_concurrent_pages} browser pages are busy; gave up after {self.acquire_timeout:g}s"
+            )
+        finally:
+            self.stats["waiting"] -= 1
+
+        self.stats["leases"] += 1
+        self.stats["total_wait_ms"] += int((time.time() - wait_start) * 1000)
+
+        pooled = None
+        context = None
+        try:
+            pooled = await self._checkout_browser()
+            context = await pooled.browser.new_context(**CONTEXT_OPTIONS)
+            await context.add_init_script(STEALTH_INIT_SCRIPT)
+            self._context_owners[id(context)] = pooled
+
+            yield context
+        finally:
+            if context is not None:
+                self._context_owners.pop(id(context), None)
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Failed to close browser context: {e}")
+            if pooled is not None:
+                await self._checkin_browser(pooled)
+            self._page_slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        leases = self.stats["leases"]
+        return {
+            "enabled": self.enabled,
+            "started": self._started,
+            "size": self.size,
+            "max_concurrent_pages": self.max_concurrent_pages,
+            "recycle_after_pages": self.recycle_after_pages,
+            "browsers": [
+                {
+                    "id": pooled.browser_id,
+                    "active_pages": pooled.active_pages,
+                    "pages_served": pooled.pages_served,
+                    "peak_js_heap_mb": round(pooled.peak_js_heap_mb, 1),
+                    "age_seconds": int(time.time() - pooled.created_at),
+                    "retiring": pooled.retiring,
+                }
+                for pooled in self._browsers
+            ],
+            **self.stats,
+            "avg_wait_ms": self.stats["total_wait_ms"] / leases if leases else 0.0,
+        }
+
+
+# Global browser pool (started/stopped by the FastAPI lifecycle hooks)
+browser_pool = BrowserPool.from_settings()
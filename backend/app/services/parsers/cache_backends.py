@@ -0,0 +1,206 @@
+"""
+Pluggable key/value cache backends used by the parser caches.
+The in-process LRU is the default; the database backend stores entries in the
+shared cache_entries table so every uvicorn worker sees the same data.
+"""
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Tuple
+
+from app.core.sessions import app_session_factory
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Interface for cache backends storing JSON-serializable payloads"""
+
+    # True when calls do blocking I/O; async callers then run them in a thread
+    blocking = False
+
+    async def offload(self, func, *args):
+        """Run func (a call that uses this backend) in a worker thread when the backend blocks"""
+        if self.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, payload: Dict[str, Any], ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.__class__.__name__}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Process-local LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+
+        # Mark as most recently used
+        self._entries.move_to_end(key)
+        return payload
+
+    def set(self, key: str, payload: Dict[str, Any], ttl_seconds: float) -> None:
+        self._entries[key] = (time.time() + ttl_seconds, payload)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class DatabaseCacheBackend(CacheBackend):
+    """Cache backend persisted in the cache_entries table (shared across workers)"""
+
+    blocking = True
+
+    def __init__(self, namespace: str, session_factory=None):
+        self.namespace = namespace
+        self._session_factory = session_factory
+
+    def _session(self):
+        if self._session_factory is None:
+            self._session_factory = app_session_factory()
+        return self._session_factory()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        from app.models.cache_entry import CacheEntry
+
+        db = self._session()
+        try:
+            entry = db.get(CacheEntry, (self.namespace, key))
+            if entry is None:
+                return None
+
+            expires_at = entry.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at <= datetime.now(timezone.utc):
+                db.delete(entry)
+                db.commit()
+                return None
+
+            return entry.payload
+        except Exception as e:
+            logger.warning(f"Cache lookup failed for {self.namespace}:{key}: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def set(self, key: str, payload: Dict[str, Any], ttl_seconds: float) -> None:
+        from app.models.cache_entry import CacheEntry
+
+        db = self._session()
+        try:
+            db.merge(CacheEntry(
+                namespace=self.namespace,
+                key=key,
+                payload=payload,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+            ))
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Cache store failed for {self.namespace}:{key}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def delete(self, key: str) -> None:
+        from app.models.cache_entry import CacheEntry
+
+        db = self._session()
+        try:
+            db.query(CacheEntry).filter(
+                CacheEntry.namespace == self.namespace,
+                CacheEntry.key == key
+            ).delete()
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {self.namespace}:{key}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def clear(self) -> None:
+        from app.models.cache_entry import CacheEntry
+
+        db = self._session()
+        try:
+            db.query(CacheEntry).filter(CacheEntry.namespace == self.namespace).delete()
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Cache clear failed for {self.namespace}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows for this namespace (returns number removed)"""
+        from app.models.cache_entry import CacheEntry
+
+        db = self._session()
+        try:
+            removed = db.query(CacheEntry).filter(
+                CacheEntry.namespace == self.namespace,
+                CacheEntry.expires_at <= datetime.now(timezone.utc)
+            ).delete()
+            db.commit()
+            return removed
+        except Exception as e:
+            logger.warning(f"Cache purge failed for {self.namespace}: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "database", "namespace": self.namespace}
+
+
+def create_cache_backend(backend: str, namespace: str, max_entries: int = 1000) -> CacheBackend:
+    """Build a cache backend by name ('memory' or 'database')"""
+    if backend == "database":
+        return DatabaseCacheBackend(namespace)
+    if backend != "memory":
+        logger.warning(f"Unknown cache backend '{backend}', falling back to in-process LRU")
+    return InMemoryCacheBackend(max_entries=max_entries)
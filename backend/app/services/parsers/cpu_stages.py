@@ -0,0 +1,101 @@
+"""
+Parsing stages run by the CPU pool (app.core.cpu_pool).
+Each stage is a module-level function taking and returning compact payloads:
+HTML goes in zlib-compressed, results come back as plain dicts, and errors come
+back as data rather than pickled exceptions. Parsers are created once per
+process, by warm_worker in pool workers or on first inline use.
+"""
+import zlib
+import logging
+from dataclasses import asdict
+from typing import Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Parser instances of this process, created on first use
+_parsers: Dict[str, Any] = {}
+
+
+def warm_worker() -> None:
+    """Pool initializer: import the parsers and compile their patterns before the first stage arrives"""
+    _url_parser()
+    _text_processor()
+    _nlp_extractor()
+
+    from .spacy_pipeline import spacy_pipeline
+    spacy_pipeline.warm()
+
+
+def _url_parser():
+    if "url" not in _parsers:
+        from .url_parser import URLParser
+        _parsers["url"] = URLParser()
+    return _parsers["url"]
+
+
+def _text_processor():
+    if "text" not in _parsers:
+        from .text_processor import TextProcessor
+        _parsers["text"] = TextProcessor()
+    return _parsers["text"]
+
+
+def _nlp_extractor():
+    if "nlp" not in _parsers:
+        from .nlp_extractor import NLPExtractor
+        _parsers["nlp"] = NLPExtractor()
+    return _parsers["nlp"]
+
+
+def pack_page(html: str, url: str) -> Tuple[bytes, str]:
+    """Payload for the HTML stages; pages compress 5-10x, which keeps the pipe transfer cheap"""
+    return zlib.compress(html.encode('utf-8'), 1), url
+
+
+def _unpack_page(payload: Tuple[bytes, str]) -> Tuple[str, str]:
+    body, url = payload
+    return zlib.decompress(body).decode('utf-8'), url
+
+
+def _run_html_stage(parse, payload: Tuple[bytes, str]) -> Dict[str, Any]:
+    """Outcome of an HTML stage with the block-page phrases it matched"""
+    from .url_parser import WebsiteProtectionError
+
+    parser = _url_parser()
+    html, url = _unpack_page(payload)
+    parser.metrics["blocking_indicator_hits"] = {}
+    outcome = {"recipe": None, "method": None, "error": None, "error_type": None}
+    try:
+        recipe, method = parse(parser, html, url)
+        outcome.update(recipe=recipe.model_dump(mode="json"), method=method)
+    except WebsiteProtectionError as e:
+        outcome.update(error=str(e), error_type="website_protection")
+    except Exception as e:
+        outcome.update(error=str(e), error_type="parsing_failed")
+    outcome["blocking_indicator_hits"] = parser.metrics["blocking_indicator_hits"]
+    return outcome
+
+
+def parse_html_page(payload: Tuple[bytes, str]) -> Dict[str, Any]:
+    """Manual parsing cascade (JSON-LD, microdata, recipe section, heuristics) over downloaded HTML"""
+    return _run_html_stage(lambda parser, html, url: parser._extract_recipe_from_html(html, url), payload)
+
+
+def parse_with_recipe_scrapers(payload: Tuple[bytes, str]) -> Dict[str, Any]:
+    """recipe-scrapers over downloaded HTML"""
+    return _run_html_stage(
+        lambda parser, html, url: (parser._parse_with_recipe_scrapers(html, url), None), payload
+    )
+
+
+def extract_caption_recipe(text: str) -> Dict[str, Any]:
+    """TextProcessor.extract_recipe_from_text as a dict (fields of RecipePattern)"""
+    return asdict(_text_processor().extract_recipe_from_text(text))
+
+
+def extract_enhanced_recipe(text: str) -> Dict[str, Any]:
+    """NLPExtractor.extract_enhanced_recipe with its dataclasses flattened to dicts"""
+    result = _nlp_extractor().extract_enhanced_recipe(text)
+    result["ingredients"] = [asdict(ingredient) for ingredient in result["ingredients"]]
+    result["instructions"] = [asdict(instruction) for instruction in result["instructions"]]
+    return result
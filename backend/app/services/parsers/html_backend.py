@@ -0,0 +1,99 @@
+"""
+HTML parsing backend for the URL parser.
+Builds BeautifulSoup trees with the fastest installed tree builder (lxml when
+available) and offers tree-free fast paths that pull ld+json scripts and the
+canonical link straight out of the raw HTML.
+"""
+import re
+import html as html_lib
+import logging
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+try:
+    import lxml  # noqa: F401  (enables the "lxml" BeautifulSoup tree builder)
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Builders in order of preference for "auto"
+SUPPORTED_BACKENDS = ("lxml", "html.parser")
+
+# Tokenizer patterns for the tree-free fast paths
+SCRIPT_OPEN_PATTERN = re.compile(r'<script\b([^>]*)>', re.IGNORECASE)
+SCRIPT_CLOSE_PATTERN = re.compile(r'</script\s*>', re.IGNORECASE)
+LD_JSON_TYPE_PATTERN = re.compile(r'''type\s*=\s*["']?application/ld\+json''', re.IGNORECASE)
+LINK_TAG_PATTERN = re.compile(r'<link\b([^>]*)>', re.IGNORECASE)
+CANONICAL_REL_PATTERN = re.compile(r'''rel\s*=\s*["']?canonical\b''', re.IGNORECASE)
+HREF_PATTERN = re.compile(r'''(?<![\w-])href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Map a configured backend name ('auto', 'lxml', 'html.parser') to an installed builder"""
+    backend = backend or settings.HTML_PARSER_BACKEND
+
+    if backend == "auto":
+        return "lxml" if LXML_AVAILABLE else "html.parser"
+
+    if backend == "lxml" and not LXML_AVAILABLE:
+        logger.warning("lxml is not installed, falling back to html.parser")
+        return "html.parser"
+
+    if backend not in SUPPORTED_BACKENDS:
+        logger.warning(f"Unknown HTML parser backend '{backend}', falling back to html.parser")
+        return "html.parser"
+
+    return backend
+
+
+def make_soup(html: str, backend: Optional[str] = None) -> BeautifulSoup:
+    """Build a BeautifulSoup tree with the configured backend"""
+    return BeautifulSoup(html, resolve_backend(backend))
+
+
+def extract_ld_json_blocks(html: str) -> List[str]:
+    """Return the raw text of every application/ld+json script without building a tree"""
+    blocks = []
+    position = 0
+
+    while True:
+        script_open = SCRIPT_OPEN_PATTERN.search(html, position)
+        if not script_open:
+            break
+
+        script_close = SCRIPT_CLOSE_PATTERN.search(html, script_open.end())
+        if not script_close:
+            break
+
+        if LD_JSON_TYPE_PATTERN.search(script_open.group(1)):
+            text = html[script_open.end():script_close.start()].strip()
+            if text:
+                blocks.append(text)
+
+        position = script_close.end()
+
+    return blocks
+
+
+def extract_canonical_href(html: str) -> Optional[str]:
+    """Return the href of <link rel=canonical> without building a tree"""
+    for link in LINK_TAG_PATTERN.finditer(html):
+        attributes = link.group(1)
+        if not CANONICAL_REL_PATTERN.search(attributes):
+            continue
+
+        href = HREF_PATTERN.search(attributes)
+        if href:
+            value = next(group for group in href.groups() if group is not None).strip()
+            if value:
+                return html_lib.unescape(value)
+
+    return None
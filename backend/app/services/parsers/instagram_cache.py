@@ -0,0 +1,190 @@
+"""
+Instagram post cache keyed on shortcode.
+Keeps what a parse learned about a post (caption and comment text, owner, media
+URLs, the TextProcessor result and the ids of media already stored with their
+thumbnails) so repeat imports skip instaloader, the text extraction and the
+media downloads. Refreshed entries reuse stored media whose source is unchanged.
+Profile and hashtag crawls also save their instaloader iterator position here,
+keyed on the last scanned shortcode, so a crawl resumes without re-scanning.
+The parser uses the *_async methods, which keep database backend I/O off the
+event loop.
+"""
+import copy
+import logging
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+from .cache_backends import CacheBackend, create_cache_backend
+from .text_processor import RecipePattern
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPost:
+    """Everything a parse extracted from one Instagram post"""
+    text_content: str
+    media_data: Dict[str, Any]  # Includes stored_media / video_thumbnails once processed
+    recipe_pattern: RecipePattern
+
+
+def media_source_key(url: Optional[str]) -> Optional[str]:
+    """Instagram CDN URLs carry expiring signatures; the path identifies the file"""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+class InstagramPostCache:
+    """Stores parsed Instagram posts by shortcode"""
+
+    NAMESPACE = "instagram_post"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 7 * 86400, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "stores": 0,
+            "media_reused": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "InstagramPostCache":
+        """Build the cache from application settings"""
+        backend = create_cache_backend(
+            settings.INSTAGRAM_CACHE_BACKEND,
+            cls.NAMESPACE,
+            max_entries=settings.INSTAGRAM_CACHE_MAX_ENTRIES,
+        )
+        return cls(
+            backend,
+            ttl_seconds=settings.INSTAGRAM_CACHE_TTL_SECONDS,
+            enabled=settings.INSTAGRAM_CACHE_ENABLED,
+        )
+
+    def lookup(self, shortcode: str, refresh: bool = False) -> Optional[CachedPost]:
+        """Look up a post; a refresh still returns the entry (for media reuse) but counts separately"""
+        if not self.enabled:
+            return None
+
+        if refresh:
+            self.stats["refreshes"] += 1
+
+        payload = self.backend.get(shortcode)
+        if payload is None:
+            if not refresh:
+                self.stats["misses"] += 1
+            return None
+
+        try:
+            cached = CachedPost(
+                text_content=payload["text_content"],
+                # The in-process backend hands out its own dict; parses add to media_data
+                media_data=copy.deepcopy(payload["media_data"]),
+                recipe_pattern=RecipePattern(**payload["recipe_pattern"]),
+            )
+        except Exception as e:
+            logger.warning(f"Discarding unreadable Instagram cache entry for {shortcode}: {e}")
+            self.backend.delete(shortcode)
+            return None
+
+        if not refresh:
+            self.stats["hits"] += 1
+        return cached
+
+    def store(self, shortcode: str, post: CachedPost) -> None:
+        if not self.enabled:
+            return
+
+        self.backend.set(shortcode, asdict(post), self.ttl_seconds)
+        self.stats["stores"] += 1
+
+    async def lookup_async(self, shortcode: str, refresh: bool = False) -> Optional[CachedPost]:
+        if not self.enabled:
+            return None
+        return await self.backend.offload(self.lookup, shortcode, refresh)
+
+    async def store_async(self, shortcode: str, post: CachedPost) -> None:
+        if self.enabled:
+            await self.backend.offload(self.store, shortcode, post)
+
+    def reuse_stored_media(self, media_data: Dict[str, Any], previous: Optional[CachedPost]) -> None:
+        """Carry stored images and video thumbnails over from a previous parse when their source is unchanged"""
+        if previous is None:
+            return
+
+        old_media = previous.media_data
+        old_images = old_media.get("images") or []
+        new_images = media_data.get("images") or []
+        if (old_media.get("stored_media") and old_images and new_images
+                and media_source_key(old_images[0].get("url")) == media_source_key(new_images[0].get("url"))):
+            media_data["stored_media"] = old_media["stored_media"]
+            self.stats["media_reused"] += 1
+
+        if (old_media.get("video_thumbnails")
+                and media_source_key(old_media.get("video_url")) == media_source_key(media_data.get("video_url"))):
+            media_data["video_thumbnails"] = old_media["video_thumbnails"]
+            self.stats["media_reused"] += 1
+
+    def invalidate(self, shortcode: str) -> None:
+        self.backend.delete(shortcode)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+            **self.backend.get_stats(),
+        }
+
+
+class InstagramHarvestCursors:
+    """Frozen instaloader iterators of profile/hashtag crawls, keyed on crawl and last scanned shortcode"""
+
+    NAMESPACE = "instagram_harvest"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 7 * 86400):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"saves": 0, "resumes": 0, "misses": 0}
+
+    @classmethod
+    def from_settings(cls) -> "InstagramHarvestCursors":
+        backend = create_cache_backend(
+            settings.INSTAGRAM_CACHE_BACKEND,
+            cls.NAMESPACE,
+            max_entries=settings.INSTAGRAM_CACHE_MAX_ENTRIES,
+        )
+        return cls(backend, ttl_seconds=settings.INSTAGRAM_HARVEST_CURSOR_TTL_SECONDS)
+
+    def save(self, crawl: str, shortcode: str, frozen_state: Dict[str, Any]) -> None:
+        self.backend.set(f"{crawl}:{shortcode}", frozen_state, self.ttl_seconds)
+        self.stats["saves"] += 1
+
+    def load(self, crawl: str, shortcode: str) -> Optional[Dict[str, Any]]:
+        state = self.backend.get(f"{crawl}:{shortcode}")
+        self.stats["resumes" if state is not None else "misses"] += 1
+        return state
+
+    async def save_async(self, crawl: str, shortcode: str, frozen_state: Dict[str, Any]) -> None:
+        await self.backend.offload(self.save, crawl, shortcode, frozen_state)
+
+    async def load_async(self, crawl: str, shortcode: str) -> Optional[Dict[str, Any]]:
+        return await self.backend.offload(self.load, crawl, shortcode)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "ttl_seconds": self.ttl_seconds, **self.backend.get_stats()}
+
+
+# Global Instagram post cache shared by every InstagramParser instance in this process
+instagram_post_cache = InstagramPostCache.from_settings()
+instagram_harvest_cursors = InstagramHarvestCursors.from_settings()
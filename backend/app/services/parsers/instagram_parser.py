@@ -1,12 +1,56 @@
 import instaloader
 import re
-from typing import Dict, Any, Optional, List
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator, Callable
 from urllib.parse import urlparse
 from .base_parser import BaseParser, ParsedRecipe
 from .text_processor import TextProcessor, RecipePattern
+from .instagram_cache import instagram_post_cache, instagram_harvest_cursors, CachedPost
+from . import cpu_stages
+from app.core.config import settings
+from app.core.fetch_scheduler import fetch_scheduler
+from app.core.cpu_pool import cpu_pool
 from app.utils.storage_utils import storage_utils
 from app.utils.media_utils import media_utils
 
+logger = logging.getLogger(__name__)
+
+# instaloader talks to several Instagram hosts; they share one scheduler slot pool
+INSTAGRAM_URL = "https://www.instagram.com/"
+
+# instaloader blocks for whole HTTP round trips; its own threads keep a batch from
+# starving the default executor that file and media work runs on
+instaloader_executor = ThreadPoolExecutor(
+    max_workers=settings.INSTAGRAM_THREAD_POOL_SIZE,
+    thread_name_prefix="instaloader"
+)
+
+
+class InvalidCursorError(ValueError):
+    """A crawl cursor that is unknown or no longer in the feed"""
+
+
+@dataclass
+class HarvestedRecipe:
+    """One result of a profile/hashtag crawl; the last one has no recipe and reports where the crawl stopped"""
+    shortcode: Optional[str]
+    cursor: Optional[str]  # Pass back to continue after this post (None once the feed is exhausted)
+    recipe: Optional[ParsedRecipe] = None
+    posts_scanned: int = 0
+    exhausted: bool = False
+
+
+def _needs_page_fetch(posts: instaloader.NodeIterator) -> bool:
+    """Whether the next post needs another page from Instagram (NodeIterator internals; assume yes if unknown)"""
+    data = getattr(posts, "_data", None)
+    page_index = getattr(posts, "_page_index", None)
+    if not isinstance(data, dict) or page_index is None:
+        return True
+    return page_index >= len(data.get("edges", []))
+
 
 class InstagramParser(BaseParser):
     """Parser for Instagram posts using instaloader"""
@@ -20,26 +64,24 @@ class InstagramParser(BaseParser):
         self.loader.context.quiet = True
         self.loader.context.request_timeout = 30
         
-    async def parse(self, instagram_url: str, **kwargs) -> ParsedRecipe:
-        """Parse recipe from Instagram post URL"""
+    async def parse(self, instagram_url: str, refresh: bool = False, post: Optional[instaloader.Post] = None, **kwargs) -> ParsedRecipe:
+        """Parse recipe from Instagram post URL (refresh=True ignores the cached post; post skips re-fetching it)"""
         try:
             # Extract shortcode from URL
             shortcode = self._extract_shortcode(instagram_url)
             if not shortcode:
                 raise ValueError("Invalid Instagram URL format")
             
-            # Download post metadata
-            post = self._get_post_data(shortcode)
-            
-            # Validate post object before proceeding
-            if not isinstance(post, instaloader.Post):
-                raise Exception(f"Expected Post object, got {type(post)}")
-            
-            # Extract text content
-            text_content = self._extract_text_content(post)
-            
-            # Process text for recipe components
-            recipe_pattern = self.text_processor.extract_recipe_from_text(text_content)
+            cached = await instagram_post_cache.lookup_async(shortcode, refresh=refresh)
+            if cached and not refresh:
+                # Repeat import: no instaloader calls, text extraction or media downloads
+                text_content, media_data, recipe_pattern = cached.text_content, cached.media_data, cached.recipe_pattern
+                if await self._drop_collected_media(media_data):
+                    # The image was garbage-collected while the post stayed cached; store it again
+                    await self._process_and_store_media(media_data)
+                    await instagram_post_cache.store_async(shortcode, CachedPost(text_content, media_data, recipe_pattern))
+            else:
+                text_content, media_data, recipe_pattern = await self._load_and_process_post(shortcode, previous=cached, post=post)
             
             # Extract servings information from the pattern or text
             servings_count = None
@@ -54,24 +96,9 @@ class InstagramParser(BaseParser):
             except Exception as e:
                 description = "Recipe from Instagram"  # Fallback
             
-            # Extract additional metadata
-            media_data = self._extract_media_data(post)
-            
-            # Store media with thumbnails if available
-            await self._process_and_store_media(media_data)
-            
-            # Generate video thumbnails if this is a video post
-            if post.is_video and media_data.get("video_url"):
-                try:
-                    video_thumbnails = await self._generate_video_thumbnails(media_data["video_url"])
-                    if video_thumbnails:
-                        media_data["video_thumbnails"] = video_thumbnails
-                except Exception as e:
-                    print(f"Failed to generate video thumbnails: {e}")
-            
             # Build parsed recipe with structured data
             parsed_data = ParsedRecipe(
-                title=recipe_pattern.title or f"Recipe from @{post.owner_username}",
+                title=recipe_pattern.title or f"Recipe from @{media_data['username']}",
                 description=description,
                 source_type="instagram",
                 source_url=instagram_url,
@@ -87,6 +114,37 @@ class InstagramParser(BaseParser):
         except Exception as e:
             raise Exception(f"Failed to parse Instagram recipe: {str(e)}")
     
+    async def _load_and_process_post(self, shortcode: str, previous: Optional[CachedPost] = None,
+                                     post: Optional[instaloader.Post] = None) -> Tuple[str, Dict[str, Any], RecipePattern]:
+        """Download a post, extract its recipe text and store its media, then cache the result"""
+        # Download post metadata, caption, comments and media info
+        text_content, media_data = await self._load_post(shortcode, post)
+        
+        # Process text for recipe components (long captions run in the CPU pool)
+        recipe_pattern = RecipePattern(**await cpu_pool.run(
+            "caption_text", cpu_stages.extract_caption_recipe, text_content, size=len(text_content)
+        ))
+        
+        # Media stored by an earlier parse of this post is reused when its source is unchanged
+        instagram_post_cache.reuse_stored_media(media_data, previous)
+        await self._drop_collected_media(media_data)
+        
+        # Store media with thumbnails if available
+        if not media_data.get("stored_media"):
+            await self._process_and_store_media(media_data)
+        
+        # Generate video thumbnails if this is a video post
+        if media_data["is_video"] and media_data.get("video_url") and not media_data.get("video_thumbnails"):
+            try:
+                video_thumbnails = await self._generate_video_thumbnails(media_data["video_url"])
+                if video_thumbnails:
+                    media_data["video_thumbnails"] = video_thumbnails
+            except Exception as e:
+                print(f"Failed to generate video thumbnails: {e}")
+        
+        await instagram_post_cache.store_async(shortcode, CachedPost(text_content, media_data, recipe_pattern))
+        return text_content, media_data, recipe_pattern
+    
     def _extract_shortcode(self, url: str) -> Optional[str]:
         """Extract Instagram post shortcode from URL"""
         # Handle various Instagram URL formats
@@ -113,6 +171,24 @@ class InstagramParser(BaseParser):
         
         return None
     
+    async def _load_post(self, shortcode: str, post: Optional[instaloader.Post] = None) -> Tuple[str, Dict[str, Any]]:
+        """Fetch a post's text and media info in a worker thread, holding an Instagram fetch slot"""
+        # instaloader is blocking and lazily fetches comments, owner and sidecar data on
+        # attribute access, so every read of the post happens inside the thread
+        async with fetch_scheduler.slot(INSTAGRAM_URL, method="instaloader"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(instaloader_executor, self._read_post, shortcode, post)
+    
+    def _read_post(self, shortcode: str, post: Optional[instaloader.Post] = None) -> Tuple[str, Dict[str, Any]]:
+        if post is None:
+            post = self._get_post_data(shortcode)
+        
+        # Validate post object before proceeding
+        if not isinstance(post, instaloader.Post):
+            raise Exception(f"Expected Post object, got {type(post)}")
+        
+        return self._extract_text_content(post), self._extract_media_data(post)
+    
     def _get_post_data(self, shortcode: str) -> instaloader.Post:
         """Get post data using instaloader"""
         try:
@@ -244,34 +320,133 @@ class InstagramParser(BaseParser):
         
         return media_data
     
-    def parse_instagram_profile(self, username: str, max_posts: int = 10) -> List[ParsedRecipe]:
+    async def iter_profile_recipes(self, username: str, max_posts: int = 10, cursor: Optional[str] = None,
+                                   refresh: bool = False) -> AsyncIterator[HarvestedRecipe]:
+        """Yield recipe posts from an Instagram profile as they are found, resuming after cursor"""
+        def open_posts() -> instaloader.NodeIterator:
+            return instaloader.Profile.from_username(self.loader.context, username).get_posts()
+
+        async for item in self._harvest(f"profile:{username.lower()}", open_posts, max_posts, cursor, 0.3, refresh):
+            yield item
+    
+    async def iter_hashtag_recipes(self, hashtag: str, max_posts: int = 20, cursor: Optional[str] = None,
+                                   refresh: bool = False) -> AsyncIterator[HarvestedRecipe]:
+        """Yield recipe posts for a hashtag as they are found, resuming after cursor"""
+        def open_posts() -> instaloader.NodeIterator:
+            return instaloader.Hashtag.from_name(self.loader.context, hashtag).get_posts_resumable()
+
+        # Higher threshold for hashtag searches
+        async for item in self._harvest(f"hashtag:{hashtag.lower()}", open_posts, max_posts, cursor, 0.4, refresh):
+            yield item
+    
+    async def parse_instagram_profile(self, username: str, max_posts: int = 10) -> List[ParsedRecipe]:
         """Parse multiple recipe posts from an Instagram profile"""
         try:
-            profile = instaloader.Profile.from_username(self.loader.context, username)
-            recipes = []
-            
-            for post in profile.get_posts():
-                if len(recipes) >= max_posts:
-                    break
-                
+            return [item.recipe async for item in self.iter_profile_recipes(username, max_posts) if item.recipe]
+        except Exception as e:
+            raise Exception(f"Failed to parse Instagram profile: {str(e)}")
+    
+    async def search_recipe_hashtags(self, hashtag: str, max_posts: int = 20) -> List[ParsedRecipe]:
+        """Search for recipes using hashtags"""
+        try:
+            return [item.recipe async for item in self.iter_hashtag_recipes(hashtag, max_posts) if item.recipe]
+        except Exception as e:
+            raise Exception(f"Failed to search hashtag {hashtag}: {str(e)}")
+    
+    async def _harvest(self, crawl: str, open_posts: Callable[[], instaloader.NodeIterator], max_results: int,
+                       cursor: Optional[str], min_confidence: float, refresh: bool) -> AsyncIterator[HarvestedRecipe]:
+        """Walk a post iterator, parsing posts that look like recipes; yields a final HarvestedRecipe without a recipe"""
+        loop = asyncio.get_running_loop()
+        frozen_state = await instagram_harvest_cursors.load_async(crawl, cursor) if cursor else None
+
+        def open_iterator() -> Tuple[instaloader.NodeIterator, bool]:
+            posts = open_posts()
+            if frozen_state:
                 try:
-                    # Check if post might contain a recipe
-                    if self._post_looks_like_recipe(post):
-                        instagram_url = f"https://www.instagram.com/p/{post.shortcode}/"
-                        recipe = self.parse(instagram_url)
-                        
-                        # Only add if confidence is reasonable
-                        if recipe.confidence_score > 0.3:
-                            recipes.append(recipe)
-                            
-                except Exception:
-                    # Skip posts that fail to parse
+                    posts.thaw(instaloader.FrozenNodeIterator(**frozen_state))
+                    return posts, True
+                except instaloader.InvalidArgumentException as e:
+                    # Expired or from a different query: fall back to skipping up to the cursor
+                    logger.info(f"Cannot resume {crawl} from saved position, re-scanning to {cursor}: {e}")
+                    posts = open_posts()
+            return posts, False
+
+        async with fetch_scheduler.slot(INSTAGRAM_URL, method="instaloader"):
+            posts, resumed = await loop.run_in_executor(instaloader_executor, open_iterator)
+
+        skip_until = cursor
+        last_shortcode = cursor
+        scanned = found = skipped = 0
+        exhausted = False
+        while found < max_results:
+            # Only a page boundary costs a request; posts within a loaded page are free
+            if _needs_page_fetch(posts):
+                async with fetch_scheduler.slot(INSTAGRAM_URL, method="instaloader"):
+                    candidate = await loop.run_in_executor(instaloader_executor, self._next_candidate, posts)
+            else:
+                candidate = await loop.run_in_executor(instaloader_executor, self._next_candidate, posts)
+
+            if candidate is None:
+                if skip_until and not resumed:
+                    raise InvalidCursorError(f"Invalid or expired cursor: {cursor} is not in the feed")
+                exhausted = True
+                break
+
+            post, looks_like_recipe = candidate
+            if skip_until:
+                if post.shortcode == skip_until:
+                    skip_until = None
                     continue
-            
-            return recipes
-            
+                if not resumed:
+                    # Each skipped post may cost a page fetch; a cursor this far back is treated as gone
+                    skipped += 1
+                    if skipped >= settings.INSTAGRAM_HARVEST_MAX_SKIP:
+                        raise InvalidCursorError(
+                            f"Invalid or expired cursor: {cursor} not found in the latest {skipped} posts"
+                        )
+                    continue
+                # A resumed iterator restarts at the cursor post; anything else is new
+                skip_until = None
+
+            scanned += 1
+            last_shortcode = post.shortcode
+            if not looks_like_recipe:
+                continue
+
+            try:
+                recipe = await self.parse(f"https://www.instagram.com/p/{post.shortcode}/", refresh=refresh, post=post)
+            except Exception:
+                # Skip posts that fail to parse
+                continue
+
+            # Only add if confidence is reasonable
+            if recipe.confidence_score > min_confidence:
+                found += 1
+                await self._save_cursor(crawl, posts, post.shortcode)
+                yield HarvestedRecipe(shortcode=post.shortcode, cursor=post.shortcode, recipe=recipe)
+
+        if not exhausted and last_shortcode:
+            await self._save_cursor(crawl, posts, last_shortcode)
+        yield HarvestedRecipe(
+            shortcode=None,
+            cursor=None if exhausted else last_shortcode,
+            posts_scanned=scanned,
+            exhausted=exhausted
+        )
+    
+    def _next_candidate(self, posts: instaloader.NodeIterator) -> Optional[Tuple[instaloader.Post, bool]]:
+        """Next post and whether it looks like a recipe (runs in the instaloader pool)"""
+        try:
+            post = next(posts)
+        except StopIteration:
+            return None
+        return post, self._post_looks_like_recipe(post)
+    
+    async def _save_cursor(self, crawl: str, posts: instaloader.NodeIterator, shortcode: str) -> None:
+        try:
+            await instagram_harvest_cursors.save_async(crawl, shortcode, posts.freeze()._asdict())
         except Exception as e:
-            raise Exception(f"Failed to parse Instagram profile: {str(e)}")
+            logger.warning(f"Could not save {crawl} crawl position at {shortcode}: {e}")
     
     def _post_looks_like_recipe(self, post: instaloader.Post) -> bool:
         """Quick check if post might contain a recipe"""
@@ -292,32 +467,6 @@ class InstagramParser(BaseParser):
         # Must have at least 2 recipe keywords and reasonable length
         return keyword_count >= 2 and len(post.caption.split()) >= 20
     
-    def search_recipe_hashtags(self, hashtag: str, max_posts: int = 20) -> List[ParsedRecipe]:
-        """Search for recipes using hashtags"""
-        try:
-            hashtag_obj = instaloader.Hashtag.from_name(self.loader.context, hashtag)
-            recipes = []
-            
-            for post in hashtag_obj.get_posts():
-                if len(recipes) >= max_posts:
-                    break
-                
-                try:
-                    if self._post_looks_like_recipe(post):
-                        instagram_url = f"https://www.instagram.com/p/{post.shortcode}/"
-                        recipe = self.parse(instagram_url)
-                        
-                        if recipe.confidence_score > 0.4:  # Higher threshold for hashtag searches
-                            recipes.append(recipe)
-                            
-                except Exception:
-                    continue
-            
-            return recipes
-            
-        except Exception as e:
-            raise Exception(f"Failed to search hashtag {hashtag}: {str(e)}")
-    
     def _validate_parsed_data(self, parsed_data: ParsedRecipe) -> ParsedRecipe:
         """Enhanced validation for Instagram-specific data"""
         # Use base validation first
@@ -351,19 +500,28 @@ class InstagramParser(BaseParser):
                     )
                     
                     if storage_result.get("success"):
-                        # Add stored media info to media_data
+                        # Add stored media info to media_data (URLs come with the stored metadata)
+                        metadata = storage_result["metadata"]
+                        thumbnails = metadata.get("thumbnails") or {}
                         media_data["stored_media"] = {
                             "media_id": storage_result["media_id"],
                             "thumbnails": {
-                                "small": storage_utils.get_thumbnail_url(storage_result["media_id"], "small"),
-                                "medium": storage_utils.get_thumbnail_url(storage_result["media_id"], "medium"),
-                                "large": storage_utils.get_thumbnail_url(storage_result["media_id"], "large")
+                                size: (thumbnails.get(size) or {}).get("url") for size in ("small", "medium", "large")
                             },
-                            "original": storage_utils.get_original_url(storage_result["media_id"])
+                            "original": (metadata.get("original") or {}).get("url")
                         }
             except Exception as e:
                 print(f"Failed to store media for Instagram post: {e}")
     
+    async def _drop_collected_media(self, media_data: Dict[str, Any]) -> bool:
+        """Forget stored_media whose image was garbage-collected (cached posts outlive the GC grace period);
+        checking a live image restarts its grace period. True when something was dropped"""
+        stored = media_data.get("stored_media")
+        if not stored or await asyncio.to_thread(storage_utils.touch_media, stored["media_id"]):
+            return False
+        del media_data["stored_media"]
+        return True
+    
     async def _generate_video_thumbnails(self, video_url: str) -> Optional[Dict[str, Any]]:
         """Generate thumbnails for video posts"""
         try:
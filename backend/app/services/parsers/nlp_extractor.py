@@ -1,14 +1,14 @@
 import re
+import threading
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
-from .text_processor import TextProcessor, RecipePattern
+from dataclasses import dataclass, asdict, replace
 
-try:
-    import spacy
-    SPACY_AVAILABLE = True
-except ImportError:
-    SPACY_AVAILABLE = False
-    spacy = None
+from app.core.config import settings
+from app.core.cpu_pool import cpu_pool
+from . import cpu_stages
+from .cache_backends import InMemoryCacheBackend
+from .text_processor import TextProcessor, RecipePattern
+from .spacy_pipeline import spacy_pipeline, SPACY_AVAILABLE
 
 
 @dataclass
@@ -33,12 +33,49 @@ class EnhancedInstruction:
     confidence: float = 0.0
 
 
+class IngredientParseCache:
+    """LRU of parsed ingredients keyed on the normalized line; "1 tsp salt" recurs across most recipes"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.backend = InMemoryCacheBackend(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def lookup(self, key: str) -> Optional[EnhancedIngredient]:
+        with self._lock:
+            payload = self.backend.get(key)
+        if payload is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return EnhancedIngredient(**payload)
+
+    def store(self, key: str, ingredient: EnhancedIngredient) -> None:
+        with self._lock:
+            self.backend.set(key, asdict(ingredient), float("inf"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            **self.backend.get_stats(),
+        }
+
+
+# Global ingredient cache shared by every NLPExtractor instance in this process
+ingredient_parse_cache = IngredientParseCache(settings.NLP_INGREDIENT_CACHE_SIZE)
+
+
 class NLPExtractor:
     """Advanced NLP-based recipe extraction using spaCy"""
-    
+
+    _LIST_ITEM_RE = re.compile(r'<li>(.*?)</li>', re.DOTALL)
+    _BULLET_RE = re.compile(r'^[-•*]\s*')
+    _WHITESPACE_RE = re.compile(r'\s+')
+
     def __init__(self):
         self.text_processor = TextProcessor()
-        self.nlp = None  # Will be loaded on first use
         
         # Enhanced patterns for ingredient parsing
         self.quantity_patterns = [
@@ -68,41 +105,29 @@ class NLPExtractor:
             'boil', 'boiling', 'simmer', 'simmering', 'steam', 'steaming', 'grill', 'grilling',
             'broil', 'broiling', 'braise', 'braising', 'stew', 'stewing', 'poach', 'poaching'
         ]
-    
-    def _load_spacy_model(self):
-        """Load spaCy model on first use"""
-        if not SPACY_AVAILABLE:
-            self.nlp = None
-            return
-            
-        if self.nlp is None:
-            try:
-                # Try to load English model (requires: python -m spacy download en_core_web_sm)
-                self.nlp = spacy.load("en_core_web_sm")
-            except OSError:
-                try:
-                    # Fallback to blank model if en_core_web_sm not installed
-                    self.nlp = spacy.blank("en")
-                    # Add basic components
-                    if "tagger" not in self.nlp.pipe_names:
-                        self.nlp.add_pipe("tagger")
-                    if "parser" not in self.nlp.pipe_names:
-                        self.nlp.add_pipe("parser")
-                except Exception:
-                    # If spaCy can't create even a blank model, disable it
-                    self.nlp = None
-    
+
+    @property
+    def nlp(self):
+        """The process-wide spaCy model, or None when unavailable"""
+        return spacy_pipeline.load()
+
+    def _list_items(self, html: str) -> List[str]:
+        """Lines of the <li> items in TextProcessor's HTML output"""
+        return [item.strip() for item in self._LIST_ITEM_RE.findall(html) if item.strip()]
+
+    def _normalize_ingredient(self, ingredient_text: str) -> str:
+        """Cache key for an ingredient line: lowercase, no bullet, single spaces"""
+        text = self._BULLET_RE.sub('', ingredient_text.strip().lower())
+        return self._WHITESPACE_RE.sub(' ', text)
+
     def extract_enhanced_recipe(self, text: str) -> Dict[str, Any]:
         """Extract recipe with enhanced NLP processing"""
         # First get basic extraction
         basic_pattern = self.text_processor.extract_recipe_from_text(text)
         
-        # Load spaCy model
-        self._load_spacy_model()
-        
         # Enhance with NLP
-        enhanced_ingredients = self._parse_ingredients_with_nlp(basic_pattern.ingredients, text)
-        enhanced_instructions = self._parse_instructions_with_nlp(basic_pattern.instructions, text)
+        enhanced_ingredients = self._parse_ingredients_with_nlp(self._list_items(basic_pattern.ingredients), text)
+        enhanced_instructions = self._parse_instructions_with_nlp(self._list_items(basic_pattern.instructions), text)
         
         # Extract additional information
         cooking_time = self._extract_cooking_time(text)
@@ -120,18 +145,34 @@ class NLPExtractor:
             'recipe_type': self.text_processor.detect_recipe_type(text)
         }
     
+    async def extract_enhanced_recipe_async(self, text: str) -> Dict[str, Any]:
+        """extract_enhanced_recipe for async callers; long texts run in the CPU pool"""
+        result = await cpu_pool.run("nlp", cpu_stages.extract_enhanced_recipe, text, size=len(text))
+        result["ingredients"] = [EnhancedIngredient(**ingredient) for ingredient in result["ingredients"]]
+        result["instructions"] = [EnhancedInstruction(**instruction) for instruction in result["instructions"]]
+        return result
+    
     def _parse_ingredients_with_nlp(self, ingredients: List[str], full_text: str) -> List[EnhancedIngredient]:
         """Parse ingredients using NLP for better component extraction"""
-        enhanced_ingredients = []
-        
-        for ingredient_text in ingredients:
-            enhanced = self._parse_single_ingredient(ingredient_text)
-            enhanced_ingredients.append(enhanced)
-        
-        return enhanced_ingredients
+        keys = [self._normalize_ingredient(ingredient_text) for ingredient_text in ingredients]
+
+        parsed: Dict[str, Optional[EnhancedIngredient]] = {}
+        for key in dict.fromkeys(keys):
+            parsed[key] = ingredient_parse_cache.lookup(key)
+
+        # Only lines not seen before go through spaCy, in one batch
+        missing = [key for key, ingredient in parsed.items() if ingredient is None]
+        for key, doc in zip(missing, spacy_pipeline.pipe(missing)):
+            parsed[key] = self._parse_single_ingredient(key, doc)
+            ingredient_parse_cache.store(key, parsed[key])
+
+        return [
+            replace(parsed[key], raw_text=ingredient_text.strip())
+            for key, ingredient_text in zip(keys, ingredients)
+        ]
     
-    def _parse_single_ingredient(self, ingredient_text: str) -> EnhancedIngredient:
-        """Parse a single ingredient into components"""
+    def _parse_single_ingredient(self, ingredient_text: str, doc=None) -> EnhancedIngredient:
+        """Parse a single ingredient into components; a spaCy doc of the line refines the name and preparation"""
         original_text = ingredient_text.strip()
         text = original_text.lower()
         
@@ -186,6 +227,9 @@ class NLPExtractor:
         name_text = re.sub(r'^(of|,|-)', '', name_text).strip()
         
         ingredient.name = name_text if name_text else original_text
+
+        if doc is not None:
+            self._refine_ingredient(ingredient, doc)
         
         # Calculate confidence based on parsing success
         confidence = 0.3  # Base confidence
@@ -200,18 +244,34 @@ class NLPExtractor:
         
         return ingredient
     
+    def _refine_ingredient(self, ingredient: EnhancedIngredient, doc) -> None:
+        """Use part-of-speech tags: past participles are preparations, nouns and adjectives the name"""
+        if not ingredient.preparation:
+            for token in doc:
+                if token.tag_ == 'VBN':
+                    ingredient.preparation = token.lower_
+                    break
+
+        skip = {ingredient.unit, ingredient.preparation}
+        name_tokens = [
+            token.text for token in doc
+            if token.pos_ in ('NOUN', 'PROPN', 'ADJ') and not token.like_num and token.lower_ not in skip
+        ]
+        if name_tokens:
+            ingredient.name = " ".join(name_tokens)
+
     def _parse_instructions_with_nlp(self, instructions: List[str], full_text: str) -> List[EnhancedInstruction]:
         """Parse instructions using NLP for better component extraction"""
-        enhanced_instructions = []
-        
-        for i, instruction_text in enumerate(instructions):
-            enhanced = self._parse_single_instruction(instruction_text, i + 1)
-            enhanced_instructions.append(enhanced)
-        
-        return enhanced_instructions
+        texts = [instruction_text.strip() for instruction_text in instructions]
+        docs = spacy_pipeline.pipe(texts)
+
+        return [
+            self._parse_single_instruction(instruction_text, i + 1, doc)
+            for i, (instruction_text, doc) in enumerate(zip(texts, docs))
+        ]
     
-    def _parse_single_instruction(self, instruction_text: str, step_num: int) -> EnhancedInstruction:
-        """Parse a single instruction into components"""
+    def _parse_single_instruction(self, instruction_text: str, step_num: int, doc=None) -> EnhancedInstruction:
+        """Parse a single instruction into components; a spaCy doc of the line finds the cooking verb"""
         text = instruction_text.strip()
         text_lower = text.lower()
         
@@ -221,11 +281,18 @@ class NLPExtractor:
             confidence=0.5
         )
         
-        # Extract cooking method
-        for method in self.cooking_methods:
-            if method in text_lower:
-                instruction.cooking_method = method
-                break
+        # Extract cooking method: the first cooking verb, else the first cooking word anywhere
+        if doc is not None:
+            for token in doc:
+                if token.pos_ == 'VERB' and token.lemma_.lower() in self.cooking_methods:
+                    instruction.cooking_method = token.lemma_.lower()
+                    break
+
+        if not instruction.cooking_method:
+            for method in self.cooking_methods:
+                if method in text_lower:
+                    instruction.cooking_method = method
+                    break
         
         # Extract temperature
         temp_patterns = [
@@ -315,7 +382,7 @@ class NLPExtractor:
         basic_pattern = self.text_processor.extract_recipe_from_text(text)
         
         # Enhance with NLP
-        return self._parse_ingredients_with_nlp(basic_pattern.ingredients, text)
+        return self._parse_ingredients_with_nlp(self._list_items(basic_pattern.ingredients), text)
     
     def extract_instructions_from_text(self, text: str) -> List[EnhancedInstruction]:
         """Extract just instructions from free text"""
@@ -323,4 +390,4 @@ class NLPExtractor:
         basic_pattern = self.text_processor.extract_recipe_from_text(text)
         
         # Enhance with NLP
-        return self._parse_instructions_with_nlp(basic_pattern.instructions, text)
\ No newline at end of file
+        return self._parse_instructions_with_nlp(self._list_items(basic_pattern.instructions), text)
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Parse result cache keyed on canonicalized recipe URLs.
+Lets repeated imports of the same recipe skip the scrapers -> manual -> browser
+cascade, and briefly remembers pages that are blocked or missing.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+
+from app.core.config import settings
+from .base_parser import ParsedRecipe
+from .cache_backends import CacheBackend, create_cache_backend
+from .html_backend import extract_canonical_href
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only carry tracking information
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref_src',
+}
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Kinds of negative entries
+NEGATIVE_WEBSITE_PROTECTION = "website_protection"
+NEGATIVE_NOT_FOUND = "not_found"
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so equivalent recipe links share one cache key"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query_params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    query = urlencode(sorted(query_params))
+
+    # Fragments never reach the server, so they are dropped
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def find_canonical_link(html: str, base_url: str) -> Optional[str]:
+    """Return the absolute <link rel=canonical> target of a page, if any"""
+    href = extract_canonical_href(html)
+    if not href:
+        return None
+
+    return urljoin(base_url, href)
+
+
+@dataclass
+class CacheLookup:
+    """Result of a cache lookup"""
+    recipe: Optional[ParsedRecipe] = None
+    negative_kind: Optional[str] = None
+    negative_message: Optional[str] = None
+
+    @property
+    def is_negative(self) -> bool:
+        return self.negative_kind is not None
+
+
+class ParseCache:
+    """Stores parsed recipes (and short-lived failures) by canonical URL"""
+
+    NAMESPACE = "parse_result"
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 86400, negative_ttl_seconds: float = 300, enabled: bool = True):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.enabled = enabled
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "negative_hits": 0,
+            "stores": 0,
+            "negative_stores": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "ParseCache":
+        """Build the cache from application settings"""
+        backend = create_cache_backend(
+            settings.PARSE_CACHE_BACKEND,
+            cls.NAMESPACE,
+            max_entries=settings.PARSE_CACHE_MAX_ENTRIES,
+        )
+        return cls(
+            backend,
+            ttl_seconds=settings.PARSE_CACHE_TTL_SECONDS,
+            negative_ttl_seconds=settings.PARSE_CACHE_NEGATIVE_TTL_SECONDS,
+            enabled=settings.PARSE_CACHE_ENABLED,
+        )
+
+    def lookup(self, url: str) -> Optional[CacheLookup]:
+        """Look up a URL; returns None on a miss"""
+        if not self.enabled:
+            return None
+
+        payload = self.backend.get(canonicalize_url(url))
+        if payload is None:
+            self.stats["misses"] += 1
+            return None
+
+        if payload.get("negative"):
+            self.stats["negative_hits"] += 1
+            return CacheLookup(
+                negative_kind=payload.get("kind"),
+                negative_message=payload.get("message"),
+            )
+
+        try:
+            recipe = ParsedRecipe(**payload["recipe"])
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache entry for {url}: {e}")
+            self.backend.delete(canonicalize_url(url))
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return CacheLookup(recipe=recipe)
+
+    def store(self, urls: List[str], recipe: ParsedRecipe) -> None:
+        """Store a successful parse under every URL that identifies the page"""
+        if not self.enabled:
+            return
+
+        payload = {"recipe": recipe.model_dump()}
+        for key in {canonicalize_url(url) for url in urls if url}:
+            self.backend.set(key, payload, self.ttl_seconds)
+            self.stats["stores"] += 1
+
+    def store_negative(self, url: str, kind: str, message: str) -> None:
+        """Remember a blocked or missing page for a short time"""
+        if not self.enabled:
+            return
+
+        payload = {"negative": True, "kind": kind, "message": message}
+        self.backend.set(canonicalize_url(url), payload, self.negative_ttl_seconds)
+        self.stats["negative_stores"] += 1
+
+    # Database backends block on I/O; these run their calls in a thread instead of on the event loop
+    async def lookup_async(self, url: str) -> Optional[CacheLookup]:
+        return await self.backend.offload(self.lookup, url)
+
+    async def store_async(self, urls: List[str], recipe: ParsedRecipe) -> None:
+        await self.backend.offload(self.store, urls, recipe)
+
+    async def store_negative_async(self, url: str, kind: str, message: str) -> None:
+        await self.backend.offload(self.store_negative, url, kind, message)
+
+    def invalidate(self, url: str) -> None:
+        """Drop any cached entry for a URL"""
+        self.backend.delete(canonicalize_url(url))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["negative_hits"]
+        hit_rate = (self.stats["hits"] + self.stats["negative_hits"]) / lookups if lookups else 0.0
+        return {
+            "enabled": self.enabled,
+            **self.stats,
+            "hit_rate": hit_rate,
+            "ttl_seconds": self.ttl_seconds,
+            "negative_ttl_seconds": self.negative_ttl_seconds,
+            **self.backend.get_stats(),
+        }
+
+
+# Global parse cache shared by every URLParser instance in this process
+parse_cache = ParseCache.from_settings()
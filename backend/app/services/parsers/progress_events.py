@@ -18,6 +18,7 @@ class ProgressPhase(Enum):
     """Parsing phases in order of execution"""
     INITIALIZING = "initializing"
     RATE_LIMITING = "rate_limiting"
+    FETCHING_PAGE = "fetching_page"
     TRYING_SCRAPERS = "trying_scrapers"
     SCRAPERS_FAILED = "scrapers_failed"
     TRYING_MANUAL = "trying_manual"
@@ -109,6 +110,7 @@ class ProgressEventEmitter:
         self.expected_durations = {
             ProgressPhase.INITIALIZING: 0.5,
             ProgressPhase.RATE_LIMITING: 2.0,
+            ProgressPhase.FETCHING_PAGE: 2.0,
             ProgressPhase.TRYING_SCRAPERS: 5.0,
             ProgressPhase.TRYING_MANUAL: 8.0,
             ProgressPhase.TRYING_BROWSER: 15.0,
@@ -135,9 +137,10 @@ class ProgressEventEmitter:
         total_attempts: Optional[int] = None,
         metadata: Optional[Dict[str, Any]] = None,
         error_details: Optional[str] = None,
-        suggestions: Optional[List[str]] = None
+        suggestions: Optional[List[str]] = None,
+        estimated_remaining_ms: Optional[int] = None
     ) -> ProgressEvent:
-        """Emit a progress event"""
+        """Emit a progress event (estimated_remaining_ms overrides the phase-based estimate)"""
         
         # Update phase tracking
         current_time = time.time()
@@ -151,7 +154,7 @@ class ProgressEventEmitter:
         
         # Calculate progress and estimates
         progress_percent = self._calculate_progress_percent()
-        estimated_remaining = self._estimate_remaining_time()
+        estimated_remaining = estimated_remaining_ms if estimated_remaining_ms is not None else self._estimate_remaining_time()
         duration_ms = int((current_time - self.start_time) * 1000)
         
         # Create event
@@ -191,6 +194,7 @@ class ProgressEventEmitter:
         phase_weights = {
             ProgressPhase.INITIALIZING: 5,
             ProgressPhase.RATE_LIMITING: 10,
+            ProgressPhase.FETCHING_PAGE: 15,
             ProgressPhase.TRYING_SCRAPERS: 25,
             ProgressPhase.TRYING_MANUAL: 35,
             ProgressPhase.TRYING_BROWSER: 50,
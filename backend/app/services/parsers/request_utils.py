@@ -5,10 +5,18 @@ Contains defensive strategies for bypassing website blocking mechanisms.
 import random
 import time
 import asyncio
+import hashlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 import logging
 
+from app.core.fetch_scheduler import fetch_scheduler
+from .state_store import StateStore, shared_state_store
+from .progress_events import ProgressStatus
+
 logger = logging.getLogger(__name__)
 
 
@@ -163,113 +171,217 @@ class RequestHeaderManager:
 
 
 class RateLimiter:
-    """Per-domain rate limiting to avoid triggering anti-bot measures"""
+    """Per-domain backoff after failures, to avoid triggering anti-bot measures.
+
+    The failure count and delay live in the shared store. The delay is applied
+    as the fetch scheduler's pace for the domain, so requests are spaced by the
+    token bucket instead of sleeping while holding a slot.
+    """
     
-    def __init__(self, default_delay: float = 2.0, max_delay: float = 30.0):
+    NAMESPACE = "rate_limit"
+    STATE_TTL_SECONDS = 24 * 60 * 60
+    
+    def __init__(self, default_delay: float = 2.0, max_delay: float = 30.0, store: Optional[StateStore] = None):
         self.default_delay = default_delay
         self.max_delay = max_delay
-        self.domain_delays: Dict[str, float] = {}
-        self.last_request_times: Dict[str, float] = {}
-        self.consecutive_failures: Dict[str, int] = {}
-        
-    async def wait_for_domain(self, url: str) -> None:
-        """Wait appropriate time before making request to domain"""
-        domain = urlparse(url).netloc
-        current_time = time.time()
-        
-        # Get delay for this domain
-        delay = self.domain_delays.get(domain, self.default_delay)
+        # Delays, failure counts and request slots are shared by every parser (and worker, with the database store)
+        self.store = store or shared_state_store
         
-        # Add randomization to avoid patterns
-        jittered_delay = delay * (0.8 + random.random() * 0.4)  # ±20% jitter
-        
-        # Check if we need to wait
-        last_request = self.last_request_times.get(domain, 0)
-        time_since_last = current_time - last_request
-        
-        if time_since_last < jittered_delay:
-            wait_time = jittered_delay - time_since_last
-            logger.debug(f"Rate limiting: waiting {wait_time:.2f}s for {domain}")
-            await asyncio.sleep(wait_time)
-        
-        # Update last request time
-        self.last_request_times[domain] = time.time()
+    async def refresh_backoff(self, url: str) -> float:
+        """Apply the domain's shared backoff (set by any worker) to the fetch scheduler"""
+        state = await self.store.get_async(self.NAMESPACE, urlparse(url).netloc)
+        return self._apply_backoff(url, state or {})
+    
+    def _apply_backoff(self, url: str, state: Dict) -> float:
+        # Delays at the default are normal pacing, which the scheduler's own rate covers
+        delay = state.get("delay", self.default_delay)
+        backoff = delay if delay > self.default_delay else 0.0
+        fetch_scheduler.set_backoff(url, backoff)
+        return backoff
     
-    def record_success(self, url: str) -> None:
+    async def record_success(self, url: str) -> None:
         """Record successful request to potentially reduce delay"""
         domain = urlparse(url).netloc
         
-        # Reset failure count
-        self.consecutive_failures[domain] = 0
+        reduced = {}
         
-        # Gradually reduce delay for successful domains
-        current_delay = self.domain_delays.get(domain, self.default_delay)
-        if current_delay > self.default_delay:
-            new_delay = max(self.default_delay, current_delay * 0.8)
-            self.domain_delays[domain] = new_delay
-            logger.debug(f"Reduced delay for {domain} to {new_delay:.2f}s")
+        def recover(state: Dict) -> None:
+            # Reset failure count
+            state["failures"] = 0
+            
+            # Gradually reduce delay for successful domains
+            current_delay = state.get("delay", self.default_delay)
+            if current_delay > self.default_delay:
+                state["delay"] = max(self.default_delay, current_delay * 0.8)
+                reduced["delay"] = state["delay"]
+        
+        state = await self.store.update_async(self.NAMESPACE, domain, recover, self.STATE_TTL_SECONDS)
+        self._apply_backoff(url, state)
+        if reduced:
+            logger.debug(f"Reduced delay for {domain} to {reduced['delay']:.2f}s")
     
-    def record_failure(self, url: str, is_rate_limited: bool = False) -> None:
+    async def record_failure(self, url: str, is_rate_limited: bool = False) -> None:
         """Record failed request to increase delay"""
         domain = urlparse(url).netloc
         
-        # Increment failure count
-        failures = self.consecutive_failures.get(domain, 0) + 1
-        self.consecutive_failures[domain] = failures
-        
-        # Increase delay based on failure type and count
-        current_delay = self.domain_delays.get(domain, self.default_delay)
-        
-        if is_rate_limited:
-            # Significant increase for rate limiting
-            multiplier = 2.0 + (failures * 0.5)
-        else:
-            # Moderate increase for other failures
-            multiplier = 1.2 + (failures * 0.1)
-        
-        new_delay = min(self.max_delay, current_delay * multiplier)
-        self.domain_delays[domain] = new_delay
+        def back_off(state: Dict) -> None:
+            # Increment failure count
+            failures = state.get("failures", 0) + 1
+            state["failures"] = failures
+            
+            # Increase delay based on failure type and count
+            if is_rate_limited:
+                # Significant increase for rate limiting
+                multiplier = 2.0 + (failures * 0.5)
+            else:
+                # Moderate increase for other failures
+                multiplier = 1.2 + (failures * 0.1)
+            
+            state["delay"] = min(self.max_delay, state.get("delay", self.default_delay) * multiplier)
         
-        logger.warning(f"Increased delay for {domain} to {new_delay:.2f}s after {failures} failures")
+        state = await self.store.update_async(self.NAMESPACE, domain, back_off, self.STATE_TTL_SECONDS)
+        self._apply_backoff(url, state)
+        logger.warning(f"Increased delay for {domain} to {state['delay']:.2f}s after {state['failures']} failures")
     
     def get_domain_stats(self) -> Dict[str, Dict]:
         """Get statistics for all domains"""
         stats = {}
-        for domain in set(list(self.domain_delays.keys()) + list(self.last_request_times.keys())):
+        for domain, state in self.store.items(self.NAMESPACE).items():
             stats[domain] = {
-                "delay": self.domain_delays.get(domain, self.default_delay),
-                "failures": self.consecutive_failures.get(domain, 0),
-                "last_request": self.last_request_times.get(domain, 0),
+                "delay": state.get("delay", self.default_delay),
+                "failures": state.get("failures", 0),
             }
         return stats
 
 
+class DeadlineExceeded(Exception):
+    """Raised when a request's overall time budget runs out"""
+    pass
+
+
+class Deadline:
+    """Overall time budget for one request, shared by every retry and fallback"""
+    
+    def __init__(self, budget_seconds: Optional[float]):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds if budget_seconds else None
+    
+    def remaining(self) -> float:
+        """Seconds left (infinite when there is no budget)"""
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    async def run(self, awaitable, what: str = "request"):
+        """Await within the remaining budget, raising DeadlineExceeded when it runs out"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(f"No time left in the {self.budget_seconds:.0f}s budget for {what}")
+        if remaining == float('inf'):
+            return await awaitable
+        
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(f"{what} ran past the {self.budget_seconds:.0f}s budget for this request")
+
+
+# (attempt, total_attempts) of the retry loop the current task is running in
+_current_attempt: ContextVar[Tuple[Optional[int], Optional[int]]] = ContextVar("retry_attempt", default=(None, None))
+
+
+def current_attempt() -> Tuple[Optional[int], Optional[int]]:
+    """Attempt number and total attempts for progress events emitted inside execute_with_retry"""
+    return _current_attempt.get()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
 class RetryManager:
     """Handles intelligent retry logic with exponential backoff"""
     
-    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 60.0):
+    def __init__(self, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 60.0, min_attempt_seconds: float = 2.0):
         self.max_retries = max_retries
         self.base_delay = base_delay
         self.max_delay = max_delay
+        # Assumed duration of an attempt before one has been timed
+        self.min_attempt_seconds = min_attempt_seconds
     
-    async def execute_with_retry(self, func, *args, **kwargs):
-        """Execute function with retry logic and exponential backoff"""
+    async def execute_with_retry(
+        self,
+        func,
+        *args,
+        deadline: Optional[Deadline] = None,
+        progress_emitter=None,
+        method: Optional[str] = None,
+        **kwargs
+    ):
+        """Execute function with retry logic and exponential backoff, within the request's deadline"""
+        deadline = deadline or Deadline(None)
+        total_attempts = self.max_retries + 1
         last_exception = None
+        # Slowest attempt so far: a retry is only worth starting if one more fits the budget
+        attempt_seconds = self.min_attempt_seconds
         
-        for attempt in range(self.max_retries + 1):
-            try:
-                if attempt > 0:
-                    # Calculate delay with exponential backoff and jitter
-                    delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
-                    jittered_delay = delay * (0.5 + random.random() * 0.5)  # 50-100% of delay
-                    
-                    logger.info(f"Retry attempt {attempt}/{self.max_retries} in {jittered_delay:.2f}s")
-                    await asyncio.sleep(jittered_delay)
+        for attempt in range(total_attempts):
+            if attempt > 0:
+                delay = self._retry_delay(attempt, last_exception)
+                if delay is None:
+                    break
+                
+                needed = delay + attempt_seconds
+                if deadline.remaining() < needed:
+                    logger.info(
+                        f"Not retrying: {deadline.remaining():.1f}s left of the request budget, "
+                        f"another attempt needs about {needed:.1f}s"
+                    )
+                    break
                 
-                return await func(*args, **kwargs)
+                logger.info(f"Retry attempt {attempt}/{self.max_retries} in {delay:.2f}s")
+                if progress_emitter:
+                    progress_emitter.emit_event(
+                        progress_emitter.current_phase,
+                        ProgressStatus.RETRYING,
+                        f"Attempt {attempt} of {total_attempts} failed, retrying in {delay:.1f}s",
+                        method=method,
+                        attempt=attempt + 1,
+                        total_attempts=total_attempts,
+                        error_details=str(last_exception)[:200],
+                        estimated_remaining_ms=int(delay * 1000)
+                    )
+                await asyncio.sleep(delay)
+            
+            started = time.monotonic()
+            token = _current_attempt.set((attempt + 1, total_attempts))
+            try:
+                return await deadline.run(func(*args, **kwargs), getattr(func, '__name__', 'request'))
                 
+            except DeadlineExceeded:
+                raise
+            
             except Exception as e:
                 last_exception = e
+                attempt_seconds = max(attempt_seconds, time.monotonic() - started)
                 
                 # Check if this is a retryable error
                 if not self._is_retryable_error(e):
@@ -281,10 +393,39 @@ class RetryManager:
                     break
                 
                 logger.warning(f"Attempt {attempt + 1} failed: {e}")
+            finally:
+                _current_attempt.reset(token)
         
         # If we get here, all retries failed
         raise last_exception
     
+    def _retry_delay(self, attempt: int, error: Optional[Exception]) -> Optional[float]:
+        """Backoff before the given attempt, or None when the server asked for a longer wait than max_delay"""
+        # Exponential backoff with jitter (50-100% of delay)
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        delay *= 0.5 + random.random() * 0.5
+        
+        # Never come back sooner than the server asked (429/503 Retry-After)
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            if retry_after > self.max_delay:
+                logger.info(f"Not retrying: server asked to wait {retry_after:.0f}s")
+                return None
+            delay = max(delay, retry_after)
+        
+        return delay
+    
+    def _retry_after(self, error: Optional[Exception]) -> Optional[float]:
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return retry_after
+        
+        # httpx.HTTPStatusError carries the response
+        response = getattr(error, 'response', None)
+        if response is not None:
+            return parse_retry_after(response.headers.get('Retry-After'))
+        return None
+    
     def _is_retryable_error(self, error: Exception) -> bool:
         """Determine if an error is worth retrying"""
         error_str = str(error).lower()
@@ -317,11 +458,15 @@ class RetryManager:
 class ProxyManager:
     """Manages proxy rotation for avoiding IP-based blocking"""
     
-    def __init__(self, proxies: List[str] = None):
+    NAMESPACE = "proxy_health"
+    STATE_TTL_SECONDS = 24 * 60 * 60
+    
+    def __init__(self, proxies: List[str] = None, store: Optional[StateStore] = None):
         self.proxies = proxies or []
         self.current_proxy_index = 0
-        self.proxy_failures: Dict[str, int] = {}
         self.max_failures = 3
+        # Failure counts are shared by every parser (and worker, with the database store)
+        self.store = store or shared_state_store
         
     def add_proxy(self, proxy_url: str) -> None:
         """Add a proxy to the rotation list"""
@@ -332,10 +477,9 @@ class ProxyManager:
         """Remove a proxy from the rotation list"""
         if proxy_url in self.proxies:
             self.proxies.remove(proxy_url)
-            if proxy_url in self.proxy_failures:
-                del self.proxy_failures[proxy_url]
+            self.store.delete(self.NAMESPACE, self._proxy_key(proxy_url))
     
-    def get_next_proxy(self) -> Optional[str]:
+    async def get_next_proxy(self) -> Optional[str]:
         """Get next proxy in rotation, skipping failed ones"""
         if not self.proxies:
             return None
@@ -347,7 +491,8 @@ class ProxyManager:
             self.current_proxy_index = (self.current_proxy_index + 1) % len(self.proxies)
             
             # Check if this proxy has failed too many times
-            failures = self.proxy_failures.get(proxy, 0)
+            state = await self.store.get_async(self.NAMESPACE, self._proxy_key(proxy))
+            failures = state.get("failures", 0) if state else 0
             if failures < self.max_failures:
                 return proxy
             
@@ -355,63 +500,85 @@ class ProxyManager:
         
         # All proxies have failed, reset failure counts and try again
         logger.warning("All proxies have failed, resetting failure counts")
-        self.proxy_failures.clear()
+        for proxy in self.proxies:
+            await self.store.delete_async(self.NAMESPACE, self._proxy_key(proxy))
         return self.proxies[0] if self.proxies else None
     
-    def record_proxy_success(self, proxy_url: str) -> None:
+    async def record_proxy_success(self, proxy_url: str) -> None:
         """Record successful proxy usage"""
-        if proxy_url in self.proxy_failures:
+        def recover(state: Dict) -> None:
             # Reduce failure count on success
-            self.proxy_failures[proxy_url] = max(0, self.proxy_failures[proxy_url] - 1)
+            state["failures"] = max(0, state.get("failures", 0) - 1)
+        
+        await self.store.update_async(self.NAMESPACE, self._proxy_key(proxy_url), recover, self.STATE_TTL_SECONDS)
     
-    def record_proxy_failure(self, proxy_url: str) -> None:
+    async def record_proxy_failure(self, proxy_url: str) -> None:
         """Record proxy failure"""
-        self.proxy_failures[proxy_url] = self.proxy_failures.get(proxy_url, 0) + 1
-        logger.warning(f"Proxy {proxy_url} failed {self.proxy_failures[proxy_url]} times")
+        def add_failure(state: Dict) -> None:
+            state["failures"] = state.get("failures", 0) + 1
+        
+        state = await self.store.update_async(self.NAMESPACE, self._proxy_key(proxy_url), add_failure, self.STATE_TTL_SECONDS)
+        logger.warning(f"Proxy {proxy_url} failed {state['failures']} times")
     
     def get_proxy_stats(self) -> Dict[str, Dict]:
         """Get statistics for all proxies"""
         stats = {}
         for proxy in self.proxies:
+            failures = self._get_failures(proxy)
             stats[proxy] = {
-                "failures": self.proxy_failures.get(proxy, 0),
-                "status": "failed" if self.proxy_failures.get(proxy, 0) >= self.max_failures else "active"
+                "failures": failures,
+                "status": "failed" if failures >= self.max_failures else "active"
             }
         return stats
+    
+    def _get_failures(self, proxy_url: str) -> int:
+        state = self.store.get(self.NAMESPACE, self._proxy_key(proxy_url))
+        return state.get("failures", 0) if state else 0
+    
+    @staticmethod
+    def _proxy_key(proxy_url: str) -> str:
+        """Proxy URLs can carry credentials, so shared state is keyed by a hash"""
+        return hashlib.sha256(proxy_url.encode("utf-8")).hexdigest()[:32]
 
 
 class SessionManager:
     """Manages HTTP sessions with cookie persistence and connection pooling"""
     
-    def __init__(self):
-        self.domain_sessions: Dict[str, Dict] = {}
+    NAMESPACE = "session"
+    STATE_TTL_SECONDS = 24 * 60 * 60
+    
+    def __init__(self, store: Optional[StateStore] = None):
+        # Cookies are shared by every parser (and worker, with the database store)
+        self.store = store or shared_state_store
     
-    def get_session_data(self, url: str) -> Dict:
+    async def get_session_data(self, url: str) -> Dict:
         """Get or create session data for domain"""
         domain = urlparse(url).netloc
         
-        if domain not in self.domain_sessions:
-            self.domain_sessions[domain] = {
-                "cookies": {},
-                "created_at": time.time(),
-                "request_count": 0,
-            }
+        session_data = await self.store.get_async(self.NAMESPACE, domain)
+        if session_data is None:
+            session_data = await self.store.update_async(self.NAMESPACE, domain, self._init_session, self.STATE_TTL_SECONDS)
         
-        return self.domain_sessions[domain]
+        return session_data
     
-    def update_session(self, url: str, response_headers: Dict, response_cookies: Dict = None) -> None:
+    async def update_session(self, url: str, response_headers: Dict, response_cookies: Dict = None) -> None:
         """Update session data with response information"""
-        session_data = self.get_session_data(url)
-        session_data["request_count"] += 1
-        session_data["last_request"] = time.time()
+        domain = urlparse(url).netloc
+        
+        def record_response(session_data: Dict) -> None:
+            self._init_session(session_data)
+            session_data["request_count"] += 1
+            session_data["last_request"] = time.time()
+            
+            # Update cookies if provided
+            if response_cookies:
+                session_data["cookies"].update(response_cookies)
         
-        # Update cookies if provided
-        if response_cookies:
-            session_data["cookies"].update(response_cookies)
+        await self.store.update_async(self.NAMESPACE, domain, record_response, self.STATE_TTL_SECONDS)
     
-    def get_session_headers(self, url: str) -> Dict[str, str]:
+    async def get_session_headers(self, url: str) -> Dict[str, str]:
         """Get session-specific headers including cookies"""
-        session_data = self.get_session_data(url)
+        session_data = await self.get_session_data(url)
         headers = {}
         
         # Add cookies if we have them
@@ -422,15 +589,17 @@ class SessionManager:
         return headers
     
     def cleanup_old_sessions(self, max_age_hours: int = 24) -> None:
-        """Remove old session data to prevent memory leaks"""
+        """Remove old session data (the store also expires sessions a day after their last use)"""
         current_time = time.time()
         max_age_seconds = max_age_hours * 3600
         
-        domains_to_remove = []
-        for domain, session_data in self.domain_sessions.items():
-            if current_time - session_data["created_at"] > max_age_seconds:
-                domains_to_remove.append(domain)
-        
-        for domain in domains_to_remove:
-            del self.domain_sessions[domain]
-            logger.debug(f"Cleaned up old session for {domain}")
\ No newline at end of file
+        for domain, session_data in self.store.items(self.NAMESPACE).items():
+            if current_time - session_data.get("created_at", current_time) > max_age_seconds:
+                self.store.delete(self.NAMESPACE, domain)
+                logger.debug(f"Cleaned up old session for {domain}")
+    
+    @staticmethod
+    def _init_session(session_data: Dict) -> None:
+        session_data.setdefault("cookies", {})
+        session_data.setdefault("created_at", time.time())
+        session_data.setdefault("request_count", 0)
@@ -0,0 +1,242 @@
+"""
+HTTP validators for pages the parser has already read.
+Keeps each page's ETag / Last-Modified, its compressed body and the recipe
+parsed from it in a small SQLite file keyed by canonical URL, so re-imports
+send a conditional request and a 304 Not Modified skips both the download and
+the parsing cascade. Lookups read only the validators; the body and recipe are
+loaded after a 304. The *_async methods run SQLite work in a worker thread.
+"""
+import asyncio
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from app.core.config import settings
+from .base_parser import ParsedRecipe
+from .parse_cache import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB,
+    recipe TEXT,
+    stored_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class StoredPage:
+    """Validators, body and parse result remembered for one URL (body and recipe are filled in by load)"""
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: Optional[str] = None
+    recipe: Optional[ParsedRecipe] = None
+
+
+class RevalidationStore:
+    """SQLite-backed store of HTTP validators and parsed results"""
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: float = 30 * 86400, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+        self._conn: Optional[sqlite3.Connection] = None
+        # Instagram parsing runs in worker threads; one connection is shared under a lock
+        self._lock = threading.Lock()
+        self._unavailable = False
+
+        self.stats = {
+            "conditional_requests": 0,
+            "not_modified": 0,
+            "modified": 0,
+            "stores": 0,
+            "bytes_saved": 0,
+            "evictions": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "RevalidationStore":
+        """Build the store from application settings"""
+        return cls(
+            settings.REVALIDATION_STORE_PATH,
+            max_entries=settings.REVALIDATION_MAX_ENTRIES,
+            ttl_seconds=settings.REVALIDATION_TTL_SECONDS,
+            enabled=settings.REVALIDATION_ENABLED,
+        )
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._unavailable:
+            try:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+                # WAL lets several workers read while one writes
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(SCHEMA)
+                self._conn = conn
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Revalidation store unavailable at {self.path}, conditional requests disabled: {e}")
+                self._unavailable = True
+        return self._conn
+
+    def lookup(self, url: str) -> Optional[StoredPage]:
+        """Return the stored validators for a URL, if any and not expired (body and recipe not loaded)"""
+        if not self.enabled:
+            return None
+
+        key = canonicalize_url(url)
+        row = self._fetch_one("SELECT etag, last_modified, stored_at FROM page_validators WHERE url = ?", key)
+        if row is None:
+            return None
+
+        etag, last_modified, stored_at = row
+        if stored_at + self.ttl_seconds <= time.time():
+            self.delete(url)
+            return None
+
+        return StoredPage(url=key, etag=etag, last_modified=last_modified)
+
+    def load(self, stored: StoredPage) -> bool:
+        """Fill in the body and recipe of a page the server answered 304 for; False if the entry is gone"""
+        row = self._fetch_one("SELECT body, recipe FROM page_validators WHERE url = ?", stored.url)
+        if row is None:
+            return False
+
+        body, recipe_json = row
+        stored.body = zlib.decompress(body).decode('utf-8') if body else None
+        if recipe_json:
+            try:
+                stored.recipe = ParsedRecipe(**json.loads(recipe_json))
+            except Exception as e:
+                logger.debug(f"Ignoring unreadable stored recipe for {stored.url}: {e}")
+        return True
+
+    async def lookup_async(self, url: str) -> Optional[StoredPage]:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(self.lookup, url)
+
+    async def load_not_modified_async(self, stored: StoredPage) -> bool:
+        """load() and record_not_modified() for a 304, in a worker thread"""
+        def load_and_record() -> bool:
+            if not self.load(stored):
+                return False
+            self.record_not_modified(stored)
+            return True
+
+        return await asyncio.to_thread(load_and_record)
+
+    async def store_async(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str,
+                          recipe: Optional[ParsedRecipe] = None) -> None:
+        if not self.enabled or not (etag or last_modified):
+            return
+        await asyncio.to_thread(self.store, url, etag, last_modified, body, recipe)
+
+    def conditional_headers(self, stored: Optional[StoredPage]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a stored page"""
+        headers = {}
+        if stored is None:
+            return headers
+        if stored.etag:
+            headers["If-None-Match"] = stored.etag
+        if stored.last_modified:
+            headers["If-Modified-Since"] = stored.last_modified
+        if headers:
+            self.stats["conditional_requests"] += 1
+        return headers
+
+    def record_not_modified(self, stored: StoredPage) -> None:
+        """Count a 304; the server confirmed the entry is current, so it starts a fresh TTL"""
+        self.stats["not_modified"] += 1
+        self.stats["bytes_saved"] += len(stored.body or "")
+        now = time.time()
+        self._execute("UPDATE page_validators SET stored_at = ?, last_used_at = ? WHERE url = ?", (now, now, stored.url))
+
+    def record_modified(self) -> None:
+        """Count a conditional request the server answered with a full page"""
+        self.stats["modified"] += 1
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str,
+              recipe: Optional[ParsedRecipe] = None) -> None:
+        """Remember a page that carried validators, with the recipe parsed from it"""
+        if not self.enabled or not (etag or last_modified):
+            return
+
+        now = time.time()
+        recipe_json = json.dumps(recipe.model_dump(mode="json")) if recipe else None
+        stored = self._execute(
+            "INSERT OR REPLACE INTO page_validators "
+            "(url, etag, last_modified, body, recipe, stored_at, last_used_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (canonicalize_url(url), etag, last_modified, zlib.compress(body.encode('utf-8'), 6),
+             recipe_json, now, now)
+        )
+        if stored:
+            self.stats["stores"] += 1
+            if self.stats["stores"] % 100 == 0:
+                self._evict()
+
+    def delete(self, url: str) -> None:
+        self._execute("DELETE FROM page_validators WHERE url = ?", (canonicalize_url(url),))
+
+    def _evict(self) -> None:
+        """Drop expired entries and the least recently used ones beyond max_entries"""
+        self._execute("DELETE FROM page_validators WHERE stored_at <= ?", (time.time() - self.ttl_seconds,))
+        removed = self._execute(
+            "DELETE FROM page_validators WHERE url IN ("
+            "SELECT url FROM page_validators ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        self.stats["evictions"] += removed or 0
+
+    def _fetch_one(self, sql: str, key: str) -> Optional[tuple]:
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                return conn.execute(sql, (key,)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Revalidation lookup failed for {key}: {e}")
+                return None
+
+    def _execute(self, sql: str, params: tuple) -> Optional[int]:
+        """Run a write statement; returns the affected row count, or None when the store is unavailable"""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                return conn.execute(sql, params).rowcount
+            except sqlite3.Error as e:
+                logger.warning(f"Revalidation store write failed: {e}")
+                return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        conditional = self.stats["conditional_requests"]
+        return {
+            "enabled": self.enabled,
+            "available": not self._unavailable,
+            **self.stats,
+            "hit_rate": self.stats["not_modified"] / conditional if conditional else 0.0,
+        }
+
+
+# Global store shared by every URLParser instance in this process
+revalidation_store = RevalidationStore.from_settings()
@@ -0,0 +1,124 @@
+"""
+Single-flight deduplication for concurrent parses of the same URL.
+When many requests for one canonical URL arrive together, only the first starts
+a parse; the others await the same task and receive its result. Each waiter
+keeps its own ProgressEventEmitter, fed from the shared task's events.
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+
+from .progress_events import ProgressEvent, ProgressEventEmitter
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressFanout(ProgressEventEmitter):
+    """Emitter used by the shared task; mirrors every event to attached waiters"""
+
+    def __init__(self, url: str, session_id: str):
+        super().__init__(url, session_id)
+        self.subscribers: List[ProgressEventEmitter] = []
+        self.add_listener(self._forward)
+
+    def attach(self, emitter: ProgressEventEmitter) -> None:
+        """Attach a waiter's emitter and replay the events it missed"""
+        for event in list(self.events):
+            self._mirror(emitter, event)
+        self.subscribers.append(emitter)
+
+    def detach(self, emitter: ProgressEventEmitter) -> None:
+        if emitter in self.subscribers:
+            self.subscribers.remove(emitter)
+
+    def _forward(self, event: ProgressEvent) -> None:
+        for emitter in list(self.subscribers):
+            self._mirror(emitter, event)
+
+    def _mirror(self, emitter: ProgressEventEmitter, event: ProgressEvent) -> None:
+        try:
+            emitter.emit_event(
+                event.phase,
+                event.status,
+                event.message,
+                method=event.method,
+                attempt=event.attempt,
+                total_attempts=event.total_attempts,
+                metadata=event.metadata,
+                error_details=event.error_details,
+                suggestions=event.suggestions,
+                estimated_remaining_ms=event.estimated_remaining_ms,
+            )
+        except Exception as e:
+            logger.error(f"Failed to forward progress event to {emitter.session_id}: {e}")
+
+
+class _Flight:
+    """A shared in-flight task and its progress fan-out"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.fanout = ProgressFanout(key, f"flight-{id(self)}")
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one task per key at a time and shares its result"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.stats = {
+            "started": 0,
+            "joined": 0,
+        }
+
+    async def run(
+        self,
+        key: str,
+        func: Callable[[ProgressEventEmitter], Awaitable[Any]],
+        progress_emitter: Optional[ProgressEventEmitter] = None,
+    ) -> Any:
+        """Run func(emitter) for key, or join the flight already running for it"""
+        flight = self._flights.get(key)
+
+        if flight is None:
+            flight = _Flight(key)
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(func(flight.fanout))
+            flight.task.add_done_callback(lambda _task: self._finish(flight))
+            self.stats["started"] += 1
+        else:
+            self.stats["joined"] += 1
+            logger.debug(f"Joining in-flight parse for {key} ({flight.waiters} waiting)")
+
+        if progress_emitter:
+            flight.fanout.attach(progress_emitter)
+
+        flight.waiters += 1
+        try:
+            # Shield the shared task: one waiter disconnecting must not cancel it for the rest
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if progress_emitter:
+                flight.fanout.detach(progress_emitter)
+
+    def _finish(self, flight: _Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+        # Retrieve the exception so an unobserved failure is not logged as never retrieved
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "in_flight": len(self._flights),
+            "waiters": sum(flight.waiters for flight in self._flights.values()),
+        }
+
+
+# Global single-flight group for URL parses in this process
+url_parse_flights = SingleFlight()
@@ -0,0 +1,115 @@
+"""
+Process-wide spaCy pipeline for the NLP extractor.
+The model is loaded once per process (warmed at startup) without the
+components the extractor never reads, and lines are tagged in batches through
+nlp.pipe instead of one pipeline call per ingredient or instruction.
+"""
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Sequence
+
+from app.core.config import settings
+
+try:
+    import spacy
+    SPACY_AVAILABLE = True
+except ImportError:
+    SPACY_AVAILABLE = False
+    spacy = None
+
+logger = logging.getLogger(__name__)
+
+
+class SpacyPipeline:
+    """Lazily loaded, shared spaCy model"""
+
+    def __init__(self, model_name: str = "en_core_web_sm", exclude: Sequence[str] = ("ner", "parser"),
+                 batch_size: int = 64, n_process: int = 1, enabled: bool = True):
+        self.model_name = model_name
+        self.exclude = list(exclude)
+        self.batch_size = max(1, batch_size)
+        self.n_process = max(1, n_process)
+        self.enabled = enabled and SPACY_AVAILABLE
+
+        self._nlp = None
+        self._load_attempted = False
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "load_ms": None,
+            "pipe_calls": 0,
+            "texts_processed": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "SpacyPipeline":
+        """Build the pipeline from application settings"""
+        return cls(
+            model_name=settings.SPACY_MODEL,
+            exclude=[name.strip() for name in settings.SPACY_EXCLUDE.split(',') if name.strip()],
+            batch_size=settings.SPACY_BATCH_SIZE,
+            n_process=settings.SPACY_N_PROCESS,
+            enabled=settings.SPACY_ENABLED,
+        )
+
+    def load(self):
+        """Load the model on first use; returns None when spaCy or the model is unavailable"""
+        if not self.enabled or self._load_attempted:
+            return self._nlp
+
+        with self._lock:
+            if self._load_attempted:
+                return self._nlp
+
+            start = time.perf_counter()
+            try:
+                # Excluded components are never loaded (requires: python -m spacy download en_core_web_sm)
+                self._nlp = spacy.load(self.model_name, exclude=self.exclude)
+                self.stats["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                logger.info(f"Loaded spaCy model {self.model_name} in {self.stats['load_ms']} ms "
+                            f"(pipes: {', '.join(self._nlp.pipe_names)})")
+            except OSError as e:
+                # An untrained blank pipeline has no tagger to read, so fall back to the regex parsers
+                logger.warning(f"spaCy model {self.model_name} unavailable, using regex parsing only: {e}")
+                self._nlp = None
+            self._load_attempted = True
+        return self._nlp
+
+    def warm(self) -> None:
+        """Load the model and run one line through it, so the first request pays neither cost"""
+        if not self.enabled:
+            logger.info("spaCy not installed or disabled; NLP extraction uses regex parsing only")
+            return
+        nlp = self.load()
+        if nlp is not None:
+            nlp("1 tsp salt")
+
+    def pipe(self, texts: List[str]) -> List[Optional[Any]]:
+        """Docs for the texts, in order; Nones when no model is loaded"""
+        nlp = self.load()
+        if nlp is None or not texts:
+            return [None] * len(texts)
+
+        # Worker processes only pay off for batches larger than one chunk
+        n_process = self.n_process if len(texts) > self.batch_size else 1
+        docs = list(nlp.pipe(texts, batch_size=self.batch_size, n_process=n_process))
+
+        self.stats["pipe_calls"] += 1
+        self.stats["texts_processed"] += len(texts)
+        return docs
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "model": self.model_name,
+            "loaded": self._nlp is not None,
+            "pipes": list(self._nlp.pipe_names) if self._nlp is not None else [],
+            "batch_size": self.batch_size,
+            "n_process": self.n_process,
+            **self.stats,
+        }
+
+
+# Global pipeline shared by every NLPExtractor instance in this process
+spacy_pipeline = SpacyPipeline.from_settings()
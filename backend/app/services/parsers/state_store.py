@@ -0,0 +1,326 @@
+"""
+Shared state for the request helpers (politeness delays, cookies, proxy health).
+The in-process store keeps state for the life of the worker, shared by every
+URLParser instance; the database store keeps it in the shared_state table
+(Postgres, or a SQLite file) so every uvicorn worker and restart sees the same
+per-domain backoff, cookies and proxy health. Updates are read-modify-write
+under a row lock so concurrent workers never lose each other's changes.
+Async callers use the *_async methods, which run the database store's
+queries in a worker thread instead of on the event loop.
+"""
+import asyncio
+import os
+import copy
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Mutates a namespace/key's state dict in place. It may be called more than once
+# for one update (the database store retries after a concurrent insert), so it
+# must only change the dict it is given and set, not accumulate, anything it captures
+StateMutator = Callable[[Dict[str, Any]], None]
+
+
+class StateStore:
+    """Interface for namespaced key/value state with atomic updates"""
+
+    # True when calls do blocking I/O; the async methods then run them in a thread
+    blocking = False
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def update(self, namespace: str, key: str, mutate: StateMutator, ttl_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Atomically apply mutate to the current state (an empty dict when missing) and return the result.
+
+        mutate may run more than once; see StateMutator.
+        """
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    def items(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def get_async(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        return await self._offload(self.get, namespace, key)
+
+    async def update_async(self, namespace: str, key: str, mutate: StateMutator, ttl_seconds: Optional[float] = None) -> Dict[str, Any]:
+        return await self._offload(self.update, namespace, key, mutate, ttl_seconds)
+
+    async def delete_async(self, namespace: str, key: str) -> None:
+        await self._offload(self.delete, namespace, key)
+
+    async def _offload(self, func, *args):
+        if self.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.__class__.__name__}
+
+
+class InMemoryStateStore(StateStore):
+    """Process-wide state shared by every parser instance in this worker"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[Optional[float], Dict[str, Any]]] = {}
+        # Instagram parsing runs in worker threads, so guard read-modify-write
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._live_state(namespace, key)
+            return copy.deepcopy(state) if state is not None else None
+
+    def update(self, namespace: str, key: str, mutate: StateMutator, ttl_seconds: Optional[float] = None) -> Dict[str, Any]:
+        with self._lock:
+            state = copy.deepcopy(self._live_state(namespace, key) or {})
+            mutate(state)
+            expires_at = time.time() + ttl_seconds if ttl_seconds else None
+            self._entries[(namespace, key)] = (expires_at, state)
+            return copy.deepcopy(state)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def items(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                key: copy.deepcopy(state)
+                for (entry_namespace, key) in list(self._entries)
+                if entry_namespace == namespace
+                for state in [self._live_state(entry_namespace, key)] if state is not None
+            }
+
+    def _live_state(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+
+        expires_at, state = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[(namespace, key)]
+            return None
+        return state
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "entries": len(self._entries)}
+
+
+class DatabaseStateStore(StateStore):
+    """State persisted in the shared_state table (app database, or a separate Postgres/SQLite URL)"""
+
+    blocking = True
+
+    def __init__(self, database_url: str = "", session_factory=None):
+        self.database_url = database_url
+        self._session_factory = session_factory
+        # Sessions are opened from worker threads; only one of them builds the engine
+        self._init_lock = threading.Lock()
+        # Keeps the parser working (per process) while the database is unreachable
+        self._fallback = InMemoryStateStore()
+        self._database_down = False
+        self.stats = {"updates": 0, "lock_retries": 0, "fallbacks": 0}
+
+    def _session(self):
+        with self._init_lock:
+            if self._session_factory is None:
+                # The state store may use its own database, so the engine is chosen here rather than via app_session_factory
+                from app.models.shared_state import SharedState
+
+                if self.database_url:
+                    engine = _create_state_engine(self.database_url)
+                else:
+                    from app.core.database import engine
+
+                SharedState.__table__.create(bind=engine, checkfirst=True)
+
+                from sqlalchemy.orm import sessionmaker
+                self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        return self._session_factory()
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            from app.models.shared_state import SharedState
+            db = self._session()
+        except Exception as e:
+            return self._use_fallback(e).get(namespace, key)
+
+        try:
+            row = db.get(SharedState, (namespace, key))
+            if row is None or _is_expired(row.expires_at):
+                return None
+            return row.payload
+        except Exception as e:
+            db.rollback()
+            return self._use_fallback(e).get(namespace, key)
+        finally:
+            db.close()
+
+    def update(self, namespace: str, key: str, mutate: StateMutator, ttl_seconds: Optional[float] = None) -> Dict[str, Any]:
+        from sqlalchemy.exc import IntegrityError
+
+        try:
+            from app.models.shared_state import SharedState
+            db = self._session()
+        except Exception as e:
+            return self._use_fallback(e).update(namespace, key, mutate, ttl_seconds)
+
+        try:
+            # Two attempts: a concurrent worker may insert the same new row between our SELECT and INSERT
+            for attempt in range(2):
+                try:
+                    row = db.query(SharedState).filter(
+                        SharedState.namespace == namespace,
+                        SharedState.key == key
+                    ).with_for_update().one_or_none()
+
+                    state = {} if row is None or _is_expired(row.expires_at) else copy.deepcopy(row.payload)
+                    mutate(state)
+
+                    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds) if ttl_seconds else None
+                    if row is None:
+                        db.add(SharedState(namespace=namespace, key=key, payload=state, expires_at=expires_at))
+                    else:
+                        row.payload = state
+                        row.expires_at = expires_at
+                    db.commit()
+
+                    self.stats["updates"] += 1
+                    self._database_down = False
+                    return state
+                except IntegrityError:
+                    db.rollback()
+                    self.stats["lock_retries"] += 1
+                    if attempt:
+                        raise
+        except Exception as e:
+            db.rollback()
+            return self._use_fallback(e).update(namespace, key, mutate, ttl_seconds)
+        finally:
+            db.close()
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._fallback.delete(namespace, key)
+        try:
+            from app.models.shared_state import SharedState
+            db = self._session()
+        except Exception as e:
+            logger.warning(f"Shared state delete failed for {namespace}:{key}: {e}")
+            return
+
+        try:
+            db.query(SharedState).filter(
+                SharedState.namespace == namespace,
+                SharedState.key == key
+            ).delete()
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Shared state delete failed for {namespace}:{key}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def items(self, namespace: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            from app.models.shared_state import SharedState
+            db = self._session()
+        except Exception as e:
+            return self._use_fallback(e).items(namespace)
+
+        try:
+            rows = db.query(SharedState).filter(SharedState.namespace == namespace).all()
+            return {row.key: row.payload for row in rows if not _is_expired(row.expires_at)}
+        except Exception as e:
+            db.rollback()
+            return self._use_fallback(e).items(namespace)
+        finally:
+            db.close()
+
+    def purge_expired(self) -> int:
+        """Delete expired rows in every namespace (returns number removed)"""
+        from app.models.shared_state import SharedState
+
+        db = self._session()
+        try:
+            removed = db.query(SharedState).filter(
+                SharedState.expires_at <= datetime.now(timezone.utc)
+            ).delete()
+            db.commit()
+            return removed
+        except Exception as e:
+            logger.warning(f"Shared state purge failed: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+
+    def _use_fallback(self, error: Exception) -> InMemoryStateStore:
+        self.stats["fallbacks"] += 1
+        if not self._database_down:
+            logger.warning(f"Shared state database unavailable, using in-process state: {error}")
+        self._database_down = True
+        return self._fallback
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "database",
+            "database": "sqlite" if self.database_url.startswith("sqlite") else "postgres",
+            **self.stats,
+        }
+
+
+def _create_state_engine(database_url: str):
+    """Engine for a dedicated state database; SQLite takes the write lock up front"""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.engine import make_url
+
+    url = make_url(database_url)
+    if not url.drivername.startswith("sqlite"):
+        return create_engine(database_url, pool_pre_ping=True)
+
+    if url.database and url.database != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+
+    engine = create_engine(database_url, connect_args={"timeout": 30, "check_same_thread": False})
+
+    # SQLite ignores SELECT ... FOR UPDATE; BEGIN IMMEDIATE serializes writers instead
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+def _is_expired(expires_at: Optional[datetime]) -> bool:
+    if expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at <= datetime.now(timezone.utc)
+
+
+def create_state_store(backend: str, database_url: str = "") -> StateStore:
+    """Build a state store by name ('memory' or 'database')"""
+    if backend == "database":
+        return DatabaseStateStore(database_url)
+    if backend != "memory":
+        logger.warning(f"Unknown shared state backend '{backend}', falling back to in-process state")
+    return InMemoryStateStore()
+
+
+# Global state store shared by every RateLimiter, SessionManager and ProxyManager
+shared_state_store = create_state_store(settings.SHARED_STATE_BACKEND, settings.SHARED_STATE_DATABASE_URL)
@@ -0,0 +1,553 @@
+"""
+Per-domain parsing strategy table.
+Records how often each parsing method (recipe-scrapers, JSON-LD, microdata,
+recipe section, HTML heuristics, browser) succeeds on a domain and how long it
+takes, persists the counters in Postgres, and plans the cascade for the next
+request: methods that keep failing are skipped, domains that only parse in a
+browser go straight to it, and a share of requests explore the full cascade
+so the table notices when a site changes. Plans use exponentially decayed
+counters, so a site that changed its markup is re-learned instead of being
+judged on its whole history.
+"""
+import asyncio
+import time
+import random
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.sessions import app_session_factory
+
+logger = logging.getLogger(__name__)
+
+# Methods tracked per domain
+METHOD_SCRAPERS = "scrapers"
+METHOD_JSON_LD = "json-ld"
+METHOD_MICRODATA = "microdata"
+METHOD_SECTION = "section"
+METHOD_HTML = "html"
+METHOD_BROWSER = "browser"
+
+# Manual HTTP parsing runs these in one pass over the same page; a manual parse
+# is recorded under the method that produced the recipe (or "html" when none did)
+MANUAL_METHODS = (METHOD_JSON_LD, METHOD_MICRODATA, METHOD_SECTION, METHOD_HTML)
+STRATEGY_METHODS = (METHOD_SCRAPERS,) + MANUAL_METHODS + (METHOD_BROWSER,)
+
+# Stages of the plain-HTTP part of the cascade
+STAGE_SCRAPERS = "scrapers"
+STAGE_MANUAL = "manual"
+
+
+@dataclass
+class MethodStats:
+    """Attempt/success/latency counters for one method on one domain.
+
+    attempts/successes/total_latency_ms are lifetime totals for reporting; the
+    recent_* counters decay by half every half-life (as of recent_at) and are
+    what plans are built from.
+    """
+    attempts: int = 0
+    successes: int = 0
+    total_latency_ms: float = 0.0
+    last_success_at: Optional[float] = None
+    last_failure_at: Optional[float] = None
+    recent_attempts: float = 0.0
+    recent_successes: float = 0.0
+    recent_latency_ms: float = 0.0
+    recent_at: Optional[float] = None
+
+    @property
+    def success_rate(self) -> float:
+        # Decay scales both counters alike, so the ratio needs no decay applied
+        return self.recent_successes / self.recent_attempts if self.recent_attempts else 0.0
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return self.recent_latency_ms / self.recent_attempts if self.recent_attempts else 0.0
+
+    def weight(self, now: float, half_life: float) -> float:
+        """Decayed number of attempts as of now"""
+        return self.recent_attempts * _decay_factor(self.recent_at, now, half_life)
+
+    def decay(self, now: float, half_life: float) -> None:
+        factor = _decay_factor(self.recent_at, now, half_life)
+        self.recent_attempts *= factor
+        self.recent_successes *= factor
+        self.recent_latency_ms *= factor
+        self.recent_at = _latest(self.recent_at, now)
+
+    def record(self, success: bool, latency_ms: float, at: float, half_life: float) -> None:
+        self.decay(at, half_life)
+        self.attempts += 1
+        self.total_latency_ms += latency_ms
+        self.recent_attempts += 1
+        self.recent_latency_ms += latency_ms
+        if success:
+            self.successes += 1
+            self.recent_successes += 1
+            self.last_success_at = at
+        else:
+            self.last_failure_at = at
+
+    def merge(self, other: "MethodStats", half_life: float) -> None:
+        self.attempts += other.attempts
+        self.successes += other.successes
+        self.total_latency_ms += other.total_latency_ms
+        self.last_success_at = _latest(self.last_success_at, other.last_success_at)
+        self.last_failure_at = _latest(self.last_failure_at, other.last_failure_at)
+
+        # Bring both sets of recent counters to the same moment before adding them
+        now = _latest(self.recent_at, other.recent_at)
+        if now is None:
+            return
+        self.decay(now, half_life)
+        factor = _decay_factor(other.recent_at, now, half_life)
+        self.recent_attempts += other.recent_attempts * factor
+        self.recent_successes += other.recent_successes * factor
+        self.recent_latency_ms += other.recent_latency_ms * factor
+
+    def to_dict(self, now: float, half_life: float) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "recent_attempts": round(self.weight(now, half_life), 1),
+            "success_rate": round(self.success_rate, 3),
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "last_success_at": _isoformat(self.last_success_at),
+            "last_failure_at": _isoformat(self.last_failure_at),
+        }
+
+
+@dataclass
+class StrategyPlan:
+    """How the URL parser should run its cascade for one request"""
+    browser_first: bool = False
+    http_stages: List[str] = field(default_factory=lambda: [STAGE_SCRAPERS, STAGE_MANUAL])
+    skipped: List[str] = field(default_factory=list)
+    exploring: bool = False
+    reason: str = "default cascade"
+
+    @property
+    def is_default(self) -> bool:
+        return not self.browser_first and not self.skipped and self.http_stages == [STAGE_SCRAPERS, STAGE_MANUAL]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "browser_first": self.browser_first,
+            "http_stages": list(self.http_stages),
+            "skipped": list(self.skipped),
+            "reason": self.reason,
+        }
+
+
+class StrategyTable:
+    """Learns which parsing methods work per domain and plans the cascade from it"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        persist: bool = True,
+        min_samples: int = 5,
+        min_success_rate: float = 0.2,
+        exploration_rate: float = 0.1,
+        flush_interval: float = 30.0,
+        decay_half_life: float = 86400.0,
+        session_factory=None,
+    ):
+        self.enabled = enabled
+        self.persist = persist
+        self.min_samples = max(1, min_samples)
+        self.min_success_rate = min_success_rate
+        self.exploration_rate = exploration_rate
+        self.flush_interval = flush_interval
+        self.decay_half_life = max(1.0, decay_half_life)
+        self._session_factory = session_factory
+
+        self._domains: Dict[str, Dict[str, MethodStats]] = {}
+        self._loaded_domains = set()
+        # One database load per domain in flight; concurrent first requests all wait on it
+        self._loading: Dict[str, asyncio.Task] = {}
+        # Counters recorded since the last flush, written as increments so workers don't overwrite each other
+        self._pending: Dict[Tuple[str, str], MethodStats] = {}
+        self._last_flush = time.time()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "plans": 0,
+            "explorations": 0,
+            "browser_first": 0,
+            "scrapers_skipped": 0,
+            "manual_first": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+        }
+
+    @classmethod
+    def from_settings(cls) -> "StrategyTable":
+        """Build the table from application settings"""
+        return cls(
+            enabled=settings.STRATEGY_LEARNING_ENABLED,
+            persist=settings.STRATEGY_PERSIST,
+            min_samples=settings.STRATEGY_MIN_SAMPLES,
+            min_success_rate=settings.STRATEGY_MIN_SUCCESS_RATE,
+            exploration_rate=settings.STRATEGY_EXPLORATION_RATE,
+            flush_interval=settings.STRATEGY_FLUSH_INTERVAL,
+            decay_half_life=settings.STRATEGY_DECAY_HALF_LIFE_HOURS * 3600,
+        )
+
+    async def plan(self, domain: str) -> StrategyPlan:
+        """Plan the cascade for a request to domain (occasionally exploring the full cascade)"""
+        if not self.enabled:
+            return StrategyPlan(reason="strategy learning disabled")
+
+        self.stats["plans"] += 1
+        await self._ensure_loaded(domain)
+        plan = self._build_plan(self._domain_stats(domain))
+
+        if not plan.is_default and random.random() < self.exploration_rate:
+            self.stats["explorations"] += 1
+            return StrategyPlan(exploring=True, reason=f"exploring full cascade (learned: {plan.reason})")
+
+        if plan.browser_first:
+            self.stats["browser_first"] += 1
+        if STAGE_SCRAPERS in plan.skipped:
+            self.stats["scrapers_skipped"] += 1
+        if plan.http_stages and plan.http_stages[0] == STAGE_MANUAL:
+            self.stats["manual_first"] += 1
+        return plan
+
+    def record(self, domain: str, method: str, success: bool, latency_ms: float) -> None:
+        """Record the outcome of one method on one domain"""
+        domain = normalize_domain(domain)
+        now = time.time()
+
+        self._domain_stats(domain).setdefault(method, MethodStats()).record(success, latency_ms, now, self.decay_half_life)
+        if self.persist:
+            self._pending.setdefault((domain, method), MethodStats()).record(success, latency_ms, now, self.decay_half_life)
+            if now - self._last_flush >= self.flush_interval:
+                self._schedule_flush()
+
+    def _build_plan(self, stats: Dict[str, MethodStats]) -> StrategyPlan:
+        scrapers = stats.get(METHOD_SCRAPERS, MethodStats())
+        manual = self._combine(stats.get(method) for method in MANUAL_METHODS)
+        browser = stats.get(METHOD_BROWSER, MethodStats())
+
+        plan = StrategyPlan(http_stages=[], reason="")
+        reasons = []
+
+        if self._is_failing(scrapers):
+            plan.skipped.append(STAGE_SCRAPERS)
+            reasons.append(f"recipe-scrapers failing ({_describe(scrapers)})")
+        else:
+            plan.http_stages.append(STAGE_SCRAPERS)
+
+        # Manual parsing is the baseline and is never skipped, only reordered
+        if (
+            STAGE_SCRAPERS in plan.http_stages
+            and self._is_proven(scrapers) and self._is_proven(manual)
+            and self._cost(manual) < self._cost(scrapers)
+        ):
+            plan.http_stages.insert(0, STAGE_MANUAL)
+            reasons.append("manual parsing cheaper than recipe-scrapers")
+        else:
+            plan.http_stages.append(STAGE_MANUAL)
+
+        # Go straight to the browser when nothing over plain HTTP has been working
+        http_failing = self._is_failing(manual) and (STAGE_SCRAPERS in plan.skipped or not self._is_tried(scrapers))
+        if http_failing and self._is_proven(browser) and not self._is_failing(browser):
+            plan.browser_first = True
+            reasons.append(
+                f"plain HTTP failing ({_describe(manual)}), "
+                f"browser works ({_describe(browser)})"
+            )
+
+        plan.reason = "; ".join(reasons) or "default cascade"
+        return plan
+
+    def _combine(self, stats: Iterable[Optional[MethodStats]]) -> MethodStats:
+        combined = MethodStats()
+        for item in stats:
+            if item:
+                combined.merge(item, self.decay_half_life)
+        return combined
+
+    def _is_tried(self, stats: MethodStats) -> bool:
+        return stats.weight(time.time(), self.decay_half_life) >= 0.5
+
+    def _is_proven(self, stats: MethodStats) -> bool:
+        # Idle domains decay below the threshold and go back to the full cascade
+        return stats.weight(time.time(), self.decay_half_life) >= self.min_samples
+
+    def _is_failing(self, stats: MethodStats) -> bool:
+        return self._is_proven(stats) and stats.success_rate < self.min_success_rate
+
+    def _cost(self, stats: MethodStats) -> float:
+        """Expected time spent per successful parse"""
+        return stats.avg_latency_ms / max(stats.success_rate, 0.01)
+
+    def _domain_stats(self, domain: str) -> Dict[str, MethodStats]:
+        return self._domains.setdefault(normalize_domain(domain), {})
+
+    async def _ensure_loaded(self, domain: str) -> None:
+        """Seed a domain's counters from the database the first time it is seen, off the event loop"""
+        domain = normalize_domain(domain)
+        if domain in self._loaded_domains:
+            return
+
+        if not self.persist:
+            self._loaded_domains.add(domain)
+            return
+
+        task = self._loading.get(domain)
+        if task is None:
+            task = asyncio.create_task(self._load_into_table(domain))
+            self._loading[domain] = task
+            task.add_done_callback(lambda _: self._loading.pop(domain, None))
+        # Shielded so a cancelled request does not cancel the load other requests are waiting on
+        await asyncio.shield(task)
+
+    async def _load_into_table(self, domain: str) -> None:
+        loaded = await asyncio.to_thread(self._load_domain, domain)
+        if loaded is None:
+            # Left unmarked, so the next request for the domain tries again
+            return
+
+        stats = self._domain_stats(domain)
+        for method, method_stats in loaded.items():
+            stats.setdefault(method, MethodStats()).merge(method_stats, self.decay_half_life)
+        self._loaded_domains.add(domain)
+
+    def _session(self):
+        if self._session_factory is None:
+            self._session_factory = app_session_factory()
+        return self._session_factory()
+
+    def _load_domain(self, domain: str) -> Optional[Dict[str, MethodStats]]:
+        """Read a domain's persisted counters (runs in a worker thread); None when the read failed"""
+        try:
+            from app.models.domain_strategy_stat import DomainStrategyStat
+            db = self._session()
+        except Exception as e:
+            logger.warning(f"Strategy table load failed for {domain}: {e}")
+            return None
+
+        try:
+            rows = db.query(DomainStrategyStat).filter(DomainStrategyStat.domain == domain).all()
+            return {row.method: _stats_from_row(row) for row in rows}
+        except Exception as e:
+            logger.warning(f"Strategy table load failed for {domain}: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _schedule_flush(self) -> None:
+        """Flush in a background task so the parse that triggered it does not wait on the database"""
+        self._last_flush = time.time()
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._flush_task = loop.create_task(self.flush_async())
+
+    def flush(self) -> None:
+        """Add pending counters to the database and refresh them with other workers' totals"""
+        pending = self._take_pending()
+        if not pending:
+            return
+
+        try:
+            refreshed = self._write_pending(pending)
+        except Exception as e:
+            self._flush_failed(pending, e)
+            return
+        self._apply_refreshed(refreshed)
+
+    async def flush_async(self) -> None:
+        """flush() with the database writes in a worker thread"""
+        pending = self._take_pending()
+        if not pending:
+            return
+
+        try:
+            refreshed = await asyncio.to_thread(self._write_pending, pending)
+        except Exception as e:
+            self._flush_failed(pending, e)
+            return
+        self._apply_refreshed(refreshed)
+
+    async def shutdown(self) -> None:
+        """Wait for a running background flush, then write whatever is still pending"""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        await self.flush_async()
+
+    def _take_pending(self) -> Dict[Tuple[str, str], MethodStats]:
+        self._last_flush = time.time()
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def _flush_failed(self, pending: Dict[Tuple[str, str], MethodStats], error: Exception) -> None:
+        self._requeue(pending)
+        self.stats["flush_failures"] += 1
+        logger.warning(f"Strategy table flush failed: {error}")
+
+    def _apply_refreshed(self, refreshed: Dict[Tuple[str, str], MethodStats]) -> None:
+        """Adopt the database totals, plus anything recorded while the flush was running"""
+        for (domain, method), stats in refreshed.items():
+            recorded_since = self._pending.get((domain, method))
+            if recorded_since:
+                stats.merge(recorded_since, self.decay_half_life)
+            self._domain_stats(domain)[method] = stats
+        self.stats["flushes"] += 1
+
+    def _write_pending(self, pending: Dict[Tuple[str, str], MethodStats]) -> Dict[Tuple[str, str], MethodStats]:
+        """Upsert pending counters and return the resulting totals (runs in a worker thread on the async path)"""
+        from app.models.domain_strategy_stat import DomainStrategyStat
+        table = DomainStrategyStat.__table__
+        db = self._session()
+
+        refreshed = {}
+        now = time.time()
+        try:
+            for (domain, method), delta in pending.items():
+                delta.decay(now, self.decay_half_life)
+                statement = insert(table).values(
+                    domain=domain,
+                    method=method,
+                    attempts=delta.attempts,
+                    successes=delta.successes,
+                    total_latency_ms=delta.total_latency_ms,
+                    last_success_at=_to_datetime(delta.last_success_at),
+                    last_failure_at=_to_datetime(delta.last_failure_at),
+                    recent_attempts=delta.recent_attempts,
+                    recent_successes=delta.recent_successes,
+                    recent_latency_ms=delta.recent_latency_ms,
+                    recent_at=_to_datetime(delta.recent_at),
+                )
+                excluded = statement.excluded
+                # Decay the stored recent counters up to this flush before adding the delta
+                elapsed = func.greatest(func.extract('epoch', excluded.recent_at - table.c.recent_at), 0)
+                factor = func.coalesce(func.power(0.5, elapsed / self.decay_half_life), 0.0)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[table.c.domain, table.c.method],
+                    set_={
+                        "attempts": table.c.attempts + excluded.attempts,
+                        "successes": table.c.successes + excluded.successes,
+                        "total_latency_ms": table.c.total_latency_ms + excluded.total_latency_ms,
+                        # GREATEST ignores NULLs in Postgres
+                        "last_success_at": func.greatest(table.c.last_success_at, excluded.last_success_at),
+                        "last_failure_at": func.greatest(table.c.last_failure_at, excluded.last_failure_at),
+                        "recent_attempts": table.c.recent_attempts * factor + excluded.recent_attempts,
+                        "recent_successes": table.c.recent_successes * factor + excluded.recent_successes,
+                        "recent_latency_ms": table.c.recent_latency_ms * factor + excluded.recent_latency_ms,
+                        "recent_at": func.greatest(table.c.recent_at, excluded.recent_at),
+                        "updated_at": func.now(),
+                    },
+                ).returning(table)
+
+                refreshed[(domain, method)] = _stats_from_row(db.execute(statement).one())
+            db.commit()
+            return refreshed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _requeue(self, pending: Dict[Tuple[str, str], MethodStats]) -> None:
+        """Keep unwritten counters for the next flush"""
+        for key, delta in pending.items():
+            self._pending.setdefault(key, MethodStats()).merge(delta, self.decay_half_life)
+
+    def get_domain_summary(self, domain: str) -> Dict[str, Any]:
+        stats = self._domain_stats(domain)
+        now = time.time()
+        return {
+            "methods": {
+                method: stats[method].to_dict(now, self.decay_half_life)
+                for method in STRATEGY_METHODS if method in stats
+            },
+            "plan": self._build_plan(stats).to_dict(),
+        }
+
+    def get_summary(self, limit: int = 50) -> Dict[str, Any]:
+        """Learned per-domain table (busiest domains first) and planning counters"""
+        busiest = sorted(
+            self._domains.items(),
+            key=lambda item: sum(stats.attempts for stats in item[1].values()),
+            reverse=True
+        )
+        return {
+            "enabled": self.enabled,
+            "persist": self.persist,
+            "min_samples": self.min_samples,
+            "min_success_rate": self.min_success_rate,
+            "exploration_rate": self.exploration_rate,
+            "decay_half_life_hours": round(self.decay_half_life / 3600, 1),
+            "pending_updates": len(self._pending),
+            **self.stats,
+            "domains": {
+                domain: self.get_domain_summary(domain)
+                for domain, stats in busiest[:limit] if stats
+            },
+        }
+
+
+def normalize_domain(domain: str) -> str:
+    """Key domains without case, port or a leading www."""
+    domain = domain.lower().split(':')[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def _decay_factor(since: Optional[float], now: float, half_life: float) -> float:
+    if since is None or now <= since:
+        return 1.0
+    return 0.5 ** ((now - since) / half_life)
+
+
+def _describe(stats: MethodStats) -> str:
+    return f"{stats.success_rate:.0%} of ~{stats.recent_attempts:.0f} recent"
+
+
+def _latest(first: Optional[float], second: Optional[float]) -> Optional[float]:
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+def _to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp is not None else None
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return _to_datetime(timestamp).isoformat() if timestamp is not None else None
+
+
+def _stats_from_row(row) -> MethodStats:
+    return MethodStats(
+        attempts=row.attempts or 0,
+        successes=row.successes or 0,
+        total_latency_ms=row.total_latency_ms or 0.0,
+        last_success_at=row.last_success_at.timestamp() if row.last_success_at else None,
+        last_failure_at=row.last_failure_at.timestamp() if row.last_failure_at else None,
+        recent_attempts=row.recent_attempts or 0.0,
+        recent_successes=row.recent_successes or 0.0,
+        recent_latency_ms=row.recent_latency_ms or 0.0,
+        recent_at=row.recent_at.timestamp() if row.recent_at else None,
+    )
+
+
+# Global strategy table shared by every URL parser in this process
+strategy_table = StrategyTable.from_settings()
@@ -0,0 +1,213 @@
+"""
+Structured recipe data extraction (JSON-LD, microdata and RDFa).
+Walks every ld+json block, @graph arrays, @type lists and mainEntity links to
+find the best Recipe node, and turns itemprop/property Recipe markup into the
+same JSON-LD shape so both feed URLParser._parse_json_ld_recipe.
+"""
+import re
+import json
+import logging
+from typing import Dict, Any, List, Optional, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Keys that link a page/article node to the entity it is about
+ENTITY_LINK_KEYS = ('mainEntity', 'mainEntityOfPage', 'about', 'hasPart')
+
+# Recipe properties read from microdata/RDFa markup
+RECIPE_LIST_PROPERTIES = ('recipeIngredient', 'ingredients', 'recipeInstructions', 'image')
+RECIPE_TEXT_PROPERTIES = (
+    'name', 'description', 'prepTime', 'cookTime', 'totalTime', 'recipeYield',
+    'recipeCategory', 'recipeCuisine',
+)
+
+SCHEMA_PREFIX_PATTERN = re.compile(r'^(?:https?://schema\.org/|schema:)', re.IGNORECASE)
+HTML_COMMENT_PATTERN = re.compile(r'^\s*(?:<!--|//\s*<!\[CDATA\[)|(?:-->|//\s*\]\]>)\s*$')
+
+
+def has_type(node: Dict[str, Any], type_name: str) -> bool:
+    """Check @type, which may be a string or a list and may carry a schema.org prefix"""
+    node_type = node.get('@type')
+    types = node_type if isinstance(node_type, list) else [node_type]
+    return any(
+        isinstance(value, str) and SCHEMA_PREFIX_PATTERN.sub('', value).lower() == type_name.lower()
+        for value in types
+    )
+
+
+def load_json_ld(text: str) -> Optional[Any]:
+    """Parse one ld+json block, tolerating HTML comment/CDATA wrappers and raw control characters"""
+    cleaned = HTML_COMMENT_PATTERN.sub('', text.strip())
+    try:
+        return json.loads(cleaned, strict=False)
+    except (ValueError, TypeError) as e:
+        logger.debug(f"Skipping unreadable ld+json block: {e}")
+        return None
+
+
+def iter_json_ld_nodes(data: Any, _depth: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield every object node in a JSON-LD document, following @graph and entity links"""
+    if _depth > 8:
+        return
+
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_json_ld_nodes(item, _depth + 1)
+        return
+
+    if not isinstance(data, dict):
+        return
+
+    yield data
+
+    if '@graph' in data:
+        yield from iter_json_ld_nodes(data['@graph'], _depth + 1)
+
+    for key in ENTITY_LINK_KEYS:
+        linked = data.get(key)
+        if isinstance(linked, (dict, list)):
+            yield from iter_json_ld_nodes(linked, _depth + 1)
+
+
+def score_recipe_node(node: Dict[str, Any]) -> int:
+    """Rank Recipe nodes by how much usable content they carry"""
+    score = 0
+    if node.get('name'):
+        score += 2
+    if node.get('recipeIngredient') or node.get('ingredients'):
+        score += 5
+    if node.get('recipeInstructions'):
+        score += 5
+    for key in ('image', 'recipeYield', 'prepTime', 'cookTime', 'totalTime', 'description'):
+        if node.get(key):
+            score += 1
+    return score
+
+
+def find_best_recipe_node(json_ld_blocks: List[str]) -> Optional[Dict[str, Any]]:
+    """Return the most complete Recipe node across all ld+json blocks"""
+    best_node = None
+    best_score = -1
+
+    for block in json_ld_blocks:
+        data = load_json_ld(block)
+        if data is None:
+            continue
+
+        for node in iter_json_ld_nodes(data):
+            if not has_type(node, 'Recipe'):
+                continue
+
+            score = score_recipe_node(node)
+            if score > best_score:
+                best_node, best_score = node, score
+
+    return normalize_recipe_node(best_node) if best_node else None
+
+
+def normalize_recipe_node(node: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten the common schema.org variations into the shape _parse_json_ld_recipe expects"""
+    recipe = dict(node)
+
+    # Older markup uses "ingredients"; some sites send a single string
+    ingredients = recipe.get('recipeIngredient') or recipe.get('ingredients') or []
+    if isinstance(ingredients, str):
+        ingredients = [line for line in ingredients.split('\n') if line.strip()]
+    recipe['recipeIngredient'] = ingredients
+
+    recipe['recipeInstructions'] = _flatten_instructions(recipe.get('recipeInstructions'))
+
+    # recipeYield is often a list like ["4", "4 servings"]
+    recipe_yield = recipe.get('recipeYield')
+    if isinstance(recipe_yield, list):
+        recipe['recipeYield'] = next(
+            (value for value in recipe_yield if re.search(r'\d', str(value))),
+            recipe_yield[0] if recipe_yield else None
+        )
+
+    for key in ('name', 'description'):
+        value = recipe.get(key)
+        if isinstance(value, list):
+            recipe[key] = value[0] if value else ''
+
+    return recipe
+
+
+def _flatten_instructions(instructions: Any) -> List[Any]:
+    """Expand HowToSection/ItemList steps and split plain-text instructions"""
+    if not instructions:
+        return []
+
+    if isinstance(instructions, str):
+        return [line.strip() for line in re.split(r'\n+', instructions) if line.strip()]
+
+    if isinstance(instructions, dict):
+        instructions = [instructions]
+
+    steps = []
+    for item in instructions:
+        if isinstance(item, dict) and ('itemListElement' in item) and not item.get('text'):
+            steps.extend(_flatten_instructions(item.get('itemListElement')))
+        elif isinstance(item, list):
+            steps.extend(_flatten_instructions(item))
+        else:
+            steps.append(item)
+    return steps
+
+
+def extract_microdata_recipe(soup) -> Optional[Dict[str, Any]]:
+    """Build a JSON-LD shaped Recipe from microdata (itemprop) or RDFa (property) markup"""
+    scope = soup.find(attrs={'itemtype': re.compile(r'schema\.org/Recipe\b', re.IGNORECASE)})
+    attribute = 'itemprop'
+    if scope is None:
+        scope = soup.find(attrs={'typeof': re.compile(r'(?:^|[\s:/])Recipe\b')})
+        attribute = 'property'
+    if scope is None:
+        return None
+
+    recipe: Dict[str, Any] = {'@type': 'Recipe'}
+    for element in scope.find_all(attrs={attribute: True}):
+        if _belongs_to_nested_scope(element, scope, attribute):
+            continue
+
+        value = _property_value(element, attribute)
+        if not value:
+            continue
+
+        for prop in element.get(attribute, '').split():
+            prop = SCHEMA_PREFIX_PATTERN.sub('', prop)
+            if prop in RECIPE_LIST_PROPERTIES:
+                recipe.setdefault(prop, []).append(value)
+            elif prop in RECIPE_TEXT_PROPERTIES:
+                recipe.setdefault(prop, value)
+
+    if score_recipe_node(recipe) < 5:
+        return None
+
+    return normalize_recipe_node(recipe)
+
+
+def _belongs_to_nested_scope(element, scope, attribute: str) -> bool:
+    """True when an element describes a nested item (e.g. the author) rather than the recipe"""
+    scope_attribute = 'itemscope' if attribute == 'itemprop' else 'typeof'
+    for parent in element.parents:
+        if parent is scope:
+            return False
+        if parent.has_attr(scope_attribute):
+            return True
+    return False
+
+
+def _property_value(element, attribute: str) -> Optional[str]:
+    """Read a microdata/RDFa property value the way the specs define it"""
+    if element.has_attr('content'):
+        return element['content'].strip()
+    if element.name in ('img', 'audio', 'video', 'source') and element.get('src'):
+        return element['src'].strip()
+    if element.name in ('a', 'link') and element.get('href'):
+        return element['href'].strip()
+    if element.name == 'time' and element.get('datetime'):
+        return element['datetime'].strip()
+    if element.name == 'meta':
+        return None
+    return ' '.join(element.get_text(' ').split())
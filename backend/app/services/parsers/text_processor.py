@@ -1,5 +1,5 @@
 import re
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Iterable
 from dataclasses import dataclass
 
 
@@ -13,60 +13,152 @@ class RecipePattern:
     servings: Optional[str] = None
 
 
+@dataclass
+class LineFeatures:
+    """Everything the extractors need to know about one caption line, computed in a single pass"""
+    text: str
+    lower: str
+    section: str  # 'ingredients', 'instructions' or 'other'
+    word_count: int
+    is_servings: bool
+    is_ingredient: bool
+    is_instruction: bool  # Reads like an instruction rather than an ingredient
+    is_category_header: bool
+    is_quantity_item: bool  # Starts with an amount like an ingredient list entry ("2 cups chicken, shredded")
+
+
+def _literal_alternation(words: Iterable[str]) -> str:
+    """Alternation matching any of the words as plain substrings, longest first"""
+    return "|".join(re.escape(word) for word in sorted(set(words), key=len, reverse=True))
+
+
 class TextProcessor:
     """Utility class for extracting recipe components from unstructured text"""
-    
-    def __init__(self):
-        # Common recipe keywords and patterns
-        self.ingredient_keywords = [
-            'ingredients?', 'recipe', 'you[\'ll]? need', 'shopping list',
-            'what you need', 'grocery list', 'supplies'
-        ]
-        
-        self.instruction_keywords = [
-            'instructions?', 'directions?', 'method', 'steps?', 'how to make',
-            'preparation', 'cooking method', 'recipe', 'procedure'
-        ]
-        
-        # Common measurement units
-        self.measurement_units = [
-            'cup', 'cups', 'tbsp', 'tablespoon', 'tablespoons', 'tsp', 'teaspoon', 'teaspoons',
-            'oz', 'ounce', 'ounces', 'lb', 'pound', 'pounds', 'g', 'gram', 'grams',
-            'kg', 'kilogram', 'kilograms', 'ml', 'milliliter', 'milliliters',
-            'l', 'liter', 'liters', 'pinch', 'dash', 'handful', 'clove', 'cloves',
-            'slice', 'slices', 'piece', 'pieces', 'can', 'cans', 'jar', 'jars',
-            'package', 'packages', 'bunch', 'bunches'
-        ]
-        
-        # Common cooking actions for instructions
-        self.cooking_actions = [
-            'mix', 'stir', 'combine', 'whisk', 'beat', 'fold', 'chop', 'dice',
-            'mince', 'slice', 'cut', 'heat', 'cook', 'bake', 'fry', 'sauté',
-            'boil', 'simmer', 'roast', 'grill', 'season', 'add', 'remove',
-            'serve', 'garnish', 'blend', 'process', 'knead', 'roll', 'pour'
-        ]
-    
+
+    # Section header keywords (regular expressions)
+    ingredient_keywords = [
+        'ingredients?', 'recipe', "you(?:'ll)? need", 'shopping list',
+        'what you need', 'grocery list', 'supplies'
+    ]
+
+    instruction_keywords = [
+        'instructions?', 'directions?', 'method', 'steps?', 'how to make',
+        'preparation', 'cooking method', 'procedure'
+    ]
+
+    # Common measurement units
+    measurement_units = [
+        'cup', 'cups', 'tbsp', 'tablespoon', 'tablespoons', 'tsp', 'teaspoon', 'teaspoons',
+        'oz', 'ounce', 'ounces', 'lb', 'pound', 'pounds', 'g', 'gram', 'grams',
+        'kg', 'kilogram', 'kilograms', 'ml', 'milliliter', 'milliliters',
+        'l', 'liter', 'liters', 'pinch', 'dash', 'handful', 'clove', 'cloves',
+        'slice', 'slices', 'piece', 'pieces', 'can', 'cans', 'jar', 'jars',
+        'package', 'packages', 'bunch', 'bunches'
+    ]
+
+    # Common cooking actions for instructions
+    cooking_actions = [
+        'mix', 'stir', 'combine', 'whisk', 'beat', 'fold', 'chop', 'dice',
+        'mince', 'slice', 'cut', 'heat', 'cook', 'bake', 'fry', 'sauté',
+        'boil', 'simmer', 'roast', 'grill', 'season', 'add', 'remove',
+        'serve', 'garnish', 'blend', 'process', 'knead', 'roll', 'pour'
+    ]
+
+    food_indicators = [
+        'oil', 'salt', 'pepper', 'sugar', 'flour', 'butter', 'milk',
+        'egg', 'cheese', 'chicken', 'beef', 'fish', 'onion', 'garlic',
+        'tomato', 'water', 'vinegar', 'lemon', 'herbs', 'spice', 'vanilla',
+        'baking', 'powder', 'soda', 'chocolate', 'chips'
+    ]
+
+    # Short lines naming a part of the recipe (e.g. 'Dressing', 'Chicken Salad')
+    category_indicators = [
+        'dressing', 'sauce', 'marinade', 'filling', 'topping', 'garnish',
+        'salad', 'chicken', 'beef', 'fish', 'vegetables', 'base', 'mix',
+        'for serving', 'assembly', 'crust', 'batter'
+    ]
+
+    instruction_starters = [
+        'make the', 'in a', 'add the', 'combine', 'mix', 'stir', 'blend',
+        'season with', 'pour', 'toss', 'cook', 'heat', 'bake', 'fry'
+    ]
+
+    recipe_keywords = [
+        'recipe', 'cook', 'bake', 'ingredients', 'instructions',
+        'delicious', 'homemade', 'easy', 'simple', 'tasty'
+    ]
+
+    recipe_types = {
+        'dessert': ['cake', 'cookie', 'pie', 'dessert', 'sweet', 'chocolate', 'sugar'],
+        'main_dish': ['chicken', 'beef', 'fish', 'pasta', 'rice', 'dinner', 'lunch'],
+        'breakfast': ['breakfast', 'pancake', 'eggs', 'toast', 'cereal', 'morning'],
+        'soup': ['soup', 'broth', 'stew', 'chili'],
+        'salad': ['salad', 'greens', 'lettuce', 'fresh'],
+        'beverage': ['drink', 'smoothie', 'juice', 'coffee', 'tea']
+    }
+
+    # Patterns are compiled once here; every method below runs per caption or per line.
+    # Header patterns only match lines that are nothing but the header ("Ingredients:", "STEPS")
+    _HEADER_TEMPLATE = r'^[^\w]*(?:{})\b\s*(?:\([^)]*\))?[^\w]*$'
+    _INGREDIENT_HEADER_RE = re.compile(_HEADER_TEMPLATE.format("|".join(ingredient_keywords)))
+    _INSTRUCTION_HEADER_RE = re.compile(_HEADER_TEMPLATE.format("|".join(instruction_keywords)))
+    # Units stand alone or follow a number ("500g", "2 handfuls"), never inside a word ("dressing", "olive")
+    _UNIT_RE = re.compile(rf'(?<![a-z])(?:{_literal_alternation(measurement_units)})(?:e?s)?(?![a-z])')
+    _COOKING_ACTION_RE = re.compile(_literal_alternation(cooking_actions))
+    _FOOD_RE = re.compile(_literal_alternation(food_indicators))
+    _CATEGORY_RE = re.compile(_literal_alternation(category_indicators))
+    _INSTRUCTION_STARTER_RE = re.compile(rf'(?:{_literal_alternation(instruction_starters)})')
+    _INSTRUCTION_SECTION_WORD_RE = re.compile(
+        _literal_alternation(['instructions', 'directions', 'method', 'steps', 'preparation'])
+    )
+    _HEADER_VERB_RE = re.compile(_literal_alternation(['make', 'add', 'mix', 'cook', 'heat']))
+    _RECIPE_WORD_RE = re.compile(_literal_alternation(['recipe', 'easy', 'homemade', 'delicious', 'simple']))
+    _RECIPE_KEYWORD_RE = re.compile(_literal_alternation(recipe_keywords))
+    _RECIPE_TYPE_RES = {category: re.compile(_literal_alternation(words)) for category, words in recipe_types.items()}
+
+    _BULLET_RE = re.compile(r'^\s*[-•*]\s+')
+    _TAGS_ONLY_RE = re.compile(r'^(?:[#@]\w+\s*)+$')
+    _DIGIT_RE = re.compile(r'\d')
+    # A leading amount ("2", "1/2", "1 1/2"), optionally bulleted; "1." and "1)" are step numbers
+    _QUANTITY_START_RE = re.compile(r'^(?:[-•*]\s+)?\d+(?:[/.,]\d+)?(?:\s+\d+/\d+)?(?![.)\d])')
+    _STEP_RE = re.compile(r'^(?:\d+\.|step \d+|\d+\)\s+|first|then|next|finally)')
+    _TIME_TEMPERATURE_RE = re.compile(r'until|for \d+|°|degrees|minutes?|hours?|oven|bake')
+    _TIMING_RE = re.compile(r'until|for \d+|degrees?|minutes?|hours?|°[cf]')
+    # Word boundaries keep "reserve 1/2 cup" from reading as a serving count
+    _SERVINGS_LINE_RE = re.compile(r'\bmakes?\s+\d+.*servings?|\bserves?\s+\d+')
+    _SERVINGS_RES = [
+        re.compile(r'\bmakes?\s+(\d+(?:\s*to\s*\d+)?)\s*servings?'),
+        re.compile(r'\bserves?\s+(\d+(?:\s*to\s*\d+)?)'),
+        re.compile(r'(\d+(?:\s*-\s*\d+)?)\s*servings?'),
+        re.compile(r'yield:?\s*(\d+(?:\s*to\s*\d+)?)'),
+    ]
+    _EXCESS_BLANK_LINES_RE = re.compile(r'\n{3,}')
+    _URL_RE = re.compile(r'http[s]?://\S+')
+    _HASHTAG_RE = re.compile(r'#(\w+)')
+    _MENTION_RE = re.compile(r'@(\w+)')
+    _LEADING_NUMBER_RE = re.compile(r'^\d+\.\s*')
+
     def extract_recipe_from_text(self, text: str) -> RecipePattern:
         """Main method to extract recipe components from text"""
         # Clean and prepare text
         cleaned_text = self._clean_text(text)
-        
+
         # Try to identify title
         title = self._extract_title(cleaned_text)
-        
-        # Split text into potential sections
-        sections = self._split_into_sections(cleaned_text)
-        
+
+        # Classify every line once; both extractors read the same features
+        lines = self._classify_lines(cleaned_text)
+
         # Extract servings info first (before processing ingredients)
         servings = self._extract_servings_info(cleaned_text)
-        
+
         # Extract ingredients and instructions with better categorization
-        ingredients_structured = self._extract_ingredients_structured(sections, cleaned_text)
-        instructions_structured = self._extract_instructions_structured(sections)
-        
+        ingredients_structured = self._extract_ingredients_structured(lines, cleaned_text)
+        instructions_structured = self._extract_instructions_structured(lines)
+
         # Calculate confidence score
         confidence = self._calculate_confidence_structured(ingredients_structured, instructions_structured, cleaned_text)
-        
+
         return RecipePattern(
             ingredients=ingredients_structured,
             instructions=instructions_structured,
@@ -74,525 +166,492 @@ class TextProcessor:
             confidence=confidence,
             servings=servings
         )
-    
+
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text for processing"""
         # Preserve line breaks for better section detection
-        text = re.sub(r'\r\n', '\n', text)  # Normalize Windows line breaks
-        text = re.sub(r'\n{3,}', '\n\n', text)  # Limit excessive line breaks
-        
+        text = text.replace('\r\n', '\n')  # Normalize Windows line breaks
+        text = self._EXCESS_BLANK_LINES_RE.sub('\n\n', text)  # Limit excessive line breaks
+
         # Remove common social media artifacts but keep structure
-        text = re.sub(r'http[s]?://\S+', '', text)  # Remove URLs
-        
+        text = self._URL_RE.sub('', text)  # Remove URLs
+
         return text.strip()
-    
+
     def _extract_title(self, text: str) -> str:
         """Extract potential recipe title from text"""
         lines = text.split('\n')
-        
+
         # Look for short lines that might be titles
         for line in lines[:3]:  # Check first 3 lines
             line = line.strip()
             if 5 <= len(line) <= 50 and not self._looks_like_ingredient(line):
                 # Check if it contains recipe-like words
-                recipe_words = ['recipe', 'easy', 'homemade', 'delicious', 'simple']
-                if any(word in line.lower() for word in recipe_words):
+                if self._RECIPE_WORD_RE.search(line.lower()):
                     return line
-        
+
         # Fallback: use first meaningful line
         for line in lines:
             line = line.strip()
             if len(line) > 5 and len(line.split()) >= 2:
                 return line[:50]  # Truncate if too long
-        
+
         return "Recipe from Instagram"
-    
+
+    def _classify_lines(self, text: str) -> List[LineFeatures]:
+        """Assign sections and compute every per-line feature in one pass over the text"""
+        features = []
+        current_section = 'other'
+
+        for raw_line in text.split('\n'):
+            line = raw_line.strip()
+            if not line:
+                continue
+            line_lower = line.lower()
+
+            # Section headers switch the section and are not content themselves
+            if self._INGREDIENT_HEADER_RE.match(line_lower):
+                current_section = 'ingredients'
+                continue
+            if self._INSTRUCTION_HEADER_RE.match(line_lower):
+                current_section = 'instructions'
+                continue
+
+            word_count = len(line.split())
+            is_ingredient = self._is_ingredient(line, line_lower, word_count)
+            features.append(LineFeatures(
+                text=line,
+                lower=line_lower,
+                section=current_section,
+                word_count=word_count,
+                is_servings=bool(self._SERVINGS_LINE_RE.search(line_lower)),
+                is_ingredient=is_ingredient,
+                is_instruction=self._is_instruction_not_ingredient(line_lower, word_count),
+                is_category_header=self._is_category_header(line, line_lower, word_count),
+                is_quantity_item=(
+                    is_ingredient and word_count <= 8 and bool(self._QUANTITY_START_RE.match(line_lower))
+                ),
+            ))
+
+        return features
+
     def _split_into_sections(self, text: str) -> Dict[str, List[str]]:
         """Split text into potential ingredient and instruction sections"""
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
         sections = {
             'ingredients': [],
             'instructions': [],
             'other': []
         }
-        
-        current_section = 'other'
-        
-        for line in lines:
-            line_lower = line.lower()
-            
-            # Check if line indicates start of ingredients section
-            if any(keyword in line_lower for keyword in self.ingredient_keywords):
-                current_section = 'ingredients'
-                continue
-            
-            # Check if line indicates start of instructions section
-            if any(keyword in line_lower for keyword in self.instruction_keywords):
-                current_section = 'instructions'
-                continue
-            
-            # Add line to current section
-            sections[current_section].append(line)
-        
+
+        for line in self._classify_lines(text):
+            sections[line.section].append(line.text)
+
         return sections
-    
+
+    @staticmethod
+    def _in_sections(lines: List[LineFeatures], *section_order: str) -> List[LineFeatures]:
+        """Lines grouped by section, in the given section order"""
+        return [line for section in section_order for line in lines if line.section == section]
+
     def _extract_ingredients(self, sections: Dict[str, List[str]]) -> List[str]:
         """Extract ingredients from text sections"""
         ingredients = []
-        
+
         # First, check explicit ingredients section
         if sections['ingredients']:
             for line in sections['ingredients']:
                 if self._looks_like_ingredient(line):
                     ingredients.append(line)
-        
+
         # If no explicit section, look in all text
         if not ingredients:
             all_lines = sections['ingredients'] + sections['other']
             for line in all_lines:
                 if self._looks_like_ingredient(line):
                     ingredients.append(line)
-        
+
         return ingredients[:20]  # Limit to reasonable number
-    
+
     def _extract_instructions(self, sections: Dict[str, List[str]]) -> List[str]:
         """Extract instructions from text sections"""
         instructions = []
-        
+
         # First, check explicit instructions section
         if sections['instructions']:
             for line in sections['instructions']:
                 if self._looks_like_instruction(line):
                     instructions.append(line)
-        
+
         # If no explicit section, look in all text
         if not instructions:
             all_lines = sections['instructions'] + sections['other']
             for line in all_lines:
                 if self._looks_like_instruction(line):
                     instructions.append(line)
-        
+
         return instructions[:15]  # Limit to reasonable number
-    
+
     def _looks_like_ingredient(self, line: str) -> bool:
         """Determine if a line looks like an ingredient"""
-        line_lower = line.lower().strip()
-        
+        return self._is_ingredient(line, line.lower().strip(), len(line.split()))
+
+    def _is_ingredient(self, line: str, line_lower: str, word_count: int) -> bool:
         # Skip empty lines or very short lines
         if len(line_lower) < 3:
             return False
-        
+
         # Check for bullet points or list indicators first
-        if re.match(r'^\s*[-•*]\s+', line):
+        if self._BULLET_RE.match(line):
             # Remove bullet point for further analysis
-            line_clean = re.sub(r'^\s*[-•*]\s+', '', line_lower)
+            line_clean = self._BULLET_RE.sub('', line_lower)
             if len(line_clean.split()) <= 8 and len(line_clean) > 3:
                 return True
-        
+
         # Check for measurement units
-        if any(unit in line_lower for unit in self.measurement_units):
+        if self._UNIT_RE.search(line_lower):
             return True
-        
+
         # Check for numbers (quantities) with reasonable length
-        if re.search(r'\d+', line) and len(line.split()) <= 8:
+        if word_count <= 8 and self._DIGIT_RE.search(line):
             # Must have some food-related words or be reasonably short
-            food_indicators = [
-                'oil', 'salt', 'pepper', 'sugar', 'flour', 'butter', 'milk',
-                'egg', 'cheese', 'chicken', 'beef', 'fish', 'onion', 'garlic',
-                'tomato', 'water', 'vinegar', 'lemon', 'herbs', 'spice', 'vanilla',
-                'baking', 'powder', 'soda', 'chocolate', 'chips'
-            ]
-            if any(food in line_lower for food in food_indicators):
+            if self._FOOD_RE.search(line_lower):
                 return True
-        
+
         return False
-    
+
     def _looks_like_instruction(self, line: str) -> bool:
         """Determine if a line looks like a cooking instruction"""
         line_lower = line.lower().strip()
-        
+
         # Skip empty lines or very short lines
         if len(line_lower) < 5:
             return False
-        
+
         # Check for instruction patterns first
-        instruction_patterns = [
-            r'^\d+\.',  # Numbered steps
-            r'^step \d+',  # Step numbered
-            r'^\d+\)\s+',  # 1) format
-            r'^first|^then|^next|^finally',  # Sequence words
-        ]
-        
-        if any(re.search(pattern, line_lower) for pattern in instruction_patterns):
+        if self._STEP_RE.search(line_lower):
             return True
-        
+
+        word_count = len(line.split())
+
         # Check for cooking action words
-        if any(action in line_lower for action in self.cooking_actions):
+        if word_count >= 3 and self._COOKING_ACTION_RE.search(line_lower):
             # Must be reasonably long to be an instruction
-            if len(line.split()) >= 3:
-                return True
-        
+            return True
+
         # Check for time/temperature indicators
-        if re.search(r'until|for \d+|°|degrees|minutes?|hours?|oven|bake', line_lower):
-            if len(line.split()) >= 3:
-                return True
-        
+        if word_count >= 3 and self._TIME_TEMPERATURE_RE.search(line_lower):
+            return True
+
         return False
-    
+
     def _calculate_confidence(self, ingredients: List[str], instructions: List[str], full_text: str) -> float:
         """Calculate confidence score for recipe extraction"""
         score = 0.0
-        
+
         # Base score for having ingredients and instructions
         if ingredients:
             score += 0.3
         if instructions:
             score += 0.3
-        
+
         # Bonus for reasonable quantities
         if len(ingredients) >= 3:
             score += 0.2
         if len(instructions) >= 2:
             score += 0.2
-        
+
         # Check for recipe-related keywords in full text
-        recipe_keywords = [
-            'recipe', 'cook', 'bake', 'ingredients', 'instructions',
-            'delicious', 'homemade', 'easy', 'simple', 'tasty'
-        ]
-        
-        keyword_count = sum(1 for keyword in recipe_keywords if keyword in full_text.lower())
-        score += min(keyword_count * 0.05, 0.2)
-        
+        score += min(self._count_recipe_keywords(full_text) * 0.05, 0.2)
+
         # Penalty for very short content
         if len(full_text.split()) < 10:
             score *= 0.5
-        
+
         return min(score, 1.0)
-    
+
+    def _count_recipe_keywords(self, text: str) -> int:
+        """Number of distinct recipe keywords that appear in the text"""
+        return len(set(self._RECIPE_KEYWORD_RE.findall(text.lower())))
+
     def extract_hashtags(self, text: str) -> List[str]:
         """Extract hashtags from text"""
-        hashtags = re.findall(r'#(\w+)', text)
+        hashtags = self._HASHTAG_RE.findall(text)
         return hashtags
-    
+
     def extract_mentions(self, text: str) -> List[str]:
         """Extract mentions from text"""
-        mentions = re.findall(r'@(\w+)', text)
+        mentions = self._MENTION_RE.findall(text)
         return mentions
-    
+
     def detect_recipe_type(self, text: str) -> Optional[str]:
         """Try to detect the type of recipe from text"""
         text_lower = text.lower()
-        
-        recipe_types = {
-            'dessert': ['cake', 'cookie', 'pie', 'dessert', 'sweet', 'chocolate', 'sugar'],
-            'main_dish': ['chicken', 'beef', 'fish', 'pasta', 'rice', 'dinner', 'lunch'],
-            'breakfast': ['breakfast', 'pancake', 'eggs', 'toast', 'cereal', 'morning'],
-            'soup': ['soup', 'broth', 'stew', 'chili'],
-            'salad': ['salad', 'greens', 'lettuce', 'fresh'],
-            'beverage': ['drink', 'smoothie', 'juice', 'coffee', 'tea']
-        }
-        
-        for category, keywords in recipe_types.items():
-            if any(keyword in text_lower for keyword in keywords):
+
+        for category, keywords in self._RECIPE_TYPE_RES.items():
+            if keywords.search(text_lower):
                 return category
-        
+
         return None
-    
+
     def _extract_servings_info(self, text: str) -> Optional[str]:
         """Extract serving information from text"""
-        servings_patterns = [
-            r'makes?\s+(\d+(?:\s*to\s*\d+)?)\s*servings?',
-            r'serves?\s+(\d+(?:\s*to\s*\d+)?)',
-            r'(\d+(?:\s*-\s*\d+)?)\s*servings?',
-            r'yield:?\s*(\d+(?:\s*to\s*\d+)?)',
-        ]
-        
         text_lower = text.lower()
-        for pattern in servings_patterns:
-            match = re.search(pattern, text_lower)
+        for pattern in self._SERVINGS_RES:
+            match = pattern.search(text_lower)
             if match:
                 return match.group(1)
         return None
-    
+
     def _extract_ingredients_enhanced(self, sections: Dict[str, List[str]]) -> List[str]:
         """Enhanced ingredient extraction that handles categories and filters out instructions"""
         ingredients = []
-        
+
         # Process ingredients section
         all_ingredient_lines = sections['ingredients'] + sections['other']
-        
+
         for line in all_ingredient_lines:
             line = line.strip()
             if not line:
                 continue
-                
+
             # Skip servings info
-            if re.search(r'makes?\s+\d+.*servings?|serves?\s+\d+', line.lower()):
+            if self._SERVINGS_LINE_RE.search(line.lower()):
                 continue
-                
+
             # Skip obvious instructions (long sentences with cooking verbs)
             if self._looks_like_instruction_not_ingredient(line):
                 continue
-                
+
             # Check if it's a category header
             if self._looks_like_category_header(line):
                 # Add category as a section marker (you might want to handle this differently)
                 ingredients.append(f"--- {line} ---")
                 continue
-                
+
             # Check if it looks like an ingredient
             if self._looks_like_ingredient(line):
                 ingredients.append(line)
-        
+
         return ingredients[:25]  # Reasonable limit
-    
+
     def _extract_instructions_enhanced(self, sections: Dict[str, List[str]]) -> List[str]:
         """Enhanced instruction extraction"""
         instructions = []
-        
+
         # Look in all sections for instructions
         all_lines = sections['instructions'] + sections['other'] + sections['ingredients']
-        
+
         for line in all_lines:
             line = line.strip()
             if not line:
                 continue
-                
+
             # Skip category headers and serving info
-            if (self._looks_like_category_header(line) or 
-                re.search(r'makes?\s+\d+.*servings?|serves?\s+\d+', line.lower())):
+            if (self._looks_like_category_header(line) or
+                self._SERVINGS_LINE_RE.search(line.lower())):
                 continue
-                
+
             # Check if it looks like an instruction
             if self._looks_like_instruction_not_ingredient(line):
                 instructions.append(line)
-        
+
         return instructions[:15]
-    
+
     def _looks_like_category_header(self, line: str) -> bool:
         """Check if line looks like a category header (e.g., 'Dressing', 'Chicken Salad')"""
         line = line.strip()
-        
+        return self._is_category_header(line, line.lower(), len(line.split()))
+
+    def _is_category_header(self, line: str, line_lower: str, word_count: int) -> bool:
+        # Must be relatively short and not contain measurements
+        if word_count > 3 or len(line) <= 3 or self._DIGIT_RE.search(line) or self._UNIT_RE.search(line_lower):
+            return False
+
         # Don't treat instruction section headers as ingredient categories
-        instruction_headers = ['instructions', 'directions', 'method', 'steps', 'preparation']
-        if any(header in line.lower() for header in instruction_headers):
+        if self._INSTRUCTION_SECTION_WORD_RE.search(line_lower):
             return False
-        
-        # Single words or short phrases that are common recipe section headers
-        category_indicators = [
-            'dressing', 'sauce', 'marinade', 'filling', 'topping', 'garnish',
-            'salad', 'chicken', 'beef', 'fish', 'vegetables', 'base', 'mix',
-            'for serving', 'assembly', 'crust', 'batter'
-        ]
-        
-        # Must be relatively short and not contain measurements
-        if (len(line.split()) <= 3 and 
-            not re.search(r'\d+', line) and 
-            not any(unit in line.lower() for unit in self.measurement_units) and
-            len(line) > 3):
-            
-            # Check if it matches common category patterns
-            line_lower = line.lower()
-            if any(cat in line_lower for cat in category_indicators):
-                return True
-                
-            # Or if it's a simple noun phrase without articles and colons (like "Chicken Salad:")
-            if (not line_lower.startswith(('a ', 'an ', 'the ')) and
-                not any(verb in line_lower for verb in ['make', 'add', 'mix', 'cook', 'heat']) and
-                line.endswith(':')):
-                return True
-        
-        return False
-    
+
+        # Check if it matches common category patterns
+        if self._CATEGORY_RE.search(line_lower):
+            return True
+
+        # Or if it's a simple noun phrase without articles and colons (like "Chicken Salad:")
+        return (line.endswith(':') and
+                not line_lower.startswith(('a ', 'an ', 'the ')) and
+                not self._HEADER_VERB_RE.search(line_lower))
+
     def _looks_like_instruction_not_ingredient(self, line: str) -> bool:
         """Check if line looks like an instruction rather than an ingredient"""
-        line_lower = line.lower().strip()
-        
+        return self._is_instruction_not_ingredient(line.lower().strip(), len(line.split()))
+
+    def _is_instruction_not_ingredient(self, line_lower: str, word_count: int) -> bool:
         # Skip empty or very short lines
         if len(line_lower) < 10:
             return False
-        
+
         # Strong instruction indicators
-        instruction_starters = [
-            'make the', 'in a', 'add the', 'combine', 'mix', 'stir', 'blend',
-            'season with', 'pour', 'toss', 'cook', 'heat', 'bake', 'fry'
-        ]
-        
-        if any(line_lower.startswith(starter) for starter in instruction_starters):
+        if self._INSTRUCTION_STARTER_RE.match(line_lower):
             return True
-        
+
         # Check for cooking actions in longer sentences
-        if (len(line.split()) >= 5 and 
-            any(action in line_lower for action in self.cooking_actions)):
+        if word_count >= 5 and self._COOKING_ACTION_RE.search(line_lower):
             return True
-        
+
         # Check for instruction patterns
-        if re.search(r'until|for \d+|degrees?|minutes?|hours?|°[cf]', line_lower):
-            return True
-        
-        return False
-    
-    def _extract_ingredients_structured(self, sections: Dict[str, List[str]], full_text: str) -> str:
+        return bool(self._TIMING_RE.search(line_lower))
+
+    def _extract_ingredients_structured(self, lines: List[LineFeatures], full_text: str) -> str:
         """Extract ingredients as HTML content"""
         # Filter out description text from processing
         description_text = self._extract_description_text(full_text)
-        
-        all_lines = sections['ingredients'] + sections['other']
-        
+
         # Structure: categorized ingredients with HTML formatting
         current_category = None
+        category_section = None
         categorized_ingredients = []
         current_items = []
-        
-        for line in all_lines:
-            line = line.strip()
-            if not line:
-                continue
-                
+
+        for line in self._in_sections(lines, 'ingredients', 'other'):
             # Skip description text
-            if description_text and line in description_text:
-                continue
-                
-            # Skip serving info
-            if re.search(r'makes?\s+\d+.*servings?|serves?\s+\d+', line.lower()):
+            if description_text and line.text in description_text:
                 continue
-                
-            # Skip obvious instructions
-            if self._looks_like_instruction_not_ingredient(line):
+
+            # Skip serving info, obvious instructions and hashtag lines; an amount followed by a
+            # preparation ("4 cloves garlic, minced") is still an ingredient
+            if line.is_servings or (line.is_instruction and not line.is_quantity_item) or self._TAGS_ONLY_RE.match(line.lower):
                 continue
-                
+
             # Check if it's a category header
-            if self._looks_like_category_header(line) and not self._looks_like_instruction_not_ingredient(line):
+            if line.is_category_header:
                 # Save previous category if it has items
                 if current_category and current_items:
                     categorized_ingredients.append((current_category, current_items))
-                
+
                 # Start new category
-                current_category = line.rstrip(':')
+                current_category = line.text.rstrip(':')
+                category_section = line.section
                 current_items = []
                 continue
-                
+
+            # Under an ingredients header or a category, short lines are list items even
+            # without a quantity ("Salt to taste", "Fresh cilantro")
+            in_ingredient_list = line.section == 'ingredients' or (
+                current_category is not None and category_section == line.section
+            )
+
             # Check if it looks like an ingredient
-            if self._looks_like_ingredient(line):
-                current_items.append(line)
-        
+            if line.is_ingredient or (in_ingredient_list and line.word_count <= 8):
+                current_items.append(line.text)
+
         # Add final category
         if current_category and current_items:
             categorized_ingredients.append((current_category, current_items))
-        
+
         # If no categories found, treat all as one list
         if not categorized_ingredients and current_items:
             categorized_ingredients.append((None, current_items))
-        
+
         # Convert to HTML
         return self._ingredients_to_html(categorized_ingredients)
-    
-    def _extract_instructions_structured(self, sections: Dict[str, List[str]]) -> str:
-        """Extract instructions as HTML content"""
-        all_lines = sections['instructions'] + sections['other'] + sections['ingredients']
-        
-        instructions = []
-        
-        for line in all_lines:
-            line = line.strip()
-            if not line:
-                continue
-                
+
+    def _extract_instructions_structured(self, lines: List[LineFeatures]) -> str:
+        """Extract instructions as HTML content, in caption order"""
+        # Text before the recipe starts (first section header or ingredient) is the caption's intro
+        intro_end = next(
+            (index for index, line in enumerate(lines) if line.section != 'other' or line.is_quantity_item),
+            len(lines)
+        )
+        has_instruction_section = any(line.section == 'instructions' for line in lines)
+
+        instructions = [
+            line.text for index, line in enumerate(lines)
+            if index >= intro_end
+            # Under an explicit steps header, only that section holds steps
+            and not (has_instruction_section and line.section == 'other')
+            and line.is_instruction and not line.is_quantity_item
             # Skip category headers and serving info
-            if (self._looks_like_category_header(line) or 
-                re.search(r'makes?\s+\d+.*servings?|serves?\s+\d+', line.lower())):
-                continue
-                
-            # Check if it looks like an instruction
-            if self._looks_like_instruction_not_ingredient(line):
-                instructions.append(line)
-        
+            and not (line.is_category_header or line.is_servings)
+        ]
+
         # Convert to HTML ordered list
         return self._instructions_to_html(instructions[:15])
-    
+
     def _extract_description_text(self, full_text: str) -> Optional[str]:
         """Extract the main description text to avoid including it in ingredients"""
         lines = full_text.split('\n')
-        
+
         # Look for long descriptive paragraphs (usually at the beginning)
         for line in lines[:5]:  # Check first 5 lines
             line = line.strip()
             # Skip title-like lines and serving info
-            if (len(line) > 50 and 
-                not re.search(r'makes?\s+\d+.*servings?|serves?\s+\d+', line.lower()) and
+            if (len(line) > 50 and
+                not self._SERVINGS_LINE_RE.search(line.lower()) and
                 not self._looks_like_ingredient(line) and
                 not self._looks_like_instruction_not_ingredient(line)):
                 return line
-        
+
         return None
-    
+
     def _ingredients_to_html(self, categorized_ingredients: List[Tuple[Optional[str], List[str]]]) -> str:
         """Convert categorized ingredients to HTML"""
         if not categorized_ingredients:
             return ""
-        
+
         html_parts = []
-        
+
         for category, items in categorized_ingredients:
             if category:
                 # Add category as heading
                 html_parts.append(f"<h3>{category}</h3>")
-            
+
             if items:
                 # Add ingredients as unordered list
                 list_items = "".join(f"<li>{item}</li>" for item in items)
                 html_parts.append(f"<ul>{list_items}</ul>")
-        
+
         return "".join(html_parts)
-    
+
     def _instructions_to_html(self, instructions: List[str]) -> str:
         """Convert instructions to HTML ordered list"""
         if not instructions:
             return ""
-        
+
         # Clean up instructions that already have numbers
         cleaned_instructions = []
         for instruction in instructions:
             # Remove existing numbering (1., 2., etc.)
-            cleaned = re.sub(r'^\d+\.\s*', '', instruction.strip())
+            cleaned = self._LEADING_NUMBER_RE.sub('', instruction.strip())
             if cleaned:
                 cleaned_instructions.append(cleaned)
-        
+
         if not cleaned_instructions:
             return ""
-        
+
         # Create ordered list
         list_items = "".join(f"<li>{instruction}</li>" for instruction in cleaned_instructions)
         return f"<ol>{list_items}</ol>"
-    
+
     def _calculate_confidence_structured(self, ingredients: str, instructions: str, full_text: str) -> float:
         """Calculate confidence score for structured recipe extraction"""
         score = 0.0
-        
+
         # Count HTML elements to estimate content
         ingredients_count = ingredients.count('<li>')
         instructions_count = instructions.count('<li>')
-        
+
         # Base score for having content
         if ingredients_count > 0:
             score += 0.3
         if instructions_count > 0:
             score += 0.3
-        
+
         # Bonus for reasonable quantities
         if ingredients_count >= 3:
             score += 0.2
         if instructions_count >= 2:
             score += 0.2
-        
+
         # Check for recipe-related keywords
-        recipe_keywords = [
-            'recipe', 'cook', 'bake', 'ingredients', 'instructions',
-            'delicious', 'homemade', 'easy', 'simple', 'tasty'
-        ]
-        keyword_count = sum(1 for keyword in recipe_keywords if keyword in full_text.lower())
-        score += min(keyword_count * 0.05, 0.15)
-        
-        return min(score, 1.0)
\ No newline at end of file
+        score += min(self._count_recipe_keywords(full_text) * 0.05, 0.15)
+
+        return min(score, 1.0)
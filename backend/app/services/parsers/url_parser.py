@@ -1,18 +1,60 @@
-import json
 import re
-import asyncio
+import time
 import logging
+from dataclasses import dataclass
 from typing import Dict, Any, List, Tuple, Optional
+from urllib.parse import urlparse
 from .base_parser import BaseParser, ParsedRecipe
-from .request_utils import RequestHeaderManager, RateLimiter, RetryManager, SessionManager, ProxyManager
+from .request_utils import (
+    RequestHeaderManager, RateLimiter, RetryManager, SessionManager, ProxyManager,
+    Deadline, DeadlineExceeded, current_attempt, parse_retry_after,
+)
+from .state_store import shared_state_store
 from .browser_automation import BrowserAutomation, PLAYWRIGHT_AVAILABLE
+from .browser_pool import browser_pool
 from .progress_events import ProgressEventEmitter, ProgressPhase, ProgressStatus
+from .revalidation_store import revalidation_store, StoredPage
+from .parse_cache import (
+    parse_cache, CacheLookup, canonicalize_url, find_canonical_link,
+    NEGATIVE_WEBSITE_PROTECTION, NEGATIVE_NOT_FOUND
+)
+from .single_flight import url_parse_flights
+from .html_backend import make_soup, extract_ld_json_blocks
+from . import cpu_stages
+from .structured_data import find_best_recipe_node, extract_microdata_recipe
+from .blocking_detection import blocked_page_detector
+from .strategy_table import (
+    strategy_table, StrategyPlan, STAGE_SCRAPERS,
+    METHOD_SCRAPERS, METHOD_JSON_LD, METHOD_MICRODATA, METHOD_SECTION, METHOD_HTML, METHOD_BROWSER
+)
+from app.core.config import settings
+from app.core.http_client import http_client_registry
+from app.core.fetch_scheduler import fetch_scheduler
+from app.core.cpu_pool import cpu_pool
 
 
 class WebsiteProtectionError(Exception):
     """Raised when a website blocks automated access with anti-bot protection"""
     pass
 
+
+class PageNotFoundError(Exception):
+    """Raised when the recipe page itself answered 404 or 410"""
+
+    def __init__(self, message: str, status_code: int = 404):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _http_status(error: Exception) -> Optional[int]:
+    """Status code of the HTTP response behind an error, if it came from one"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        response = getattr(error, "response", None)
+        status_code = getattr(response, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
 try:
     import httpx
     HTTP_AVAILABLE = True
@@ -30,11 +72,11 @@ except ImportError as e:
     BS4_AVAILABLE = False
 
 try:
-    from recipe_scrapers import scrape_me
+    from recipe_scrapers import scrape_html
     RECIPE_SCRAPERS_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: recipe-scrapers not available: {e}")
-    scrape_me = None
+    scrape_html = None
     RECIPE_SCRAPERS_AVAILABLE = False
 
 # Ensure HTTP_AVAILABLE is properly set
@@ -43,6 +85,19 @@ HTTP_AVAILABLE = HTTP_AVAILABLE and BS4_AVAILABLE
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class FetchedPage:
+    """A page downloaded once and shared by every HTML-based parsing step"""
+    url: str
+    final_url: str
+    html: str
+    status_code: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Set when the server answered 304 and the stored copy is being reused
+    not_modified: Optional[StoredPage] = None
+
+
 class URLParser(BaseParser):
     """Parser for recipe websites using URL scraping with anti-bot protection"""
     
@@ -55,6 +110,9 @@ class URLParser(BaseParser):
         self.proxy_manager = ProxyManager(proxies)
         self.use_browser_fallback = PLAYWRIGHT_AVAILABLE  # Enable browser fallback if available
         
+        # <link rel=canonical> targets seen while fetching, keyed by requested URL
+        self._canonical_urls: Dict[str, str] = {}
+        
         # Metrics tracking
         self.metrics = {
             "total_requests": 0,
@@ -64,27 +122,89 @@ class URLParser(BaseParser):
             "proxy_used": 0,
             "recipe_scrapers_used": 0,
             "manual_parsing_used": 0,
+            "cache_hits": 0,
+            "revalidated_requests": 0,
             "domains_parsed": set(),
+            "blocking_indicator_hits": {},
         }
         
-        # Enhanced blocking detection patterns
-        self.blocked_indicators = [
-            'access denied', 'forbidden', 'blocked', 'sign in', 'login', 
-            'subscribe', 'membership required', 'unauthorized access',
-            'please enable javascript', 'verify you are human',
-            'captcha', 'are you a robot', 'cloudflare', 'ddos protection',
-            'rate limit', 'too many requests', 'temporarily unavailable',
-            'security check', 'suspicious activity', 'bot detected',
-            'please try again later', 'service unavailable',
-            'checking your browser', 'moment please', 'ray id',
-            'error 1020', 'error 1015', 'error 1012'  # Cloudflare errors
-        ]
+        # Block-page phrases matched in one pass over title, h1 and the start of the body
+        self.block_detector = blocked_page_detector
     
     async def parse(self, url: str, progress_emitter: Optional[ProgressEventEmitter] = None, **kwargs) -> ParsedRecipe:
-        """Parse recipe from URL with comprehensive anti-bot protection and progress tracking"""
+        """Parse recipe from URL, serving repeat imports of the same page from the parse cache"""
         if not HTTP_AVAILABLE:
             raise ImportError("httpx and BeautifulSoup4 are required for URL parsing")
         
+        cached = await parse_cache.lookup_async(url)
+        if cached:
+            return self._serve_cached_result(url, cached, progress_emitter)
+        
+        # Concurrent requests for the same page share one in-flight parse
+        result = await url_parse_flights.run(
+            canonicalize_url(url),
+            lambda emitter: self._parse_and_cache(url, emitter),
+            progress_emitter
+        )
+        
+        # Keep the URL the user actually submitted on the returned recipe
+        if result.source_url != url:
+            result = result.model_copy(update={"source_url": url})
+        return result
+    
+    async def _parse_and_cache(self, url: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> ParsedRecipe:
+        """Run the parsing cascade and record the outcome in the parse cache"""
+        try:
+            result = await self._parse_uncached(url, progress_emitter)
+        except WebsiteProtectionError as e:
+            await parse_cache.store_negative_async(url, NEGATIVE_WEBSITE_PROTECTION, str(e))
+            raise
+        except PageNotFoundError as e:
+            await parse_cache.store_negative_async(url, NEGATIVE_NOT_FOUND, str(e))
+            raise
+        finally:
+            canonical_url = self._canonical_urls.pop(url, None)
+        
+        # Store under the requested URL and the page's <link rel=canonical> target
+        await parse_cache.store_async([url, canonical_url], result)
+        return result
+    
+    def _serve_cached_result(self, url: str, cached: CacheLookup, progress_emitter: Optional[ProgressEventEmitter] = None) -> ParsedRecipe:
+        """Return a cached parse result (or re-raise a cached failure)"""
+        self.metrics["cache_hits"] += 1
+        
+        if cached.is_negative:
+            if progress_emitter:
+                progress_emitter.emit_event(
+                    ProgressPhase.FAILED,
+                    ProgressStatus.FAILED,
+                    f"Recently failed to parse this page: {(cached.negative_message or '')[:100]}",
+                    method="cache",
+                    error_details=cached.negative_message,
+                    suggestions=["Try again in a few minutes", "Copy and paste recipe text manually"]
+                )
+            if cached.negative_kind == NEGATIVE_WEBSITE_PROTECTION:
+                raise WebsiteProtectionError(cached.negative_message)
+            if cached.negative_kind == NEGATIVE_NOT_FOUND:
+                raise PageNotFoundError(cached.negative_message)
+            raise Exception(cached.negative_message)
+        
+        # Keep the URL the user actually submitted on the returned recipe
+        result = cached.recipe.model_copy(update={"source_url": url})
+        
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.COMPLETED,
+                ProgressStatus.SUCCESS,
+                f"Loaded previously parsed recipe: {result.title}",
+                method="cache",
+                metadata={"title": result.title, "confidence": result.confidence_score, "cached": True}
+            )
+        
+        return result
+    
+    async def _parse_uncached(self, url: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> ParsedRecipe:
+        """Parse recipe from URL with comprehensive anti-bot protection and progress tracking"""
         # Initialize progress tracking
         if progress_emitter:
             progress_emitter.emit_event(
@@ -95,222 +215,391 @@ class URLParser(BaseParser):
             )
         
         # Track metrics
-        from urllib.parse import urlparse
         domain = urlparse(url).netloc
         self.metrics["total_requests"] += 1
         self.metrics["domains_parsed"].add(domain)
         
-        # Try recipe-scrapers first (supports 500+ sites)
-        if RECIPE_SCRAPERS_AVAILABLE:
+        # One time budget for the whole cascade: fetch retries and browser fallbacks share it
+        deadline = Deadline(settings.PARSE_DEADLINE_SECONDS)
+        
+        # Learned per-domain plan: skip methods that keep failing here, or go straight to the browser
+        plan = await strategy_table.plan(domain)
+        if not plan.is_default:
+            logger.debug(f"Parsing strategy for {domain}: {plan.reason}")
+        
+        browser_attempted = False
+        if plan.browser_first and self.use_browser_fallback:
+            result = await self._parse_browser_first(url, plan, deadline, progress_emitter)
+            if result:
+                return result
+            browser_attempted = True
+        
+        # Download the page once; every HTML-based strategy below reuses it
+        fetch_start = time.time()
+        try:
+            page = await self.retry_manager.execute_with_retry(
+                self._fetch_page, url, progress_emitter,
+                deadline=deadline, progress_emitter=progress_emitter, method="http"
+            )
+        except WebsiteProtectionError as e:
+            self._record_strategy(domain, METHOD_HTML, False, fetch_start)
+            return await self._handle_blocked_page(url, e, progress_emitter, try_browser=not browser_attempted, deadline=deadline)
+        except Exception as e:
+            return await self._handle_parse_error(url, e, try_browser=not browser_attempted, deadline=deadline)
+        
+        await self.rate_limiter.record_success(url)
+        
+        # 304 Not Modified: the recipe parsed from this exact page last time is still current
+        if page.not_modified is not None and page.not_modified.recipe is not None:
+            return self._serve_revalidated(url, page.not_modified.recipe, progress_emitter)
+        
+        # Follow <link rel=canonical>: another URL for the same page may already be cached
+        cached_recipe = await self._lookup_canonical_url(url, page)
+        if cached_recipe:
+            self.metrics["cache_hits"] += 1
             if progress_emitter:
                 progress_emitter.emit_event(
-                    ProgressPhase.TRYING_SCRAPERS,
-                    ProgressStatus.IN_PROGRESS,
-                    "Attempting to parse using recipe-scrapers library",
-                    method="recipe-scrapers",
-                    metadata={"library": "recipe-scrapers", "supports": "500+ sites"}
+                    ProgressPhase.COMPLETED,
+                    ProgressStatus.SUCCESS,
+                    f"Loaded previously parsed recipe: {cached_recipe.title}",
+                    method="cache",
+                    metadata={"title": cached_recipe.title, "confidence": cached_recipe.confidence_score, "cached": True}
                 )
+            return cached_recipe
+        
+        # recipe-scrapers (supports 500+ sites) and manual parsing, in the planned order
+        manual_error = None
+        for stage in plan.http_stages:
+            if stage == STAGE_SCRAPERS:
+                result = await self._try_recipe_scrapers(page, domain, progress_emitter)
+                if result:
+                    await self._remember_validators(page, result)
+                    return result
+            else:
+                try:
+                    result = await self._try_manual_parsing(page, domain, progress_emitter)
+                except Exception as e:
+                    manual_error = e
+                else:
+                    await self._remember_validators(page, result)
+                    return result
+        
+        if isinstance(manual_error, WebsiteProtectionError):
+            return await self._handle_blocked_page(url, manual_error, progress_emitter, try_browser=not browser_attempted, deadline=deadline)
+        return await self._handle_parse_error(url, manual_error, try_browser=not browser_attempted, deadline=deadline)
+    
+    def _serve_revalidated(self, url: str, recipe: ParsedRecipe, progress_emitter: Optional[ProgressEventEmitter] = None) -> ParsedRecipe:
+        """Return the stored recipe for a page the server confirmed is unchanged"""
+        self.metrics["successful_requests"] += 1
+        self.metrics["revalidated_requests"] += 1
+        result = recipe.model_copy(update={"source_url": url})
+        
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.COMPLETED,
+                ProgressStatus.SUCCESS,
+                f"Page unchanged since last import: {result.title}",
+                method="cache",
+                metadata={"title": result.title, "confidence": result.confidence_score, "cached": True, "revalidated": True}
+            )
+        
+        return result
+    
+    async def _remember_validators(self, page: FetchedPage, recipe: ParsedRecipe) -> None:
+        """Keep the page's ETag/Last-Modified with its body and recipe for conditional re-fetches"""
+        await revalidation_store.store_async(page.url, page.etag, page.last_modified, page.html, recipe)
+    
+    async def _try_recipe_scrapers(self, page: FetchedPage, domain: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> Optional[ParsedRecipe]:
+        """Parse the downloaded page with recipe-scrapers, returning None when it can't"""
+        if not RECIPE_SCRAPERS_AVAILABLE:
+            return None
+        
+        url = page.url
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.TRYING_SCRAPERS,
+                ProgressStatus.IN_PROGRESS,
+                "Attempting to parse using recipe-scrapers library",
+                method="recipe-scrapers",
+                metadata={"library": "recipe-scrapers", "supports": "500+ sites"}
+            )
+        
+        started = time.time()
+        try:
+            outcome = await cpu_pool.run(
+                "recipe_scrapers", cpu_stages.parse_with_recipe_scrapers,
+                cpu_stages.pack_page(page.html, url), size=len(page.html)
+            )
+            result, _ = self._recipe_from_stage(outcome)
+        except Exception as e:
+            self._record_strategy(domain, METHOD_SCRAPERS, False, started)
+            logger.warning(f"recipe-scrapers failed for {url}: {e}")
             
-            try:
-                result = await self.retry_manager.execute_with_retry(
-                    self._parse_with_recipe_scrapers, url, progress_emitter
+            if progress_emitter:
+                progress_emitter.emit_event(
+                    ProgressPhase.SCRAPERS_FAILED,
+                    ProgressStatus.FAILED,
+                    f"recipe-scrapers failed: {str(e)[:100]}",
+                    method="recipe-scrapers",
+                    error_details=str(e),
+                    suggestions=["Falling back to manual parsing", "This is normal for sites not supported by recipe-scrapers"]
                 )
-                self.rate_limiter.record_success(url)
-                self.metrics["successful_requests"] += 1
-                self.metrics["recipe_scrapers_used"] += 1
-                
-                if progress_emitter:
-                    progress_emitter.emit_event(
-                        ProgressPhase.COMPLETED,
-                        ProgressStatus.SUCCESS,
-                        f"Successfully parsed recipe: {result.title}",
-                        method="recipe-scrapers",
-                        metadata={"title": result.title, "confidence": result.confidence_score}
-                    )
-                
-                return result
-            except Exception as e:
-                logger.warning(f"recipe-scrapers failed for {url}: {e}")
-                self.rate_limiter.record_failure(url, "rate limit" in str(e).lower())
-                
-                if progress_emitter:
-                    progress_emitter.emit_event(
-                        ProgressPhase.SCRAPERS_FAILED,
-                        ProgressStatus.FAILED,
-                        f"recipe-scrapers failed: {str(e)[:100]}",
-                        method="recipe-scrapers",
-                        error_details=str(e),
-                        suggestions=["Falling back to manual parsing", "This is normal for sites not supported by recipe-scrapers"]
-                    )
-                # Fall back to manual parsing
+            return None
+        
+        self._record_strategy(domain, METHOD_SCRAPERS, True, started)
+        self.metrics["successful_requests"] += 1
+        self.metrics["recipe_scrapers_used"] += 1
+        
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.COMPLETED,
+                ProgressStatus.SUCCESS,
+                f"Successfully parsed recipe: {result.title}",
+                method="recipe-scrapers",
+                metadata={"title": result.title, "confidence": result.confidence_score}
+            )
         
-        # Fallback to manual parsing with enhanced protection
+        return result
+    
+    async def _try_manual_parsing(self, page: FetchedPage, domain: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> ParsedRecipe:
+        """Manual parsing of the downloaded page; raises when no recipe could be extracted"""
         if progress_emitter:
             progress_emitter.emit_event(
                 ProgressPhase.TRYING_MANUAL,
                 ProgressStatus.IN_PROGRESS,
-                "Attempting manual parsing with enhanced headers and anti-bot protection",
+                "Attempting manual parsing of structured data and recipe sections",
                 method="manual-http",
-                metadata={"features": ["header rotation", "rate limiting", "session management", "proxy support"]}
+                metadata={"strategies": ["JSON-LD", "jump to recipe", "HTML heuristics"]}
             )
         
+        started = time.time()
         try:
-            result = await self.retry_manager.execute_with_retry(
-                self._fetch_and_parse_manually, url, progress_emitter
+            result, method = await self._parse_fetched_page(page, progress_emitter)
+        except Exception:
+            self._record_strategy(domain, METHOD_HTML, False, started)
+            raise
+        
+        self._record_strategy(domain, method, True, started)
+        self.metrics["successful_requests"] += 1
+        self.metrics["manual_parsing_used"] += 1
+        
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.COMPLETED,
+                ProgressStatus.SUCCESS,
+                f"Successfully parsed recipe: {result.title}",
+                method="manual-http",
+                metadata={"title": result.title, "confidence": result.confidence_score, "strategy": method}
             )
-            self.rate_limiter.record_success(url)
-            self.metrics["successful_requests"] += 1
-            self.metrics["manual_parsing_used"] += 1
-            
+        
+        return result
+    
+    async def _parse_browser_first(self, url: str, plan: StrategyPlan, deadline: Deadline, progress_emitter: Optional[ProgressEventEmitter] = None) -> Optional[ParsedRecipe]:
+        """Go straight to browser automation for a domain where plain HTTP keeps failing"""
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.TRYING_BROWSER,
+                ProgressStatus.IN_PROGRESS,
+                "This site usually needs a browser, skipping plain HTTP parsing",
+                method="browser-automation",
+                metadata={"strategy": plan.reason}
+            )
+        
+        # No retries here: if the browser fails, the plain HTTP cascade is still tried
+        started = time.time()
+        try:
+            result = await deadline.run(self._parse_with_browser_automation(url, progress_emitter), "browser automation")
+        except Exception as e:
+            self._record_strategy(urlparse(url).netloc, METHOD_BROWSER, False, started)
+            logger.info(f"Browser-first parse failed for {url}, falling back to plain HTTP: {e}")
+            return None
+        
+        self._record_strategy(urlparse(url).netloc, METHOD_BROWSER, True, started)
+        await self.rate_limiter.record_success(url)
+        self.metrics["successful_requests"] += 1
+        self.metrics["browser_automation_used"] += 1
+        
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.COMPLETED,
+                ProgressStatus.SUCCESS,
+                f"Successfully parsed recipe via browser automation: {result.title}",
+                method="browser-automation",
+                metadata={"title": result.title, "confidence": result.confidence_score}
+            )
+        
+        return result
+    
+    def _record_strategy(self, domain: str, method: str, success: bool, started: float) -> None:
+        """Feed a method's outcome and latency into the per-domain strategy table"""
+        strategy_table.record(domain, method, success, (time.time() - started) * 1000)
+    
+    async def _handle_blocked_page(self, url: str, error: WebsiteProtectionError, progress_emitter: Optional[ProgressEventEmitter] = None, try_browser: bool = True, deadline: Optional[Deadline] = None) -> ParsedRecipe:
+        """Fall back to browser automation for a page that blocked plain HTTP parsing"""
+        deadline = deadline or Deadline(None)
+        await self.rate_limiter.record_failure(url, True)
+        self.metrics["blocked_requests"] += 1
+        
+        if progress_emitter:
+            progress_emitter.emit_event(
+                ProgressPhase.MANUAL_BLOCKED,
+                ProgressStatus.FAILED,
+                f"Manual parsing blocked: {str(error)[:100]}",
+                method="manual-http",
+                error_details=str(error),
+                suggestions=["Trying browser automation", "Website has anti-bot protection"]
+            )
+        
+        # Try browser automation as final fallback if available (and not already tried first)
+        if self.use_browser_fallback and try_browser and not deadline.expired:
             if progress_emitter:
                 progress_emitter.emit_event(
-                    ProgressPhase.COMPLETED,
-                    ProgressStatus.SUCCESS,
-                    f"Successfully parsed recipe: {result.title}",
-                    method="manual-http",
-                    metadata={"title": result.title, "confidence": result.confidence_score}
+                    ProgressPhase.TRYING_BROWSER,
+                    ProgressStatus.IN_PROGRESS,
+                    "Attempting browser automation with Playwright (this may take longer)",
+                    method="browser-automation",
+                    metadata={"browser": "chromium", "headless": True, "features": ["JavaScript execution", "human-like behavior"]}
                 )
             
-            return result
-            
-        except WebsiteProtectionError as e:
-            self.rate_limiter.record_failure(url, True)
-            self.metrics["blocked_requests"] += 1
-            
-            if progress_emitter:
-                progress_emitter.emit_event(
-                    ProgressPhase.MANUAL_BLOCKED,
-                    ProgressStatus.FAILED,
-                    f"Manual parsing blocked: {str(e)[:100]}",
-                    method="manual-http",
-                    error_details=str(e),
-                    suggestions=["Trying browser automation", "Website has anti-bot protection"]
+            logger.info(f"Trying browser automation fallback for {url}")
+            browser_start = time.time()
+            try:
+                result = await self.retry_manager.execute_with_retry(
+                    self._parse_with_browser_automation, url, progress_emitter,
+                    deadline=deadline, progress_emitter=progress_emitter, method="browser-automation"
                 )
-            
-            # Try browser automation as final fallback if available
-            if self.use_browser_fallback:
+                self._record_strategy(urlparse(url).netloc, METHOD_BROWSER, True, browser_start)
+                await self.rate_limiter.record_success(url)
+                self.metrics["successful_requests"] += 1
+                self.metrics["browser_automation_used"] += 1
+                
                 if progress_emitter:
                     progress_emitter.emit_event(
-                        ProgressPhase.TRYING_BROWSER,
-                        ProgressStatus.IN_PROGRESS,
-                        "Attempting browser automation with Playwright (this may take longer)",
+                        ProgressPhase.COMPLETED,
+                        ProgressStatus.SUCCESS,
+                        f"Successfully parsed recipe via browser automation: {result.title}",
                         method="browser-automation",
-                        metadata={"browser": "chromium", "headless": True, "features": ["JavaScript execution", "human-like behavior"]}
+                        metadata={"title": result.title, "confidence": result.confidence_score}
                     )
                 
-                logger.info(f"Trying browser automation fallback for {url}")
-                try:
-                    result = await self.retry_manager.execute_with_retry(
-                        self._parse_with_browser_automation, url, progress_emitter
-                    )
-                    self.rate_limiter.record_success(url)
-                    self.metrics["successful_requests"] += 1
-                    self.metrics["browser_automation_used"] += 1
-                    
-                    if progress_emitter:
-                        progress_emitter.emit_event(
-                            ProgressPhase.COMPLETED,
-                            ProgressStatus.SUCCESS,
-                            f"Successfully parsed recipe via browser automation: {result.title}",
-                            method="browser-automation",
-                            metadata={"title": result.title, "confidence": result.confidence_score}
-                        )
-                    
-                    return result
-                except Exception as browser_error:
-                    logger.error(f"Browser automation also failed: {browser_error}")
-                    if progress_emitter:
-                        progress_emitter.emit_event(
-                            ProgressPhase.FAILED,
-                            ProgressStatus.FAILED,
-                            f"All parsing methods failed. Browser automation error: {str(browser_error)[:100]}",
-                            method="browser-automation",
-                            error_details=str(browser_error),
-                            suggestions=["Try a different URL", "Copy and paste recipe text manually", "Website may have strong protection"]
-                        )
-                    # Fall through to raise original error
-            else:
+                return result
+            except Exception as browser_error:
+                self._record_strategy(urlparse(url).netloc, METHOD_BROWSER, False, browser_start)
+                logger.error(f"Browser automation also failed: {browser_error}")
                 if progress_emitter:
                     progress_emitter.emit_event(
                         ProgressPhase.FAILED,
                         ProgressStatus.FAILED,
-                        "All available parsing methods failed. Browser automation not available.",
-                        error_details=str(e),
-                        suggestions=["Install Playwright for browser automation: pip install playwright", "Copy and paste recipe text manually"]
-                    )
-            
-            raise e
-        except Exception as e:
-            error_msg = str(e)
-            self.rate_limiter.record_failure(url, "rate limit" in error_msg.lower())
-            
-            # Try browser automation for certain errors if available
-            if self.use_browser_fallback and any(indicator in error_msg.lower() for indicator in ["403", "forbidden", "timeout", "connection"]):
-                logger.info(f"Trying browser automation fallback for error: {error_msg}")
-                try:
-                    result = await self.retry_manager.execute_with_retry(
-                        self._parse_with_browser_automation, url
+                        f"All parsing methods failed. Browser automation error: {str(browser_error)[:100]}",
+                        method="browser-automation",
+                        error_details=str(browser_error),
+                        suggestions=["Try a different URL", "Copy and paste recipe text manually", "Website may have strong protection"]
                     )
-                    self.rate_limiter.record_success(url)
-                    self.metrics["successful_requests"] += 1
-                    self.metrics["browser_automation_used"] += 1
-                    return result
-                except Exception as browser_error:
-                    logger.error(f"Browser automation also failed: {browser_error}")
-                    # Fall through to original error handling
-            
-            # Provide helpful suggestions for common issues
-            if "403" in error_msg or "Forbidden" in error_msg:
-                raise WebsiteProtectionError("This website blocks automated access. The recipe may be available, but the site prevents our parser from reading it.")
-            elif "404" in error_msg or "Not Found" in error_msg:
-                raise Exception("Recipe page not found. The page may have moved or been deleted. Please check the URL and try again.")
-            elif "timeout" in error_msg.lower():
-                raise Exception("The website is taking too long to respond. Please try again later.")
-            else:
-                raise Exception(f"Failed to parse recipe from URL: {error_msg}")
+                # Fall through to raise original error
+        elif self.use_browser_fallback and try_browser:
+            if progress_emitter:
+                progress_emitter.emit_event(
+                    ProgressPhase.FAILED,
+                    ProgressStatus.FAILED,
+                    "Ran out of time before browser automation could be tried.",
+                    error_details=str(error),
+                    suggestions=["Try again in a few minutes", "Copy and paste recipe text manually"]
+                )
+        elif self.use_browser_fallback:
+            if progress_emitter:
+                progress_emitter.emit_event(
+                    ProgressPhase.FAILED,
+                    ProgressStatus.FAILED,
+                    "All parsing methods failed, including browser automation.",
+                    error_details=str(error),
+                    suggestions=["Try a different URL", "Copy and paste recipe text manually", "Website may have strong protection"]
+                )
+        else:
+            if progress_emitter:
+                progress_emitter.emit_event(
+                    ProgressPhase.FAILED,
+                    ProgressStatus.FAILED,
+                    "All available parsing methods failed. Browser automation not available.",
+                    error_details=str(error),
+                    suggestions=["Install Playwright for browser automation: pip install playwright", "Copy and paste recipe text manually"]
+                )
+        
+        raise error
     
-    async def _fetch_and_parse_manually(self, url: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> ParsedRecipe:
-        """Fetch and parse recipe manually with anti-bot protection"""
-        # Apply rate limiting
-        if progress_emitter:
-            progress_emitter.emit_event(
-                ProgressPhase.RATE_LIMITING,
-                ProgressStatus.IN_PROGRESS,
-                "Applying rate limiting to avoid triggering anti-bot measures",
-                method="manual-http",
-                metadata={"domain": urlparse(url).netloc}
+    async def _handle_parse_error(self, url: str, error: Exception, try_browser: bool = True, deadline: Optional[Deadline] = None) -> ParsedRecipe:
+        """Try browser automation for recoverable errors, otherwise raise a user-facing error"""
+        deadline = deadline or Deadline(None)
+        error_msg = str(error)
+        await self.rate_limiter.record_failure(url, "rate limit" in error_msg.lower())
+        
+        # Try browser automation for certain errors if available
+        if self.use_browser_fallback and try_browser and not deadline.expired and any(indicator in error_msg.lower() for indicator in ["403", "forbidden", "timeout", "connection"]):
+            logger.info(f"Trying browser automation fallback for error: {error_msg}")
+            browser_start = time.time()
+            try:
+                result = await self.retry_manager.execute_with_retry(
+                    self._parse_with_browser_automation, url,
+                    deadline=deadline, method="browser-automation"
+                )
+                self._record_strategy(urlparse(url).netloc, METHOD_BROWSER, True, browser_start)
+                await self.rate_limiter.record_success(url)
+                self.metrics["successful_requests"] += 1
+                self.metrics["browser_automation_used"] += 1
+                return result
+            except Exception as browser_error:
+                self._record_strategy(urlparse(url).netloc, METHOD_BROWSER, False, browser_start)
+                logger.error(f"Browser automation also failed: {browser_error}")
+                # Fall through to original error handling
+        
+        # Provide helpful suggestions for common issues
+        if "403" in error_msg or "Forbidden" in error_msg:
+            raise WebsiteProtectionError("This website blocks automated access. The recipe may be available, but the site prevents our parser from reading it.")
+        elif _http_status(error) in (404, 410):
+            raise PageNotFoundError(
+                "Recipe page not found. The page may have moved or been deleted. Please check the URL and try again.",
+                status_code=_http_status(error)
             )
-        
-        await self.rate_limiter.wait_for_domain(url)
-        
+        elif isinstance(error, DeadlineExceeded) or "timeout" in error_msg.lower():
+            raise Exception("The website is taking too long to respond. Please try again later.")
+        else:
+            raise Exception(f"Failed to parse recipe from URL: {error_msg}")
+    
+    async def _fetch_page(self, url: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> FetchedPage:
+        """Download a page once with rate limiting, rotated headers, session cookies and proxies"""
+        # Queue for a per-domain slot (fair across users; reports the wait as RATE_LIMITING).
+        # A backed-off domain is paced by the scheduler, so nothing sleeps while holding the slot
+        await self.rate_limiter.refresh_backoff(url)
+        async with fetch_scheduler.slot(url, progress_emitter=progress_emitter, method="http"):
+            return await self._fetch_page_in_slot(url, progress_emitter)
+    
+    async def _fetch_page_in_slot(self, url: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> FetchedPage:
         # Get realistic headers with rotation
         headers = self.header_manager.get_random_headers(url)
         
         # Add session-specific headers (cookies, etc.)
-        session_headers = self.session_manager.get_session_headers(url)
+        session_headers = await self.session_manager.get_session_headers(url)
         headers.update(session_headers)
         
+        # Revalidate a page read before: a 304 skips the download (and the parse, when its recipe was kept)
+        stored = await revalidation_store.lookup_async(url)
+        conditional_headers = revalidation_store.conditional_headers(stored)
+        headers.update(conditional_headers)
+        
         # Get proxy if available
-        proxy = self.proxy_manager.get_next_proxy()
-        proxy_config = {"proxy": proxy} if proxy else {}
+        proxy = await self.proxy_manager.get_next_proxy()
         if proxy:
             self.metrics["proxy_used"] += 1
-            if progress_emitter:
-                progress_emitter.emit_event(
-                    ProgressPhase.TRYING_MANUAL,
-                    ProgressStatus.IN_PROGRESS,
-                    f"Using proxy for request: {proxy}",
-                    method="manual-http",
-                    metadata={"proxy": proxy, "proxy_type": "rotation"}
-                )
         
         # Make request with enhanced protection
+        attempt, total_attempts = current_attempt()
         if progress_emitter:
             progress_emitter.emit_event(
-                ProgressPhase.TRYING_MANUAL,
+                ProgressPhase.FETCHING_PAGE,
                 ProgressStatus.IN_PROGRESS,
-                "Making HTTP request with enhanced headers and protection",
-                method="manual-http",
+                "Fetching page with enhanced headers and protection",
+                method="http",
+                attempt=attempt,
+                total_attempts=total_attempts,
                 metadata={
                     "user_agent": headers['User-Agent'][:50] + "..." if len(headers['User-Agent']) > 50 else headers['User-Agent'],
                     "proxy_used": proxy is not None,
@@ -318,71 +607,133 @@ class URLParser(BaseParser):
                 }
             )
         
-        async with httpx.AsyncClient(timeout=30.0, **proxy_config) as client:
-            logger.debug(f"Fetching {url} with User-Agent: {headers['User-Agent'][:50]}... {f'via proxy {proxy}' if proxy else ''}")
+        # Use the shared pooled client so keep-alive connections are reused across parses
+        logger.debug(f"Fetching {url} with User-Agent: {headers['User-Agent'][:50]}... {f'via proxy {proxy}' if proxy else ''}")
+        
+        try:
+            response = await http_client_registry.get(url, proxy=proxy, headers=headers)
             
-            try:
-                response = await client.get(url, headers=headers)
-                
-                # Record proxy success if used
-                if proxy:
-                    self.proxy_manager.record_proxy_success(proxy)
-                
-                # Update session with response
-                response_cookies = dict(response.cookies) if hasattr(response, 'cookies') else {}
-                self.session_manager.update_session(url, dict(response.headers), response_cookies)
-                
-                # Check for explicit blocking before raising HTTP errors
-                if response.status_code in [403, 429]:
-                    page_text = response.text.lower() if response.text else ""
-                    if any(indicator in page_text for indicator in self.blocked_indicators):
-                        raise WebsiteProtectionError(
-                            f"Website returned {response.status_code} and appears to be blocking automated access"
-                        )
-                
-                response.raise_for_status()
-                
-            except Exception as e:
-                # Record proxy failure if used
-                if proxy:
-                    self.proxy_manager.record_proxy_failure(proxy)
-                raise e
+            # Record proxy success if used
+            if proxy:
+                await self.proxy_manager.record_proxy_success(proxy)
             
-        soup = BeautifulSoup(response.text, 'html.parser')
+            # Update session with response
+            response_cookies = dict(response.cookies) if hasattr(response, 'cookies') else {}
+            await self.session_manager.update_session(url, dict(response.headers), response_cookies)
+            
+            if response.status_code == 304 and stored is not None:
+                if not await revalidation_store.load_not_modified_async(stored):
+                    # Evicted since the lookup: the next attempt fetches the page unconditionally
+                    raise Exception(f"Stored copy of {url} disappeared before its 304 could be used")
+                return FetchedPage(
+                    url=url,
+                    final_url=url,
+                    html=stored.body or "",
+                    status_code=304,
+                    etag=stored.etag,
+                    last_modified=stored.last_modified,
+                    not_modified=stored,
+                )
+            if conditional_headers:
+                revalidation_store.record_modified()
+            
+            # Check for explicit blocking before raising HTTP errors
+            if response.status_code in [403, 429]:
+                hits = self._record_block_indicators(self.block_detector.detect_in_html(response.text or ""))
+                if hits:
+                    error = WebsiteProtectionError(
+                        f"Website returned {response.status_code} and appears to be blocking automated access "
+                        f"(matched: {', '.join(hits)})"
+                    )
+                    # Lets the retry manager wait as long as the site asked
+                    error.retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    raise error
+            
+            response.raise_for_status()
+            
+        except Exception as e:
+            # Record proxy failure if used
+            if proxy:
+                await self.proxy_manager.record_proxy_failure(proxy)
+            raise e
         
-        # Enhanced blocking detection
+        return FetchedPage(
+            url=url,
+            final_url=str(response.url),
+            html=response.text,
+            status_code=response.status_code,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+        )
+    
+    async def _lookup_canonical_url(self, url: str, page: FetchedPage) -> Optional[ParsedRecipe]:
+        """Remember the page's canonical URL and return its cached recipe, if any"""
+        canonical_url = find_canonical_link(page.html, page.final_url)
+        if not canonical_url:
+            return None
+        
+        self._canonical_urls[url] = canonical_url
+        cached = await parse_cache.lookup_async(canonical_url)
+        if cached and not cached.is_negative:
+            logger.debug(f"Canonical URL {canonical_url} already cached for {url}")
+            return cached.recipe.model_copy(update={"source_url": url})
+        
+        return None
+    
+    async def _parse_fetched_page(self, page: FetchedPage, progress_emitter: Optional[ProgressEventEmitter] = None) -> Tuple[ParsedRecipe, str]:
+        """Extract a recipe from already downloaded HTML (JSON-LD, recipe section, heuristics), with the method that found it"""
         if progress_emitter:
             progress_emitter.emit_event(
                 ProgressPhase.PARSING_CONTENT,
                 ProgressStatus.IN_PROGRESS,
                 "Analyzing page content and checking for blocking",
                 method="manual-http",
-                metadata={"content_length": len(response.text), "status_code": response.status_code}
+                metadata={"content_length": len(page.html), "status_code": page.status_code}
             )
         
-        page_text = soup.get_text().lower()
-        if any(indicator in page_text for indicator in self.blocked_indicators):
+        # Tree building and the heuristics are CPU-bound; large pages run in the CPU pool
+        outcome = await cpu_pool.run(
+            "html_parse", cpu_stages.parse_html_page, cpu_stages.pack_page(page.html, page.url), size=len(page.html)
+        )
+        return self._recipe_from_stage(outcome)
+    
+    def _recipe_from_stage(self, outcome: Dict[str, Any]) -> Tuple[ParsedRecipe, Optional[str]]:
+        """Recipe and method from a CPU-pool stage outcome, re-raising the error it reported"""
+        for indicator, count in outcome["blocking_indicator_hits"].items():
+            counts = self.metrics["blocking_indicator_hits"]
+            counts[indicator] = counts.get(indicator, 0) + count
+        
+        if outcome["error_type"] == "website_protection":
+            raise WebsiteProtectionError(outcome["error"])
+        if outcome["error_type"]:
+            raise Exception(outcome["error"])
+        return ParsedRecipe(**outcome["recipe"]), outcome["method"]
+    
+    def _extract_recipe_from_html(self, html: str, url: str) -> Tuple[ParsedRecipe, str]:
+        """The manual parsing cascade itself; runs in a CPU pool worker for large pages"""
+        # Fast path: structured data straight from the raw HTML, before any tree is built
+        result = self._parse_structured_data(html, url)
+        if result:
+            return result, METHOD_JSON_LD
+        
+        soup = make_soup(html)
+        
+        # Enhanced blocking detection
+        hits = self._record_block_indicators(self.block_detector.detect_in_soup(soup))
+        if hits:
             raise WebsiteProtectionError(
-                "This website appears to be blocking automated access or requires verification"
+                f"This website appears to be blocking automated access or requires verification (matched: {', '.join(hits)})"
             )
         
-        # Try to extract structured data first (JSON-LD)
-        json_ld = soup.find('script', {'type': 'application/ld+json'})
-        if json_ld:
-            try:
-                data = json.loads(json_ld.string)
-                if isinstance(data, list):
-                    data = data[0]
-                
-                if data.get('@type') == 'Recipe':
-                    return self._parse_json_ld_recipe(data, url)
-            except:
-                pass
+        # Try microdata/RDFa Recipe markup
+        result = self._parse_microdata(soup, url)
+        if result:
+            return result, METHOD_MICRODATA
         
         # Try Jump to Recipe approach
         recipe_section = self._find_recipe_section_via_jump_link(soup)
         if recipe_section:
-            return self._parse_recipe_section(recipe_section, url)
+            return self._parse_recipe_section(recipe_section, url), METHOD_SECTION
         
         # Fallback to HTML parsing
         result = self._parse_html_recipe(soup, url)
@@ -393,7 +744,14 @@ class URLParser(BaseParser):
                 "Unable to parse recipe from this website. The site may be blocking automated access or the recipe content may not be accessible to our parser."
             )
         
-        return result
+        return result, METHOD_HTML
+    
+    def _record_block_indicators(self, hits: List[str]) -> List[str]:
+        """Count which block-page phrases matched so they show up in the parser metrics"""
+        for indicator in hits:
+            counts = self.metrics["blocking_indicator_hits"]
+            counts[indicator] = counts.get(indicator, 0) + 1
+        return hits
     
     def _is_likely_blocked_content(self, result: ParsedRecipe, soup: BeautifulSoup) -> bool:
         """Enhanced detection of blocked or low-quality content"""
@@ -403,11 +761,12 @@ class URLParser(BaseParser):
             (not result.ingredients or len(result.ingredients.strip()) < 50) and
             (not result.instructions or len(result.instructions.strip()) < 100)):
             
-            # Additional checks for blocked content
-            page_text = soup.get_text().lower()
+            # Additional checks for blocked content (title, h1 and the start of the visible body)
+            page_text = self.block_detector.visible_text_from_soup(soup).lower()
             
             # Check for blocking indicators
-            if any(indicator in page_text for indicator in self.blocked_indicators):
+            headings = self.block_detector.headings_from_soup(soup)
+            if self._record_block_indicators(self.block_detector.find_indicators(page_text, headings)):
                 return True
             
             # Check for minimal content (likely a blocked page)
@@ -429,92 +788,60 @@ class URLParser(BaseParser):
         
         logger.info(f"Using browser automation for {url}")
         
+        attempt, total_attempts = current_attempt()
         if progress_emitter:
             progress_emitter.emit_event(
                 ProgressPhase.TRYING_BROWSER,
                 ProgressStatus.IN_PROGRESS,
-                "Launching headless browser and loading page",
+                "Borrowing a warm headless browser and loading page",
                 method="browser-automation",
+                attempt=attempt,
+                total_attempts=total_attempts,
                 metadata={"browser": "chromium", "timeout": "30s"}
             )
         
-        # Apply rate limiting (browser automation is slower, so use longer delay)
-        await self.rate_limiter.wait_for_domain(url)
-        
         try:
-            async with BrowserAutomation() as browser:
-                html_content, page_title = await browser.fetch_page_content(url, wait_for_content=True)
-                
-                # Parse the retrieved HTML content
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Enhanced blocking detection for browser-retrieved content
-                page_text = soup.get_text().lower()
-                if any(indicator in page_text for indicator in self.blocked_indicators):
-                    raise WebsiteProtectionError(
-                        "Website is still blocking access even with browser automation"
+            # Queue for the domain's slot before borrowing a browser page, and give the page back before parsing
+            await self.rate_limiter.refresh_backoff(url)
+            async with fetch_scheduler.slot(url, progress_emitter=progress_emitter, method="browser-automation"):
+                async with BrowserAutomation() as browser:
+                    html_content, page_title = await browser.fetch_page_content(
+                        url, wait_for_content=True, extract_recipe_early=True
                     )
-                
-                # Try to extract structured data first (JSON-LD)
-                json_ld = soup.find('script', {'type': 'application/ld+json'})
-                if json_ld:
-                    try:
-                        data = json.loads(json_ld.string)
-                        if isinstance(data, list):
-                            data = data[0]
-                        
-                        if data.get('@type') == 'Recipe':
-                            logger.debug("Found JSON-LD recipe data via browser automation")
-                            return self._parse_json_ld_recipe(data, url)
-                    except:
-                        pass
-                
-                # Try Jump to Recipe approach
-                recipe_section = self._find_recipe_section_via_jump_link(soup)
-                if recipe_section:
-                    logger.debug("Found recipe section via jump link with browser automation")
-                    return self._parse_recipe_section(recipe_section, url)
-                
-                # Fallback to HTML parsing
-                result = self._parse_html_recipe(soup, url)
-                
-                # Enhanced low confidence detection
-                if self._is_likely_blocked_content(result, soup):
+                    logger.debug(
+                        f"Browser fetch for {url}: early_exit={browser.stats['early_exit']}, "
+                        f"blocked_requests={browser.stats['blocked_requests']}"
+                    )
+            
+            # Same cascade as a fetched page; rendered pages are the largest inputs, so they go to the CPU pool
+            outcome = await cpu_pool.run(
+                "html_parse", cpu_stages.parse_html_page, cpu_stages.pack_page(html_content, url), size=len(html_content)
+            )
+            try:
+                result, _ = self._recipe_from_stage(outcome)
+            except WebsiteProtectionError:
+                hits = list(outcome["blocking_indicator_hits"])
+                if hits:
                     raise WebsiteProtectionError(
-                        "Unable to parse recipe even with browser automation. The site may have additional protection or the recipe content may not be accessible."
+                        f"Website is still blocking access even with browser automation (matched: {', '.join(hits)})"
                     )
-                
-                logger.info(f"Successfully parsed recipe via browser automation: {result.title}")
-                return result
-                
+                raise WebsiteProtectionError(
+                    "Unable to parse recipe even with browser automation. The site may have additional protection or the recipe content may not be accessible."
+                )
+            
+            logger.info(f"Successfully parsed recipe via browser automation: {result.title}")
+            return result
+            
         except WebsiteProtectionError as e:
             raise e
         except Exception as e:
             raise Exception(f"Browser automation parsing failed: {str(e)}")
     
-    async def _parse_with_recipe_scrapers(self, url: str, progress_emitter: Optional[ProgressEventEmitter] = None) -> ParsedRecipe:
-        """Parse recipe using recipe-scrapers library with rate limiting"""
-        # Apply rate limiting before using recipe-scrapers
-        await self.rate_limiter.wait_for_domain(url)
-        
+    def _parse_with_recipe_scrapers(self, html: str, url: str) -> ParsedRecipe:
+        """Parse already downloaded HTML with the recipe-scrapers library"""
         try:
-            # Recipe-scrapers is synchronous, so we run it in a thread pool
-            import asyncio
-            loop = asyncio.get_event_loop()
-            
-            def scrape_with_headers():
-                try:
-                    logger.debug(f"Using recipe-scrapers for {url}")
-                    return scrape_me(url)
-                except Exception as e:
-                    # recipe-scrapers doesn't expose header customization easily
-                    # Check if this looks like a blocking error
-                    error_str = str(e).lower()
-                    if any(indicator in error_str for indicator in ['403', 'forbidden', 'blocked', 'captcha']):
-                        raise WebsiteProtectionError(f"recipe-scrapers blocked: {e}")
-                    raise e
-            
-            scraper = await loop.run_in_executor(None, scrape_with_headers)
+            logger.debug(f"Using recipe-scrapers for {url}")
+            scraper = scrape_html(html, org_url=url)
             
             # Extract ingredients and convert to HTML
             ingredients = scraper.ingredients() or []
@@ -577,7 +904,7 @@ class URLParser(BaseParser):
             description = ""
             try:
                 description = scraper.description() or ""
-            except (NotImplementedError, AttributeError):
+            except Exception:
                 description = ""
             
             parsed_data = ParsedRecipe(
@@ -612,6 +939,30 @@ class URLParser(BaseParser):
         except Exception as e:
             raise Exception(f"Recipe-scrapers parsing failed: {str(e)}")
     
+    def _parse_structured_data(self, html: str, url: str) -> Optional[ParsedRecipe]:
+        """Parse the best Recipe node from every ld+json block in the raw HTML"""
+        data = find_best_recipe_node(extract_ld_json_blocks(html))
+        if not data:
+            return None
+        
+        try:
+            return self._parse_json_ld_recipe(data, url)
+        except Exception as e:
+            logger.debug(f"JSON-LD Recipe for {url} was not usable: {e}")
+            return None
+    
+    def _parse_microdata(self, soup: BeautifulSoup, url: str) -> Optional[ParsedRecipe]:
+        """Parse Recipe microdata/RDFa markup through the JSON-LD path"""
+        data = extract_microdata_recipe(soup)
+        if not data:
+            return None
+        
+        try:
+            return self._parse_json_ld_recipe(data, url)
+        except Exception as e:
+            logger.debug(f"Microdata Recipe for {url} was not usable: {e}")
+            return None
+    
     def _parse_json_ld_recipe(self, data: Dict[str, Any], url: str) -> ParsedRecipe:
         """Parse recipe from JSON-LD structured data"""
         # Parse ingredients and instructions as structured data first
@@ -1283,35 +1634,28 @@ class URLParser(BaseParser):
         """Extract images from JSON-LD structured data"""
         images = []
         
-        json_ld_scripts = soup.find_all('script', {'type': 'application/ld+json'})
-        for script in json_ld_scripts:
-            try:
-                data = json.loads(script.string)
-                if isinstance(data, list):
-                    data = data[0]
-                
-                if data.get('@type') == 'Recipe':
-                    image_data = data.get('image')
-                    if image_data:
-                        if isinstance(image_data, str):
-                            img_url = self._make_absolute_url(image_data, base_url)
-                            if img_url:
-                                images.append(img_url)
-                        elif isinstance(image_data, list):
-                            for img in image_data:
-                                img_url = img if isinstance(img, str) else img.get('url', '')
-                                img_url = self._make_absolute_url(img_url, base_url)
-                                if img_url and img_url not in images:
-                                    images.append(img_url)
-                                    if len(images) >= 3:
-                                        break
-                        elif isinstance(image_data, dict):
-                            img_url = image_data.get('url', '')
-                            img_url = self._make_absolute_url(img_url, base_url)
-                            if img_url:
-                                images.append(img_url)
-            except:
-                continue
+        data = find_best_recipe_node([
+            script.string or '' for script in soup.find_all('script', {'type': 'application/ld+json'})
+        ])
+        image_data = data.get('image') if data else None
+        if image_data:
+            if isinstance(image_data, str):
+                img_url = self._make_absolute_url(image_data, base_url)
+                if img_url:
+                    images.append(img_url)
+            elif isinstance(image_data, list):
+                for img in image_data:
+                    img_url = img if isinstance(img, str) else (img.get('url', '') if isinstance(img, dict) else '')
+                    img_url = self._make_absolute_url(img_url, base_url)
+                    if img_url and img_url not in images:
+                        images.append(img_url)
+                        if len(images) >= 3:
+                            break
+            elif isinstance(image_data, dict):
+                img_url = image_data.get('url', '')
+                img_url = self._make_absolute_url(img_url, base_url)
+                if img_url:
+                    images.append(img_url)
         
         return images
     
@@ -1422,6 +1766,7 @@ class URLParser(BaseParser):
         # Convert set to list for JSON serialization
         metrics["domains_parsed"] = list(metrics["domains_parsed"])
         metrics["unique_domains_count"] = len(self.metrics["domains_parsed"])
+        metrics["blocking_indicator_hits"] = dict(metrics["blocking_indicator_hits"])
         
         # Calculate success rates
         total = metrics["total_requests"]
@@ -1439,10 +1784,34 @@ class URLParser(BaseParser):
         # Add rate limiter stats
         metrics["rate_limiter_stats"] = self.rate_limiter.get_domain_stats()
         
+        # Add shared state store stats (politeness delays, cookies and proxy health)
+        metrics["shared_state_stats"] = shared_state_store.get_stats()
+        
         # Add proxy stats if available
         if self.proxy_manager.proxies:
             metrics["proxy_stats"] = self.proxy_manager.get_proxy_stats()
         
+        # Add outbound fetch scheduler stats (per-domain queues and waits)
+        metrics["fetch_scheduler_stats"] = fetch_scheduler.get_stats()
+        
+        # Add conditional request stats (304s that skipped download and parsing)
+        metrics["revalidation_stats"] = revalidation_store.get_stats()
+        
+        # Add shared connection pool stats (handshakes saved by keep-alive reuse)
+        metrics["http_pool_stats"] = http_client_registry.get_pool_stats()
+        
+        # Add in-flight deduplication stats (joined = parses avoided)
+        metrics["single_flight_stats"] = url_parse_flights.get_stats()
+        
+        # Add warm browser pool stats (browser-automation fallback)
+        metrics["browser_pool_stats"] = browser_pool.get_stats()
+        
+        # Add parse cache hit/miss counters (shared by all parsers in this process)
+        metrics["parse_cache_stats"] = parse_cache.get_stats()
+        
+        # Add CPU pool queue/CPU time per parsing stage
+        metrics["cpu_pool_stats"] = cpu_pool.get_stats()
+        
         return metrics
     
     def reset_metrics(self) -> None:
@@ -1455,7 +1824,10 @@ class URLParser(BaseParser):
             "proxy_used": 0,
             "recipe_scrapers_used": 0,
             "manual_parsing_used": 0,
+            "cache_hits": 0,
+            "revalidated_requests": 0,
             "domains_parsed": set(),
+            "blocking_indicator_hits": {},
         }
     
     def add_proxy(self, proxy_url: str) -> None:
@@ -1494,6 +1866,7 @@ class URLParser(BaseParser):
                 "recipe_scrapers_success": metrics["recipe_scrapers_used"],
                 "manual_parsing_used": metrics["manual_parsing_used"],
             },
+            "domain_strategies": strategy_table.get_summary(),
             "recommendations": self._get_recommendations(metrics)
         }
         
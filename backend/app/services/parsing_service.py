@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, AsyncIterator, Callable
+import asyncio
+import time
 from app.schemas.recipe import RecipeCreate
 from app.core.config import settings
+from app.core.fetch_scheduler import fetch_user
 from app.services.parsers import URLParser, InstagramParser, ValidationPipeline, ParsedRecipe
 from app.services.parsers.url_parser import WebsiteProtectionError
 from app.services.parsers.progress_events import ProgressEventEmitter
@@ -15,8 +18,9 @@ class ParsingService:
 
     async def parse_from_url(self, url: str, user_id: Optional[str] = None, collection_id: Optional[str] = None) -> Dict[str, Any]:
         try:
-            # Parse using new URL parser
-            parsed_recipe = await self.url_parser.parse(url)
+            # Parse using new URL parser (outbound fetches queue fairly per user)
+            with fetch_user(user_id):
+                parsed_recipe = await self.url_parser.parse(url)
             
             # Convert user_id to string if it's a UUID object
             user_id_str = str(user_id) if user_id is not None else None
@@ -38,8 +42,9 @@ class ParsingService:
     async def parse_from_url_with_progress(self, url: str, user_id: Optional[str] = None, collection_id: Optional[str] = None, progress_emitter: Optional[ProgressEventEmitter] = None) -> Dict[str, Any]:
         """Parse recipe from URL with progress tracking"""
         try:
-            # Parse using URL parser with progress tracking
-            parsed_recipe = await self.url_parser.parse(url, progress_emitter=progress_emitter)
+            # Parse using URL parser with progress tracking (outbound fetches queue fairly per user)
+            with fetch_user(user_id):
+                parsed_recipe = await self.url_parser.parse(url, progress_emitter=progress_emitter)
             
             # Convert user_id to string if it's a UUID object
             user_id_str = str(user_id) if user_id is not None else None
@@ -58,10 +63,11 @@ class ParsingService:
         except Exception as e:
             raise Exception(f"Failed to parse recipe from URL: {str(e)}")
 
-    async def parse_from_instagram(self, url: str, user_id: Optional[str] = None, collection_id: Optional[str] = None) -> Dict[str, Any]:
+    async def parse_from_instagram(self, url: str, user_id: Optional[str] = None, collection_id: Optional[str] = None, refresh: bool = False) -> Dict[str, Any]:
         try:
-            # Parse using new Instagram parser
-            parsed_recipe = await self.instagram_parser.parse(url)
+            # Parse using new Instagram parser (outbound fetches queue fairly per user; refresh bypasses the post cache)
+            with fetch_user(user_id):
+                parsed_recipe = await self.instagram_parser.parse(url, refresh=refresh)
             
             # Convert user_id to string if it's a UUID object
             user_id_str = str(user_id) if user_id is not None else None
@@ -77,6 +83,89 @@ class ParsingService:
         except Exception as e:
             raise Exception(f"Failed to parse recipe from Instagram: {str(e)}")
 
+    async def iter_instagram_batch(self, urls: List[str], user_id: Optional[str] = None, collection_id: Optional[str] = None, concurrency: Optional[int] = None, refresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Parse Instagram posts concurrently, yielding each item as soon as it finishes"""
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.INSTAGRAM_BATCH_CONCURRENCY))
+
+        async def parse_item(index: int, url: str) -> Dict[str, Any]:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    recipe_data = await self.parse_from_instagram(url, user_id, collection_id, refresh)
+                    item = {"url": url, "index": index, "status": "success", "data": recipe_data}
+                except Exception as e:
+                    item = {"url": url, "index": index, "status": "error", "error": str(e)}
+                item["duration_ms"] = int((time.perf_counter() - started) * 1000)
+                return item
+
+        tasks = [asyncio.create_task(parse_item(index, url)) for index, url in enumerate(urls)]
+        try:
+            for next_item in asyncio.as_completed(tasks):
+                yield await next_item
+        finally:
+            # The consumer went away (e.g. client disconnected): stop the remaining posts
+            for task in tasks:
+                task.cancel()
+
+    async def parse_batch_from_instagram(self, urls: List[str], user_id: Optional[str] = None, collection_id: Optional[str] = None, on_item: Optional[Callable[[Dict[str, Any]], None]] = None, refresh: bool = False) -> Dict[str, Any]:
+        """Parse Instagram posts concurrently and summarize them in request order (on_item sees each as it finishes)"""
+        started = time.perf_counter()
+        items = []
+        async for item in self.iter_instagram_batch(urls, user_id, collection_id, refresh=refresh):
+            items.append(item)
+            if on_item:
+                on_item(item)
+        items.sort(key=lambda item: item["index"])
+
+        results = [item for item in items if item["status"] == "success"]
+        errors = [item for item in items if item["status"] == "error"]
+        return {
+            "total_processed": len(items),
+            "successful": len(results),
+            "failed": len(errors),
+            "duration_ms": int((time.perf_counter() - started) * 1000),
+            "results": results,
+            "errors": errors
+        }
+
+    async def iter_instagram_harvest(self, source: str, name: str, max_posts: int, cursor: Optional[str] = None, user_id: Optional[str] = None, refresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Crawl an Instagram profile or hashtag, yielding each recipe as it is found and then where the crawl stopped"""
+        if source == "profile":
+            harvest = self.instagram_parser.iter_profile_recipes(name, max_posts, cursor, refresh)
+        else:
+            harvest = self.instagram_parser.iter_hashtag_recipes(name, max_posts, cursor, refresh)
+
+        recipes_found = 0
+        try:
+            while True:
+                # The user is set per step, never across a yield: an abandoned stream is closed
+                # from another task's context, where resetting the ContextVar would fail
+                with fetch_user(user_id):
+                    try:
+                        item = await harvest.__anext__()
+                    except StopAsyncIteration:
+                        break
+
+                if item.recipe is None:
+                    yield {
+                        "event": "end",
+                        "cursor": item.cursor,
+                        "recipes_found": recipes_found,
+                        "posts_scanned": item.posts_scanned,
+                        "exhausted": item.exhausted
+                    }
+                    continue
+
+                recipes_found += 1
+                yield {
+                    "event": "recipe",
+                    "shortcode": item.shortcode,
+                    "cursor": item.cursor,
+                    "data": self._convert_to_legacy_format(item.recipe)
+                }
+        finally:
+            await harvest.aclose()
+
     async def parse_from_image(self, image_data: bytes, user_id: Optional[str] = None, collection_id: Optional[str] = None) -> Dict[str, Any]:
         # Placeholder for OCR image parsing
         # In a real implementation, you would use Google Cloud Vision or similar
@@ -4,6 +4,14 @@ from typing import List, Optional
 from app.models.recipe import Recipe, Tag
 from app.models.collection import Collection
 from app.schemas.recipe import RecipeCreate, RecipeUpdate
+from app.utils.storage_utils import storage_utils
+
+
+def _stored_media_id(media: Optional[dict]) -> Optional[str]:
+    """Content hash of the image an imported recipe keeps in the media store"""
+    if not isinstance(media, dict):
+        return None
+    return (media.get("stored_media") or {}).get("media_id")
 
 class RecipeService:
     def __init__(self, db: Session):
@@ -119,6 +127,10 @@ class RecipeService:
 
         self.db.commit()
         self.db.refresh(recipe)
+
+        media_id = _stored_media_id(recipe.media)
+        if media_id:
+            storage_utils.add_reference(media_id, recipe.id)
         return self._populate_recipe_collection_info(recipe)
 
     def update_recipe(
@@ -131,6 +143,7 @@ class RecipeService:
         if not recipe:
             return None
 
+        old_media_id = _stored_media_id(recipe.media)
         update_data = recipe_update.dict(exclude_unset=True, exclude={'tags', 'collection_id'})
         for field, value in update_data.items():
             setattr(recipe, field, value)
@@ -172,6 +185,13 @@ class RecipeService:
 
         self.db.commit()
         self.db.refresh(recipe)
+
+        new_media_id = _stored_media_id(recipe.media)
+        if new_media_id != old_media_id:
+            if new_media_id:
+                storage_utils.add_reference(new_media_id, recipe.id)
+            if old_media_id:
+                storage_utils.release_reference(old_media_id, recipe.id)
         return self._populate_recipe_collection_info(recipe)
 
     def delete_recipe(self, recipe_id: str, user_id: str) -> bool:
@@ -181,4 +201,7 @@ class RecipeService:
         
         self.db.delete(recipe)
         self.db.commit()
+
+        # Images no other recipe uses are collected after the grace period
+        storage_utils.release_recipe(recipe_id)
         return True
\ No newline at end of file
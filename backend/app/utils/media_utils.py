@@ -2,28 +2,130 @@ from typing import Optional, Tuple, Dict, Any
 from PIL import Image, ImageOps
 import io
 import os
+import asyncio
 import hashlib
-import httpx
 from pathlib import Path
 import tempfile
 import subprocess
 import logging
 from fractions import Fraction
+from functools import partial
+from app.core.http_client import http_client_registry
+from app.core.fetch_scheduler import fetch_scheduler
+from app.core.cpu_pool import cpu_pool
 try:
     import ffmpeg
 except ImportError:
     ffmpeg = None
 
 
+# Standard thumbnail sizes for recipe cards
+THUMBNAIL_SIZES = {
+    "small": (150, 150),
+    "medium": (300, 300),
+    "large": (600, 600)
+}
+
+# Bounding box and quality of the stored web-optimized original
+OPTIMIZED_MAX_SIZE = (1200, 1200)
+OPTIMIZED_QUALITY = 85
+THUMBNAIL_QUALITY = 90
+
+
+def _fitted_size(size: Tuple[int, int], box: Tuple[int, int]) -> Tuple[int, int]:
+    """Size of an image scaled down (never up) to fit inside box"""
+    scale = min(box[0] / size[0], box[1] / size[1], 1.0)
+    return max(1, int(size[0] * scale)), max(1, int(size[1] * scale))
+
+
+def _fit(img: Image.Image, box: Tuple[int, int]) -> Image.Image:
+    """img scaled down to fit inside box; img itself when it already fits"""
+    if img.width <= box[0] and img.height <= box[1]:
+        return img
+    resized = img.copy()
+    resized.thumbnail(box, Image.Resampling.LANCZOS)
+    return resized
+
+
+def _pad_square(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """img centered on a white background of the thumbnail size"""
+    thumb = Image.new('RGB', size, (255, 255, 255))
+    thumb.paste(img, ((size[0] - img.width) // 2, (size[1] - img.height) // 2))
+    return thumb
+
+
+def _thumbnail_cascade(img: Image.Image, sizes: Dict[str, Tuple[int, int]]) -> Dict[str, Image.Image]:
+    """Padded thumbnails for each size, each downscaled from the next larger one rather than from img"""
+    thumbs = {}
+    current = img
+    for size_name, size in sorted(sizes.items(), key=lambda item: item[1][0] * item[1][1], reverse=True):
+        current = _fit(current, size)
+        thumbs[size_name] = _pad_square(current, size)
+    return {size_name: thumbs[size_name] for size_name in sizes}
+
+
+def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def render_image_variants(image_data: bytes, include_optimized: bool = True,
+                          include_thumbnails: bool = True) -> Dict[str, Any]:
+    """
+    Optimized original and all thumbnail sizes from a single decode.
+
+    JPEGs are decoded through draft(), which lets libjpeg scale by 1/2, 1/4 or 1/8
+    while decoding when the optimized original needs no more pixels than that; every
+    output is then cut from that one pixel buffer. Module-level (and returning plain
+    bytes) so it can run in the CPU pool's worker processes.
+    """
+    try:
+        with Image.open(io.BytesIO(image_data)) as img:
+            # Header fields only, read before decoding
+            metadata = {
+                "valid": True,
+                "format": img.format,
+                "mode": img.mode,
+                "size": img.size,
+                "width": img.width,
+                "height": img.height,
+                "file_size": len(image_data)
+            }
+
+            if img.format == 'JPEG':
+                img.draft('RGB', _fitted_size(img.size, OPTIMIZED_MAX_SIZE))
+
+            # Convert to RGB if necessary (for formats like PNG with transparency); this also decodes
+            frame = img.convert('RGB') if img.mode not in ('RGB', 'L') else img
+            frame.load()
+
+            optimized = _fit(frame, OPTIMIZED_MAX_SIZE)
+            # Identity of the image for deduplication: its normalized pixels, independent of
+            # container, EXIF and encoder settings of the downloaded file
+            content_hash = hashlib.sha256(
+                f"{optimized.mode}:{optimized.width}x{optimized.height}:".encode() + optimized.tobytes()
+            ).hexdigest()
+            thumbnails = _thumbnail_cascade(optimized, THUMBNAIL_SIZES) if include_thumbnails else {}
+
+            return {
+                "success": True,
+                "metadata": metadata,
+                "content_hash": content_hash,
+                "optimized": _encode_jpeg(optimized, OPTIMIZED_QUALITY) if include_optimized else None,
+                "thumbnails": {
+                    size_name: _encode_jpeg(thumb, THUMBNAIL_QUALITY) for size_name, thumb in thumbnails.items()
+                }
+            }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
 class MediaUtils:
     """Utility class for media processing and thumbnail generation"""
     
     # Standard thumbnail sizes for recipe cards
-    THUMBNAIL_SIZES = {
-        "small": (150, 150),
-        "medium": (300, 300),
-        "large": (600, 600)
-    }
+    THUMBNAIL_SIZES = THUMBNAIL_SIZES
     
     # Supported image formats
     SUPPORTED_FORMATS = {'JPEG', 'PNG', 'WebP', 'GIF'}
@@ -47,10 +149,11 @@ class MediaUtils:
     async def download_image(self, url: str) -> Optional[bytes]:
         """Download image from URL"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, timeout=30.0)
-                response.raise_for_status()
-                return response.content
+            # Media hosts share the per-domain slots and request budget with the parsers
+            async with fetch_scheduler.slot(url, method="media"):
+                response = await http_client_registry.get(url, timeout=30.0)
+            response.raise_for_status()
+            return response.content
         except Exception as e:
             print(f"Failed to download image from {url}: {e}")
             return None
@@ -87,14 +190,17 @@ class MediaUtils:
             return None
     
     def create_multiple_thumbnails(self, image_data: bytes) -> Dict[str, Optional[bytes]]:
-        """Create multiple thumbnail sizes from image data"""
-        thumbnails = {}
-        
-        for size_name, size_tuple in self.THUMBNAIL_SIZES.items():
-            thumbnail_data = self.create_thumbnail(image_data, size_tuple)
-            thumbnails[size_name] = thumbnail_data
-        
-        return thumbnails
+        """Create multiple thumbnail sizes from image data (decoded once)"""
+        variants = render_image_variants(image_data, include_optimized=False)
+        if not variants["success"]:
+            print(f"Failed to create thumbnails: {variants['error']}")
+            return {size_name: None for size_name in self.THUMBNAIL_SIZES}
+        return variants["thumbnails"]
+    
+    async def render_variants(self, image_data: bytes, create_thumbnails: bool = True) -> Dict[str, Any]:
+        """render_image_variants off the event loop: in the CPU pool, or a thread for small images"""
+        func = render_image_variants if create_thumbnails else partial(render_image_variants, include_thumbnails=False)
+        return await cpu_pool.run("image_variants", func, image_data, size=len(image_data), inline_in_thread=True)
     
     def validate_image(self, image_data: bytes) -> Dict[str, Any]:
         """Validate image data and return metadata"""
@@ -122,16 +228,16 @@ class MediaUtils:
         return f"{prefix}_{url_hash}.jpg"
     
     async def process_image_from_url(self, url: str, create_thumbnails: bool = True) -> Dict[str, Any]:
-        """Download image from URL and process it"""
+        """Download image from URL and process it; the result carries the optimized original as well"""
         # Download image
         image_data = await self.download_image(url)
         if not image_data:
             return {"success": False, "error": "Failed to download image"}
         
-        # Validate image
-        validation = self.validate_image(image_data)
-        if not validation["valid"]:
-            return {"success": False, "error": f"Invalid image: {validation['error']}"}
+        # Validate, optimize and thumbnail in one decode
+        variants = await self.render_variants(image_data, create_thumbnails)
+        if not variants["success"]:
+            return {"success": False, "error": f"Invalid image: {variants['error']}"}
         
         # Generate filename
         filename = self.generate_filename(url)
@@ -139,13 +245,15 @@ class MediaUtils:
         result = {
             "success": True,
             "filename": filename,
-            "metadata": validation,
-            "original_url": url
+            "metadata": variants["metadata"],
+            "original_url": url,
+            "content_hash": variants["content_hash"],
+            "optimized_data": variants["optimized"]
         }
         
         # Create thumbnails if requested
         if create_thumbnails:
-            thumbnails = self.create_multiple_thumbnails(image_data)
+            thumbnails = variants["thumbnails"]
             result["thumbnails"] = {}
             
             for size_name, thumbnail_data in thumbnails.items():
@@ -293,18 +401,10 @@ class MediaUtils:
         thumbnails = {}
         base_name = Path(base_filename).stem
         
-        for size_name, size_tuple in self.THUMBNAIL_SIZES.items():
+        # Each size is downscaled from the next larger one instead of from the full image
+        for size_name, square_thumb in _thumbnail_cascade(img, self.THUMBNAIL_SIZES).items():
+            size_tuple = self.THUMBNAIL_SIZES[size_name]
             try:
-                # Create thumbnail
-                thumb_img = img.copy()
-                thumb_img.thumbnail(size_tuple, Image.Resampling.LANCZOS)
-                
-                # Create square background
-                square_thumb = Image.new('RGB', size_tuple, (255, 255, 255))
-                x = (size_tuple[0] - thumb_img.width) // 2
-                y = (size_tuple[1] - thumb_img.height) // 2
-                square_thumb.paste(thumb_img, (x, y))
-                
                 # Save thumbnail
                 thumb_filename = f"{base_name}_thumb_{size_name}.jpg"
                 thumb_path = self.media_dir / "thumbnails" / thumb_filename
@@ -444,8 +544,9 @@ class MediaUtils:
     
     async def process_video_from_url(self, video_url: str, create_thumbnails: bool = True) -> Dict[str, Any]:
         """Process video from URL and generate thumbnails"""
-        # Validate video
-        validation = self.validate_video(video_url)
+        # Validate video (ffprobe reads the remote file; run it off the event loop under a fetch slot)
+        async with fetch_scheduler.slot(video_url, method="media"):
+            validation = await asyncio.to_thread(self.validate_video, video_url)
         if not validation["valid"]:
             return {"success": False, "error": f"Invalid video: {validation['error']}"}
         
@@ -466,7 +567,8 @@ class MediaUtils:
             duration = validation.get('duration', 10)
             timestamp = min(1.0, duration * 0.1) if duration > 0 else 1.0
             
-            thumbnails = self.create_video_thumbnails(video_url, timestamp)
+            async with fetch_scheduler.slot(video_url, method="media"):
+                thumbnails = await asyncio.to_thread(self.create_video_thumbnails, video_url, timestamp)
             result["thumbnails"] = {}
             
             for size_name, thumbnail_data in thumbnails.items():
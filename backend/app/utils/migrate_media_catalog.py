@@ -0,0 +1,34 @@
+"""
+One-shot migration of media metadata from media/metadata/*.json into the
+media_items catalog (see StorageUtils.migrate_json_metadata). Run once from
+backend/ after deploying the catalog, with the API stopped or running:
+
+    python -m app.utils.migrate_media_catalog [--keep-json]
+"""
+import argparse
+import logging
+
+from app.core.database import engine
+from app.models.media_blob import MediaBlob, MediaAlias, MediaReference
+from app.models.media_item import MediaItem
+from app.utils.storage_utils import storage_utils
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-json", action="store_true", help="Leave the JSON files in place after importing them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # The API creates tables at startup; the migration may run first
+    for model in (MediaBlob, MediaAlias, MediaReference, MediaItem):
+        model.__table__.create(bind=engine, checkfirst=True)
+
+    counts = storage_utils.migrate_json_metadata(delete_files=not args.keep_json)
+    print(f"Imported {counts['imported']} media items ({counts['failed']} failed), "
+          f"{counts['referenced']} recipe references")
+
+
+if __name__ == "__main__":
+    main()
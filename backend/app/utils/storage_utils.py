@@ -1,112 +1,492 @@
 from typing import Dict, Any, Optional, List
 import os
 import json
-import hashlib
+import asyncio
+import logging
+import tempfile
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.sessions import app_session_factory
 from .media_utils import media_utils
 
+logger = logging.getLogger(__name__)
+
+# Query parameters that select a rendition, sign or track a CDN request rather than pick the image
+ALIAS_IGNORED_PARAMS = {
+    'w', 'h', 'width', 'height', 'resize', 'fit', 'crop', 'dpr', 'q', 'quality', 'auto', 'fm', 'format',
+    'oh', 'oe', 'stp', 'efg', 'ccb', 'edm', 'ig_cache_key',
+    'fbclid', 'gclid', 'igshid',
+}
+ALIAS_IGNORED_PARAM_PREFIXES = ('utm_', '_nc_')
+
+
+def media_alias_key(url: str) -> str:
+    """Canonical form of an image URL, shared by the renditions and signed variants of one CDN asset"""
+    parts = urlsplit(url.strip())
+    query_params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in ALIAS_IGNORED_PARAMS and not key.lower().startswith(ALIAS_IGNORED_PARAM_PREFIXES)
+    ]
+    return urlunsplit((
+        (parts.scheme or 'https').lower(), parts.netloc.lower(), parts.path, urlencode(sorted(query_params)), ''
+    ))
+
 
 class StorageUtils:
-    """Utility class for managing media file storage and metadata"""
+    """
+    Content-addressed media store.
     
-    def __init__(self, base_dir: str = "media"):
+    Images are stored once per SHA-256 of their normalized pixels, under a sharded
+    layout (blobs/ab/cd/<hash>_<variant>.jpg). The media_blobs table counts the
+    recipes referencing each image, media_aliases maps source URLs to stored
+    images so repeat imports skip the download, and garbage collection removes
+    images whose count has stayed at zero for MEDIA_GC_GRACE_SECONDS. File
+    paths, URLs and sizes are cataloged in media_items, so lookups and stats
+    are index reads and aggregates rather than scans of the media directory.
+    """
+    
+    def __init__(self, base_dir: str = "media", session_factory=None,
+                 gc_grace_seconds: int = 24 * 60 * 60, gc_batch_size: int = 500,
+                 gc_interval_seconds: float = 60 * 60):
         """Initialize StorageUtils"""
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(exist_ok=True)
         
-        # Create metadata directory
+        # Per-item JSON files of the previous layout; only read by migrate_media_catalog
         self.metadata_dir = self.base_dir / "metadata"
-        self.metadata_dir.mkdir(exist_ok=True)
+        
+        # Create blob directory
+        self.blob_root = self.base_dir / "blobs"
+        self.blob_root.mkdir(exist_ok=True)
+        
+        self.gc_grace_seconds = gc_grace_seconds
+        self.gc_batch_size = gc_batch_size
+        self.gc_interval_seconds = gc_interval_seconds
+        self._session_factory = session_factory
+        self._gc_task: Optional[asyncio.Task] = None
+        
+        self.stats = {
+            "alias_hits": 0,
+            "content_hits": 0,
+            "stored": 0,
+            "collected": 0,
+        }
     
-    def generate_media_id(self, url: str) -> str:
-        """Generate unique media ID from URL"""
-        return hashlib.md5(url.encode()).hexdigest()[:16]
+    @classmethod
+    def from_settings(cls) -> "StorageUtils":
+        """Build the store from application settings"""
+        return cls(
+            gc_grace_seconds=settings.MEDIA_GC_GRACE_SECONDS,
+            gc_batch_size=settings.MEDIA_GC_BATCH_SIZE,
+            gc_interval_seconds=settings.MEDIA_GC_INTERVAL_SECONDS,
+        )
+    
+    def _session(self):
+        if self._session_factory is None:
+            self._session_factory = app_session_factory()
+        return self._session_factory()
+    
+    def blob_dir(self, content_hash: str) -> Path:
+        """Two levels of 256 shards keep directories small at any catalog size"""
+        return self.blob_root / content_hash[:2] / content_hash[2:4]
+    
+    def _blob_url(self, content_hash: str, variant: str) -> str:
+        return media_utils.get_image_url(
+            f"{content_hash}_{variant}.jpg", f"blobs/{content_hash[:2]}/{content_hash[2:4]}"
+        )
+    
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        """Write via a temp file so a concurrent store of the same image never sees a partial file"""
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as temp_file:
+            temp_file.write(data)
+        os.replace(temp_file.name, path)
     
     async def store_media_from_url(self, url: str, recipe_id: Optional[str] = None) -> Dict[str, Any]:
-        """Store media from URL with thumbnails and metadata"""
+        """Store media from URL with thumbnails and metadata; media_id is the image's content hash"""
         try:
-            # Process the image
+            alias_key = media_alias_key(url)
+            
+            # Known source URL: no download, no decode. Catalog queries and file writes block,
+            # so they run in a thread rather than on the event loop
+            stored = await asyncio.to_thread(self._reuse_alias, alias_key, recipe_id)
+            if stored:
+                return stored
+            
+            # Download once; the optimized original and thumbnails come from the same decode
             result = await media_utils.process_image_from_url(url, create_thumbnails=True)
             
             if not result["success"]:
                 return result
             
-            # Generate media ID
-            media_id = self.generate_media_id(url)
-            
-            # Save original image (optimized)
-            original_data = await media_utils.download_image(url)
-            if not original_data:
-                return {"success": False, "error": "Failed to download original image"}
-            
-            # Optimize the original image
-            optimized_data = media_utils.optimize_image(original_data)
-            
-            # Save optimized original
-            original_filename = f"{media_id}_original.jpg"
-            original_path = media_utils.save_image_data(optimized_data, original_filename, "images")
-            
-            # Save thumbnails
-            thumbnail_info = {}
-            if "thumbnails" in result:
-                for size_name, thumb_data in result["thumbnails"].items():
-                    if thumb_data and thumb_data["data"]:
-                        thumb_filename = f"{media_id}_{size_name}.jpg"
-                        thumb_path = media_utils.save_image_data(
-                            thumb_data["data"], 
-                            thumb_filename, 
-                            "thumbnails"
-                        )
-                        
-                        if thumb_path:
-                            thumbnail_info[size_name] = {
-                                "filename": thumb_filename,
-                                "path": thumb_path,
-                                "url": media_utils.get_image_url(thumb_filename, "thumbnails"),
-                                "size": thumb_data["size"]
-                            }
-            
-            # Create metadata
-            metadata = {
-                "media_id": media_id,
-                "original_url": url,
-                "recipe_id": recipe_id,
-                "created_at": datetime.utcnow().isoformat(),
-                "original": {
-                    "filename": original_filename,
-                    "path": original_path,
-                    "url": media_utils.get_image_url(original_filename, "images"),
-                    "metadata": result["metadata"]
-                },
-                "thumbnails": thumbnail_info
-            }
+            return await asyncio.to_thread(self._save_processed, url, alias_key, result, recipe_id)
+        
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _reuse_alias(self, alias_key: str, recipe_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Store result for an image already downloaded from this source URL, if it is still stored"""
+        media_id = self._lookup_alias(alias_key)
+        if not media_id:
+            return None
+        
+        metadata = self.get_media_metadata(media_id)
+        if not metadata:
+            return None
+        
+        self.stats["alias_hits"] += 1
+        if recipe_id:
+            self.add_reference(media_id, recipe_id)
+        return {"success": True, "media_id": media_id, "metadata": metadata, "deduplicated": True}
+    
+    def _save_processed(self, url: str, alias_key: str, result: Dict[str, Any], recipe_id: Optional[str]) -> Dict[str, Any]:
+        """Write (or find by content hash) a downloaded image and catalog it under its source URL"""
+        media_id = result["content_hash"]
+        metadata = self.get_media_metadata(media_id)
+        deduplicated = metadata is not None
+        
+        if deduplicated:
+            # Same pixels already stored under another URL
+            self.stats["content_hits"] += 1
+        else:
+            metadata = self._write_blob(media_id, url, result)
+            self.stats["stored"] += 1
+        
+        self._register(media_id, alias_key, metadata, new_item=not deduplicated)
+        if recipe_id:
+            self.add_reference(media_id, recipe_id)
+        
+        return {
+            "success": True,
+            "media_id": media_id,
+            "metadata": metadata,
+            "deduplicated": deduplicated
+        }
+    
+    def _write_blob(self, content_hash: str, url: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Write the image variants into the blob's shard; returns their catalog details"""
+        blob_dir = self.blob_dir(content_hash)
+        blob_dir.mkdir(parents=True, exist_ok=True)
+        
+        original_filename = f"{content_hash}_original.jpg"
+        original_path = blob_dir / original_filename
+        self._write_atomic(original_path, result["optimized_data"])
+        byte_size = len(result["optimized_data"])
+        
+        # Save thumbnails
+        thumbnail_info = {}
+        for size_name, thumb_data in result.get("thumbnails", {}).items():
+            if thumb_data and thumb_data["data"]:
+                thumb_filename = f"{content_hash}_{size_name}.jpg"
+                thumb_path = blob_dir / thumb_filename
+                self._write_atomic(thumb_path, thumb_data["data"])
+                byte_size += len(thumb_data["data"])
+                
+                thumbnail_info[size_name] = {
+                    "filename": thumb_filename,
+                    "path": str(thumb_path),
+                    "url": self._blob_url(content_hash, size_name),
+                    "size": thumb_data["size"],
+                    "file_size": len(thumb_data["data"])
+                }
+        
+        # Create metadata
+        metadata = {
+            "media_id": content_hash,
+            "content_hash": content_hash,
+            "original_url": url,
+            "created_at": datetime.utcnow().isoformat(),
+            "byte_size": byte_size,
+            "original": {
+                "filename": original_filename,
+                "path": str(original_path),
+                "url": self._blob_url(content_hash, "original"),
+                "file_size": len(result["optimized_data"]),
+                "metadata": result["metadata"]
+            },
+            "thumbnails": thumbnail_info
+        }
+        return metadata
+    
+    def _lookup_alias(self, alias_key: str) -> Optional[str]:
+        """Content hash stored for a source URL; refreshes the GC grace period of unreferenced blobs"""
+        from app.models.media_blob import MediaAlias
+        
+        db = self._session()
+        try:
+            alias = db.get(MediaAlias, alias_key)
+            if alias is None:
+                return None
             
-            # Save metadata
-            metadata_file = self.metadata_dir / f"{media_id}.json"
-            with open(metadata_file, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            touched = self._touch_blob(db, alias.content_hash)
+            db.commit()
+            return alias.content_hash if touched else None
+        except Exception as e:
+            logger.warning(f"Media alias lookup failed for {alias_key}: {e}")
+            db.rollback()
+            return None
+        finally:
+            db.close()
+    
+    def touch_media(self, media_id: str) -> bool:
+        """Whether an image is still stored, refreshing its GC grace period if it is unreferenced.
+        For media ids kept outside the catalog (e.g. cached posts); assumes it exists when the check fails."""
+        db = self._session()
+        try:
+            touched = self._touch_blob(db, media_id)
+            db.commit()
+            return touched
+        except Exception as e:
+            logger.warning(f"Media check failed for {media_id}: {e}")
+            db.rollback()
+            return True
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _touch_blob(db, content_hash: str) -> bool:
+        """Restart the GC grace period of an unreferenced blob; False when the blob is gone"""
+        from app.models.media_blob import MediaBlob
+        
+        return bool(db.query(MediaBlob).filter(MediaBlob.content_hash == content_hash).update(
+            {MediaBlob.released_at: case((MediaBlob.ref_count == 0, func.now()), else_=MediaBlob.released_at)},
+            synchronize_session=False
+        ))
+    
+    @staticmethod
+    def catalog_item(metadata: Dict[str, Any]):
+        """media_items row for an image's details; sizes of files not recorded in them are read from disk"""
+        from app.models.media_item import MediaItem
+        
+        def file_size(info: Optional[Dict[str, Any]]) -> int:
+            if not info:
+                return 0
+            if info.get("file_size") is not None:
+                return info["file_size"]
+            path = Path(info.get("path") or "")
+            return path.stat().st_size if path.is_file() else 0
+        
+        thumbnails = metadata.get("thumbnails") or {}
+        sizes = {
+            "original_bytes": file_size(metadata.get("original")),
+            **{f"{size_name}_bytes": file_size(thumbnails.get(size_name)) for size_name in media_utils.THUMBNAIL_SIZES},
+        }
+        item = MediaItem(
+            media_id=metadata["media_id"],
+            content_hash=metadata.get("content_hash"),
+            source_url=metadata.get("original_url"),
+            byte_size=sum(sizes.values()),
+            details=metadata,
+            **sizes
+        )
+        if metadata.get("created_at"):
+            # Written by datetime.utcnow().isoformat()
+            item.created_at = datetime.fromisoformat(metadata["created_at"]).replace(tzinfo=timezone.utc)
+        return item
+    
+    def _register(self, content_hash: str, alias_key: str, metadata: Dict[str, Any], new_item: bool = True) -> None:
+        """Catalog the image, record its blob (unreferenced until a recipe saves it) and the URL it came from"""
+        from app.models.media_blob import MediaAlias, MediaBlob
+        
+        db = self._session()
+        try:
+            if new_item:
+                db.merge(self.catalog_item(metadata))
+            if db.get(MediaBlob, content_hash) is None:
+                db.add(MediaBlob(
+                    content_hash=content_hash,
+                    ref_count=0,
+                    byte_size=metadata.get("byte_size", 0),
+                    released_at=datetime.now(timezone.utc),
+                ))
+                db.flush()
+            db.merge(MediaAlias(url_key=alias_key, content_hash=content_hash))
+            db.commit()
+        except IntegrityError:
+            # Another worker registered the same image first
+            db.rollback()
+            if new_item:
+                db.merge(self.catalog_item(metadata))
+            db.merge(MediaAlias(url_key=alias_key, content_hash=content_hash))
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to register media {content_hash}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
+    def add_reference(self, media_id: str, recipe_id: str) -> bool:
+        """Count recipe_id as a user of the image; False for unknown (e.g. pre-dedup) media ids"""
+        from app.models.media_blob import MediaBlob, MediaReference
+        
+        db = self._session()
+        try:
+            if db.get(MediaBlob, media_id) is None:
+                return False
+            if db.get(MediaReference, (media_id, recipe_id)) is not None:
+                return True
             
-            return {
-                "success": True,
-                "media_id": media_id,
-                "metadata": metadata
-            }
+            db.add(MediaReference(content_hash=media_id, recipe_id=recipe_id))
+            db.query(MediaBlob).filter(MediaBlob.content_hash == media_id).update(
+                {MediaBlob.ref_count: MediaBlob.ref_count + 1, MediaBlob.released_at: None},
+                synchronize_session=False
+            )
+            db.commit()
+            return True
+        except IntegrityError:
+            # Concurrent save of the same recipe already holds the reference
+            db.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to reference media {media_id} from recipe {recipe_id}: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+    
+    def release_reference(self, media_id: str, recipe_id: str) -> bool:
+        """Drop recipe_id's reference; the image becomes collectable when the count reaches zero"""
+        from app.models.media_blob import MediaBlob, MediaReference
+        
+        db = self._session()
+        try:
+            removed = db.query(MediaReference).filter(
+                MediaReference.content_hash == media_id,
+                MediaReference.recipe_id == recipe_id
+            ).delete(synchronize_session=False)
+            if removed:
+                # SET expressions read the pre-update ref_count
+                db.query(MediaBlob).filter(MediaBlob.content_hash == media_id).update({
+                    MediaBlob.ref_count: MediaBlob.ref_count - 1,
+                    MediaBlob.released_at: case((MediaBlob.ref_count <= 1, func.now()), else_=MediaBlob.released_at),
+                }, synchronize_session=False)
+            db.commit()
+            return bool(removed)
+        except Exception as e:
+            logger.warning(f"Failed to release media {media_id} from recipe {recipe_id}: {e}")
+            db.rollback()
+            return False
+        finally:
+            db.close()
+    
+    def release_recipe(self, recipe_id: str) -> int:
+        """Release every image referenced by a recipe (returns number released)"""
+        from app.models.media_blob import MediaReference
+        
+        db = self._session()
+        try:
+            media_ids = [row.content_hash for row in db.query(MediaReference.content_hash).filter(
+                MediaReference.recipe_id == recipe_id
+            )]
+        except Exception as e:
+            logger.warning(f"Failed to list media of recipe {recipe_id}: {e}")
+            return 0
+        finally:
+            db.close()
+        
+        return sum(self.release_reference(media_id, recipe_id) for media_id in media_ids)
+    
+    def collect_garbage(self, grace_seconds: Optional[int] = None) -> int:
+        """Delete images unreferenced for longer than the grace period (returns number deleted)"""
+        from app.models.media_blob import MediaAlias, MediaBlob
+        from app.models.media_item import MediaItem
+        
+        grace = self.gc_grace_seconds if grace_seconds is None else grace_seconds
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+        
+        db = self._session()
+        collected = []
+        try:
+            candidates = [row.content_hash for row in db.query(MediaBlob.content_hash).filter(
+                MediaBlob.ref_count == 0,
+                MediaBlob.released_at <= cutoff
+            ).limit(self.gc_batch_size)]
             
+            for content_hash in candidates:
+                # Re-checked in the DELETE so a reference added meanwhile keeps the blob
+                deleted = db.query(MediaBlob).filter(
+                    MediaBlob.content_hash == content_hash,
+                    MediaBlob.ref_count == 0
+                ).delete(synchronize_session=False)
+                if deleted:
+                    db.query(MediaAlias).filter(MediaAlias.content_hash == content_hash).delete(
+                        synchronize_session=False
+                    )
+                    item = db.get(MediaItem, content_hash)
+                    if item is not None:
+                        collected.append(item.details)
+                        db.delete(item)
+            db.commit()
         except Exception as e:
-            return {"success": False, "error": str(e)}
+            logger.warning(f"Media garbage collection failed: {e}")
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+        
+        # Files go only after the rows are gone, so no stored reference ever points at a missing file
+        for details in collected:
+            self._delete_files(details)
+        
+        self.stats["collected"] += len(collected)
+        if collected:
+            logger.info(f"Collected {len(collected)} unreferenced media blobs")
+        return len(collected)
+    
+    def start_gc(self) -> None:
+        """Run garbage collection every gc_interval_seconds in the background (0 disables it)"""
+        if self.gc_interval_seconds <= 0 or (self._gc_task is not None and not self._gc_task.done()):
+            return
+        self._gc_task = asyncio.create_task(self._gc_loop())
+    
+    async def stop_gc(self) -> None:
+        """Cancel the background garbage collection"""
+        if self._gc_task is None:
+            return
+        self._gc_task.cancel()
+        try:
+            await self._gc_task
+        except asyncio.CancelledError:
+            pass
+        self._gc_task = None
+    
+    async def _gc_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.collect_garbage)
+            except Exception as e:
+                logger.warning(f"Media garbage collection failed: {e}")
+            await asyncio.sleep(self.gc_interval_seconds)
+    
+    @staticmethod
+    def _delete_files(details: Dict[str, Any]) -> None:
+        """Delete the original and thumbnail files listed in an image's catalog details"""
+        files = [details.get("original")] + list((details.get("thumbnails") or {}).values())
+        for info in files:
+            if not info or not info.get("path"):
+                continue
+            try:
+                Path(info["path"]).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Failed to delete {info['path']}: {e}")
     
     def get_media_metadata(self, media_id: str) -> Optional[Dict[str, Any]]:
         """Get metadata for stored media"""
+        from app.models.media_item import MediaItem
+        
+        db = self._session()
         try:
-            metadata_file = self.metadata_dir / f"{media_id}.json"
-            if metadata_file.exists():
-                with open(metadata_file, 'r') as f:
-                    return json.load(f)
-            return None
+            item = db.get(MediaItem, media_id)
+            return item.details if item is not None else None
         except Exception as e:
-            print(f"Failed to load metadata for {media_id}: {e}")
+            logger.warning(f"Failed to load metadata for {media_id}: {e}")
             return None
+        finally:
+            db.close()
     
     def get_thumbnail_url(self, media_id: str, size: str = "medium") -> Optional[str]:
         """Get thumbnail URL for media"""
@@ -123,120 +503,171 @@ class StorageUtils:
         return None
     
     def delete_media(self, media_id: str) -> bool:
-        """Delete media files and metadata"""
+        """Delete media files and catalog rows regardless of references"""
+        from app.models.media_blob import MediaAlias, MediaBlob, MediaReference
+        from app.models.media_item import MediaItem
+        
         try:
-            metadata = self.get_media_metadata(media_id)
-            if not metadata:
-                return False
-            
-            # Delete original file
-            if "original" in metadata and "path" in metadata["original"]:
-                original_path = Path(metadata["original"]["path"])
-                if original_path.exists():
-                    original_path.unlink()
-            
-            # Delete thumbnail files
-            if "thumbnails" in metadata:
-                for thumb_info in metadata["thumbnails"].values():
-                    if "path" in thumb_info:
-                        thumb_path = Path(thumb_info["path"])
-                        if thumb_path.exists():
-                            thumb_path.unlink()
-            
-            # Delete metadata file
-            metadata_file = self.metadata_dir / f"{media_id}.json"
-            if metadata_file.exists():
-                metadata_file.unlink()
+            db = self._session()
+            try:
+                item = db.get(MediaItem, media_id)
+                if item is None:
+                    return False
+                details = item.details
+                
+                for model in (MediaReference, MediaAlias, MediaBlob):
+                    db.query(model).filter(model.content_hash == media_id).delete(synchronize_session=False)
+                db.delete(item)
+                db.commit()
+            finally:
+                db.close()
             
+            self._delete_files(details)
             return True
-            
+        
         except Exception as e:
             print(f"Failed to delete media {media_id}: {e}")
             return False
     
     def list_media_by_recipe(self, recipe_id: str) -> List[Dict[str, Any]]:
         """List all media for a recipe"""
-        media_list = []
+        from app.models.media_blob import MediaReference
+        from app.models.media_item import MediaItem
         
+        db = self._session()
         try:
-            for metadata_file in self.metadata_dir.glob("*.json"):
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                    if metadata.get("recipe_id") == recipe_id:
-                        media_list.append(metadata)
+            rows = db.query(MediaItem.details).join(
+                MediaReference, MediaReference.content_hash == MediaItem.media_id
+            ).filter(MediaReference.recipe_id == recipe_id).order_by(MediaItem.created_at)
+            return [{**row.details, "recipe_id": recipe_id} for row in rows]
         except Exception as e:
             print(f"Failed to list media for recipe {recipe_id}: {e}")
-        
-        return media_list
+            return []
+        finally:
+            db.close()
     
     def cleanup_orphaned_media(self, recipe_ids: List[str]) -> int:
-        """Clean up media files that don't belong to any existing recipe"""
-        deleted_count = 0
+        """
+        Release references held by recipes that no longer exist, then collect
+        unreferenced images. Recipes release their media when deleted, so this
+        only reconciles references left behind by failures.
+        """
+        from app.models.media_blob import MediaReference
         
+        db = self._session()
         try:
-            for metadata_file in self.metadata_dir.glob("*.json"):
-                with open(metadata_file, 'r') as f:
-                    metadata = json.load(f)
-                    recipe_id = metadata.get("recipe_id")
-                    
-                    # If media has a recipe_id but recipe doesn't exist, delete it
-                    if recipe_id and recipe_id not in recipe_ids:
-                        if self.delete_media(metadata["media_id"]):
-                            deleted_count += 1
-                            
+            stale = [(row.content_hash, row.recipe_id) for row in db.query(
+                MediaReference.content_hash, MediaReference.recipe_id
+            ).filter(MediaReference.recipe_id.notin_(recipe_ids))]
         except Exception as e:
             print(f"Failed to cleanup orphaned media: {e}")
+            return 0
+        finally:
+            db.close()
         
-        return deleted_count
+        for media_id, recipe_id in stale:
+            self.release_reference(media_id, recipe_id)
+        return self.collect_garbage()
     
     def get_storage_stats(self) -> Dict[str, Any]:
-        """Get storage statistics"""
+        """Get storage statistics (one aggregate query over the catalog)"""
+        from app.models.media_blob import MediaBlob
+        from app.models.media_item import MediaItem
+        
+        size_columns = {size_name: getattr(MediaItem, f"{size_name}_bytes") for size_name in media_utils.THUMBNAIL_SIZES}
+        
+        db = self._session()
         try:
-            stats = {
-                "total_media": 0,
-                "total_size": 0,
-                "by_type": {"images": 0, "thumbnails": 0},
-                "by_size": {}
-            }
-            
-            # Count metadata files
-            metadata_files = list(self.metadata_dir.glob("*.json"))
-            stats["total_media"] = len(metadata_files)
-            
-            # Calculate storage usage
-            for root, dirs, files in os.walk(self.base_dir):
-                for file in files:
-                    file_path = Path(root) / file
-                    file_size = file_path.stat().st_size
-                    stats["total_size"] += file_size
-                    
-                    # Categorize by directory
-                    if "images" in root:
-                        stats["by_type"]["images"] += file_size
-                    elif "thumbnails" in root:
-                        stats["by_type"]["thumbnails"] += file_size
-            
-            # Get thumbnail size breakdown
-            for size_name in media_utils.THUMBNAIL_SIZES:
-                size_total = 0
-                for metadata_file in metadata_files:
-                    try:
-                        with open(metadata_file, 'r') as f:
-                            metadata = json.load(f)
-                            if "thumbnails" in metadata and size_name in metadata["thumbnails"]:
-                                thumb_path = Path(metadata["thumbnails"][size_name]["path"])
-                                if thumb_path.exists():
-                                    size_total += thumb_path.stat().st_size
-                    except:
-                        continue
-                stats["by_size"][size_name] = size_total
-            
-            return stats
+            totals = db.query(
+                func.count(MediaItem.media_id).label("total_media"),
+                func.coalesce(func.sum(MediaItem.byte_size), 0).label("total_size"),
+                func.coalesce(func.sum(MediaItem.original_bytes), 0).label("images"),
+                func.coalesce(func.sum(case((MediaBlob.ref_count > 0, 1), else_=0)), 0).label("referenced"),
+                *(func.coalesce(func.sum(column), 0).label(size_name) for size_name, column in size_columns.items())
+            ).outerjoin(MediaBlob, MediaBlob.content_hash == MediaItem.media_id).one()
             
+            by_size = {size_name: int(getattr(totals, size_name)) for size_name in size_columns}
+            return {
+                "total_media": totals.total_media,
+                "total_size": int(totals.total_size),
+                "by_type": {"images": int(totals.images), "thumbnails": sum(by_size.values())},
+                "by_size": by_size,
+                "referenced_media": int(totals.referenced),
+                "unreferenced_media": totals.total_media - int(totals.referenced),
+                "dedup": dict(self.stats)
+            }
+        
         except Exception as e:
             print(f"Failed to get storage stats: {e}")
             return {"error": str(e)}
+        finally:
+            db.close()
+    
+    def migrate_json_metadata(self, delete_files: bool = True) -> Dict[str, int]:
+        """
+        One-shot import of the per-item JSON files in media/metadata into the
+        catalog. Images stored before deduplication keep their URL-derived ids
+        and file locations, so URLs saved in recipes stay valid; they get blob
+        rows and references from the JSON's recipe_id and from every recipe whose
+        media.stored_media points at them. Safe to re-run.
+        """
+        from app.models.media_blob import MediaBlob
+        from app.models.recipe import Recipe
+        
+        counts = {"imported": 0, "failed": 0, "referenced": 0}
+        imported_files = []
+        recipe_ids: Dict[str, set] = {}
+        
+        db = self._session()
+        try:
+            for metadata_file in sorted(self.metadata_dir.glob("*.json")):
+                try:
+                    with open(metadata_file, 'r') as f:
+                        metadata = json.load(f)
+                    media_id = metadata["media_id"]
+                    
+                    db.merge(self.catalog_item({k: v for k, v in metadata.items() if k != "recipe_id"}))
+                    if db.get(MediaBlob, media_id) is None:
+                        db.add(MediaBlob(
+                            content_hash=media_id,
+                            ref_count=0,
+                            byte_size=metadata.get("byte_size", 0),
+                            released_at=datetime.now(timezone.utc),
+                        ))
+                    db.flush()
+                except Exception as e:
+                    logger.warning(f"Failed to migrate {metadata_file.name}: {e}")
+                    counts["failed"] += 1
+                    continue
+                
+                counts["imported"] += 1
+                imported_files.append(metadata_file)
+                if metadata.get("recipe_id"):
+                    recipe_ids.setdefault(media_id, set()).add(metadata["recipe_id"])
+            db.commit()
+            
+            # Imports stored media before the recipe existed, so the recipes themselves are the reliable source
+            for recipe_id, media in db.query(Recipe.id, Recipe.media).filter(Recipe.media.isnot(None)):
+                media_id = ((media or {}).get("stored_media") or {}).get("media_id") if isinstance(media, dict) else None
+                if media_id:
+                    recipe_ids.setdefault(media_id, set()).add(recipe_id)
+        except Exception as e:
+            logger.error(f"Media catalog migration failed: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        
+        for media_id, ids in recipe_ids.items():
+            counts["referenced"] += sum(self.add_reference(media_id, recipe_id) for recipe_id in ids)
+        
+        if delete_files:
+            for metadata_file in imported_files:
+                metadata_file.unlink(missing_ok=True)
+        
+        logger.info(f"Media catalog migration: {counts}")
+        return counts
 
 
 # Global instance
-storage_utils = StorageUtils()
\ No newline at end of file
+storage_utils = StorageUtils.from_settings()
@@ -0,0 +1,268 @@
+"""
+Background worker for queued recipe parses.
+Runs PARSE_WORKER_CONCURRENCY async workers that claim rows from the parse_jobs
+table (SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker processes can
+share the queue), run the parse, persist its progress events for the SSE
+endpoint and record the result. Start it next to the API:
+
+    python -m app.workers.parse_worker --concurrency 4
+"""
+import os
+import socket
+import signal
+import asyncio
+import argparse
+import logging
+from typing import Dict, Any, Optional
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.startup import startup_event, shutdown_event
+from app.models.parse_job import ParseJob, ParseJobEvent
+from app.services.parse_job_service import (
+    ParseJobService, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, CANCELLED_ERROR, WEBSITE_PROTECTION_SUGGESTIONS
+)
+from app.services.parsing_service import ParsingService
+from app.services.parsers.url_parser import WebsiteProtectionError
+from app.services.parsers.progress_events import ProgressEventEmitter, ProgressPhase, ProgressStatus
+
+logger = logging.getLogger(__name__)
+
+
+class ParseWorker:
+    """Pool of async workers consuming the parse_jobs queue"""
+
+    def __init__(self, concurrency: int = 4, poll_interval: float = 1.0, heartbeat_interval: float = 5.0,
+                 name: Optional[str] = None):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+
+        self._stopping = asyncio.Event()
+        self.stats = {"claimed": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+
+    @classmethod
+    def from_settings(cls, concurrency: Optional[int] = None) -> "ParseWorker":
+        """Build the worker from application settings"""
+        return cls(
+            concurrency=concurrency or settings.PARSE_WORKER_CONCURRENCY,
+            poll_interval=settings.PARSE_JOB_POLL_INTERVAL,
+            heartbeat_interval=settings.PARSE_JOB_HEARTBEAT_INTERVAL,
+        )
+
+    def stop(self) -> None:
+        """Stop claiming jobs; running jobs are allowed to finish"""
+        if not self._stopping.is_set():
+            logger.info(f"Parse worker {self.name} stopping after its running jobs")
+            self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(f"Parse worker {self.name} started with {self.concurrency} slots")
+        tasks = [asyncio.create_task(self._worker_loop(f"{self.name}:{index}")) for index in range(self.concurrency)]
+        tasks.append(asyncio.create_task(self._maintenance_loop()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            logger.info(f"Parse worker {self.name} stopped: {self.stats}")
+
+    async def _worker_loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await asyncio.to_thread(self._claim, worker_id)
+            except Exception as e:
+                logger.error(f"Failed to claim a parse job: {str(e)}")
+                job = None
+
+            if job is None:
+                await self._sleep(self.poll_interval)
+                continue
+
+            self.stats["claimed"] += 1
+            await self._run_job(job, worker_id)
+
+    async def _maintenance_loop(self) -> None:
+        """Requeue jobs abandoned by crashed workers and purge old finished ones"""
+        interval = max(settings.PARSE_JOB_STALE_SECONDS / 2, self.poll_interval)
+        runs = 0
+        while not self._stopping.is_set():
+            await asyncio.to_thread(self._with_session, ParseJobService.requeue_stale)
+            if runs % 120 == 0:
+                removed = await asyncio.to_thread(self._with_session, ParseJobService.purge_finished)
+                if removed:
+                    logger.info(f"Purged {removed} finished parse jobs")
+            runs += 1
+            await self._sleep(interval)
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_job(self, job: ParseJob, worker_id: str) -> None:
+        events: asyncio.Queue = asyncio.Queue()
+        emitter = ProgressEventEmitter(job.params.get("url") or "", job.id)
+        emitter.add_listener(lambda event: events.put_nowait(event.to_dict()))
+        writer = asyncio.create_task(self._write_events(job.id, events))
+
+        logger.info(f"{worker_id} running {job.job_type} parse job {job.id} (attempt {job.attempts})")
+        task = asyncio.create_task(self._execute(job, emitter))
+        cancelled = False
+
+        # Heartbeat while the parse runs; a cancel request (or losing the job) stops it
+        while not task.done():
+            done, _ = await asyncio.wait({task}, timeout=self.heartbeat_interval)
+            if done:
+                break
+            try:
+                keep_running = await asyncio.to_thread(self._with_session, ParseJobService.heartbeat, job.id, worker_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for parse job {job.id}: {str(e)}")
+                keep_running = True
+            if not keep_running:
+                cancelled = True
+                task.cancel()
+
+        status, result, error = JOB_SUCCEEDED, None, None
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not cancelled:
+                raise
+            status, error = JOB_CANCELLED, CANCELLED_ERROR
+            emitter.emit_event(ProgressPhase.FAILED, ProgressStatus.FAILED, "Parsing cancelled")
+        except WebsiteProtectionError as e:
+            status, error = JOB_FAILED, {
+                "error_type": "website_protection",
+                "message": str(e),
+                "suggestions": WEBSITE_PROTECTION_SUGGESTIONS
+            }
+        except Exception as e:
+            logger.warning(f"Parse job {job.id} failed: {str(e)}")
+            status, error = JOB_FAILED, {"error_type": "parsing_failed", "message": str(e)}
+
+        # Every event is stored before the outcome, so a streaming client sees them all
+        await events.join()
+        writer.cancel()
+
+        self.stats[status] += 1
+        try:
+            await asyncio.to_thread(
+                self._with_session, ParseJobService.finish, job.id, worker_id, status, result=result, error=error
+            )
+        except Exception as e:
+            # The heartbeat goes stale and the job is requeued
+            logger.error(f"Failed to record outcome of parse job {job.id}: {str(e)}")
+
+    async def _execute(self, job: ParseJob, emitter: ProgressEventEmitter) -> Dict[str, Any]:
+        params = job.params
+        db = SessionLocal()
+        try:
+            parsing_service = ParsingService(db)
+
+            if job.job_type == "url":
+                return await parsing_service.parse_from_url_with_progress(
+                    params["url"], job.user_id, params.get("collection_id"), emitter
+                )
+
+            if job.job_type == "instagram":
+                emitter.emit_event(ProgressPhase.INITIALIZING, ProgressStatus.IN_PROGRESS, "Loading Instagram post")
+                try:
+                    recipe_data = await parsing_service.parse_from_instagram(
+                        params["url"], job.user_id, params.get("collection_id"), refresh=bool(params.get("refresh"))
+                    )
+                except Exception as e:
+                    emitter.emit_event(ProgressPhase.FAILED, ProgressStatus.FAILED, "Instagram parsing failed",
+                                       error_details=str(e))
+                    raise
+                emitter.emit_event(ProgressPhase.COMPLETED, ProgressStatus.SUCCESS, "Recipe parsed from Instagram")
+                return recipe_data
+
+            # instagram_batch: same response shape as /instagram/batch
+            urls = params["urls"][:params.get("max_results") or 20]
+            finished = []
+
+            def report_item(item: Dict[str, Any]) -> None:
+                finished.append(item)
+                emitter.emit_event(ProgressPhase.PARSING_CONTENT, ProgressStatus.IN_PROGRESS,
+                                   f"Parsed {len(finished)} of {len(urls)} posts",
+                                   metadata={"url": item["url"], "status": item["status"],
+                                             "duration_ms": item["duration_ms"], "total": len(urls)})
+
+            summary = await parsing_service.parse_batch_from_instagram(
+                urls, job.user_id, params.get("collection_id"), on_item=report_item,
+                refresh=bool(params.get("refresh"))
+            )
+            emitter.emit_event(ProgressPhase.COMPLETED, ProgressStatus.SUCCESS,
+                               f"Parsed {summary['successful']} of {len(urls)} posts")
+            return summary
+        finally:
+            db.close()
+
+    async def _write_events(self, job_id: str, events: asyncio.Queue) -> None:
+        """Persist progress events in order, batching whatever queued up during the last write"""
+        while True:
+            payloads = [await events.get()]
+            while not events.empty():
+                payloads.append(events.get_nowait())
+            try:
+                await asyncio.to_thread(self._with_session, ParseJobService.append_events, job_id, payloads)
+            except Exception as e:
+                logger.warning(f"Failed to store {len(payloads)} progress events for parse job {job_id}: {str(e)}")
+            finally:
+                for _ in payloads:
+                    events.task_done()
+
+    def _claim(self, worker_id: str) -> Optional[ParseJob]:
+        db = SessionLocal()
+        try:
+            job = ParseJobService.claim_next(worker_id, db)
+            if job is not None:
+                # The job is used after the session closes
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    @staticmethod
+    def _with_session(func, *args, **kwargs):
+        db = SessionLocal()
+        try:
+            return func(*args, db=db, **kwargs)
+        finally:
+            db.close()
+
+
+async def main(concurrency: Optional[int] = None) -> None:
+    # The API creates tables at startup; a worker may start first
+    ParseJob.__table__.create(bind=engine, checkfirst=True)
+    ParseJobEvent.__table__.create(bind=engine, checkfirst=True)
+
+    await startup_event()
+    worker = ParseWorker.from_settings(concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            # Windows: Ctrl+C raises KeyboardInterrupt instead
+            pass
+
+    try:
+        await worker.run()
+    finally:
+        await shutdown_event()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run background recipe parse workers")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Parse jobs run concurrently (default: PARSE_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main(args.concurrency))
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark for the manual parser's HTML backends.
+
+Times tree construction, full-text extraction and ld+json lookup for every
+installed BeautifulSoup tree builder (plus selectolax when installed), and the
+tree-free ld+json fast path, over the saved pages in benchmarks/corpus/html.
+
+Usage (from backend/):
+    python -m benchmarks.bench_html_backends [--iterations 20] [--corpus DIR]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from app.services.parsers.html_backend import extract_ld_json_blocks  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "html"
+
+
+def available_builders() -> List[str]:
+    """BeautifulSoup tree builders installed in this environment"""
+    builders = ["html.parser"]
+    for builder, module in (("lxml", "lxml"), ("html5lib", "html5lib")):
+        try:
+            __import__(module)
+            builders.append(builder)
+        except ImportError:
+            pass
+    return builders
+
+
+def time_call(func: Callable[[], object], iterations: int) -> float:
+    """Median wall time of func in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def bench_page(html: str, iterations: int) -> Dict[str, float]:
+    results = {}
+
+    for builder in available_builders():
+        results[f"{builder}: tree"] = time_call(lambda: BeautifulSoup(html, builder), iterations)
+        results[f"{builder}: tree + get_text"] = time_call(
+            lambda: BeautifulSoup(html, builder).get_text().lower(), iterations
+        )
+        results[f"{builder}: tree + ld+json"] = time_call(
+            lambda: [script.string for script in BeautifulSoup(html, builder).find_all('script', type='application/ld+json')],
+            iterations
+        )
+
+    try:
+        from selectolax.parser import HTMLParser
+        results["selectolax: tree + text"] = time_call(lambda: HTMLParser(html).text().lower(), iterations)
+    except ImportError:
+        pass
+
+    results["fast path: ld+json tokenizer"] = time_call(lambda: extract_ld_json_blocks(html), iterations)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    args = parser.parse_args()
+
+    pages = sorted(args.corpus.glob("*.html"))
+    if not pages:
+        sys.exit(f"No .html files found in {args.corpus}")
+
+    totals: Dict[str, float] = {}
+    for path in pages:
+        html = path.read_text(encoding="utf-8")
+        results = bench_page(html, args.iterations)
+
+        print(f"\n{path.name} ({len(html) / 1024:.0f} KB)")
+        for name, median_ms in results.items():
+            totals[name] = totals.get(name, 0.0) + median_ms
+            print(f"  {name:<32} {median_ms:9.2f} ms")
+
+    print(f"\nCorpus total ({len(pages)} pages, median of {args.iterations} runs each)")
+    baseline = totals.get("html.parser: tree + get_text")
+    for name, total_ms in sorted(totals.items(), key=lambda item: item[1]):
+        speedup = f"  x{baseline / total_ms:.1f} vs html.parser + get_text" if baseline and total_ms else ""
+        print(f"  {name:<32} {total_ms:9.2f} ms{speedup}")
+
+
+if __name__ == "__main__":
+    main()
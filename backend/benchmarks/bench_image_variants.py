@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for the image variant pipeline.
+
+Compares render_image_variants (one decode, JPEG draft() scaling, thumbnail
+cascade) with the previous path: optimize_image on the original plus one
+create_thumbnail call per size, each decoding the original again. Inputs are
+synthetic JPEG/PNG photos at typical recipe-image resolutions unless --images
+points to a directory of real files.
+
+Usage (from backend/):
+    python -m benchmarks.bench_image_variants [--iterations 20] [--images DIR]
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from PIL import Image  # noqa: E402
+
+from app.utils.media_utils import media_utils, render_image_variants  # noqa: E402
+
+
+def time_call(func: Callable[[], object], iterations: int) -> float:
+    """Median wall time of func in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def synthetic_images() -> Dict[str, bytes]:
+    """Gradient images (compress like photos, unlike flat colour) in the usual formats and sizes"""
+    images = {}
+    for width, height, fmt in ((1080, 1350, "JPEG"), (3024, 4032, "JPEG"), (1600, 1200, "PNG")):
+        gradient = Image.linear_gradient("L").resize((width, height))
+        img = Image.merge("RGB", (gradient, gradient.rotate(90, expand=False), gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+        output = io.BytesIO()
+        img.save(output, format=fmt, quality=90)
+        images[f"{width}x{height}.{fmt.lower()}"] = output.getvalue()
+    return images
+
+
+def previous_pipeline(image_data: bytes) -> None:
+    media_utils.optimize_image(image_data)
+    for size in media_utils.THUMBNAIL_SIZES.values():
+        media_utils.create_thumbnail(image_data, size)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--images", type=Path, default=None, help="Directory of .jpg/.png files")
+    args = parser.parse_args()
+
+    if args.images:
+        images = {path.name: path.read_bytes() for path in sorted(args.images.iterdir())
+                  if path.suffix.lower() in (".jpg", ".jpeg", ".png", ".webp")}
+    else:
+        images = synthetic_images()
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+
+    for name, image_data in images.items():
+        previous_ms = time_call(lambda: previous_pipeline(image_data), args.iterations)
+        current_ms = time_call(lambda: render_image_variants(image_data), args.iterations)
+        print(f"{name:<22} {len(image_data) / 1024:8.0f} KB  previous {previous_ms:8.1f} ms  "
+              f"single-decode {current_ms:8.1f} ms  x{previous_ms / current_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark for TextProcessor.extract_recipe_from_text.
+
+Times the caption extractor over the captions in benchmarks/corpus/captions.
+With --baseline it loads another copy of text_processor.py (for example one
+exported from an earlier commit) and reports the speedup against it:
+
+    git show <rev>:backend/app/services/parsers/text_processor.py > /tmp/text_processor_base.py
+
+Usage (from backend/):
+    python -m benchmarks.bench_text_processor [--iterations 200] [--corpus DIR] [--baseline FILE]
+"""
+import argparse
+import importlib.util
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.parsers.text_processor import TextProcessor  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "corpus" / "captions"
+
+
+def time_call(func: Callable[[], object], iterations: int) -> float:
+    """Median wall time of func in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def load_baseline(path: Path) -> object:
+    """TextProcessor instance from a standalone copy of text_processor.py"""
+    spec = importlib.util.spec_from_file_location("baseline_text_processor", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.TextProcessor()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="text_processor.py to compare against")
+    args = parser.parse_args()
+
+    captions = sorted(args.corpus.glob("*.txt"))
+    if not captions:
+        sys.exit(f"No .txt files found in {args.corpus}")
+
+    processors: Dict[str, object] = {"current": TextProcessor()}
+    if args.baseline:
+        processors["baseline"] = load_baseline(args.baseline)
+
+    totals: Dict[str, float] = {name: 0.0 for name in processors}
+    changed = []
+    for path in captions:
+        text = path.read_text(encoding="utf-8")
+        print(f"\n{path.name} ({len(text.splitlines())} lines)")
+        for name, processor in processors.items():
+            median_ms = time_call(lambda: processor.extract_recipe_from_text(text), args.iterations)
+            totals[name] += median_ms
+            print(f"  {name:<10} {median_ms:9.3f} ms")
+
+        if "baseline" in processors:
+            current = processors["current"].extract_recipe_from_text(text)
+            baseline = processors["baseline"].extract_recipe_from_text(text)
+            if vars(current) != vars(baseline):
+                changed.append(path.name)
+
+    print(f"\nCorpus total ({len(captions)} captions, median of {args.iterations} runs each)")
+    baseline_total: Optional[float] = totals.get("baseline")
+    for name, total_ms in totals.items():
+        speedup = f"  x{baseline_total / total_ms:.1f} vs baseline" if baseline_total and total_ms else ""
+        print(f"  {name:<10} {total_ms:9.3f} ms{speedup}")
+
+    if changed:
+        print(f"\nOutput differs from the baseline for: {', '.join(changed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Offline parser benchmark and regression harness.
+
+Replays the frozen corpus through the parsers with no network access:
+  url   URLParser.parse over benchmarks/corpus/html (pages served by an httpx
+        MockTransport installed on the shared HTTP client registry)
+  text  TextProcessor.extract_recipe_from_text over benchmarks/corpus/captions
+  nlp   NLPExtractor.extract_enhanced_recipe over the same captions
+
+For each stage it reports latency percentiles, items/sec and allocations
+(tracemalloc, measured in a separate pass so it does not skew the timings),
+and for url/text the field-level accuracy against the golden JSON in
+benchmarks/golden. Goldens hold the output a person would expect from the
+source page or caption, not what the parser currently returns. Results saved with --output can be compared on a later
+commit with --compare, which exits non-zero on a regression.
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks [--iterations 10] [--stages url,text,nlp]
+        [--output results.json] [--compare baseline.json] [--threshold 0.2]
+    python -m benchmarks.run_benchmarks --update-golden   # seed goldens for new corpus items, then correct them by hand
+"""
+import os
+
+# Parser caches, learned strategies and politeness delays would turn every repeat into a
+# cache hit or a sleep; they are switched off before the application settings are read
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("PARSE_CACHE_ENABLED", "false")
+os.environ.setdefault("REVALIDATION_ENABLED", "false")
+os.environ.setdefault("STRATEGY_LEARNING_ENABLED", "false")
+os.environ.setdefault("STRATEGY_PERSIST", "false")
+os.environ.setdefault("FETCH_DOMAIN_RATE", "0")
+os.environ.setdefault("INSTAGRAM_CACHE_BACKEND", "memory")
+os.environ.setdefault("CPU_POOL_ENABLED", "false")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import platform  # noqa: E402
+import re  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import tracemalloc  # noqa: E402
+from dataclasses import asdict  # noqa: E402
+from pathlib import Path  # noqa: E402
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple  # noqa: E402
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+
+from app.core.http_client import http_client_registry  # noqa: E402
+from app.services.parsers.url_parser import URLParser  # noqa: E402
+from app.services.parsers.text_processor import TextProcessor  # noqa: E402
+from app.services.parsers.nlp_extractor import NLPExtractor  # noqa: E402
+
+BENCH_DIR = Path(__file__).resolve().parent
+HTML_CORPUS = BENCH_DIR / "corpus" / "html"
+CAPTION_CORPUS = BENCH_DIR / "corpus" / "captions"
+GOLDEN_DIR = BENCH_DIR / "golden"
+
+STAGES = ("url", "text", "nlp")
+SCALAR_FIELDS = {
+    "url": ["title", "description", "prep_time", "cook_time", "total_time", "servings"],
+    "text": ["title", "servings"],
+}
+LIST_FIELDS = ["ingredients", "instructions"]
+
+_LIST_ITEM_RE = re.compile(r'<li>(.*?)</li>', re.DOTALL)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+# Corpus and network stub
+
+def page_url(path: Path) -> str:
+    """Each saved page gets its own host, as it would in production"""
+    return f"https://{path.stem.replace('_', '-')}.bench.test/recipe"
+
+
+def install_mock_transport(pages: List[Path]) -> None:
+    """Serve the saved pages from memory through the shared HTTP client registry"""
+    bodies = {httpx.URL(page_url(path)).host: path.read_bytes() for path in pages}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = bodies.get(request.url.host)
+        if body is None:
+            return httpx.Response(404, text="not in benchmark corpus")
+        return httpx.Response(200, content=body, headers={"Content-Type": "text/html; charset=utf-8"})
+
+    http_client_registry.transport = httpx.MockTransport(handler)
+
+
+# Stage runners: each returns a JSON-serializable outcome for one corpus item
+
+def make_runners() -> Dict[str, Callable[[Path], Awaitable[Dict[str, Any]]]]:
+    url_parser = URLParser()
+    url_parser.rate_limiter.default_delay = 0.0
+    text_processor = TextProcessor()
+    nlp_extractor = NLPExtractor()
+
+    async def run_url(path: Path) -> Dict[str, Any]:
+        try:
+            recipe = await url_parser.parse(page_url(path))
+        except Exception as e:
+            return {"error": type(e).__name__}
+        return recipe.model_dump(mode="json", exclude={"media", "source_url"})
+
+    async def run_text(path: Path) -> Dict[str, Any]:
+        return asdict(text_processor.extract_recipe_from_text(path.read_text(encoding="utf-8")))
+
+    async def run_nlp(path: Path) -> Dict[str, Any]:
+        result = nlp_extractor.extract_enhanced_recipe(path.read_text(encoding="utf-8"))
+        return {"ingredients": len(result["ingredients"]), "instructions": len(result["instructions"])}
+
+    return {"url": run_url, "text": run_text, "nlp": run_nlp}
+
+
+def corpus_for(stage: str) -> List[Path]:
+    if stage == "url":
+        return sorted(HTML_CORPUS.glob("*.html"))
+    return sorted(CAPTION_CORPUS.glob("*.txt"))
+
+
+# Measurements
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure_latency(run: Callable[[Path], Awaitable[Dict[str, Any]]], items: List[Path],
+                          iterations: int) -> Tuple[Dict[str, float], Dict[str, Dict[str, Any]]]:
+    """Latency distribution over iterations x items, and the outcome of each item"""
+    outcomes = {path.stem: await run(path) for path in items}  # Warm-up pass, also the accuracy sample
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for path in items:
+            start = time.perf_counter()
+            await run(path)
+            samples.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "samples": len(samples),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p90_ms": round(percentile(samples, 90), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(max(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "items_per_sec": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+    }, outcomes
+
+
+async def measure_allocations(run: Callable[[Path], Awaitable[Dict[str, Any]]], items: List[Path]) -> Dict[str, float]:
+    """Peak traced memory and allocated blocks per item"""
+    peaks, blocks = [], []
+    tracemalloc.start()
+    try:
+        for path in items:
+            tracemalloc.clear_traces()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            await run(path)
+            after = tracemalloc.take_snapshot()
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            blocks.append(sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0))
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "peak_kb_mean": round(statistics.fmean(peaks), 1),
+        "peak_kb_max": round(max(peaks), 1),
+        "alloc_blocks_mean": round(statistics.fmean(blocks), 1),
+    }
+
+
+# Accuracy against golden outputs
+
+def list_items(html: Optional[str]) -> List[str]:
+    return [_WHITESPACE_RE.sub(' ', item).strip().lower() for item in _LIST_ITEM_RE.findall(html or "")]
+
+
+def list_f1(expected: List[str], actual: List[str]) -> float:
+    if not expected and not actual:
+        return 1.0
+    matched = len(set(expected) & set(actual))
+    if not matched:
+        return 0.0
+    precision, recall = matched / len(set(actual)), matched / len(set(expected))
+    return 2 * precision * recall / (precision + recall)
+
+
+def score_outcome(stage: str, expected: Dict[str, Any], actual: Dict[str, Any]) -> Dict[str, float]:
+    """1/0 per scalar field, F1 over <li> items for ingredients and instructions"""
+    if "error" in expected or "error" in actual:
+        return {"outcome": float(expected.get("error") == actual.get("error"))}
+
+    scores = {field: float(expected.get(field) == actual.get(field)) for field in SCALAR_FIELDS[stage]}
+    for field in LIST_FIELDS:
+        scores[field] = list_f1(list_items(expected.get(field)), list_items(actual.get(field)))
+    return scores
+
+
+def golden_path(stage: str, name: str) -> Path:
+    return GOLDEN_DIR / stage / f"{name}.json"
+
+
+def check_accuracy(stage: str, outcomes: Dict[str, Dict[str, Any]], update: bool) -> Optional[Dict[str, Any]]:
+    if stage not in SCALAR_FIELDS:
+        return None
+
+    per_field: Dict[str, List[float]] = {}
+    missing = []
+    for name, actual in outcomes.items():
+        path = golden_path(stage, name)
+        if update and not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(actual, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+        if not path.exists():
+            missing.append(name)
+            continue
+        for field, score in score_outcome(stage, json.loads(path.read_text(encoding="utf-8")), actual).items():
+            per_field.setdefault(field, []).append(score)
+
+    fields = {field: round(statistics.fmean(scores), 3) for field, scores in per_field.items()}
+    all_scores = [score for scores in per_field.values() for score in scores]
+    return {
+        "overall": round(statistics.fmean(all_scores), 3) if all_scores else None,
+        "fields": fields,
+        "missing_golden": missing,
+    }
+
+
+# Reporting and comparison
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(f"\nCommit {results['commit'] or 'unknown'} · Python {results['python']} · {results['iterations']} iterations")
+    for stage, data in results["stages"].items():
+        latency, memory = data["latency"], data["allocations"]
+        print(f"\n[{stage}] {data['items']} items")
+        print(f"  latency  p50 {latency['p50_ms']:.3f} ms  p90 {latency['p90_ms']:.3f} ms  "
+              f"p99 {latency['p99_ms']:.3f} ms  max {latency['max_ms']:.3f} ms")
+        print(f"  throughput  {latency['items_per_sec']:.1f} items/sec")
+        print(f"  memory   peak {memory['peak_kb_mean']:.1f} KB avg / {memory['peak_kb_max']:.1f} KB max  "
+              f"{memory['alloc_blocks_mean']:.0f} blocks/item")
+        accuracy = data.get("accuracy")
+        if accuracy:
+            fields = "  ".join(f"{field} {score:.2f}" for field, score in accuracy["fields"].items())
+            overall = f"{accuracy['overall']:.3f}" if accuracy["overall"] is not None else "n/a"
+            print(f"  accuracy {overall}  ({fields})")
+            if accuracy["missing_golden"]:
+                print(f"  no golden output for: {', '.join(accuracy['missing_golden'])} (run with --update-golden)")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Regressions of p50/p90 latency beyond threshold, or of accuracy, against a saved run"""
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for stage, data in results["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old:
+            continue
+        for metric in ("p50_ms", "p90_ms"):
+            before, after = old["latency"][metric], data["latency"][metric]
+            change = (after - before) / before if before else 0.0
+            print(f"  [{stage}] {metric:<7} {before:9.3f} -> {after:9.3f} ms ({change:+.0%})")
+            if change > threshold:
+                regressions.append(f"{stage} {metric} {change:+.0%}")
+
+        old_accuracy = (old.get("accuracy") or {}).get("overall")
+        new_accuracy = (data.get("accuracy") or {}).get("overall")
+        if old_accuracy is not None and new_accuracy is not None:
+            print(f"  [{stage}] accuracy {old_accuracy:.3f} -> {new_accuracy:.3f}")
+            if new_accuracy < old_accuracy:
+                regressions.append(f"{stage} accuracy {old_accuracy:.3f} -> {new_accuracy:.3f}")
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    install_mock_transport(corpus_for("url"))
+    runners = make_runners()
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "iterations": args.iterations,
+        "stages": {},
+    }
+    for stage in args.stages:
+        items = corpus_for(stage)
+        if not items:
+            print(f"Skipping {stage}: empty corpus")
+            continue
+        latency, outcomes = await measure_latency(runners[stage], items, args.iterations)
+        results["stages"][stage] = {
+            "items": len(items),
+            "latency": latency,
+            "allocations": await measure_allocations(runners[stage], items),
+            "accuracy": check_accuracy(stage, outcomes, args.update_golden),
+        }
+
+    await http_client_registry.shutdown()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--stages", type=lambda value: [stage.strip() for stage in value.split(",")],
+                        default=list(STAGES), help="Comma-separated subset of url,text,nlp")
+    parser.add_argument("--output", type=Path, help="Save results as JSON for later --compare")
+    parser.add_argument("--compare", type=Path, help="Results JSON of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative p50/p90 latency increase before --compare fails")
+    parser.add_argument("--update-golden", action="store_true", help="Write this run's output as the golden for corpus items that have none")
+    args = parser.parse_args()
+
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        sys.exit(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    # Expected fallbacks (no schema, block pages) would log on every iteration
+    logging.getLogger("app").setLevel(logging.ERROR)
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+        if regressions:
+            print(f"\nRegressions: {'; '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Shared test setup. Settings are read at import time, so the environment is
+prepared here before any app module is imported: throwaway SQLite databases
+(including the revalidation store), in-memory caches and no persisted
+strategy/politeness state.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+_TEST_DIR = tempfile.mkdtemp(prefix="recipe-tests-")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TEST_DIR}/test.db")
+os.environ.setdefault("PARSE_CACHE_BACKEND", "memory")
+os.environ.setdefault("INSTAGRAM_CACHE_BACKEND", "memory")
+os.environ.setdefault("STRATEGY_PERSIST", "false")
+os.environ.setdefault("FETCH_DOMAIN_RATE", "0")
+os.environ.setdefault("CPU_POOL_ENABLED", "false")
+os.environ.setdefault("REVALIDATION_STORE_PATH", f"{_TEST_DIR}/revalidation.db")
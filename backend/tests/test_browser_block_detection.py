@@ -0,0 +1,127 @@
+import pytest
+
+from app.services.parsers.browser_automation import BrowserAutomation, CHROME_SELECTOR
+
+NAV_LOGIN_PAGE = """
+<html><head><title>Best Banana Bread</title></head>
+<body>
+  <header><a href="/login">Login</a> <a href="/subscribe">Subscribe</a></header>
+  <nav><a href="/account">Sign in</a></nav>
+  <div role="navigation"><a href="/join">Login</a></div>
+  <main>
+    <h1>Best Banana Bread</h1>
+    <ul><li>3 ripe bananas</li><li>2 cups flour</li></ul>
+    <ol><li>Mash the bananas.</li><li>Bake for 60 minutes.</li></ol>
+  </main>
+  <aside>Subscribe to our newsletter</aside>
+  <footer>Sign in to save recipes</footer>
+</body></html>
+"""
+
+SAVE_PROMPT_PAGE = """
+<html><head><title>Best Banana Bread</title></head>
+<body><main><h1>Best Banana Bread</h1><p>Sign in to save this recipe, or subscribe to our newsletter.</p>
+<p>Mash the bananas and bake for 60 minutes.</p></main></body></html>
+"""
+
+LOGIN_WALL_PAGE = """
+<html><head><title>Sign in | Example Food</title></head>
+<body><main><h1>Membership required</h1><p>Create an account to keep reading.</p></main></body></html>
+"""
+
+CHALLENGE_PAGE = """
+<html><head><title>Example Food</title></head>
+<body><main><p>Checking your browser before accessing example.com.</p></main></body></html>
+"""
+
+
+class FakePage:
+    """Stands in for a Playwright page; evaluate fails so the rendered-HTML path is used"""
+
+    def __init__(self, html: str):
+        self.html = html
+        self.evaluate_args = None
+
+    async def evaluate(self, script, args):
+        self.evaluate_args = args
+        raise RuntimeError("no JavaScript engine")
+
+    async def content(self):
+        return self.html
+
+
+@pytest.mark.asyncio
+async def test_login_links_in_site_chrome_are_not_a_block():
+    page = FakePage(NAV_LOGIN_PAGE)
+    assert await BrowserAutomation()._find_block_indicators(page) == []
+
+
+@pytest.mark.asyncio
+async def test_account_prompts_in_page_content_are_not_a_block():
+    page = FakePage(SAVE_PROMPT_PAGE)
+    assert await BrowserAutomation()._find_block_indicators(page) == []
+
+
+@pytest.mark.asyncio
+async def test_login_wall_headings_are_a_block():
+    page = FakePage(LOGIN_WALL_PAGE)
+    assert await BrowserAutomation()._find_block_indicators(page) == ["sign in", "membership required"]
+
+
+@pytest.mark.asyncio
+async def test_challenge_text_in_page_content_is_a_block():
+    page = FakePage(CHALLENGE_PAGE)
+    assert await BrowserAutomation()._find_block_indicators(page) == ["checking your browser"]
+
+
+@pytest.mark.asyncio
+async def test_in_page_script_result_matches_account_words_in_headings_only():
+    class RenderedPage(FakePage):
+        async def evaluate(self, script, args):
+            return {"headings": "Best Banana Bread", "text": "Sign in to save. Subscribe for more."}
+
+    assert await BrowserAutomation()._find_block_indicators(RenderedPage("")) == []
+
+
+@pytest.mark.asyncio
+async def test_in_page_script_skips_chrome_elements():
+    page = FakePage(NAV_LOGIN_PAGE)
+    await BrowserAutomation()._find_block_indicators(page)
+
+    chrome_selector = page.evaluate_args[1]
+    assert chrome_selector == CHROME_SELECTOR
+    for selector in ("nav", "header", "footer", "aside", "[role=navigation]"):
+        assert selector in chrome_selector.split(", ")
+
+
+class ScriptPage:
+    """Page whose in-page script returns a fixed value; waiting on it is an error"""
+
+    def __init__(self, result):
+        self.result = result
+
+    async def evaluate(self, script, args):
+        return self.result
+
+    async def wait_for_function(self, *args, **kwargs):
+        raise AssertionError("early extraction must not wait")
+
+
+@pytest.mark.asyncio
+async def test_early_extraction_does_not_wait_without_json_ld():
+    browser = BrowserAutomation()
+
+    assert await browser._extract_recipe_early(ScriptPage(None)) is None
+    assert not browser.stats["early_exit"]
+
+
+@pytest.mark.asyncio
+async def test_early_extraction_returns_json_ld_already_in_the_page():
+    browser = BrowserAutomation()
+    page = ScriptPage({"jsonLd": ['{"@type": "Recipe"}'], "sectionHtml": "<div>card</div>", "title": "Cake"})
+
+    html_content, title = await browser._extract_recipe_early(page)
+
+    assert title == "Cake"
+    assert '<script type="application/ld+json">{"@type": "Recipe"}</script>' in html_content
+    assert browser.stats["early_exit"]
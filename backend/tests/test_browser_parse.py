@@ -0,0 +1,56 @@
+import pytest
+
+from app.services.parsers import url_parser as url_parser_module
+from app.services.parsers.url_parser import URLParser, WebsiteProtectionError
+
+RECIPE_PAGE = """
+<html><head><title>Lemon Cake</title>
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "Recipe", "name": "Lemon Cake",
+ "recipeIngredient": ["2 cups flour", "1 cup sugar"], "recipeInstructions": ["Mix.", "Bake for 30 minutes."]}
+</script></head><body><h1>Lemon Cake</h1></body></html>
+"""
+
+CHALLENGE_PAGE = """
+<html><head><title>Just a moment...</title></head>
+<body><main><p>Checking your browser before accessing example.com.</p></main></body></html>
+"""
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Serves a fixed rendered page in place of Playwright"""
+    page = {"html": ""}
+
+    class FakeBrowser:
+        stats = {"early_exit": False, "blocked_requests": 0}
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def fetch_page_content(self, url, **kwargs):
+            return page["html"], "title"
+
+    monkeypatch.setattr(url_parser_module, "PLAYWRIGHT_AVAILABLE", True)
+    monkeypatch.setattr(url_parser_module, "BrowserAutomation", FakeBrowser)
+    return page
+
+
+@pytest.mark.asyncio
+async def test_rendered_page_goes_through_the_html_stage(rendered):
+    rendered["html"] = RECIPE_PAGE
+
+    recipe = await URLParser()._parse_with_browser_automation("https://rendered.example.com/cake")
+
+    assert recipe.title == "Lemon Cake"
+
+
+@pytest.mark.asyncio
+async def test_rendered_challenge_reports_the_browser_block(rendered):
+    rendered["html"] = CHALLENGE_PAGE
+
+    with pytest.raises(WebsiteProtectionError, match="even with browser automation"):
+        await URLParser()._parse_with_browser_automation("https://rendered.example.com/cake")
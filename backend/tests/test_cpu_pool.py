@@ -0,0 +1,42 @@
+import asyncio
+import os
+
+import pytest
+
+from app.core.cpu_pool import CPUPool, CPUStageError
+
+
+def _exit_worker(payload):
+    os._exit(1)
+
+
+def _double(payload):
+    return payload * 2
+
+
+@pytest.mark.asyncio
+async def test_dead_worker_fails_the_stage_and_restarts_the_pool_once():
+    pool = CPUPool(max_workers=2, inline_bytes=0)
+    await pool.startup()
+    broken = pool._executor
+
+    startups = []
+    original_startup = pool.startup
+
+    async def counting_startup():
+        startups.append(pool._executor)
+        await original_startup()
+
+    pool.startup = counting_startup
+    try:
+        results = await asyncio.gather(
+            *(pool.run("poison", _exit_worker, None, size=1) for _ in range(3)),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(result, CPUStageError) for result in results)
+        assert len(startups) == 1
+        assert pool._executor is not None and pool._executor is not broken
+        assert await pool.run("double", _double, 21, size=1) == 42
+    finally:
+        await pool.shutdown()
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.fetch_scheduler import FetchScheduler, DomainLimits
+
+
+async def _fetch(scheduler: FetchScheduler, url: str) -> None:
+    async with scheduler.slot(url):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_idle_domains_are_evicted_at_the_cap():
+    scheduler = FetchScheduler(default_limits=DomainLimits(concurrency=2, rate=0, burst=4), max_tracked_domains=3)
+
+    for index in range(10):
+        await _fetch(scheduler, f"https://site{index}.example/recipe")
+
+    assert len(scheduler._domains) <= 3
+    assert scheduler.stats["evicted_domains"] == 7
+
+
+@pytest.mark.asyncio
+async def test_busy_and_backed_off_domains_are_kept():
+    scheduler = FetchScheduler(default_limits=DomainLimits(concurrency=1, rate=0, burst=1), max_tracked_domains=1)
+    scheduler.set_backoff("https://slow.example/a", 5.0)
+
+    async with scheduler.slot("https://busy.example/a"):
+        await _fetch(scheduler, "https://other.example/a")
+        assert {"slow.example", "busy.example"} <= set(scheduler._domains)
+
+
+@pytest.mark.asyncio
+async def test_backoff_paces_requests_through_the_bucket():
+    scheduler = FetchScheduler(default_limits=DomainLimits(concurrency=4, rate=100.0, burst=4))
+    scheduler.set_backoff("https://example.com/a", 0.2)
+
+    started = time.monotonic()
+    await asyncio.gather(*(_fetch(scheduler, "https://example.com/a") for _ in range(3)))
+
+    # No burst while backed off: the first request goes at once, the next two wait 0.2s each
+    assert time.monotonic() - started >= 0.35
+    assert scheduler.estimate_wait_ms("https://example.com/a") > 0
+
+    scheduler.set_backoff("https://example.com/a", 0.0)
+    assert scheduler._domains["example.com"].bucket.capacity == 4
@@ -0,0 +1,32 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http_client import HTTPClientRegistry
+
+
+@pytest.mark.asyncio
+async def test_idle_host_caps_are_evicted_but_busy_ones_are_kept():
+    release = asyncio.Event()
+
+    async def handler(request):
+        if request.url.host == "slow.example.com":
+            await release.wait()
+        return httpx.Response(200)
+
+    registry = HTTPClientRegistry(max_tracked_hosts=2, http2=False, transport=httpx.MockTransport(handler))
+    try:
+        slow = asyncio.create_task(registry.get("https://slow.example.com/"))
+        await asyncio.sleep(0)
+        for index in range(5):
+            await registry.get(f"https://site{index}.example.com/")
+
+        assert list(registry._host_limits) == ["slow.example.com", "site4.example.com"]
+        assert registry.stats["evicted_hosts"] == 4
+
+        release.set()
+        assert (await slow).status_code == 200
+        assert registry._host_limits["slow.example.com"].users == 0
+    finally:
+        await registry.shutdown()
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from app.services.parsers.cache_backends import InMemoryCacheBackend
+from app.services.parsers.instagram_cache import CachedPost, InstagramPostCache, InstagramHarvestCursors
+from app.services.parsers.text_processor import RecipePattern
+
+
+class BlockingBackend(InMemoryCacheBackend):
+    """In-memory backend flagged as blocking, recording which threads touch it"""
+
+    blocking = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, payload, ttl_seconds):
+        self.threads.add(threading.get_ident())
+        super().set(key, payload, ttl_seconds)
+
+
+def _post() -> CachedPost:
+    pattern = RecipePattern(ingredients="<ul><li>2 eggs</li></ul>", instructions="<ol><li>Whisk.</li></ol>",
+                            title="Eggs", confidence=0.8)
+    return CachedPost("2 eggs. Whisk.", {"username": "cook", "stored_media": {"media_id": "abc"}}, pattern)
+
+
+@pytest.mark.asyncio
+async def test_blocking_backend_runs_off_the_event_loop():
+    backend = BlockingBackend()
+    cache = InstagramPostCache(backend)
+
+    await cache.store_async("ABC123", _post())
+    cached = await cache.lookup_async("ABC123")
+
+    assert cached.recipe_pattern.title == "Eggs"
+    assert cached.media_data["stored_media"] == {"media_id": "abc"}
+    assert threading.get_ident() not in backend.threads
+
+
+@pytest.mark.asyncio
+async def test_harvest_cursors_round_trip():
+    backend = BlockingBackend()
+    cursors = InstagramHarvestCursors(backend)
+
+    await cursors.save_async("profile:cook", "ABC123", {"node_count": 12})
+
+    assert await cursors.load_async("profile:cook", "ABC123") == {"node_count": 12}
+    assert await cursors.load_async("profile:cook", "UNKNOWN") is None
+    assert cursors.stats == {"saves": 1, "resumes": 1, "misses": 1}
+    assert threading.get_ident() not in backend.threads
@@ -0,0 +1,91 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import fetch_scheduler as scheduler_module
+from app.services.parsing_service import ParsingService
+from app.services.parsers import instagram_parser
+from app.services.parsers.instagram_parser import HarvestedRecipe, InstagramParser, InvalidCursorError
+
+
+class FakePosts:
+    """Post iterator that counts how far it was walked"""
+
+    def __init__(self, count: int):
+        self.posts = [SimpleNamespace(shortcode=f"P{index}", caption=None) for index in range(count)]
+        self.consumed = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.consumed >= len(self.posts):
+            raise StopIteration
+        self.consumed += 1
+        return self.posts[self.consumed - 1]
+
+
+@pytest.fixture
+def parser(monkeypatch):
+    @asynccontextmanager
+    async def free_slot(url, method=None):
+        yield
+
+    monkeypatch.setattr(instagram_parser.fetch_scheduler, "slot", free_slot)
+    monkeypatch.setattr(instagram_parser.settings, "INSTAGRAM_HARVEST_MAX_SKIP", 5)
+    return InstagramParser(db=None)
+
+
+async def _harvest(parser, posts, cursor):
+    return [item async for item in parser._harvest("profile:cook", lambda: posts, 3, cursor, 0.3, False)]
+
+
+@pytest.mark.asyncio
+async def test_known_cursor_continues_after_it(parser):
+    posts = FakePosts(10)
+
+    items = await _harvest(parser, posts, "P3")
+
+    assert items[-1].posts_scanned == 6
+    assert items[-1].exhausted
+
+
+@pytest.mark.asyncio
+async def test_unknown_cursor_stops_after_max_skip(parser):
+    posts = FakePosts(1000)
+
+    with pytest.raises(InvalidCursorError):
+        await _harvest(parser, posts, "GONE")
+
+    assert posts.consumed == 5
+
+
+@pytest.mark.asyncio
+async def test_cursor_missing_from_short_feed_is_invalid(parser):
+    with pytest.raises(InvalidCursorError):
+        await _harvest(parser, FakePosts(3), "GONE")
+
+
+@pytest.mark.asyncio
+async def test_abandoned_harvest_stream_closes_from_another_task():
+    users = []
+
+    class FakeInstagramParser:
+        async def iter_profile_recipes(self, name, max_posts, cursor, refresh):
+            for _ in range(3):
+                users.append(scheduler_module._current_user.get())
+                yield HarvestedRecipe(shortcode=None, cursor="P1")
+
+    service = ParsingService.__new__(ParsingService)
+    service.instagram_parser = FakeInstagramParser()
+
+    events = service.iter_instagram_harvest("profile", "cook", 3, user_id="user-1")
+    assert (await events.__anext__())["event"] == "end"
+
+    # A dropped client finalizes the stream in a different task and context
+    await asyncio.create_task(events.aclose())
+
+    assert users == ["user-1"]
+    assert scheduler_module._current_user.get() is None
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Base
+from app.models.media_blob import MediaAlias, MediaBlob
+from app.models.media_item import MediaItem
+from app.services.parsers import instagram_parser
+from app.services.parsers.instagram_parser import InstagramParser
+from app.utils import storage_utils as storage_module
+from app.utils.storage_utils import StorageUtils
+
+IMAGE_URL = "https://cdn.example.com/post.jpg"
+CONTENT_HASH = "ab" * 32
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path}/media.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[MediaItem.__table__, MediaBlob.__table__, MediaAlias.__table__])
+    store = StorageUtils(base_dir=str(tmp_path / "media"), session_factory=sessionmaker(bind=engine))
+
+    async def process_image_from_url(url, create_thumbnails=True):
+        return {
+            "success": True,
+            "content_hash": CONTENT_HASH,
+            "optimized_data": b"original",
+            "thumbnails": {size: {"data": size.encode(), "size": (10, 10)} for size in ("small", "medium", "large")},
+            "metadata": {},
+        }
+
+    monkeypatch.setattr(storage_module.media_utils, "process_image_from_url", process_image_from_url)
+    monkeypatch.setattr(instagram_parser, "storage_utils", store)
+    yield store
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stored_media_urls_come_from_the_stored_metadata(store):
+    media_data = {"images": [{"url": IMAGE_URL}]}
+
+    await InstagramParser(db=None)._process_and_store_media(media_data)
+
+    stored = media_data["stored_media"]
+    assert stored["media_id"] == CONTENT_HASH
+    assert stored["original"] == store.get_original_url(CONTENT_HASH)
+    assert stored["thumbnails"]["small"] == store.get_thumbnail_url(CONTENT_HASH, "small")
+
+
+@pytest.mark.asyncio
+async def test_collected_media_is_dropped_from_cached_posts(store):
+    parser = InstagramParser(db=None)
+    media_data = {"images": [{"url": IMAGE_URL}]}
+    await parser._process_and_store_media(media_data)
+
+    assert not await parser._drop_collected_media(media_data)
+    assert "stored_media" in media_data
+
+    assert store.collect_garbage(grace_seconds=-60) == 1
+
+    assert not store.touch_media(CONTENT_HASH)
+    assert await parser._drop_collected_media(media_data)
+    assert "stored_media" not in media_data
+
+
+@pytest.mark.asyncio
+async def test_background_gc_collects_until_stopped(store, monkeypatch):
+    runs = []
+    monkeypatch.setattr(store, "collect_garbage", lambda: runs.append(1) or 0)
+    store.gc_interval_seconds = 0.01
+
+    store.start_gc()
+    await asyncio.sleep(0.1)
+    await store.stop_gc()
+    collected = len(runs)
+    await asyncio.sleep(0.05)
+
+    assert collected > 1
+    assert len(runs) == collected
@@ -0,0 +1,174 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.parsing import parsing as parsing_api
+from app.core.config import settings
+from app.models import Base, User, ParseJob, ParseJobEvent
+from app.models.user import SubscriptionTier
+from app.services.parse_job_service import (
+    ParseJobService, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED,
+)
+from app.workers import parse_worker
+from app.workers.parse_worker import ParseWorker
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    """Fresh SQLite database shared by the test, the worker threads and the SSE endpoint"""
+    engine = create_engine(f"sqlite:///{tmp_path}/jobs.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine, tables=[User.__table__, ParseJob.__table__, ParseJobEvent.__table__])
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(parse_worker, "SessionLocal", factory)
+    monkeypatch.setattr(parsing_api, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def _user(db, name: str, tier: SubscriptionTier = SubscriptionTier.FREE) -> User:
+    user = User(clerk_user_id=f"clerk-{name}", email=f"{name}@example.com", subscription_tier=tier)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def _submit(db, user: User, url: str, age_seconds: int = 0) -> ParseJob:
+    job = ParseJobService.submit(user, "url", {"url": url}, db)
+    # SQLite timestamps have one-second resolution; make FIFO order explicit
+    job.created_at = datetime.now(timezone.utc) - timedelta(seconds=age_seconds)
+    db.commit()
+    return job
+
+
+def test_premium_jobs_are_claimed_first(db):
+    free, premium = _user(db, "free"), _user(db, "premium", SubscriptionTier.PREMIUM)
+    oldest_free = _submit(db, free, "https://example.com/1", age_seconds=30)
+    newer_free = _submit(db, free, "https://example.com/2", age_seconds=20)
+    premium_job = _submit(db, premium, "https://example.com/3", age_seconds=10)
+
+    assert ParseJobService.queue_position(premium_job, db) == 0
+    assert ParseJobService.queue_position(newer_free, db) == 2
+
+    claimed = [ParseJobService.claim_next("worker", db).id for _ in range(3)]
+    assert claimed == [premium_job.id, oldest_free.id, newer_free.id]
+    assert ParseJobService.claim_next("worker", db) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_are_exclusive(db, session_factory):
+    user = _user(db, "cook")
+    for index in range(5):
+        _submit(db, user, f"https://example.com/{index}", age_seconds=index)
+
+    def claim(worker_id):
+        session = session_factory()
+        try:
+            job = ParseJobService.claim_next(worker_id, session)
+            return job.id if job else None
+        finally:
+            session.close()
+
+    claimed = await asyncio.gather(*(asyncio.to_thread(claim, f"worker-{index}") for index in range(8)))
+    claimed_ids = [job_id for job_id in claimed if job_id]
+
+    assert len(claimed_ids) == 5
+    assert len(set(claimed_ids)) == 5
+    assert db.query(ParseJob).filter(ParseJob.status == JOB_RUNNING, ParseJob.attempts == 1).count() == 5
+
+
+def test_stale_jobs_are_requeued_then_failed(db):
+    user = _user(db, "cook")
+    job = _submit(db, user, "https://example.com/recipe")
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.PARSE_JOB_STALE_SECONDS + 60)
+
+    for attempt in range(1, settings.PARSE_JOB_MAX_ATTEMPTS + 1):
+        claimed = ParseJobService.claim_next("crashed-worker", db)
+        assert claimed.id == job.id and claimed.attempts == attempt
+        claimed.heartbeat_at = stale
+        db.commit()
+
+        assert ParseJobService.requeue_stale(db) == 1
+        db.refresh(job)
+        if attempt < settings.PARSE_JOB_MAX_ATTEMPTS:
+            assert job.status == JOB_QUEUED and job.worker_id is None
+
+    assert job.status == JOB_FAILED
+    assert job.error["error_type"] == "worker_lost"
+    # The abandoned worker's late outcome is dropped
+    assert not ParseJobService.finish(job.id, "crashed-worker", JOB_SUCCEEDED, db, result={})
+
+
+@pytest.mark.asyncio
+async def test_cancel_during_run_stops_the_job_at_the_next_heartbeat(db, session_factory, monkeypatch):
+    user = _user(db, "cook")
+    job = _submit(db, user, "https://example.com/recipe")
+    started = asyncio.Event()
+
+    async def slow_parse(self, job, emitter):
+        started.set()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(ParseWorker, "_execute", slow_parse)
+    worker = ParseWorker(heartbeat_interval=0.05)
+    claimed = worker._claim("worker-0")
+    run = asyncio.create_task(worker._run_job(claimed, "worker-0"))
+
+    await started.wait()
+    ParseJobService.request_cancel(db.get(ParseJob, job.id), db)
+    await asyncio.wait_for(run, timeout=5)
+
+    db.expire_all()
+    finished = db.get(ParseJob, job.id)
+    assert finished.status == JOB_CANCELLED
+    assert finished.error["error_type"] == "cancelled"
+    assert worker.stats[JOB_CANCELLED] == 1
+    assert ParseJobService.events_since(job.id, 0, db)[-1].payload["message"] == "Parsing cancelled"
+
+
+async def _read_stream(job_id: str):
+    response = parsing_api._parse_job_event_response(job_id)
+    return [json.loads(chunk[len("data: "):]) async for chunk in response.body_iterator]
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_events_and_ends_with_the_result(db, monkeypatch):
+    monkeypatch.setattr(settings, "PARSE_JOB_EVENT_POLL_INTERVAL", 0.01)
+    user = _user(db, "cook")
+    job = _submit(db, user, "https://example.com/recipe")
+    ParseJobService.claim_next("worker", db)
+    ParseJobService.append_events(job.id, [{"phase": "initializing"}, {"phase": "trying_scrapers"}], db)
+
+    stream = asyncio.create_task(_read_stream(job.id))
+    await asyncio.sleep(0.05)
+    ParseJobService.append_events(job.id, [{"phase": "completed"}], db)
+    ParseJobService.finish(job.id, "worker", JOB_SUCCEEDED, db, result={"title": "Banana Bread"})
+
+    messages = await asyncio.wait_for(stream, timeout=5)
+    assert [message.get("phase") for message in messages[:-1]] == ["initializing", "trying_scrapers", "completed"]
+    assert messages[-1] == {"event": "result", "data": {"title": "Banana Bread"}}
+
+
+@pytest.mark.asyncio
+async def test_stream_of_a_failed_job_ends_with_its_error(db):
+    user = _user(db, "cook")
+    job = _submit(db, user, "https://example.com/recipe")
+    ParseJobService.claim_next("worker", db)
+    ParseJobService.append_events(job.id, [{"phase": "failed"}], db)
+    ParseJobService.finish(job.id, "worker", JOB_FAILED, db, error={"error_type": "parsing_failed", "message": "boom"})
+
+    messages = await _read_stream(job.id)
+    assert messages == [
+        {"phase": "failed"},
+        {"event": "error", "data": {"error_type": "parsing_failed", "message": "boom"}},
+    ]
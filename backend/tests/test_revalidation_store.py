@@ -0,0 +1,54 @@
+import pytest
+
+from app.services.parsers.base_parser import ParsedRecipe
+from app.services.parsers.revalidation_store import RevalidationStore
+
+URL = "https://www.example.com/recipe?utm_source=feed"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RevalidationStore(str(tmp_path / "validators.db"))
+
+
+def _recipe() -> ParsedRecipe:
+    return ParsedRecipe(
+        title="Banana Bread", source_type="url", source_url=URL,
+        ingredients="<ul><li>3 bananas</li></ul>", instructions="<ol><li>Bake.</li></ol>",
+    )
+
+
+@pytest.mark.asyncio
+async def test_lookup_reads_only_validators(store):
+    await store.store_async(URL, '"v1"', None, "<html>page</html>", _recipe())
+
+    stored = await store.lookup_async("https://example.com/recipe")
+    assert (stored.etag, stored.last_modified) == ('"v1"', None)
+    assert stored.body is None and stored.recipe is None
+    assert store.conditional_headers(stored) == {"If-None-Match": '"v1"'}
+
+
+@pytest.mark.asyncio
+async def test_not_modified_loads_body_and_recipe(store):
+    await store.store_async(URL, None, "Mon, 01 Jan 2024 00:00:00 GMT", "<html>page</html>", _recipe())
+    stored = await store.lookup_async(URL)
+
+    assert await store.load_not_modified_async(stored)
+    assert stored.body == "<html>page</html>"
+    assert stored.recipe.title == "Banana Bread"
+    assert store.stats["not_modified"] == 1
+
+
+@pytest.mark.asyncio
+async def test_not_modified_after_eviction_reports_missing(store):
+    await store.store_async(URL, '"v1"', None, "<html>page</html>")
+    stored = await store.lookup_async(URL)
+    store.delete(URL)
+
+    assert not await store.load_not_modified_async(stored)
+
+
+@pytest.mark.asyncio
+async def test_pages_without_validators_are_not_stored(store):
+    await store.store_async(URL, None, None, "<html>page</html>")
+    assert await store.lookup_async(URL) is None
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.services.parsers.progress_events import ProgressEventEmitter, ProgressPhase, ProgressStatus
+from app.services.parsers.single_flight import SingleFlight
+
+
+def _emitter(name: str) -> ProgressEventEmitter:
+    return ProgressEventEmitter("https://example.com/recipe", name)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def parse(emitter):
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "recipe"
+
+    waiters = [asyncio.create_task(flights.run("key", parse)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*waiters) == ["recipe"] * 5
+    assert calls == 1
+    assert flights.get_stats() == {"started": 1, "joined": 4, "in_flight": 0, "waiters": 0}
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_the_shared_task_running():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def parse(emitter):
+        await release.wait()
+        return "recipe"
+
+    first = asyncio.create_task(flights.run("key", parse))
+    second = asyncio.create_task(flights.run("key", parse))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.set()
+    assert await second == "recipe"
+    assert flights.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_waiter():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def parse(emitter):
+        await release.wait()
+        raise ValueError("page not found")
+
+    waiters = [asyncio.create_task(flights.run("key", parse)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, ValueError) and str(result) == "page not found" for result in results)
+
+    # A failed flight is not remembered: the next call starts a fresh one
+    async def retry(emitter):
+        return "recipe"
+
+    assert await flights.run("key", retry) == "recipe"
+    assert flights.stats["started"] == 2
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_receives_replayed_progress():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def parse(emitter):
+        emitter.emit_event(ProgressPhase.INITIALIZING, ProgressStatus.IN_PROGRESS, "Starting")
+        emitter.emit_event(ProgressPhase.TRYING_SCRAPERS, ProgressStatus.IN_PROGRESS, "Trying scrapers")
+        await release.wait()
+        emitter.emit_event(ProgressPhase.COMPLETED, ProgressStatus.SUCCESS, "Done")
+        return "recipe"
+
+    early = _emitter("early")
+    first = asyncio.create_task(flights.run("key", parse, early))
+    await asyncio.sleep(0)
+
+    late = _emitter("late")
+    second = asyncio.create_task(flights.run("key", parse, late))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, second)
+
+    expected = ["Starting", "Trying scrapers", "Done"]
+    assert [event.message for event in early.events] == expected
+    assert [event.message for event in late.events] == expected
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from app.services.parsers.request_utils import RateLimiter
+from app.services.parsers.state_store import DatabaseStateStore, InMemoryStateStore
+
+
+@pytest.fixture
+def database_store(tmp_path):
+    return DatabaseStateStore(f"sqlite:///{tmp_path}/state.db")
+
+
+def _increment(state):
+    state["count"] = state.get("count", 0) + 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_updates_are_not_lost(database_store):
+    await asyncio.gather(*(database_store.update_async("test", "key", _increment) for _ in range(20)))
+
+    assert (await database_store.get_async("test", "key")) == {"count": 20}
+    assert database_store.stats["fallbacks"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_shares_backoff_through_the_store(database_store):
+    first = RateLimiter(default_delay=1.0, store=database_store)
+    second = RateLimiter(default_delay=1.0, store=database_store)
+
+    await first.record_failure("https://example.com/a", is_rate_limited=True)
+
+    assert second.get_domain_stats()["example.com"]["failures"] == 1
+    # Another limiter (or worker) picks the backoff up from the store
+    assert await second.refresh_backoff("https://example.com/b") == pytest.approx(2.5)
+
+    await second.record_success("https://example.com/c")
+    assert second.get_domain_stats()["example.com"]["failures"] == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_store_runs_inline():
+    store = InMemoryStateStore()
+    assert not store.blocking
+    assert (await store.update_async("test", "key", _increment)) == {"count": 1}
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.parsers.strategy_table import (
+    StrategyTable, MethodStats, METHOD_SCRAPERS, METHOD_JSON_LD, STAGE_SCRAPERS, STAGE_MANUAL,
+)
+
+HALF_LIFE = 3600.0
+
+
+def _table() -> StrategyTable:
+    return StrategyTable(persist=False, min_samples=5, min_success_rate=0.2, exploration_rate=0.0, decay_half_life=HALF_LIFE)
+
+
+def test_recent_counters_halve_every_half_life():
+    stats = MethodStats()
+    stats.record(True, 100.0, at=0.0, half_life=HALF_LIFE)
+    stats.record(False, 300.0, at=0.0, half_life=HALF_LIFE)
+
+    assert stats.weight(HALF_LIFE, HALF_LIFE) == pytest.approx(1.0)
+    assert stats.weight(2 * HALF_LIFE, HALF_LIFE) == pytest.approx(0.5)
+    assert stats.success_rate == pytest.approx(0.5)
+    assert stats.avg_latency_ms == pytest.approx(200.0)
+    assert (stats.attempts, stats.successes) == (2, 1)
+
+
+def test_merge_aligns_counters_in_time():
+    older = MethodStats()
+    older.record(True, 0.0, at=0.0, half_life=HALF_LIFE)
+    newer = MethodStats()
+    newer.record(False, 0.0, at=HALF_LIFE, half_life=HALF_LIFE)
+
+    older.merge(newer, HALF_LIFE)
+
+    assert older.recent_attempts == pytest.approx(1.5)
+    assert older.recent_successes == pytest.approx(0.5)
+    assert older.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_scrapers_are_skipped():
+    table = _table()
+    for _ in range(6):
+        table.record("example.com", METHOD_SCRAPERS, False, 500.0)
+        table.record("example.com", METHOD_JSON_LD, True, 50.0)
+
+    plan = await table.plan("www.example.com")
+    assert plan.skipped == [STAGE_SCRAPERS]
+    assert plan.http_stages == [STAGE_MANUAL]
+
+
+@pytest.mark.asyncio
+async def test_old_failures_fade_so_the_domain_is_relearned():
+    table = _table()
+    long_ago = time.time() - 10 * HALF_LIFE
+    stats = table._domain_stats("example.com").setdefault(METHOD_SCRAPERS, MethodStats())
+    for _ in range(50):
+        stats.record(False, 500.0, at=long_ago, half_life=HALF_LIFE)
+
+    # Fifty failures ten half-lives ago weigh less than one recent attempt
+    plan = await table.plan("example.com")
+    assert plan.is_default
+
+    for _ in range(5):
+        table.record("example.com", METHOD_SCRAPERS, True, 100.0)
+    assert table._domain_stats("example.com")[METHOD_SCRAPERS].success_rate > 0.9
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_plans_share_one_load_and_failures_retry():
+    table = StrategyTable(persist=True, min_samples=5, min_success_rate=0.2, exploration_rate=0.0, decay_half_life=HALF_LIFE)
+    release = threading.Event()
+    calls = []
+
+    def load_domain(domain):
+        calls.append(domain)
+        if len(calls) == 1:
+            return None
+        release.wait(5)
+        stats = MethodStats()
+        for _ in range(6):
+            stats.record(False, 500.0, at=time.time(), half_life=HALF_LIFE)
+        return {METHOD_SCRAPERS: stats}
+
+    table._load_domain = load_domain
+
+    # A failed load leaves the domain unmarked instead of planning on empty history forever
+    await table.plan("example.com")
+    assert "example.com" not in table._loaded_domains
+
+    plans = asyncio.gather(*(table.plan("example.com") for _ in range(3)))
+    await asyncio.sleep(0.05)
+    release.set()
+
+    assert all(plan.skipped == [STAGE_SCRAPERS] for plan in await plans)
+    assert calls == ["example.com", "example.com"]
+    assert "example.com" in table._loaded_domains
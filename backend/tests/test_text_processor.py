@@ -0,0 +1,55 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from app.services.parsers.text_processor import TextProcessor
+
+CAPTIONS_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "corpus" / "captions"
+
+
+def _extract(name: str):
+    return TextProcessor().extract_recipe_from_text((CAPTIONS_DIR / f"{name}.txt").read_text(encoding="utf-8"))
+
+
+def _items(html: str):
+    return re.findall(r"<li>(.*?)</li>", html)
+
+
+@pytest.mark.parametrize("name, first_step, last_step", [
+    ("cookies_bullets", "Preheat the oven to 350°F", "Let cool on the sheet"),
+    ("curry_paragraph_steps", "Step 1 Heat the oil", "Serve with rice or naan."),
+    ("pasta_numbered_steps", "Cook the pasta in salted boiling water", "Garnish with parsley"),
+    ("tacos_reel_long", "Preheat the oven to 425°F", "Garnish with cilantro"),
+])
+def test_steps_keep_caption_order_without_the_intro(name, first_step, last_step):
+    steps = _items(_extract(name).instructions)
+
+    assert steps[0].startswith(first_step)
+    assert steps[-1].startswith(last_step)
+
+
+@pytest.mark.parametrize("name, line", [
+    ("pasta_numbered_steps", "- 4 cloves garlic, minced"),
+    ("tacos_reel_long", "1 lb cod fillets, cut into strips"),
+    ("chicken_salad_categories", "2 cups cooked chicken breast, shredded"),
+])
+def test_prepared_ingredients_are_not_steps(name, line):
+    recipe = _extract(name)
+
+    assert line in _items(recipe.ingredients)
+    assert line not in _items(recipe.instructions)
+
+
+def test_reserve_is_not_a_serving_count():
+    recipe = _extract("pasta_numbered_steps")
+
+    assert recipe.servings == "4"
+    assert _items(recipe.instructions)[0].endswith("Reserve 1/2 cup pasta water.")
+
+
+def test_caption_without_recipe_has_no_steps():
+    recipe = _extract("not_a_recipe")
+
+    assert recipe.instructions == ""
+    assert recipe.confidence < 0.3
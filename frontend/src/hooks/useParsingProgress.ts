@@ -123,6 +123,7 @@ export const getPhaseDisplayName = (phase: string): string => {
   const phaseNames: Record<string, string> = {
     'initializing': 'Initializing',
     'rate_limiting': 'Rate Limiting',
+    'fetching_page': 'Fetching Page',
     'trying_scrapers': 'Trying Recipe Scrapers',
     'scrapers_failed': 'Recipe Scrapers Failed',
     'trying_manual': 'Manual Parsing',